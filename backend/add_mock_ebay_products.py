@@ -2,8 +2,8 @@
 Add mock eBay products to database for testing
 This allows you to see how the system works with eBay products without needing real product IDs
 """
-from db import execute_query
-import random
+from db import execute_query, get_db_connection
+from ingest_pipeline import Pipeline, ApiCacheSink
 
 # Mock eBay products with realistic data
 MOCK_EBAY_PRODUCTS = [
@@ -195,56 +195,28 @@ MOCK_EBAY_PRODUCTS = [
 ]
 
 def add_mock_products():
-    """Add mock eBay products to database"""
-    added_count = 0
-    skipped_count = 0
-    
+    """Add mock eBay products to database (existing products are refreshed, never duplicated)"""
     print("🔄 Adding mock eBay products to database...")
     print("="*60)
     
-    for product in MOCK_EBAY_PRODUCTS:
-        try:
-            # Check if product already exists
-            existing = execute_query(
-                "SELECT id FROM api_cache WHERE product_id = %s",
-                (product['product_id'],),
-                fetch=True
-            )
-            
-            if existing:
-                print(f"⏭️  Skipped: {product['title'][:50]}... (already exists)")
-                skipped_count += 1
-                continue
-            
-            # Insert product
-            execute_query(
-                """INSERT INTO api_cache 
-                   (product_id, title, price, image_url, product_url, rating, description, category, gender, source) 
-                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-                (
-                    product['product_id'],
-                    product['title'],
-                    product['price'],
-                    product['image_url'],
-                    product['product_url'],
-                    product['rating'],
-                    product['description'],
-                    product['category'],
-                    product['gender'],
-                    product['source']
-                )
-            )
-            
-            print(f"✅ Added: {product['title'][:50]}...")
-            added_count += 1
-            
-        except Exception as e:
-            print(f"❌ Error adding {product['title'][:30]}...: {e}")
+    connection = get_db_connection()
+    if not connection:
+        return
+    
+    try:
+        # One batched upsert instead of a SELECT + INSERT per product
+        sink = ApiCacheSink(connection, source='ebay')
+        Pipeline(MOCK_EBAY_PRODUCTS, [], sink).run()
+    except Exception as e:
+        print(f"❌ Error adding mock products: {e}")
+        return
+    finally:
+        connection.close()
     
     print("="*60)
-    print(f"✅ Added {added_count} new mock eBay products")
-    print(f"⏭️  Skipped {skipped_count} existing products")
-    print(f"📦 Total: {added_count + skipped_count} products processed")
+    print(f"✅ Added {sink.inserted} new mock eBay products")
+    print(f"🔄 Refreshed {sink.updated} existing products")
+    print(f"📦 Total: {len(MOCK_EBAY_PRODUCTS)} products processed")
     
     # Show total count
     result = execute_query("SELECT COUNT(*) as count FROM api_cache", fetch=True)
@@ -3,12 +3,17 @@ import os
 try:
     import numpy as np
     import cv2
-    import tensorflow as tf
     DEPENDENCIES_AVAILABLE = True
 except ImportError:
     DEPENDENCIES_AVAILABLE = False
     print("Warning: AI dependencies not installed. Running in demo mode.")
-from flask import Blueprint, request, jsonify
+try:
+    # Only needed for the Keras runtime, training and export - ONNX/TFLite serve without it
+    import tensorflow as tf
+    TF_AVAILABLE = True
+except ImportError:
+    TF_AVAILABLE = False
+from flask import Blueprint, request, jsonify, url_for
 import base64
 import io
 try:
@@ -20,6 +25,12 @@ import json
 from datetime import datetime
 import sqlite3
 import logging
+import queue
+from config import Config
+from tryon_tensor_cache import TensorCache
+from tryon_inference_worker import TryOnInferenceWorker
+from tryon_runtime import load_runtime
+from tryon_uploads import UploadError, is_multipart, open_upload, form_json, response_format, image_response
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -32,8 +43,11 @@ class AITryOnBackend:
     def __init__(self):
         self.model = None
         self.model_loaded = False
+        self.runtime = None
         self.training_data = []
         self.db_path = 'ai_tryon_data.db'
+        self.tensor_cache = TensorCache(Config.TRYON_CACHE_DIR, Config.TRYON_CACHE_MEMORY_ITEMS)
+        self.inference_worker = None
         self.init_database()
         
     def init_database(self):
@@ -84,22 +98,43 @@ class AITryOnBackend:
         conn.close()
         logger.info("Database initialized successfully")
     
+    def load_keras_model(self):
+        """Load the Keras model from TRYON_MODEL_PATH, or create a new one"""
+        if not TF_AVAILABLE:
+            raise Exception("TensorFlow is not installed")
+        
+        model_path = Config.TRYON_MODEL_PATH
+        if os.path.exists(model_path):
+            logger.info(f"Loaded existing AI Try-On model from {model_path}")
+            return tf.keras.models.load_model(model_path)
+        
+        # Create new model architecture
+        logger.info("Created new AI Try-On model")
+        return self.create_model_architecture()
+    
     def load_model(self):
-        """Load or create the AI model"""
+        """
+        Load or create the AI model (only once per process).
+        TRYON_RUNTIME=onnx/tflite serves the exported model instead of Keras,
+        falling back to Keras when the export is missing.
+        """
         if not DEPENDENCIES_AVAILABLE:
             logger.info("AI dependencies not available. Running in demo mode.")
             self.model_loaded = False
             return False
+        
+        if self.model is not None:
+            return True
             
         try:
-            # Try to load existing model
-            if os.path.exists('models/ai_tryon_model.h5'):
-                self.model = tf.keras.models.load_model('models/ai_tryon_model.h5')
-                logger.info("Loaded existing AI Try-On model")
+            runtime = load_runtime(
+                Config.TRYON_RUNTIME, Config.TRYON_MODEL_PATH,
+                threads=Config.TRYON_RUNTIME_THREADS, quantized=Config.TRYON_QUANTIZED
+            )
+            if runtime is not None:
+                self.model, self.runtime = runtime, runtime.name
             else:
-                # Create new model architecture
-                self.model = self.create_model_architecture()
-                logger.info("Created new AI Try-On model")
+                self.model, self.runtime = self.load_keras_model(), 'keras'
             
             self.model_loaded = True
             return True
@@ -108,9 +143,33 @@ class AITryOnBackend:
             logger.error(f"Failed to load model: {str(e)}")
             return False
     
+    def _load_model_for_worker(self):
+        return self.model if self.load_model() else None
+    
+    def start_inference_worker(self):
+        """Load and warm up the model on the inference worker thread at startup"""
+        if not DEPENDENCIES_AVAILABLE or not Config.TRYON_WORKER_ENABLED:
+            logger.info("Try-on inference worker disabled - requests run in demo mode")
+            return None
+        
+        if self.inference_worker is None:
+            self.inference_worker = TryOnInferenceWorker(
+                model_loader=self._load_model_for_worker,
+                max_queue_size=Config.TRYON_QUEUE_SIZE,
+                max_batch_size=Config.TRYON_MAX_BATCH_SIZE,
+                max_wait_ms=Config.TRYON_BATCH_WAIT_MS,
+                job_ttl_seconds=Config.TRYON_JOB_TTL_SECONDS,
+                on_complete=self.finalize_job
+            )
+        self.inference_worker.start()
+        return self.inference_worker
+    
+    def worker_ready(self):
+        return self.inference_worker is not None and self.inference_worker.ready.is_set()
+    
     def create_model_architecture(self):
         """Create advanced neural network for virtual try-on"""
-        if not DEPENDENCIES_AVAILABLE:
+        if not TF_AVAILABLE:
             return None
             
         # Input layers
@@ -168,36 +227,110 @@ class AITryOnBackend:
         
         return model
     
+    def decode_image_data(self, image_data):
+        """Decode a base64 (optionally data-URL) image string to raw bytes"""
+        if image_data.startswith('data:image'):
+            image_data = image_data.split(',')[1]
+        return base64.b64decode(image_data)
+    
+    def preprocess_bytes(self, image_bytes, target_size=(512, 512)):
+        """Decode, convert and resize raw image bytes into a normalized array"""
+        return self.preprocess_stream(io.BytesIO(image_bytes), target_size)
+    
+    def preprocess_stream(self, stream, target_size=(512, 512), draft=False):
+        """
+        Decode an image straight from a file-like object (e.g. an uploaded part).
+        draft=True lets a large JPEG decode at reduced scale, which changes the
+        pixels slightly - only the uploaded user photo uses it; garments stay
+        exact so their cached tensors match the base64 and precompute paths.
+        """
+        image = Image.open(stream)
+        
+        if draft:
+            image.draft('RGB', target_size)
+        
+        # Convert to RGB if necessary
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        
+        # Resize image
+        image = image.resize(target_size, Image.Resampling.LANCZOS)
+        
+        # Convert to numpy array and normalize
+        return np.asarray(image, dtype=np.float32) / 255.0
+    
     def preprocess_image(self, image_data, target_size=(512, 512)):
         """Preprocess image for AI model"""
         try:
             if not PIL_AVAILABLE or not DEPENDENCIES_AVAILABLE:
                 # Return dummy data for demo mode
                 return [[0.5] * 512] * 512  # Dummy image array
-                
-            # Decode base64 image
-            if image_data.startswith('data:image'):
-                image_data = image_data.split(',')[1]
             
-            image_bytes = base64.b64decode(image_data)
-            image = Image.open(io.BytesIO(image_bytes))
+            return self.preprocess_bytes(self.decode_image_data(image_data), target_size)
+            
+        except Exception as e:
+            logger.error(f"Image preprocessing failed: {str(e)}")
+            raise
+    
+    def preprocess_garment(self, image_data, target_size=(512, 512), product_id=None):
+        """
+        Preprocess a catalog garment image through the tensor cache.
+        Precomputed product tensors are used directly; otherwise the image is
+        keyed by content hash so it is only decoded once across requests.
+        """
+        try:
+            if not PIL_AVAILABLE or not DEPENDENCIES_AVAILABLE:
+                return self.preprocess_image(image_data, target_size)
+            
+            cached = self._cached_product_tensor(product_id, target_size)
+            if cached is not None:
+                return cached
             
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
+            image_bytes = self.decode_image_data(image_data)
+            key = TensorCache.content_key(image_bytes, target_size)
+            return self.tensor_cache.get_or_compute(
+                key, lambda: self.preprocess_bytes(image_bytes, target_size)
+            )
             
-            # Resize image
-            image = image.resize(target_size, Image.Resampling.LANCZOS)
+        except Exception as e:
+            logger.error(f"Garment preprocessing failed: {str(e)}")
+            raise
+    
+    def preprocess_garment_stream(self, stream, target_size=(512, 512), product_id=None):
+        """Uploaded-garment variant of preprocess_garment, hashing the stream in chunks"""
+        try:
+            cached = self._cached_product_tensor(product_id, target_size)
+            if cached is not None:
+                return cached
             
-            # Convert to numpy array and normalize
-            image_array = np.array(image) / 255.0
+            if stream is None:
+                raise UploadError("garment_image is required unless garment_product_id is precomputed")
             
-            return image_array
+            key = TensorCache.stream_key(stream, target_size)
+            return self.tensor_cache.get_or_compute(
+                key, lambda: self.preprocess_stream(stream, target_size)
+            )
             
         except Exception as e:
-            logger.error(f"Image preprocessing failed: {str(e)}")
+            logger.error(f"Garment preprocessing failed: {str(e)}")
             raise
     
+    def has_product_tensor(self, product_id, target_size=(512, 512)):
+        """Whether a precomputed tensor exists for this catalog product"""
+        return self._cached_product_tensor(product_id, target_size) is not None
+    
+    def _cached_product_tensor(self, product_id, target_size):
+        if product_id is None or product_id == '':
+            return None
+        return self.tensor_cache.get(TensorCache.alias_key(product_id, target_size))
+    
+    def encode_result(self, image_array, quality=90):
+        """Encode a model output array as JPEG bytes"""
+        image = Image.fromarray((image_array * 255).astype(np.uint8))
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=quality)
+        return buffer.getvalue()
+    
     def postprocess_image(self, image_array):
         """Convert model output back to base64 image"""
         try:
@@ -205,16 +338,8 @@ class AITryOnBackend:
                 # Return placeholder image for demo mode
                 return "data:image/jpeg;base64,/9j/4AAQSkZJRgABAQAAAQABAAD/2wBDAAYEBQYFBAYGBQYHBwYIChAKCgkJChQODwwQFxQYGBcUFhYaHSUfGhsjHBYWICwgIyYnKSopGR8tMC0oMCUoKSj/2wBDAQcHBwoIChMKChMoGhYaKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCgoKCj/wAARCAABAAEDASIAAhEBAxEB/8QAFQABAQAAAAAAAAAAAAAAAAAAAAv/xAAUEAEAAAAAAAAAAAAAAAAAAAAA/8QAFQEBAQAAAAAAAAAAAAAAAAAAAAX/xAAUEQEAAAAAAAAAAAAAAAAAAAAA/9oADAMBAAIRAxEAPwCdABmX/9k="
                 
-            # Denormalize and convert to uint8
-            image_array = (image_array * 255).astype(np.uint8)
-            
-            # Convert to PIL Image
-            image = Image.fromarray(image_array)
-            
             # Convert to base64
-            buffer = io.BytesIO()
-            image.save(buffer, format='JPEG', quality=90)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode()
+            image_base64 = base64.b64encode(self.encode_result(image_array)).decode()
             
             return f"data:image/jpeg;base64,{image_base64}"
             
@@ -342,86 +467,166 @@ class AITryOnBackend:
         except Exception as e:
             logger.error(f"Failed to save session: {str(e)}")
     
-    def process_virtual_tryon(self, request_data):
-        """Main processing function for virtual try-on"""
+    def _demo_result(self, request_data, start_time):
+        """Demo mode - return user image with overlay message"""
+        logger.info("Running in demo mode - AI model not available")
+        garment_type = request_data.get('garment_type', 'top')
+        user_gender = request_data.get('user_gender', 'female')
+        
+        # Generate fit analysis and recommendations
+        fit_analysis = self.analyze_fit(garment_type, user_gender, request_data.get('body_measurements', {}))
+        recommendations = self.generate_recommendations(garment_type, user_gender, fit_analysis)
+        
+        return {
+            'success': True,
+            'processed_image': request_data.get('user_image'),  # Return original image in demo mode
+            'confidence': 0.85,  # Demo confidence
+            'processing_time': (datetime.now() - start_time).total_seconds() * 1000,
+            'recommendations': recommendations + ['Demo mode: Install AI dependencies for full functionality'],
+            'fit_analysis': fit_analysis,
+            'demo_mode': True
+        }
+    
+    def submit_virtual_tryon(self, request_data, uploads=None):
+        """
+        Preprocess the images and queue them on the inference worker.
+        `uploads` holds file streams for multipart requests; otherwise the
+        images are base64 strings in request_data.
+        Returns the queued job, or a finished demo-mode result when the model
+        is not available. Raises queue.Full when the worker is saturated.
+        """
         start_time = datetime.now()
         
-        try:
-            # Extract request data
-            user_image = request_data['user_image']
-            garment_image = request_data['garment_image']
-            garment_type = request_data.get('garment_type', 'top')
-            user_gender = request_data.get('user_gender', 'female')
-            body_measurements = request_data.get('body_measurements', {})
-            
-            if not self.model_loaded or not DEPENDENCIES_AVAILABLE:
-                # Demo mode - return user image with overlay message
-                logger.info("Running in demo mode - AI model not available")
+        if not DEPENDENCIES_AVAILABLE or not self.worker_ready():
+            return self._demo_result(request_data, start_time)
+        
+        # Preprocess images - only the user photo is always decoded,
+        # garments come from the tensor cache when available
+        product_id = request_data.get('garment_product_id')
+        if uploads:
+            user_array = self.preprocess_stream(uploads['user_image'], draft=True)
+            garment_array = self.preprocess_garment_stream(uploads.get('garment_image'), product_id=product_id)
+        else:
+            user_array = self.preprocess_image(request_data['user_image'])
+            garment_array = self.preprocess_garment(request_data['garment_image'], product_id=product_id)
+        
+        meta = {
+            'start_time': start_time,
+            'user_id': request_data.get('user_id', 'anonymous'),
+            'garment_type': request_data.get('garment_type', 'top'),
+            'user_gender': request_data.get('user_gender', 'female'),
+            'body_measurements': request_data.get('body_measurements', {}),
+            'response_format': request_data.get('response_format', 'json'),
+            'user_array': user_array
+        }
+        return self.inference_worker.submit(user_array, garment_array, meta)
+    
+    def finalize_job(self, job):
+        """
+        Turn a completed inference job into the API response (computed once).
+        The inference worker calls this as each job finishes; pollers get the
+        stored result.
+        """
+        with job.lock:
+            if job.result is not None:
+                return job.result
+            
+            meta = job.meta
+            start_time = meta['start_time']
+            try:
+                if job.error:
+                    raise Exception(job.error)
                 
-                # Calculate processing time
+                result_image = job.prediction
+                
+                # Post-process result - binary/url responses keep raw JPEG bytes instead of base64
+                if meta['response_format'] == 'json':
+                    processed_image = self.postprocess_image(result_image)
+                else:
+                    processed_image = None
+                    job.result_image = self.encode_result(result_image)
+                
+                # Calculate metrics
+                confidence = self.calculate_confidence(result_image, meta['user_array'])
+                fit_analysis = self.analyze_fit(meta['garment_type'], meta['user_gender'], meta['body_measurements'])
+                recommendations = self.generate_recommendations(meta['garment_type'], meta['user_gender'], fit_analysis)
+                
+                # Processing time covers queueing as well as inference
                 processing_time = (datetime.now() - start_time).total_seconds() * 1000
                 
-                # Generate fit analysis and recommendations
-                fit_analysis = self.analyze_fit(garment_type, user_gender, body_measurements)
-                recommendations = self.generate_recommendations(garment_type, user_gender, fit_analysis)
+                # Save session data
+                session_data = {
+                    'user_id': meta['user_id'],
+                    'garment_type': meta['garment_type'],
+                    'user_gender': meta['user_gender'],
+                    'confidence_score': confidence,
+                    'processing_time': processing_time
+                }
+                self.save_session(session_data)
                 
-                return {
+                job.result = {
                     'success': True,
-                    'processed_image': user_image,  # Return original image in demo mode
-                    'confidence': 0.85,  # Demo confidence
+                    'job_id': job.id,
+                    'status': job.status,
+                    'confidence': confidence,
                     'processing_time': processing_time,
-                    'recommendations': recommendations + ['Demo mode: Install AI dependencies for full functionality'],
-                    'fit_analysis': fit_analysis,
-                    'demo_mode': True
+                    'batch_size': job.batch_size,
+                    'recommendations': recommendations,
+                    'fit_analysis': fit_analysis
+                }
+                if processed_image is not None:
+                    job.result['processed_image'] = processed_image
+                
+            except Exception as e:
+                logger.error(f"Virtual try-on processing failed: {str(e)}")
+                job.result = {
+                    'success': False,
+                    'job_id': job.id,
+                    'status': 'failed',
+                    'error': str(e),
+                    'processing_time': (datetime.now() - start_time).total_seconds() * 1000
                 }
             
-            # Full AI mode
-            if not self.load_model():
-                raise Exception("AI model not available")
-            
-            # Preprocess images
-            user_array = self.preprocess_image(user_image)
-            garment_array = self.preprocess_image(garment_image)
-            
-            # Prepare model inputs (only if dependencies available)
-            if DEPENDENCIES_AVAILABLE:
-                user_batch = np.expand_dims(user_array, axis=0)
-                garment_batch = np.expand_dims(garment_array, axis=0)
-            
-            # Run AI inference
-            prediction = self.model.predict([user_batch, garment_batch])
-            result_image = prediction[0]
-            
-            # Post-process result
-            processed_image = self.postprocess_image(result_image)
-            
-            # Calculate metrics
-            confidence = self.calculate_confidence(result_image, user_array)
-            fit_analysis = self.analyze_fit(garment_type, user_gender, body_measurements)
-            recommendations = self.generate_recommendations(garment_type, user_gender, fit_analysis)
-            
-            # Calculate processing time
-            processing_time = (datetime.now() - start_time).total_seconds() * 1000
+            # Release the prediction and inputs once the response is built
+            job.prediction = None
+            meta.pop('user_array', None)
+            return job.result
+    
+    def get_job_result(self, job_id, wait=0):
+        """Poll a job, optionally blocking up to `wait` seconds. Returns None for unknown ids"""
+        job = self.inference_worker.get_job(job_id) if self.inference_worker else None
+        if job is None:
+            return None
+        
+        if not job.wait(wait):
+            return {'success': True, 'job_id': job.id, 'status': job.status}
+        
+        return self.finalize_job(job)
+    
+    def get_job_image(self, job_id):
+        """JPEG bytes of a finished binary/url-format job, or None"""
+        job = self.inference_worker.get_job(job_id) if self.inference_worker else None
+        return job.result_image if job is not None else None
+    
+    def process_virtual_tryon(self, request_data, timeout=None, uploads=None):
+        """Main processing function for virtual try-on - submits a job and waits for it"""
+        start_time = datetime.now()
+        
+        try:
+            job = self.submit_virtual_tryon(request_data, uploads=uploads)
+            if isinstance(job, dict):
+                return job
             
-            # Save session data
-            session_data = {
-                'user_id': request_data.get('user_id', 'anonymous'),
-                'garment_type': garment_type,
-                'user_gender': user_gender,
-                'confidence_score': confidence,
-                'processing_time': processing_time
-            }
-            self.save_session(session_data)
+            wait = Config.TRYON_REQUEST_TIMEOUT_SECONDS if timeout is None else timeout
+            return self.get_job_result(job.id, wait=wait)
             
+        except queue.Full:
             return {
-                'success': True,
-                'processed_image': processed_image,
-                'confidence': confidence,
-                'processing_time': processing_time,
-                'recommendations': recommendations,
-                'fit_analysis': fit_analysis
+                'success': False,
+                'busy': True,
+                'error': 'Try-on service is busy, please retry shortly',
+                'processing_time': (datetime.now() - start_time).total_seconds() * 1000
             }
-            
         except Exception as e:
             logger.error(f"Virtual try-on processing failed: {str(e)}")
             return {
@@ -433,33 +638,151 @@ class AITryOnBackend:
 # Initialize AI Try-On backend
 ai_tryon_backend = AITryOnBackend()
 
+def read_tryon_request():
+    """
+    Parse a try-on request: multipart/form-data uploads (streamed, size-limited)
+    or the original JSON body with base64 images. Returns (request_data, uploads).
+    """
+    if is_multipart(request):
+        product_id = request.form.get('garment_product_id')
+        user_stream, user_type = open_upload(request.files, 'user_image', Config.TRYON_MAX_UPLOAD_BYTES)
+        garment_stream, _ = open_upload(
+            request.files, 'garment_image', Config.TRYON_MAX_UPLOAD_BYTES, required=not product_id
+        )
+        if garment_stream is None and DEPENDENCIES_AVAILABLE and not ai_tryon_backend.has_product_tensor(product_id):
+            raise UploadError('garment_image is required unless garment_product_id is precomputed')
+        request_data = {
+            'user_id': request.form.get('user_id', 'anonymous'),
+            'garment_type': request.form.get('garment_type', 'top'),
+            'user_gender': request.form.get('user_gender', 'female'),
+            'garment_product_id': product_id,
+            'body_measurements': form_json(request.form, 'body_measurements', {}),
+            'response_format': response_format(request),
+            'user_image_type': user_type
+        }
+        return request_data, {'user_image': user_stream, 'garment_image': garment_stream}
+    
+    request_data = request.get_json()
+    
+    if not request_data:
+        raise UploadError('No data provided')
+    
+    # Validate required fields
+    required_fields = ['user_image', 'garment_image']
+    for field in required_fields:
+        if field not in request_data:
+            raise UploadError(f'Missing required field: {field}')
+    
+    request_data['response_format'] = 'json'
+    return request_data, None
+
+def tryon_response(result, request_data, uploads=None):
+    """Render a try-on result as JSON, a JSON body with a result URL, or the raw JPEG"""
+    if result.get('busy'):
+        return jsonify(result), 503
+    if result.get('status') in ('queued', 'running'):
+        # Still running after the request timeout - client can poll the job id
+        return jsonify(result), 202
+    if not result['success']:
+        return jsonify(result), 500
+    
+    fmt = request_data.get('response_format', 'json')
+    if fmt == 'json':
+        return jsonify(result), 200
+    
+    if result.get('demo_mode'):
+        if fmt == 'binary':
+            # Demo mode echoes the uploaded photo back
+            return image_response(uploads['user_image'], request_data['user_image_type'], {'X-Tryon-Demo-Mode': 'true'})
+        return jsonify(result), 200
+    
+    result = dict(result, result_url=url_for('ai_tryon.get_tryon_job_image', job_id=result['job_id']))
+    if fmt == 'url':
+        return jsonify(result), 200
+    
+    return image_response(ai_tryon_backend.get_job_image(result['job_id']), headers={
+        'X-Tryon-Job-Id': result['job_id'],
+        'X-Tryon-Confidence': round(result['confidence'], 4),
+        'X-Tryon-Recommended-Size': result['fit_analysis'].get('size'),
+        'X-Processing-Time': round(result['processing_time'], 2)
+    })
+
 @ai_tryon_bp.route('/process', methods=['POST'])
 def process_tryon():
-    """Process virtual try-on request"""
+    """Process virtual try-on request (JSON base64 body or multipart upload)"""
+    try:
+        try:
+            request_data, uploads = read_tryon_request()
+        except UploadError as e:
+            return jsonify({'error': str(e)}), e.status_code
+        
+        # Process the request
+        result = ai_tryon_backend.process_virtual_tryon(request_data, uploads=uploads)
+        return tryon_response(result, request_data, uploads)
+            
+    except Exception as e:
+        logger.error(f"API error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@ai_tryon_bp.route('/jobs', methods=['POST'])
+def submit_tryon_job():
+    """Queue a virtual try-on job and return its id"""
     try:
-        request_data = request.get_json()
+        try:
+            request_data, uploads = read_tryon_request()
+        except UploadError as e:
+            return jsonify({'error': str(e)}), e.status_code
         
-        if not request_data:
-            return jsonify({'error': 'No data provided'}), 400
+        try:
+            job = ai_tryon_backend.submit_virtual_tryon(request_data, uploads=uploads)
+        except queue.Full:
+            return jsonify({'success': False, 'busy': True, 'error': 'Try-on service is busy, please retry shortly'}), 503
         
-        # Validate required fields
-        required_fields = ['user_image', 'garment_image']
-        for field in required_fields:
-            if field not in request_data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+        if isinstance(job, dict):
+            # Demo mode finishes immediately
+            return tryon_response(job, request_data, uploads)
         
-        # Process the request
-        result = ai_tryon_backend.process_virtual_tryon(request_data)
+        return jsonify({
+            'success': True,
+            'job_id': job.id,
+            'status': job.status,
+            'queue_depth': ai_tryon_backend.inference_worker.queue_depth()
+        }), 202
+        
+    except Exception as e:
+        logger.error(f"Job submit error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@ai_tryon_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_tryon_job(job_id):
+    """Poll a try-on job; ?wait=<seconds> blocks until it finishes or the wait runs out"""
+    try:
+        wait = min(max(request.args.get('wait', 0, type=float), 0), Config.TRYON_REQUEST_TIMEOUT_SECONDS)
+        result = ai_tryon_backend.get_job_result(job_id, wait=wait)
         
+        if result is None:
+            return jsonify({'error': 'Job not found or expired'}), 404
+        if result.get('status') in ('queued', 'running'):
+            return jsonify(result), 202
         if result['success']:
+            if ai_tryon_backend.get_job_image(job_id) is not None:
+                result = dict(result, result_url=url_for('ai_tryon.get_tryon_job_image', job_id=job_id))
             return jsonify(result), 200
         else:
             return jsonify(result), 500
-            
+        
     except Exception as e:
-        logger.error(f"API error: {str(e)}")
+        logger.error(f"Job poll error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@ai_tryon_bp.route('/jobs/<job_id>/image', methods=['GET'])
+def get_tryon_job_image(job_id):
+    """Fetch the result image of a finished binary/url-format job"""
+    image = ai_tryon_backend.get_job_image(job_id)
+    if image is None:
+        return jsonify({'error': 'Result image not found or expired'}), 404
+    return image_response(image)
+
 @ai_tryon_bp.route('/train', methods=['POST'])
 def train_model():
     """Train the AI model with new data"""
@@ -524,10 +847,13 @@ def get_metrics():
         
         return jsonify({
             'model_loaded': ai_tryon_backend.model_loaded,
+            'runtime': ai_tryon_backend.runtime,
             'total_sessions': total_sessions,
             'average_confidence': round(avg_confidence, 3),
             'average_processing_time': round(avg_processing_time, 2),
-            'training_samples': training_samples
+            'training_samples': training_samples,
+            'tensor_cache': ai_tryon_backend.tensor_cache.get_stats(),
+            'inference': ai_tryon_backend.inference_worker.get_metrics() if ai_tryon_backend.inference_worker else None
         }), 200
         
     except Exception as e:
@@ -540,5 +866,8 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'model_loaded': ai_tryon_backend.model_loaded,
+        'runtime': ai_tryon_backend.runtime,
+        'worker_ready': ai_tryon_backend.worker_ready(),
+        'queue_depth': ai_tryon_backend.inference_worker.queue_depth() if ai_tryon_backend.inference_worker else 0,
         'timestamp': datetime.now().isoformat()
     }), 200
\ No newline at end of file
@@ -2,6 +2,7 @@ import requests
 from datetime import datetime
 from db import execute_query, get_db_connection
 from config import Config
+from product_snapshot import FallbackSnapshot
 
 class APICacheService:
     def __init__(self):
@@ -9,6 +10,9 @@ class APICacheService:
         self.amazon_api_url = "https://real-time-amazon-data.p.rapidapi.com/search"
         self.amazon_api_host = "real-time-amazon-data.p.rapidapi.com"
         self.monthly_limit = 100
+        # Loaded once here, re-read only when the file's mtime changes
+        self.fallback = FallbackSnapshot(Config.FALLBACK_PRODUCTS_FILE, Config.FALLBACK_CHECK_SECONDS)
+        self.fallback.refresh(force=True)
     
     def get_current_month_year(self):
         """Get current month-year string (e.g., '2024-11')"""
@@ -288,21 +292,11 @@ class APICacheService:
             print(f"📦 Fallback: Returning {len(cached)} products from cache")
             return cached
         
-        # Final fallback: Load mock products from JSON file
-        try:
-            import json
-            import os
-            
-            fallback_file = os.path.join(os.path.dirname(__file__), 'fallback_products.json')
-            if os.path.exists(fallback_file):
-                with open(fallback_file, 'r') as f:
-                    mock_products = json.load(f)
-                
-                if mock_products:
-                    print(f"🎭 Using {len(mock_products)} mock products (database not available)")
-                    return mock_products
-        except Exception as e:
-            print(f"Error loading fallback products: {e}")
+        # Final fallback: mock products from the in-memory snapshot of fallback_products.json
+        mock_products = self.fallback.search(query)
+        if mock_products:
+            print(f"🎭 Using {len(mock_products)} mock products (database not available)")
+            return mock_products
         
         print("⚠️ No products available")
         return []
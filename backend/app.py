@@ -1,21 +1,73 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, url_for, g
 from flask_cors import CORS
 import jwt
 import json
+import logging
+import time
 from datetime import datetime, timedelta
 from config import Config
-from db import execute_query
+from db import execute_query, query_profiler
+from chat_agent.metrics import registry
+from chat_agent.result_cache import SearchResultCache, canonical_key
+from chat_agent.structured_logging import configure_logging, init_request_ids
 from api_cache_service import api_cache_service
 from clothing_api_service import clothing_api_service
 from ebay_api_service import ebay_api_service
-from ai_tryon_api import ai_tryon_bp
+from catalog_facets import catalog_facet_service
+from autocomplete_service import autocomplete_service
+from typo_correction import typo_correction_service, CATEGORY_KEYWORDS, COLOR_KEYWORDS, PARTY_KEYWORDS, FORMAL_KEYWORDS
+from ai_tryon_api import ai_tryon_bp, ai_tryon_backend
+from auth_middleware import jwt_auth
+from tryon_uploads import UploadError, TryOnResultStore, is_multipart, open_upload, response_format, image_response
+
+# JSON-lines logs written off the request thread; hot paths log at DEBUG only
+configure_logging(
+    'backend',
+    level=Config.LOG_LEVEL,
+    module_levels=Config.LOG_LEVELS,
+    json_format=Config.LOG_JSON,
+    debug_sample_rate=Config.LOG_DEBUG_SAMPLE_RATE,
+    debug_per_second=Config.LOG_DEBUG_PER_SECOND,
+    queue_size=Config.LOG_QUEUE_SIZE
+)
+logger = logging.getLogger('app')
 
 app = Flask(__name__)
 CORS(app)
 
+# X-Request-ID on every request, stamped on each log line
+init_request_ids(app)
+
+# Verify the bearer token once per request; claims land on flask.g
+jwt_auth.init_app(app)
+
+# Query count / DB time per request (Server-Timing header in debug mode)
+query_profiler.init_app(app)
+
+# Reject oversized bodies while parsing, before any image is buffered
+app.config['MAX_CONTENT_LENGTH'] = Config.MAX_REQUEST_BYTES
+
+# Results of multipart virtual try-on requests served by URL
+tryon_result_store = TryOnResultStore()
+
 # Register AI Try-On Blueprint
 app.register_blueprint(ai_tryon_bp, url_prefix='/ai-tryon')
 
+# Load and warm up the try-on model once, on its inference worker thread
+ai_tryon_backend.start_inference_worker()
+
+# Prometheus metrics on /metrics - request counts/latency per route, plus
+# gauges read from the existing stats at scrape time (nothing on the hot path)
+registry.init_app(app)
+registry.gauge('cache_hit_ratio', 'Hit ratio of in-process caches', ('cache',)).set_function(lambda: {
+    'jwt': jwt_auth.get_stats()['hit_rate'],
+    'tryon_tensor': ai_tryon_backend.tensor_cache.get_stats()['hit_ratio'],
+    'natural_search': natural_search_cache.get_stats()['hit_ratio']
+})
+registry.gauge('tryon_queue_depth', 'Try-on jobs waiting for the inference worker').set_function(
+    lambda: ai_tryon_backend.inference_worker.queue_depth() if ai_tryon_backend.inference_worker else 0
+)
+
 # Helper function to generate JWT token
 def generate_token(user_id, email):
     payload = {
@@ -25,35 +77,14 @@ def generate_token(user_id, email):
     }
     return jwt.encode(payload, Config.JWT_SECRET, algorithm='HS256')
 
-# Helper function to verify JWT token
+# Helper function to verify JWT token (cached until the token's exp)
 def verify_token(token):
-    try:
-        payload = jwt.decode(token, Config.JWT_SECRET, algorithms=['HS256'])
-        return payload
-    except jwt.ExpiredSignatureError:
-        return None
-    except jwt.InvalidTokenError:
-        return None
+    return jwt_auth.verify(token)
 
 # Helper function to get user email from request
 def get_user_email_from_token(request):
-    """Extract user email from JWT token in request headers"""
-    try:
-        token = request.headers.get('Authorization')
-        if not token:
-            return None
-        
-        # Remove 'Bearer ' prefix if present
-        if token.startswith('Bearer '):
-            token = token[7:]
-        
-        payload = verify_token(token)
-        if payload and 'email' in payload:
-            return payload['email']
-        return None
-    except Exception as e:
-        print(f"Token extraction error: {e}")
-        return None
+    """User email from the JWT already verified for this request by the auth middleware"""
+    return g.get('user_email')
 
 @app.route('/api/signup', methods=['POST'])
 def signup():
@@ -105,7 +136,7 @@ def signup():
             return jsonify({'error': 'Failed to create user'}), 500
             
     except Exception as e:
-        print(f"Signup error: {e}")
+        logger.exception("Signup error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/login', methods=['POST'])
@@ -150,30 +181,33 @@ def login():
             return jsonify({'error': 'Invalid email or password'}), 401
             
     except Exception as e:
-        print(f"Login error: {e}")
+        logger.exception("Login error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/verify', methods=['GET'])
 def verify():
     try:
-        token = request.headers.get('Authorization')
-        if not token:
+        if not g.get('auth_token'):
             return jsonify({'error': 'No token provided'}), 401
         
-        # Remove 'Bearer ' prefix if present
-        if token.startswith('Bearer '):
-            token = token[7:]
-        
-        payload = verify_token(token)
+        payload = g.get('auth_claims')
         if payload:
             return jsonify({'valid': True, 'user_id': payload['user_id']}), 200
         else:
             return jsonify({'valid': False}), 401
             
     except Exception as e:
-        print(f"Verify error: {e}")
+        logger.exception("Verify error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/logout', methods=['POST'])
+def logout():
+    """Revoke the current token so it is rejected until it expires"""
+    if not g.get('auth_claims'):
+        return jsonify({'error': 'Not logged in'}), 401
+    revoked = jwt_auth.revoke(g.auth_token)
+    return jsonify({'message': 'Logged out', 'revoked': revoked}), 200
+
 @app.route('/api/reset-password', methods=['POST'])
 def reset_password():
     try:
@@ -202,7 +236,7 @@ def reset_password():
         }), 200
         
     except Exception as e:
-        print(f"Reset password error: {e}")
+        logger.exception("Reset password error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/update-password', methods=['POST'])
@@ -237,7 +271,7 @@ def update_password():
             return jsonify({'error': 'Failed to update password'}), 500
             
     except Exception as e:
-        print(f"Update password error: {e}")
+        logger.exception("Update password error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 def get_user(user_id):
     try:
@@ -253,11 +287,234 @@ def get_user(user_id):
             return jsonify({'error': 'User not found'}), 404
             
     except Exception as e:
-        print(f"Get user error: {e}")
+        logger.exception("Get user error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 # ============= PRODUCT API ENDPOINTS =============
 
+NATURAL_SEARCH_SELECT = """
+    SELECT 
+        product_id,
+        product_name as title,
+        price,
+        product_image as image_url,
+        product_category as category,
+        gender,
+        product_description as description,
+        color,
+        size,
+        stock,
+        created_at
+    FROM clothing
+"""
+
+# Filters that change natural-search SQL - together with the row limit they key the result cache
+NATURAL_SEARCH_KEY_FIELDS = ('gender', 'product_category', 'category_group', 'color',
+                             'price_min', 'price_max', 'size', 'limit')
+NATURAL_SEARCH_LIMIT = 20
+
+# Product IDs (plus the filters that found them) per canonical filter tuple and catalog version
+natural_search_cache = SearchResultCache(
+    max_cost=Config.RESULT_CACHE_MAX_COST,
+    ttl=Config.RESULT_CACHE_TTL_SECONDS,
+    cost=lambda result: len(result['ids']) + 1
+)
+
+def _natural_rows_by_ids(product_ids, version):
+    """
+    Natural-search rows for `product_ids` in that order (None when the database
+    fails). Descriptive columns come from the shared snapshot when it has them
+    all; price and stock are always read live, so a cached ID list never
+    shows an old price or sold-out stock.
+    """
+    if not product_ids:
+        return []
+    placeholders = ', '.join(['%s'] * len(product_ids))
+    snapshot = catalog_facet_service.snapshot(version)
+    if snapshot is not None:
+        rows = [snapshot.get(product_id) for product_id in product_ids]
+        if all(row is not None for row in rows):
+            live = execute_query(f"SELECT product_id, price, stock FROM clothing WHERE product_id IN ({placeholders})",
+                                 list(product_ids), fetch=True)
+            if live is None:
+                return None
+            live = {item['product_id']: item for item in live}
+            return [{
+                'product_id': row['product_id'],
+                'title': row['product_name'],
+                'price': live[row['product_id']]['price'],
+                'image_url': row['product_image'],
+                'category': row['product_category'],
+                'gender': row['gender'],
+                'description': row['product_description'],
+                'color': row['color'],
+                'size': row['size'],
+                'stock': live[row['product_id']]['stock'],
+                'created_at': None  # not part of the snapshot
+            } for row in rows if row['product_id'] in live]
+    rows = execute_query(NATURAL_SEARCH_SELECT + f" WHERE product_id IN ({placeholders})",
+                         list(product_ids), fetch=True)
+    if rows is None:
+        return None
+    by_id = {row['product_id']: row for row in rows}
+    return [by_id[product_id] for product_id in product_ids if product_id in by_id]
+
+def _cached_natural_search(filters):
+    """
+    _run_natural_search through the result cache: phrasings that extract the
+    same filters share one cached ID list, and concurrent identical searches
+    share one execution. Returns (rows, filters actually used, fallback attempted).
+    """
+    if not Config.RESULT_CACHE_ENABLED:
+        return _run_natural_search(filters)
+
+    version = catalog_facet_service.store.version()
+    key = canonical_key({k: v for k, v in filters.items() if k in NATURAL_SEARCH_KEY_FIELDS},
+                        NATURAL_SEARCH_KEY_FIELDS, limit=NATURAL_SEARCH_LIMIT)
+    loaded = None
+
+    def load():
+        nonlocal loaded
+        loaded = _run_natural_search(filters)
+        products, used_filters, fallback_attempted = loaded
+        if products is None:
+            return None  # query failed - don't cache
+        return {'ids': [p['product_id'] for p in products], 'filters': used_filters,
+                'fallback_attempted': fallback_attempted}
+
+    result = natural_search_cache.get_or_load(key, version, load)
+    if loaded is not None:
+        return loaded
+    if result is None:
+        return None, filters, False
+    return _natural_rows_by_ids(result['ids'], version), dict(result['filters']), result['fallback_attempted']
+
+def _run_natural_search(filters):
+    """
+    Filtered SQL plus the partial-match fallback - (rows, filters actually used,
+    fallback attempted). rows is None when a query failed, so an outage is
+    never mistaken for (and cached as) an empty result.
+    """
+    # 6️⃣ BUILD SQL QUERY
+    base_query = NATURAL_SEARCH_SELECT + " WHERE 1=1"
+    
+    params = []
+    
+    # Apply filters with STRICT EXACT MATCHING
+    if 'gender' in filters:
+        base_query += " AND LOWER(gender) = LOWER(%s)"
+        params.append(filters['gender'])
+    
+    if 'product_category' in filters:
+        base_query += " AND LOWER(product_category) = LOWER(%s)"
+        params.append(filters['product_category'])
+    elif 'category_group' in filters:
+        # Handle multiple categories (for party wear, etc.)
+        category_conditions = []
+        for cat in filters['category_group']:
+            category_conditions.append("LOWER(product_category) = LOWER(%s)")
+            params.append(cat)
+        base_query += f" AND ({' OR '.join(category_conditions)})"
+    
+    if 'color' in filters:
+        # STRICT COLOR MATCHING - must contain the exact color word
+        base_query += " AND (LOWER(color) = LOWER(%s) OR LOWER(color) LIKE LOWER(%s) OR LOWER(color) LIKE LOWER(%s) OR LOWER(color) LIKE LOWER(%s))"
+        color_exact = filters['color']
+        color_start = f"{filters['color']} %"  # "Pink Something"
+        color_end = f"% {filters['color']}"    # "Something Pink"
+        color_middle = f"% {filters['color']} %" # "Something Pink Something"
+        params.extend([color_exact, color_start, color_end, color_middle])
+    
+    if 'price_min' in filters:
+        base_query += " AND price >= %s"
+        params.append(filters['price_min'])
+    
+    if 'price_max' in filters:
+        base_query += " AND price <= %s"
+        params.append(filters['price_max'])
+    
+    if 'size' in filters:
+        base_query += " AND UPPER(size) = UPPER(%s)"
+        params.append(filters['size'])
+    
+    # Add ordering and limit
+    base_query += f" ORDER BY price ASC LIMIT {NATURAL_SEARCH_LIMIT}"
+    
+    logger.debug("Natural search SQL: %s params=%s", base_query, params)
+    
+    # Execute query with fallback mechanism
+    products = execute_query(base_query, params, fetch=True)
+    fallback_attempted = False
+    if products is None:
+        return None, filters, fallback_attempted
+    
+    # 🔁 PARTIAL MATCH FALLBACK (VERY IMPORTANT)
+    if not products and filters:
+        logger.debug("No products found with all filters - attempting fallback")
+        fallback_attempted = True
+        
+        # Priority order for filter removal: price → color → category → gender
+        fallback_order = ['price_max', 'price_min', 'color', 'product_category', 'category_group', 'gender']
+        
+        for filter_to_remove in fallback_order:
+            if filter_to_remove in filters:
+                logger.debug("Fallback: removing filter %s", filter_to_remove)
+                
+                # Create new filters without the least important one
+                fallback_filters = {k: v for k, v in filters.items() if k != filter_to_remove}
+                
+                # Rebuild query with fallback filters
+                fallback_query = NATURAL_SEARCH_SELECT + " WHERE 1=1"
+                
+                fallback_params = []
+                
+                # Apply fallback filters
+                if 'gender' in fallback_filters:
+                    fallback_query += " AND LOWER(gender) = LOWER(%s)"
+                    fallback_params.append(fallback_filters['gender'])
+                
+                if 'product_category' in fallback_filters:
+                    fallback_query += " AND LOWER(product_category) = LOWER(%s)"
+                    fallback_params.append(fallback_filters['product_category'])
+                elif 'category_group' in fallback_filters:
+                    category_conditions = []
+                    for cat in fallback_filters['category_group']:
+                        category_conditions.append("LOWER(product_category) = LOWER(%s)")
+                        fallback_params.append(cat)
+                    fallback_query += f" AND ({' OR '.join(category_conditions)})"
+                
+                if 'color' in fallback_filters:
+                    fallback_query += " AND LOWER(color) LIKE LOWER(%s)"
+                    fallback_params.append(f"%{fallback_filters['color']}%")
+                
+                if 'price_min' in fallback_filters:
+                    fallback_query += " AND price >= %s"
+                    fallback_params.append(fallback_filters['price_min'])
+                
+                if 'price_max' in fallback_filters:
+                    fallback_query += " AND price <= %s"
+                    fallback_params.append(fallback_filters['price_max'])
+                
+                if 'size' in fallback_filters:
+                    fallback_query += " AND UPPER(size) = UPPER(%s)"
+                    fallback_params.append(fallback_filters['size'])
+                
+                fallback_query += f" ORDER BY price ASC LIMIT {NATURAL_SEARCH_LIMIT}"
+                
+                logger.debug("Fallback SQL: %s params=%s", fallback_query, fallback_params)
+                
+                # Try fallback query
+                products = execute_query(fallback_query, fallback_params, fetch=True)
+                if products is None:
+                    return None, filters, fallback_attempted
+                
+                if products:
+                    logger.debug("Fallback found %d products", len(products))
+                    filters = fallback_filters  # Update filters to reflect what was actually used
+                    break
+    
+    return products, filters, fallback_attempted
+
 @app.route('/api/products/search-natural', methods=['POST'])
 def search_products_natural():
     """Enhanced natural language product search with STRICT keyword matching"""
@@ -269,8 +526,11 @@ def search_products_natural():
         if not query:
             return jsonify({'error': 'Query is required'}), 400
         
-        print(f"Natural language query: {query}")
-        print(f"Override filters: {override_filters}")
+        # Fix misspelled keywords ("hoddie" -> "hoodie") before matching
+        original_query = query
+        query, corrections = typo_correction_service.correct(query)
+        
+        logger.debug("Natural language query: %s (override filters: %s, corrections: %s)", query, override_filters, corrections)
         
         # Initialize filters
         filters = {}
@@ -286,21 +546,9 @@ def search_products_natural():
                 filters['gender'] = 'Men'
             
             # 2️⃣ CATEGORY DETECTION - EXACT MATCHING (Order matters - most specific first)
-            category_mapping = {
-                'T-shirts': ['t-shirt', 't-shirts', 'tshirt', 'tshirts', 'tee', 'tees'],
-                'Bottom Wear': ['bottom wear', 'bottomwear', 'pants', 'jeans', 'trousers'],
-                f"Women{chr(8217)}s Bottomwear": ['women bottomwear', 'womens bottomwear', 'women\'s bottomwear'],  # Handle smart quote
-                'Shirts': ['shirt', 'shirts'],
-                'Dresses': ['dress', 'dresses', 'gown', 'gowns'],
-                'Ethnic Wear': ['ethnic', 'traditional', 'ethnic wear', 'kurta', 'saree', 'kurti'],
-                'Western Wear': ['western', 'casual', 'western wear'],
-                'Hoodies': ['hoodie', 'hoodies', 'sweatshirt', 'sweatshirts'],
-                'Tops and Co-ord Sets': ['tops', 'coord', 'co-ord', 'sets', 'top']
-            }
-            
             # Find the most specific category match
             detected_category = None
-            for db_category, keywords in category_mapping.items():
+            for db_category, keywords in CATEGORY_KEYWORDS.items():
                 if any(keyword in query for keyword in keywords):
                     detected_category = db_category
                     break
@@ -309,7 +557,7 @@ def search_products_natural():
                 filters['product_category'] = detected_category
             
             # Special category mappings (override individual detection)
-            if any(word in query for word in ['party', 'party wear', 'evening', 'night out']):
+            if any(word in query for word in PARTY_KEYWORDS):
                 if filters.get('gender') == 'Women':
                     filters['category_group'] = ['Western Wear', 'Dresses']
                 else:
@@ -317,7 +565,7 @@ def search_products_natural():
                 # Remove individual category if special mapping applies
                 if 'product_category' in filters:
                     del filters['product_category']
-            elif any(word in query for word in ['formal', 'office', 'work', 'business']):
+            elif any(word in query for word in FORMAL_KEYWORDS):
                 if filters.get('gender') == 'Women':
                     filters['category_group'] = ['Western Wear', 'Dresses']
                 else:
@@ -327,22 +575,8 @@ def search_products_natural():
                     del filters['product_category']
             
             # 3️⃣ COLOR DETECTION - EXACT MATCHING
-            color_mapping = {
-                'Black': ['black', 'dark'],
-                'White': ['white', 'cream', 'off-white'],
-                'Blue': ['blue', 'navy', 'sky blue', 'light blue'],
-                'Red': ['red', 'maroon', 'crimson'],
-                'Green': ['green', 'olive', 'mint'],
-                'Pink': ['pink', 'rose', 'baby pink'],
-                'Grey': ['grey', 'gray', 'charcoal'],
-                'Brown': ['brown', 'tan', 'beige'],
-                'Yellow': ['yellow', 'golden', 'mustard'],
-                'Purple': ['purple', 'violet', 'lavender'],
-                'Orange': ['orange', 'peach']
-            }
-            
             detected_color = None
-            for db_color, keywords in color_mapping.items():
+            for db_color, keywords in COLOR_KEYWORDS.items():
                 if any(keyword in query for keyword in keywords):
                     detected_color = db_color
                     break
@@ -374,154 +608,10 @@ def search_products_natural():
             if size_match:
                 filters['size'] = size_match.group(1).upper()
         
-        print(f"Extracted filters: {filters}")
+        logger.debug("Extracted filters: %s", filters)
         
-        # 6️⃣ BUILD SQL QUERY
-        base_query = """
-            SELECT 
-                product_id,
-                product_name as title,
-                price,
-                product_image as image_url,
-                product_category as category,
-                gender,
-                product_description as description,
-                color,
-                size,
-                stock,
-                created_at
-            FROM clothing 
-            WHERE 1=1
-        """
-        
-        params = []
-        
-        # Apply filters with STRICT EXACT MATCHING
-        if 'gender' in filters:
-            base_query += " AND LOWER(gender) = LOWER(%s)"
-            params.append(filters['gender'])
-        
-        if 'product_category' in filters:
-            base_query += " AND LOWER(product_category) = LOWER(%s)"
-            params.append(filters['product_category'])
-        elif 'category_group' in filters:
-            # Handle multiple categories (for party wear, etc.)
-            category_conditions = []
-            for cat in filters['category_group']:
-                category_conditions.append("LOWER(product_category) = LOWER(%s)")
-                params.append(cat)
-            base_query += f" AND ({' OR '.join(category_conditions)})"
-        
-        if 'color' in filters:
-            # STRICT COLOR MATCHING - must contain the exact color word
-            base_query += " AND (LOWER(color) = LOWER(%s) OR LOWER(color) LIKE LOWER(%s) OR LOWER(color) LIKE LOWER(%s) OR LOWER(color) LIKE LOWER(%s))"
-            color_exact = filters['color']
-            color_start = f"{filters['color']} %"  # "Pink Something"
-            color_end = f"% {filters['color']}"    # "Something Pink"
-            color_middle = f"% {filters['color']} %" # "Something Pink Something"
-            params.extend([color_exact, color_start, color_end, color_middle])
-        
-        if 'price_min' in filters:
-            base_query += " AND price >= %s"
-            params.append(filters['price_min'])
-        
-        if 'price_max' in filters:
-            base_query += " AND price <= %s"
-            params.append(filters['price_max'])
-        
-        if 'size' in filters:
-            base_query += " AND UPPER(size) = UPPER(%s)"
-            params.append(filters['size'])
-        
-        # Add ordering and limit
-        base_query += " ORDER BY price ASC LIMIT 20"
-        
-        print(f"SQL Query: {base_query}")
-        print(f"Parameters: {params}")
-        
-        # Execute query with fallback mechanism
-        products = execute_query(base_query, params, fetch=True)
         original_filters = filters.copy()
-        fallback_attempted = False
-        
-        # 🔁 PARTIAL MATCH FALLBACK (VERY IMPORTANT)
-        if not products and filters:
-            print("No products found with all filters. Attempting fallback...")
-            fallback_attempted = True
-            
-            # Priority order for filter removal: price → color → category → gender
-            fallback_order = ['price_max', 'price_min', 'color', 'product_category', 'category_group', 'gender']
-            
-            for filter_to_remove in fallback_order:
-                if filter_to_remove in filters:
-                    print(f"Removing filter: {filter_to_remove}")
-                    
-                    # Create new filters without the least important one
-                    fallback_filters = {k: v for k, v in filters.items() if k != filter_to_remove}
-                    
-                    # Rebuild query with fallback filters
-                    fallback_query = """
-                        SELECT 
-                            product_id,
-                            product_name as title,
-                            price,
-                            product_image as image_url,
-                            product_category as category,
-                            gender,
-                            product_description as description,
-                            color,
-                            size,
-                            stock,
-                            created_at
-                        FROM clothing 
-                        WHERE 1=1
-                    """
-                    
-                    fallback_params = []
-                    
-                    # Apply fallback filters
-                    if 'gender' in fallback_filters:
-                        fallback_query += " AND LOWER(gender) = LOWER(%s)"
-                        fallback_params.append(fallback_filters['gender'])
-                    
-                    if 'product_category' in fallback_filters:
-                        fallback_query += " AND LOWER(product_category) = LOWER(%s)"
-                        fallback_params.append(fallback_filters['product_category'])
-                    elif 'category_group' in fallback_filters:
-                        category_conditions = []
-                        for cat in fallback_filters['category_group']:
-                            category_conditions.append("LOWER(product_category) = LOWER(%s)")
-                            fallback_params.append(cat)
-                        fallback_query += f" AND ({' OR '.join(category_conditions)})"
-                    
-                    if 'color' in fallback_filters:
-                        fallback_query += " AND LOWER(color) LIKE LOWER(%s)"
-                        fallback_params.append(f"%{fallback_filters['color']}%")
-                    
-                    if 'price_min' in fallback_filters:
-                        fallback_query += " AND price >= %s"
-                        fallback_params.append(fallback_filters['price_min'])
-                    
-                    if 'price_max' in fallback_filters:
-                        fallback_query += " AND price <= %s"
-                        fallback_params.append(fallback_filters['price_max'])
-                    
-                    if 'size' in fallback_filters:
-                        fallback_query += " AND UPPER(size) = UPPER(%s)"
-                        fallback_params.append(fallback_filters['size'])
-                    
-                    fallback_query += " ORDER BY price ASC LIMIT 20"
-                    
-                    print(f"Fallback SQL Query: {fallback_query}")
-                    print(f"Fallback Parameters: {fallback_params}")
-                    
-                    # Try fallback query
-                    products = execute_query(fallback_query, fallback_params, fetch=True)
-                    
-                    if products:
-                        print(f"Fallback successful! Found {len(products)} products")
-                        filters = fallback_filters  # Update filters to reflect what was actually used
-                        break
+        products, filters, fallback_attempted = _cached_natural_search(filters)
         
         # ❌ WHEN TO SAY "NO PRODUCTS FOUND" - Only after all fallback attempts fail
         if not products:
@@ -566,13 +656,16 @@ def search_products_natural():
             'products': transformed_products,
             'filters_applied': filters,
             'original_filters': original_filters,
+            'facets': catalog_facet_service.facets_for_filters(filters),
             'query': query,
+            'original_query': original_query,
+            'corrections': corrections,
             'fallback_used': fallback_attempted,
             'message': response_message
         }), 200
         
     except Exception as e:
-        print(f"Natural language search error: {e}")
+        logger.exception("Natural language search error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 @app.route('/api/products/search', methods=['GET'])
 def search_products():
@@ -591,7 +684,7 @@ def search_products():
         }), 200
         
     except Exception as e:
-        print(f"Search products error: {e}")
+        logger.exception("Search products error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/products/category/<category>', methods=['GET'])
@@ -606,9 +699,7 @@ def get_products_by_category(category):
         gender = request.args.get('gender')
         limit = int(request.args.get('limit', 100))
         
-        print(f"DEBUG: Category endpoint called - original={category}, decoded={decoded_category}, gender={gender}")
-        print(f"DEBUG: Decoded category lowercase: '{decoded_category.lower()}'")
-        print(f"DEBUG: Character codes: {[ord(c) for c in decoded_category.lower()]}")
+        logger.debug("Category endpoint: category=%r gender=%s limit=%d", decoded_category, gender, limit)
         
         # Handle different category types
         if decoded_category.lower() == 'fashion':
@@ -628,7 +719,7 @@ def get_products_by_category(category):
         }), 200
         
     except Exception as e:
-        print(f"Get products by category error: {e}")
+        logger.exception("Get products by category error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/products/fetch-fresh', methods=['POST'])
@@ -658,7 +749,7 @@ def fetch_fresh_products():
         }), 200
         
     except Exception as e:
-        print(f"Fetch fresh products error: {e}")
+        logger.exception("Fetch fresh products error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/products/fetch-ebay', methods=['POST'])
@@ -684,7 +775,7 @@ def fetch_ebay_products():
         }), 200
         
     except Exception as e:
-        print(f"Fetch eBay products error: {e}")
+        logger.exception("Fetch eBay products error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/products/fetch-all', methods=['POST'])
@@ -720,7 +811,7 @@ def fetch_all_products():
         }), 200
         
     except Exception as e:
-        print(f"Fetch all products error: {e}")
+        logger.exception("Fetch all products error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/usage/stats', methods=['GET'])
@@ -730,25 +821,82 @@ def get_usage_stats():
         stats = api_cache_service.get_usage_stats()
         return jsonify(stats), 200
     except Exception as e:
-        print(f"Get usage stats error: {e}")
+        logger.exception("Get usage stats error: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/metrics/db', methods=['GET'])
+def get_db_metrics():
+    """Get per-fingerprint query timings, slow queries and EXPLAIN captures"""
+    try:
+        return jsonify(dict(query_profiler.get_stats(), result_cache=natural_search_cache.get_stats())), 200
+    except Exception as e:
+        logger.exception("Get DB metrics error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/cache/count', methods=['GET'])
 def get_cache_count():
     """Get total number of clothing products"""
     try:
-        result = execute_query(
-            "SELECT COUNT(*) as count FROM clothing",
-            fetch=True
-        )
-        count = result[0]['count'] if result else 0
+        count = catalog_facet_service.total_count()
         
         return jsonify({
             'success': True,
             'cached_products': count
         }), 200
     except Exception as e:
-        print(f"Get cache count error: {e}")
+        logger.exception("Get cache count error: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/autocomplete', methods=['GET'])
+def autocomplete():
+    """Typeahead suggestions for a partial query (product names, categories, colors, past searches)"""
+    try:
+        started = time.perf_counter()
+        prefix = request.args.get('q', '')
+        limit = min(int(request.args.get('limit', 8)), 20)
+        kinds = [k for k in request.args.get('types', '').split(',') if k] or None
+        
+        suggestions = autocomplete_service.suggest(prefix, limit=limit, kinds=kinds)
+        
+        return jsonify({
+            'success': True,
+            'query': prefix,
+            'suggestions': suggestions,
+            'took_ms': round((time.perf_counter() - started) * 1000, 3)
+        }), 200
+    except ValueError:
+        return jsonify({'error': 'limit must be a number'}), 400
+    except Exception as e:
+        logger.exception("Autocomplete error: %s", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/catalog/facets', methods=['GET'])
+def get_catalog_facets():
+    """Get categories, colors, counts and price histogram from the in-memory facet store"""
+    try:
+        filters = {
+            'product_category': request.args.get('category'),
+            'gender': request.args.get('gender'),
+            'color': request.args.get('color'),
+            'size': request.args.get('size')
+        }
+        filters = {k: v for k, v in filters.items() if v}
+        
+        return jsonify({
+            'success': True,
+            'stats': catalog_facet_service.stats(),
+            'categories': catalog_facet_service.categories(),
+            'colors': catalog_facet_service.colors(),
+            'facets': catalog_facet_service.facets_for_filters(filters),
+            'price_histogram': catalog_facet_service.store.price_histogram(
+                category=filters.get('product_category'),
+                gender=filters.get('gender'),
+                color=filters.get('color'),
+                size=filters.get('size')
+            )
+        }), 200
+    except Exception as e:
+        logger.exception("Get catalog facets error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 # ============= PRODUCT DETAIL & REVIEWS =============
@@ -803,7 +951,7 @@ def get_product_detail(product_id):
         }), 200
         
     except Exception as e:
-        print(f"Get product detail error: {e}")
+        logger.exception("Get product detail error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/products/<product_id>/similar', methods=['GET'])
@@ -875,7 +1023,7 @@ def get_similar_products(product_id):
         }), 200
         
     except Exception as e:
-        print(f"Get similar products error: {e}")
+        logger.exception("Get similar products error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/reviews/<product_id>', methods=['GET'])
@@ -899,7 +1047,7 @@ def get_reviews(product_id):
         }), 200
         
     except Exception as e:
-        print(f"Get reviews error: {e}")
+        logger.exception("Get reviews error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/reviews', methods=['POST'])
@@ -934,17 +1082,102 @@ def add_review():
             return jsonify({'error': 'Failed to add review'}), 500
             
     except Exception as e:
-        print(f"Add review error: {e}")
+        logger.exception("Add review error: %s", e)
         return jsonify({'error': 'Internal server error'}), 500
 
 # ============= VIRTUAL TRY-ON =============
 
+def virtual_tryon_upload_response(image, mimetype, fmt, message=None):
+    """Return an uploaded-mode try-on result as raw image bytes, a fetchable URL, or base64 JSON"""
+    if fmt == 'binary':
+        return image_response(image, mimetype, {'X-Tryon-Demo-Mode': 'true' if message else None})
+    
+    data = image if isinstance(image, (bytes, bytearray)) else image.read()
+    payload = {'success': True}
+    if fmt == 'url':
+        result_id = tryon_result_store.put(data, mimetype)
+        payload['result_url'] = url_for('virtual_tryon_result', result_id=result_id)
+    else:
+        import base64
+        payload['result_image'] = f"data:{mimetype};base64,{base64.b64encode(data).decode('utf-8')}"
+    if message:
+        payload['message'] = message
+    return jsonify(payload), 200
+
+def virtual_tryon_upload():
+    """Multipart variant of /api/virtual-tryon - images are streamed, never base64-encoded"""
+    try:
+        person_stream, person_type = open_upload(request.files, 'person_image', Config.TRYON_MAX_UPLOAD_BYTES)
+        garment_stream, garment_type = open_upload(request.files, 'garment_image', Config.TRYON_MAX_UPLOAD_BYTES)
+        fmt = response_format(request)
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    
+    category = request.form.get('category', 'upper_body')
+    hf_api_key = Config.HUGGINGFACE_API_KEY if hasattr(Config, 'HUGGINGFACE_API_KEY') else None
+    
+    logger.debug("Virtual try-on upload: category=%s", category)
+    
+    if not hf_api_key or hf_api_key == 'your_huggingface_api_key_here':
+        logger.debug("Virtual try-on in demo mode (no API key configured)")
+        return virtual_tryon_upload_response(
+            person_stream, person_type, fmt,
+            'Virtual try-on feature is in demo mode. Configure Hugging Face API for full functionality.'
+        )
+    
+    try:
+        import requests
+        
+        api_url = "https://api-inference.huggingface.co/models/yisol/IDM-VTON"
+        headers = {"Authorization": f"Bearer {hf_api_key}"}
+        
+        # requests streams the spooled upload files straight into the outgoing body
+        files = {
+            'person_image': ('person_image', person_stream, person_type),
+            'garment_image': ('garment_image', garment_stream, garment_type)
+        }
+        
+        logger.debug("Calling Hugging Face try-on API")
+        response = requests.post(api_url, headers=headers, files=files, data={'category': category}, timeout=60)
+        
+        if response.status_code == 200:
+            result_type = response.headers.get('Content-Type', 'image/png').split(';')[0]
+            return virtual_tryon_upload_response(response.content, result_type, fmt)
+        
+        logger.warning("Hugging Face try-on API error: %s - %s", response.status_code, response.text)
+        message = f'API error (falling back to demo mode): {response.text}'
+        
+    except Exception as api_error:
+        logger.exception("Hugging Face try-on API call failed: %s", api_error)
+        message = f'API call failed (demo mode): {str(api_error)}'
+    
+    # Fallback to demo mode on error
+    person_stream.seek(0)
+    return virtual_tryon_upload_response(person_stream, person_type, fmt, message)
+
+@app.route('/api/virtual-tryon/results/<result_id>', methods=['GET'])
+def virtual_tryon_result(result_id):
+    """Fetch a try-on result stored for ?response=url requests"""
+    stored = tryon_result_store.get(result_id)
+    if stored is None:
+        return jsonify({'error': 'Result not found or expired'}), 404
+    data, mimetype = stored
+    return image_response(data, mimetype)
+
 @app.route('/api/virtual-tryon', methods=['POST'])
 def virtual_tryon():
     """
     Virtual Try-On endpoint - Proxy to Hugging Face IDM-VTON API
-    This avoids CORS issues and keeps API key secure
+    This avoids CORS issues and keeps API key secure.
+    Accepts base64 JSON, or multipart/form-data uploads (?response=binary|url|json)
     """
+    if is_multipart(request):
+        try:
+            return virtual_tryon_upload()
+        except Exception as e:
+            logger.exception("Virtual try-on upload error: %s", e)
+            return jsonify({'error': str(e)}), 500
+    
     try:
         data = request.json
         person_image = data.get('person_image')
@@ -957,12 +1190,12 @@ def virtual_tryon():
         # Get Hugging Face API key from environment
         hf_api_key = Config.HUGGINGFACE_API_KEY if hasattr(Config, 'HUGGINGFACE_API_KEY') else None
         
-        print(f"Virtual Try-On request - Category: {category}")
+        logger.debug("Virtual try-on request: category=%s", category)
         
         # Check if API key is configured
         if not hf_api_key or hf_api_key == 'your_huggingface_api_key_here':
             # Demo mode - return person image
-            print("Running in demo mode (no API key configured)")
+            logger.debug("Virtual try-on in demo mode (no API key configured)")
             return jsonify({
                 'success': True,
                 'result_image': person_image,  # For demo, return person image
@@ -990,7 +1223,7 @@ def virtual_tryon():
                 }
             }
             
-            print("Calling Hugging Face API...")
+            logger.debug("Calling Hugging Face try-on API")
             response = requests.post(api_url, headers=headers, json=payload, timeout=60)
             
             if response.status_code == 200:
@@ -1003,7 +1236,7 @@ def virtual_tryon():
                     'result_image': f'data:image/png;base64,{result_base64}'
                 }), 200
             else:
-                print(f"Hugging Face API error: {response.status_code} - {response.text}")
+                logger.warning("Hugging Face try-on API error: %s - %s", response.status_code, response.text)
                 # Fallback to demo mode on API error
                 return jsonify({
                     'success': True,
@@ -1012,7 +1245,7 @@ def virtual_tryon():
                 }), 200
                 
         except Exception as api_error:
-            print(f"Hugging Face API call error: {api_error}")
+            logger.exception("Hugging Face try-on API call failed: %s", api_error)
             # Fallback to demo mode on error
             return jsonify({
                 'success': True,
@@ -1021,7 +1254,7 @@ def virtual_tryon():
             }), 200
         
     except Exception as e:
-        print(f"Virtual try-on error: {e}")
+        logger.exception("Virtual try-on error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 # ============= USER DATA ISOLATION ENDPOINTS =============
@@ -0,0 +1,169 @@
+# Auth Middleware - verify each JWT once per request and cache the decoded claims
+import math
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import jwt
+from flask import g, request
+from config import Config
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over bytes keys. No false negatives, so a miss
+    proves a token was never revoked without touching the revocation list.
+    """
+
+    def __init__(self, capacity=10000, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Kirsch-Mitzenmacher double hashing from one blake2b digest
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class JWTAuth:
+    """
+    Token verification with a bounded LRU of decoded claims keyed by the
+    token's SHA-256 digest. An entry lives until the token's own `exp`, so
+    a cached token never outlives its signature. With revocation enabled,
+    revoked digests go into a Bloom filter; only a Bloom hit consults the
+    exact revocation list.
+    """
+
+    def __init__(self, secret, algorithms=('HS256',), max_entries=10000, default_ttl=3600,
+                 revocation_enabled=False, revocation_capacity=10000):
+        self.secret = secret
+        self.algorithms = list(algorithms)
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.revocation_enabled = revocation_enabled
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._revoked = {}
+        self._bloom = BloomFilter(revocation_capacity) if revocation_enabled else None
+        self.stats = {'hits': 0, 'misses': 0, 'invalid': 0, 'revoked': 0, 'evictions': 0}
+
+    @staticmethod
+    def digest(token):
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def _is_revoked(self, key):
+        if self._bloom is None or key not in self._bloom:
+            return False
+        expires_at = self._revoked.get(key)
+        return expires_at is not None and expires_at > time.time()
+
+    def verify(self, token):
+        """Decoded claims for a valid, unexpired, unrevoked token - else None"""
+        if not token:
+            return None
+        key = self.digest(token)
+        now = time.time()
+
+        if self._is_revoked(key):
+            self.stats['revoked'] += 1
+            return None
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                claims, expires_at = entry
+                if expires_at > now:
+                    self._cache.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return claims
+                del self._cache[key]
+
+        try:
+            claims = jwt.decode(token, self.secret, algorithms=self.algorithms)
+        except jwt.InvalidTokenError:
+            # Covers ExpiredSignatureError; invalid tokens are not cached
+            self.stats['invalid'] += 1
+            return None
+
+        expires_at = float(claims['exp']) if 'exp' in claims else now + self.default_ttl
+        with self._lock:
+            self.stats['misses'] += 1
+            self._cache[key] = (claims, expires_at)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+                self.stats['evictions'] += 1
+        return claims
+
+    def revoke(self, token):
+        """Reject `token` from now on (until its exp). Returns False when revocation is disabled"""
+        if not self.revocation_enabled or not token:
+            return False
+        key = self.digest(token)
+        try:
+            claims = jwt.decode(token, self.secret, algorithms=self.algorithms,
+                                options={'verify_exp': False})
+            expires_at = float(claims.get('exp', time.time() + self.default_ttl))
+        except jwt.InvalidTokenError:
+            return False
+
+        with self._lock:
+            now = time.time()
+            # Drop revocations whose tokens expired anyway
+            for stale in [k for k, exp in self._revoked.items() if exp <= now]:
+                del self._revoked[stale]
+            self._revoked[key] = expires_at
+            self._bloom.add(key)
+            self._cache.pop(key, None)
+        return True
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return dict(self.stats, cached=len(self._cache), revoked_tokens=len(self._revoked),
+                        hit_rate=round(self.stats['hits'] / lookups, 3) if lookups else None)
+
+    # ------------------------------------------------------------------
+    # Flask integration
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def token_from_request(req):
+        token = req.headers.get('Authorization')
+        if token and token.startswith('Bearer '):
+            token = token[7:]
+        return token or None
+
+    def _authenticate_request(self):
+        token = self.token_from_request(request)
+        claims = self.verify(token) if token else None
+        g.auth_token = token
+        g.auth_claims = claims
+        g.user_email = claims.get('email') if claims else None
+        g.user_id = claims.get('user_id') if claims else None
+
+    def init_app(self, app):
+        """Verify the Authorization header once per request; handlers read flask.g"""
+        app.before_request(self._authenticate_request)
+
+def current_user_email():
+    """Email from the request's verified token (None when anonymous or invalid)"""
+    return g.get('user_email')
+
+def current_claims():
+    return g.get('auth_claims')
+
+# Singleton instance
+jwt_auth = JWTAuth(
+    Config.JWT_SECRET,
+    max_entries=Config.JWT_CACHE_SIZE,
+    revocation_enabled=Config.JWT_REVOCATION_ENABLED
+)
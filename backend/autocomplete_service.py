@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Autocomplete Service
+Typeahead suggestions from catalog vocabulary and past searches, served from memory
+"""
+
+import os
+import sys
+import math
+import time
+import logging
+import threading
+
+# The index lives in the chat agent package so both services share one implementation
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_agent.autocomplete import AutocompleteIndex
+from config import Config
+from db import execute_query, get_catalog_version
+from catalog_facets import catalog_facet_service
+
+logger = logging.getLogger(__name__)
+
+# Past searches are only suggested once this many different users have made them,
+# so one shopper's searches are never shown to everyone else
+POPULAR_QUERIES_SQL = """
+    SELECT LOWER(TRIM(search_query)) AS search_query, COUNT(DISTINCT user_email) AS users,
+           MAX(results_count) AS results_count
+    FROM user_search_history
+    WHERE search_query <> ''
+    GROUP BY LOWER(TRIM(search_query))
+    HAVING COUNT(DISTINCT user_email) >= %s
+"""
+
+def history_weight(results_count, users=1):
+    """A past search counts more when it found more products and more users made it; zero-result searches are not suggested"""
+    results_count = int(results_count or 0)
+    return (1.0 + math.log1p(results_count)) * int(users or 1) if results_count > 0 else 0.0
+
+class AutocompleteService:
+    def __init__(self):
+        self.index = AutocompleteIndex()
+        self._lock = threading.Lock()
+        self._built = False
+        self._catalog_version = None
+        self._catalog_entries_cache = []
+        self._next_check = 0.0
+        self._next_history = 0.0
+        self.stats = {'rebuilds': 0, 'rebuild_ms': 0.0, 'history_queries': 0, 'lookups': 0}
+
+    def _catalog_rows(self, version):
+        """Name, category and color per product - from the shared snapshot when there is one"""
+        snapshot = catalog_facet_service.snapshot(version)
+        if snapshot is not None:
+            return snapshot.rows(('product_name', 'product_category', 'color'))
+        rows = execute_query("SELECT product_name, product_category, color FROM clothing", fetch=True)
+        if rows is None:
+            # execute_query swallows errors - an empty index must not look built
+            raise ConnectionError("clothing scan for autocomplete failed")
+        return rows
+
+    def _catalog_entries(self, version):
+        categories, colors = {}, {}
+        for row in self._catalog_rows(version):
+            if row.get('product_name'):
+                yield row['product_name'], 'product', 1.0
+            if row.get('product_category'):
+                categories[row['product_category']] = categories.get(row['product_category'], 0) + 1
+            if row.get('color'):
+                colors[row['color']] = colors.get(row['color'], 0) + 1
+        # Facet values are weighted by how many products they would return
+        for category, count in categories.items():
+            yield category, 'category', float(count)
+        for color, count in colors.items():
+            yield color, 'color', count * 0.5
+
+    def _history_entries(self):
+        """Popular past searches (enough distinct users), weighted by results and users"""
+        rows = execute_query(POPULAR_QUERIES_SQL, (Config.AUTOCOMPLETE_MIN_USERS,), fetch=True)
+        if rows is None:
+            raise ConnectionError("search history query for autocomplete failed")
+        entries = []
+        for row in rows:
+            weight = history_weight(row['results_count'], row['users'])
+            if weight:
+                entries.append((row['search_query'], 'query', weight))
+        return entries
+
+    def rebuild(self, reload_catalog=True):
+        """
+        Rebuild from the catalog and the popular searches. With
+        reload_catalog=False the catalog entries of the last build are reused,
+        so only the history part is re-read. Raises on database errors and
+        then leaves the current index in place.
+        """
+        started = time.time()
+        if reload_catalog or not self._built:
+            version = get_catalog_version()
+            catalog_entries = list(self._catalog_entries(version))
+        else:
+            version, catalog_entries = self._catalog_version, self._catalog_entries_cache
+        history_entries = self._history_entries()
+        self.index.build(catalog_entries + history_entries)
+        self._catalog_version = version
+        self._catalog_entries_cache = catalog_entries
+        self._next_history = time.time() + Config.AUTOCOMPLETE_HISTORY_REFRESH_SECONDS
+        self._built = True
+        self.stats['rebuilds'] += 1
+        self.stats['history_queries'] = len(history_entries)
+        self.stats['rebuild_ms'] = round((time.time() - started) * 1000, 1)
+        logger.info("🔤 Autocomplete index built: %d phrases, %d popular searches (%s ms)",
+                    len(self.index), len(history_entries), self.stats['rebuild_ms'])
+
+    def ensure_fresh(self):
+        """
+        Build on first use (retrying on every call until a build succeeds);
+        afterwards, at most every AUTOCOMPLETE_REFRESH_SECONDS, rebuild on a new
+        catalog version, and re-read the popular searches every
+        AUTOCOMPLETE_HISTORY_REFRESH_SECONDS so deleted history drops out too
+        """
+        now = time.time()
+        if self._built and now < self._next_check:
+            return
+        if not self._lock.acquire(blocking=not self._built):
+            return  # another request is refreshing - answer from the current index
+        try:
+            if self._built and now < self._next_check:
+                return
+            self._next_check = now + Config.AUTOCOMPLETE_REFRESH_SECONDS
+            if not self._built or get_catalog_version() != self._catalog_version:
+                self.rebuild()
+            elif now >= self._next_history:
+                self.rebuild(reload_catalog=False)
+        except Exception as e:
+            logger.warning("Autocomplete refresh failed, keeping the current index: %s", e)
+        finally:
+            self._lock.release()
+
+    def suggest(self, prefix, limit=8, kinds=None):
+        self.ensure_fresh()
+        self.stats['lookups'] += 1
+        return self.index.suggest(prefix, limit=limit, kinds=kinds)
+
+    def get_stats(self):
+        return dict(self.stats, **self.index.get_stats(), catalog_version=self._catalog_version)
+
+# Singleton instance
+autocomplete_service = AutocompleteService()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark AI Try-On Runtimes
+Latency, throughput and memory of the Keras, ONNX Runtime and TFLite backends.
+Each runtime runs in its own process so memory numbers are not mixed up.
+
+Usage:
+    python benchmark_tryon_runtime.py
+    python benchmark_tryon_runtime.py --runtimes keras,onnx --batch-sizes 1,8 --int8
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+
+def peak_rss_mb():
+    # ru_maxrss is KB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+def run_single(runtime, quantized, batch_sizes, iterations):
+    """Measure one runtime in this process and print a JSON result line"""
+    import numpy as np
+    from config import Config
+    from tryon_runtime import load_runtime
+
+    baseline_rss = peak_rss_mb()
+    started = time.perf_counter()
+    if runtime == 'keras':
+        from ai_tryon_api import ai_tryon_backend
+        model = ai_tryon_backend.load_keras_model()
+    else:
+        model = load_runtime(runtime, Config.TRYON_MODEL_PATH, threads=Config.TRYON_RUNTIME_THREADS,
+                             quantized=quantized)
+        if model is None:
+            print(json.dumps({'runtime': runtime, 'quantized': quantized, 'error': 'not available'}))
+            return
+    load_ms = (time.perf_counter() - started) * 1000
+    load_rss = peak_rss_mb()
+
+    rng = np.random.default_rng(0)
+    latencies = {}
+    for batch_size in batch_sizes:
+        shape = (batch_size, 512, 512, 3)
+        inputs = [rng.random(shape, dtype=np.float32), rng.random(shape, dtype=np.float32)]
+        model.predict(inputs, batch_size=batch_size, verbose=0)  # warm-up
+
+        timings = []
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            model.predict(inputs, batch_size=batch_size, verbose=0)
+            timings.append((time.perf_counter() - t0) * 1000)
+        timings.sort()
+        p50 = timings[len(timings) // 2]
+        latencies[str(batch_size)] = {
+            'p50_ms': round(p50, 2),
+            'p95_ms': round(timings[min(int(len(timings) * 0.95), len(timings) - 1)], 2),
+            'images_per_sec': round(batch_size * 1000 / p50, 2)
+        }
+
+    print(json.dumps({
+        'runtime': runtime,
+        'quantized': quantized,
+        'load_ms': round(load_ms, 1),
+        'load_rss_mb': round(load_rss - baseline_rss, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'latency': latencies
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark AI try-on runtimes')
+    parser.add_argument('--runtimes', default='keras,onnx,tflite')
+    parser.add_argument('--batch-sizes', default='1,4,8')
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--int8', action='store_true', help='also benchmark the int8 exports')
+    parser.add_argument('--single', help=argparse.SUPPRESS)
+    parser.add_argument('--quantized', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    batch_sizes = [int(b) for b in args.batch_sizes.split(',')]
+
+    if args.single:
+        run_single(args.single, args.quantized, batch_sizes, args.iterations)
+        return
+
+    runs = []
+    for runtime in args.runtimes.split(','):
+        runs.append((runtime, False))
+        if args.int8 and runtime != 'keras':
+            runs.append((runtime, True))
+
+    results = []
+    for runtime, quantized in runs:
+        label = f"{runtime}{' int8' if quantized else ''}"
+        print(f"⏱️ Benchmarking {label}...")
+        command = [sys.executable, os.path.abspath(__file__), '--single', runtime,
+                   '--batch-sizes', args.batch_sizes, '--iterations', str(args.iterations)]
+        if quantized:
+            command.append('--quantized')
+        output = subprocess.run(command, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        lines = [line for line in output.stdout.splitlines() if line.startswith('{')]
+        if not lines:
+            error = output.stderr.strip().splitlines()
+            print(f"❌ {label} failed: {error[-1] if error else 'no output'}")
+            continue
+        results.append(json.loads(lines[-1]))
+
+    print("\n" + "="*78)
+    print(f"{'runtime':<14}{'load ms':>10}{'load MB':>10}{'peak MB':>10}   latency p50 ms (images/sec) per batch")
+    print("-"*78)
+    for result in results:
+        label = f"{result['runtime']}{' int8' if result['quantized'] else ''}"
+        if 'error' in result:
+            print(f"{label:<14}{result['error']}")
+            continue
+        per_batch = '  '.join(
+            f"b{size}: {stats['p50_ms']} ({stats['images_per_sec']})" for size, stats in result['latency'].items()
+        )
+        print(f"{label:<14}{result['load_ms']:>10}{result['load_rss_mb']:>10}{result['peak_rss_mb']:>10}   {per_batch}")
+    print("="*78)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Catalog Facet Service
+Serves counts, distinct values and price histograms for the clothing table from memory
+"""
+
+import os
+import sys
+
+# The facet store and catalog snapshot live in the chat agent package so both services share one implementation
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_agent.facet_store import CatalogFacetStore
+from chat_agent.shared_catalog import SharedCatalog, CLOTHING_SNAPSHOT_QUERY, FACET_COLUMNS
+from config import Config
+from db import execute_query, get_catalog_version
+
+class CatalogFacetService:
+    def __init__(self):
+        # One memory-mapped catalog per host, shared by every worker process
+        self.shared_catalog = SharedCatalog(
+            Config.SHARED_CATALOG_DIR or None,
+            check_seconds=Config.SHARED_CATALOG_CHECK_SECONDS,
+            max_age=Config.SHARED_CATALOG_MAX_AGE_SECONDS
+        ) if Config.SHARED_CATALOG_ENABLED else None
+        self.store = CatalogFacetStore(
+            loader=self._load_rows,
+            version_probe=get_catalog_version,
+            check_interval=Config.FACET_REFRESH_SECONDS,
+            max_age=Config.SHARED_CATALOG_MAX_AGE_SECONDS
+        )
+
+    def _load_rows(self):
+        """Facet rows from the shared snapshot, else a narrow scan of the clothing table"""
+        snapshot = self.snapshot(get_catalog_version())
+        if snapshot is not None:
+            return list(snapshot.rows(FACET_COLUMNS))
+        rows = execute_query(
+            "SELECT product_category, gender, color, size, price FROM clothing",
+            fetch=True
+        )
+        if rows is None:
+            # execute_query swallows errors - keep the last facets rather than empty ones
+            raise ConnectionError("clothing facet scan failed")
+        return rows
+
+    def snapshot(self, version=None):
+        """
+        Shared catalog snapshot for `version` (the live one when None). The
+        first worker to ask for a new version builds it; the rest map it.
+        """
+        if self.shared_catalog is None:
+            return None
+        try:
+            if version is None:
+                return self.shared_catalog.current()
+            return self.shared_catalog.ensure(version, self._load_snapshot_rows)
+        except Exception as e:
+            print(f"Shared catalog unavailable, reading the database: {e}")
+            return None
+
+    def _load_snapshot_rows(self):
+        rows = execute_query(CLOTHING_SNAPSHOT_QUERY.format(table='clothing'), fetch=True)
+        if rows is None:
+            # An empty snapshot would be published to every worker - keep the current one
+            raise ConnectionError("clothing snapshot scan failed")
+        return rows
+
+    def total_count(self):
+        return self.store.total_count()
+
+    def categories(self):
+        return self.store.categories()
+
+    def colors(self):
+        return self.store.colors()
+
+    def price_range(self):
+        return self.store.price_range()
+
+    def stats(self):
+        stats = self.store.stats()
+        if self.shared_catalog is not None:
+            stats['shared_catalog'] = self.shared_catalog.get_stats()
+        return stats
+
+    def facets_for_filters(self, filters):
+        """Facet counts for a search-natural filter dict"""
+        category = filters.get('product_category') or filters.get('category_group')
+        return self.store.facet_counts(
+            category=category,
+            gender=filters.get('gender'),
+            color=filters.get('color'),
+            size=filters.get('size')
+        )
+
+# Singleton instance
+catalog_facet_service = CatalogFacetService()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Catalog Reload - shadow table bulk load with an atomic RENAME TABLE swap
+Readers keep seeing the old catalog until the new one is fully loaded,
+indexed and validated; the previous table is kept for rollback
+
+Usage:
+    with CatalogReload(conn, 'products') as reload:
+        reload.add({'id': ..., 'title': ...})
+    # swapped on clean exit, shadow dropped on error
+
+    python catalog_reload.py rollback products
+"""
+
+import sys
+import time
+
+CATALOG_META_DDL = """
+    CREATE TABLE IF NOT EXISTS catalog_meta (
+        meta_key VARCHAR(64) PRIMARY KEY,
+        meta_value BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    )
+"""
+
+class CatalogReloadError(Exception):
+    """Raised when a reload is rejected - the live table is left untouched"""
+    pass
+
+def _fetch_dicts(cursor):
+    """Rows as dicts for both dictionary and tuple cursors (mysql.connector / pymysql)"""
+    rows = cursor.fetchall()
+    if rows and not isinstance(rows[0], dict):
+        columns = [d[0] for d in cursor.description]
+        rows = [dict(zip(columns, row)) for row in rows]
+    return rows
+
+def _scalar(cursor, query, params=()):
+    cursor.execute(query, params)
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return list(row.values())[0] if isinstance(row, dict) else row[0]
+
+def table_exists(cursor, table):
+    return bool(_scalar(
+        cursor,
+        "SELECT COUNT(*) FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table,)
+    ))
+
+def bump_catalog_version(cursor):
+    """
+    Bump the catalog_version row in catalog_meta (creating the table on first
+    use) on the reload's own connection, so every process that probes
+    db.get_catalog_version drops its facets, cached searches and snapshot
+    """
+    cursor.execute(CATALOG_META_DDL)
+    cursor.execute(
+        "INSERT INTO catalog_meta (meta_key, meta_value) VALUES ('catalog_version', 1) "
+        "ON DUPLICATE KEY UPDATE meta_value = meta_value + 1"
+    )
+
+def repoint_foreign_keys(cursor, from_table, to_table):
+    """
+    RENAME TABLE carries child foreign keys along with the renamed parent, so
+    after a swap they point at the backup table. Re-create them against the
+    live table (without re-validating existing rows).
+    """
+    cursor.execute("""
+        SELECT rc.CONSTRAINT_NAME AS name, rc.TABLE_NAME AS child, rc.UPDATE_RULE AS on_update,
+               rc.DELETE_RULE AS on_delete,
+               GROUP_CONCAT(k.COLUMN_NAME ORDER BY k.ORDINAL_POSITION) AS columns,
+               GROUP_CONCAT(k.REFERENCED_COLUMN_NAME ORDER BY k.ORDINAL_POSITION) AS referenced
+        FROM information_schema.REFERENTIAL_CONSTRAINTS rc
+        JOIN information_schema.KEY_COLUMN_USAGE k
+          ON k.CONSTRAINT_SCHEMA = rc.CONSTRAINT_SCHEMA
+         AND k.CONSTRAINT_NAME = rc.CONSTRAINT_NAME
+         AND k.TABLE_NAME = rc.TABLE_NAME
+        WHERE rc.CONSTRAINT_SCHEMA = DATABASE() AND rc.REFERENCED_TABLE_NAME = %s
+        GROUP BY rc.CONSTRAINT_NAME, rc.TABLE_NAME, rc.UPDATE_RULE, rc.DELETE_RULE
+    """, (from_table,))
+    constraints = _fetch_dicts(cursor)
+    if not constraints:
+        return 0
+
+    cursor.execute("SET foreign_key_checks = 0")
+    try:
+        for fk in constraints:
+            columns = ', '.join(f"`{c}`" for c in fk['columns'].split(','))
+            referenced = ', '.join(f"`{c}`" for c in fk['referenced'].split(','))
+            cursor.execute(
+                f"ALTER TABLE `{fk['child']}` DROP FOREIGN KEY `{fk['name']}`, "
+                f"ADD CONSTRAINT `{fk['name']}` FOREIGN KEY ({columns}) REFERENCES `{to_table}` ({referenced}) "
+                f"ON DELETE {fk['on_delete']} ON UPDATE {fk['on_update']}"
+            )
+    finally:
+        cursor.execute("SET foreign_key_checks = 1")
+    return len(constraints)
+
+class CatalogReload:
+    """
+    Bulk-load a replacement for `table` into `<table>_shadow`, then swap it in.
+
+    - The shadow starts as `CREATE TABLE ... LIKE` the live table (or from
+      `create_sql`, with `{table}` as the name placeholder, for a new schema).
+    - Secondary non-unique indexes are dropped for the load and rebuilt in
+      one ALTER afterwards.
+    - Rows are inserted with multi-row INSERT IGNORE batches.
+    - The swap is rejected when the new catalog has fewer than `min_rows`
+      rows or shrinks below `min_ratio` of the live one (e.g. an upstream
+      API outage), unless `force` is set.
+    """
+
+    def __init__(self, connection, table='products', create_sql=None, batch_size=500,
+                 min_rows=1, min_ratio=0.5, force=False, bump_version=True):
+        self.connection = connection
+        self.table = table
+        self.shadow = f"{table}_shadow"
+        self.backup = f"{table}_old"
+        self.create_sql = create_sql
+        self.batch_size = batch_size
+        self.min_rows = min_rows
+        self.min_ratio = min_ratio
+        self.force = force
+        self.bump_version = bump_version
+
+        self.cursor = connection.cursor()
+        self.columns = None
+        self.loaded = 0
+        self._pending = []
+        self._deferred_indexes = []
+        self._started = None
+        self.stats = {}
+
+    # ------------------------------------------------------------------
+    # Shadow table
+    # ------------------------------------------------------------------
+
+    def begin(self):
+        self._started = time.time()
+        self.cursor.execute(f"DROP TABLE IF EXISTS `{self.shadow}`")
+
+        if self.create_sql:
+            self.cursor.execute(self.create_sql.format(table=self.shadow))
+        elif table_exists(self.cursor, self.table):
+            self.cursor.execute(f"CREATE TABLE `{self.shadow}` LIKE `{self.table}`")
+        else:
+            raise CatalogReloadError(f"Table '{self.table}' does not exist and no create_sql was given")
+
+        self._defer_secondary_indexes()
+        self.connection.commit()
+        print(f"🧱 Loading into shadow table '{self.shadow}'")
+        return self
+
+    def _defer_secondary_indexes(self):
+        """Drop non-unique secondary indexes now and remember how to rebuild them"""
+        self.cursor.execute(f"SHOW INDEX FROM `{self.shadow}`")
+        indexes = {}
+        for row in _fetch_dicts(self.cursor):
+            if row['Key_name'] == 'PRIMARY' or int(row['Non_unique']) == 0:
+                continue
+            part = f"`{row['Column_name']}`" + (f"({row['Sub_part']})" if row.get('Sub_part') else '')
+            entry = indexes.setdefault(row['Key_name'], {'type': row.get('Index_type'), 'parts': []})
+            entry['parts'].append((int(row['Seq_in_index']), part))
+
+        for name, entry in indexes.items():
+            kind = 'FULLTEXT INDEX' if entry['type'] == 'FULLTEXT' else 'INDEX'
+            parts = ', '.join(part for _, part in sorted(entry['parts']))
+            self._deferred_indexes.append(f"ADD {kind} `{name}` ({parts})")
+
+        if indexes:
+            drops = ', '.join(f"DROP INDEX `{name}`" for name in indexes)
+            self.cursor.execute(f"ALTER TABLE `{self.shadow}` {drops}")
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def add(self, row):
+        """Queue one row (dict) for the shadow table"""
+        if self.columns is None:
+            self.columns = list(row.keys())
+        self._pending.append(tuple(row.get(column) for column in self.columns))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, rows):
+        for row in rows:
+            self.add(row)
+
+    def flush(self):
+        if not self._pending:
+            return
+        column_sql = ', '.join(f"`{c}`" for c in self.columns)
+        placeholders = ', '.join(['%s'] * len(self.columns))
+        # Both drivers rewrite executemany INSERTs into one multi-row statement
+        self.cursor.executemany(
+            f"INSERT IGNORE INTO `{self.shadow}` ({column_sql}) VALUES ({placeholders})",
+            self._pending
+        )
+        self.connection.commit()
+        self.loaded += len(self._pending)
+        self._pending = []
+
+    # ------------------------------------------------------------------
+    # Validate + swap
+    # ------------------------------------------------------------------
+
+    def _rebuild_indexes(self):
+        if self._deferred_indexes:
+            started = time.time()
+            self.cursor.execute(f"ALTER TABLE `{self.shadow}` {', '.join(self._deferred_indexes)}")
+            self.stats['index_build_seconds'] = round(time.time() - started, 2)
+
+    def validate(self):
+        new_count = _scalar(self.cursor, f"SELECT COUNT(*) FROM `{self.shadow}`") or 0
+        live_exists = table_exists(self.cursor, self.table)
+        live_count = (_scalar(self.cursor, f"SELECT COUNT(*) FROM `{self.table}`") or 0) if live_exists else 0
+        self.stats.update({'new_rows': new_count, 'previous_rows': live_count})
+
+        if self.force:
+            return live_exists
+        if new_count < self.min_rows:
+            raise CatalogReloadError(f"Shadow table has {new_count} rows (minimum {self.min_rows})")
+        if live_count and new_count < live_count * self.min_ratio:
+            raise CatalogReloadError(
+                f"New catalog has {new_count} rows vs {live_count} live - "
+                f"below {self.min_ratio:.0%}, refusing to swap (use force=True to override)"
+            )
+        return live_exists
+
+    def commit(self):
+        """Flush, build indexes, validate and atomically swap the shadow in"""
+        self.flush()
+        self._rebuild_indexes()
+        live_exists = self.validate()
+
+        self.cursor.execute(f"DROP TABLE IF EXISTS `{self.backup}`")
+        if live_exists:
+            # Single RENAME TABLE statement - readers see either the old or the new table
+            self.cursor.execute(
+                f"RENAME TABLE `{self.table}` TO `{self.backup}`, `{self.shadow}` TO `{self.table}`"
+            )
+            self.stats['foreign_keys_repointed'] = repoint_foreign_keys(self.cursor, self.backup, self.table)
+        else:
+            self.cursor.execute(f"RENAME TABLE `{self.shadow}` TO `{self.table}`")
+
+        if self.bump_version:
+            bump_catalog_version(self.cursor)
+        self.connection.commit()
+
+        self.stats['seconds'] = round(time.time() - self._started, 2)
+        print(f"🔁 Swapped '{self.table}': {self.stats['previous_rows']} → {self.stats['new_rows']} rows "
+              f"in {self.stats['seconds']}s (previous table kept as '{self.backup}')")
+        return self.stats
+
+    def abort(self):
+        """Discard the shadow table; the live catalog is unchanged"""
+        self._pending = []
+        try:
+            self.cursor.execute(f"DROP TABLE IF EXISTS `{self.shadow}`")
+            self.connection.commit()
+        except Exception as e:
+            print(f"⚠️  Could not drop shadow table '{self.shadow}': {e}")
+
+    def __enter__(self):
+        return self.begin()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            try:
+                self.commit()
+            except Exception:
+                self.abort()
+                raise
+        else:
+            self.abort()
+            print(f"↩️  Reload of '{self.table}' aborted - live catalog unchanged")
+        self.cursor.close()
+        return False
+
+def rollback_catalog(connection, table='products'):
+    """Swap the previous catalog (`<table>_old`) back in"""
+    cursor = connection.cursor()
+    backup, discarded = f"{table}_old", f"{table}_rolled_back"
+    try:
+        if not table_exists(cursor, backup):
+            raise CatalogReloadError(f"No backup table '{backup}' to roll back to")
+
+        cursor.execute(f"DROP TABLE IF EXISTS `{discarded}`")
+        cursor.execute(f"RENAME TABLE `{table}` TO `{discarded}`, `{backup}` TO `{table}`")
+        repoint_foreign_keys(cursor, discarded, table)
+        cursor.execute(f"DROP TABLE `{discarded}`")
+        bump_catalog_version(cursor)
+        connection.commit()
+        print(f"↩️  Rolled '{table}' back to the previous catalog")
+        return True
+    finally:
+        cursor.close()
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == 'rollback':
+        from db import get_db_connection
+        conn = get_db_connection()
+        if conn:
+            try:
+                rollback_catalog(conn, sys.argv[2] if len(sys.argv) > 2 else 'products')
+            except CatalogReloadError as e:
+                print(f"❌ {e}")
+            finally:
+                conn.close()
+    else:
+        print("Usage: python catalog_reload.py rollback [table]")
@@ -4,8 +4,11 @@ Clothing API Service
 Service to fetch products from the clothing table with proper column mapping
 """
 
+import logging
 from db import execute_query
 
+logger = logging.getLogger(__name__)
+
 class ClothingAPIService:
     def __init__(self):
         pass
@@ -32,7 +35,7 @@ class ClothingAPIService:
             """
             params = []
             
-            print(f"DEBUG: get_clothing_products called - category={category}, gender={gender}, search_query={search_query}")
+            logger.debug("get_clothing_products: category=%s gender=%s search_query=%s", category, gender, search_query)
             
             # Flexible search across title, category, gender, description
             if search_query:
@@ -107,8 +110,7 @@ class ClothingAPIService:
             query += " ORDER BY created_at DESC LIMIT %s"
             params.append(limit)
             
-            print(f"DEBUG: Final query: {query}")
-            print(f"DEBUG: Final params: {params}")
+            logger.debug("get_clothing_products SQL: %s params=%s", query, params)
             
             products = execute_query(query, tuple(params), fetch=True)
             
@@ -134,14 +136,14 @@ class ClothingAPIService:
                     }
                     transformed_products.append(transformed_product)
                 
-                print(f"DEBUG: Returning {len(transformed_products)} clothing products")
+                logger.debug("Returning %d clothing products", len(transformed_products))
                 return transformed_products
             
-            print(f"DEBUG: No products found")
+            logger.debug("No clothing products found")
             return []
             
         except Exception as e:
-            print(f"Database error in get_clothing_products: {e}")
+            logger.exception("Database error in get_clothing_products: %s", e)
             return []
     
     def get_products(self, query, category='fashion', use_cache_first=True):
@@ -152,15 +154,15 @@ class ClothingAPIService:
         if query.lower() in ['clothing fashion', 'fashion', 'clothing']:
             products = self.get_clothing_products(limit=500)
             if products:
-                print(f"📦 Returning ALL {len(products)} products from clothing table")
+                logger.debug("Returning all %d products from clothing table", len(products))
                 return products
         else:
             products = self.get_clothing_products(search_query=query, limit=500)
             if products:
-                print(f"📦 Returning {len(products)} products from clothing table for query: {query}")
+                logger.debug("Returning %d products from clothing table for query %r", len(products), query)
                 return products
         
-        print("⚠️ No products found in clothing table")
+        logger.debug("No products found in clothing table for query %r", query)
         return []
     
     def get_cached_products(self, category=None, gender=None, limit=500, search_query=None):
@@ -9,9 +9,84 @@ class Config:
     DB_PASSWORD = os.getenv('DB_PASSWORD', '')
     DB_NAME = os.getenv('DB_NAME', 'fashiopulse')
     JWT_SECRET = os.getenv('JWT_SECRET', 'your-secret-key')
+    # Decoded-claims cache (entries expire with the token) and optional logout revocation
+    JWT_CACHE_SIZE = int(os.getenv('JWT_CACHE_SIZE', 10000))
+    JWT_REVOCATION_ENABLED = os.getenv('JWT_REVOCATION_ENABLED', 'true').lower() == 'true'
     PORT = int(os.getenv('PORT', 5000))
     
+    # Logging - JSON lines via a background writer. LOG_LEVELS overrides per
+    # module ('werkzeug=WARNING,app=DEBUG'); DEBUG records are sampled and
+    # capped per call site per second
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_LEVELS = os.getenv('LOG_LEVELS', 'werkzeug=WARNING')
+    LOG_JSON = os.getenv('LOG_JSON', 'true').lower() == 'true'
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 1.0))
+    LOG_DEBUG_PER_SECOND = int(os.getenv('LOG_DEBUG_PER_SECOND', 20))
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    
     # API Keys
     RAPIDAPI_KEY = os.getenv('RAPIDAPI_KEY', '')
     RAPIDAPI_KEY_EBAY = os.getenv('RAPIDAPI_KEY_EBAY', '')  # Can be same or different key
     HUGGINGFACE_API_KEY = os.getenv('HUGGINGFACE_API_KEY', '')  # For Virtual Try-On
+    
+    # Catalog facet store - seconds between catalog_meta version probes
+    FACET_REFRESH_SECONDS = int(os.getenv('FACET_REFRESH_SECONDS', 30))
+    
+    # Shared catalog snapshot - one memory-mapped copy per host for all workers
+    # (empty dir = /dev/shm/fashionpulse, or the temp dir without /dev/shm)
+    SHARED_CATALOG_ENABLED = os.getenv('SHARED_CATALOG_ENABLED', 'true').lower() == 'true'
+    SHARED_CATALOG_DIR = os.getenv('SHARED_CATALOG_DIR', '')
+    SHARED_CATALOG_CHECK_SECONDS = float(os.getenv('SHARED_CATALOG_CHECK_SECONDS', 2))
+    # Writes to the clothing table do not bump catalog_meta, so the snapshot and the
+    # facets are also rebuilt once they are this old, whatever the version says
+    SHARED_CATALOG_MAX_AGE_SECONDS = float(os.getenv('SHARED_CATALOG_MAX_AGE_SECONDS', 300))
+    
+    # Autocomplete - how often (seconds) to check the catalog version, and to re-read the
+    # popular past searches (made by at least AUTOCOMPLETE_MIN_USERS different users)
+    AUTOCOMPLETE_REFRESH_SECONDS = float(os.getenv('AUTOCOMPLETE_REFRESH_SECONDS', 10))
+    AUTOCOMPLETE_HISTORY_REFRESH_SECONDS = float(os.getenv('AUTOCOMPLETE_HISTORY_REFRESH_SECONDS', 300))
+    AUTOCOMPLETE_MIN_USERS = int(os.getenv('AUTOCOMPLETE_MIN_USERS', 3))
+    
+    # Natural-search result cache - product IDs per canonical filter tuple, dropped on a
+    # catalog version bump; cost is one unit per cached ID
+    RESULT_CACHE_ENABLED = os.getenv('RESULT_CACHE_ENABLED', 'true').lower() == 'true'
+    RESULT_CACHE_MAX_COST = int(os.getenv('RESULT_CACHE_MAX_COST', 50000))
+    RESULT_CACHE_TTL_SECONDS = float(os.getenv('RESULT_CACHE_TTL_SECONDS', 300))
+    
+    # Typo correction for natural-language search ("hoddie" -> "hoodie", up to two edits)
+    TYPO_CORRECTION_ENABLED = os.getenv('TYPO_CORRECTION_ENABLED', 'true').lower() == 'true'
+    # Seconds between catalog version checks; a new version rebuilds the corrector's vocabulary
+    TYPO_CORRECTION_REFRESH_SECONDS = float(os.getenv('TYPO_CORRECTION_REFRESH_SECONDS', 30))
+    
+    # AI Try-On preprocessed tensor cache (memory LRU + memory-mapped .npy files)
+    TRYON_CACHE_DIR = os.getenv('TRYON_CACHE_DIR', os.path.join('models', 'tensor_cache'))
+    TRYON_CACHE_MEMORY_ITEMS = int(os.getenv('TRYON_CACHE_MEMORY_ITEMS', 256))
+    
+    # AI Try-On inference worker - bounded queue, dynamic batching, job ids
+    TRYON_WORKER_ENABLED = os.getenv('TRYON_WORKER_ENABLED', 'true').lower() == 'true'
+    TRYON_QUEUE_SIZE = int(os.getenv('TRYON_QUEUE_SIZE', 32))
+    TRYON_MAX_BATCH_SIZE = int(os.getenv('TRYON_MAX_BATCH_SIZE', 8))
+    TRYON_BATCH_WAIT_MS = int(os.getenv('TRYON_BATCH_WAIT_MS', 20))
+    TRYON_JOB_TTL_SECONDS = int(os.getenv('TRYON_JOB_TTL_SECONDS', 300))
+    TRYON_REQUEST_TIMEOUT_SECONDS = float(os.getenv('TRYON_REQUEST_TIMEOUT_SECONDS', 30))
+    
+    # Try-on multipart uploads - per-image limit, and the overall request body cap
+    TRYON_MAX_UPLOAD_BYTES = int(os.getenv('TRYON_MAX_UPLOAD_BYTES', 10 * 1024 * 1024))
+    MAX_REQUEST_BYTES = int(os.getenv('MAX_REQUEST_BYTES', 32 * 1024 * 1024))
+    
+    # AI Try-On model - Keras file, and which runtime serves it (keras, onnx or tflite).
+    # Exported models live next to the Keras file, see export_tryon_model.py
+    TRYON_MODEL_PATH = os.getenv('TRYON_MODEL_PATH', os.path.join('models', 'ai_tryon_model.h5'))
+    TRYON_RUNTIME = os.getenv('TRYON_RUNTIME', 'keras').lower()
+    TRYON_QUANTIZED = os.getenv('TRYON_QUANTIZED', 'false').lower() == 'true'
+    TRYON_RUNTIME_THREADS = int(os.getenv('TRYON_RUNTIME_THREADS', 0))
+    
+    # Fallback catalog served when the database is down (JSON array or NDJSON, optionally .gz/.zst).
+    # Kept in memory; the file is re-read only after its mtime changes
+    FALLBACK_PRODUCTS_FILE = os.getenv('FALLBACK_PRODUCTS_FILE',
+                                       os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fallback_products.json'))
+    FALLBACK_CHECK_SECONDS = float(os.getenv('FALLBACK_CHECK_SECONDS', 2))
+    
+    # SQL profiling: statements slower than this are logged, and SELECTs get one EXPLAIN capture
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+    EXPLAIN_SLOW_QUERIES = os.getenv('EXPLAIN_SLOW_QUERIES', 'true').lower() == 'true'
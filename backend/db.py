@@ -1,6 +1,28 @@
+import os
+import sys
+import time
 import pymysql
 from config import Config
 
+# The profiler and metrics live in the chat agent package so both services share one implementation
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_agent.query_profiler import QueryProfiler
+from chat_agent.metrics import registry
+
+# Per-request query counts, per-fingerprint timings and slow-query EXPLAIN plans
+query_profiler = QueryProfiler(
+    slow_ms=Config.SLOW_QUERY_MS,
+    explain_slow=Config.EXPLAIN_SLOW_QUERIES
+)
+
+# There is no pool - every execute_query opens its own connection, so opens
+# per second and connections in use are the numbers to watch
+db_connections_opened = registry.counter('db_connections_opened_total', 'MySQL connections opened')
+db_connection_errors = registry.counter('db_connection_errors_total', 'MySQL connection failures')
+db_connections_in_use = registry.gauge('db_connections_in_use', 'MySQL connections held by execute_query')
+db_query_seconds = registry.histogram('db_query_duration_seconds', 'execute_query statement time', ('kind',))
+
 def get_db_connection():
     """Create and return a database connection"""
     try:
@@ -12,8 +34,10 @@ def get_db_connection():
             charset='utf8mb4',
             cursorclass=pymysql.cursors.DictCursor
         )
+        db_connections_opened.inc()
         return connection
     except pymysql.Error as err:
+        db_connection_errors.inc()
         print(f"Error connecting to database: {err}")
         return None
 
@@ -23,18 +47,41 @@ def execute_query(query, params=None, fetch=False):
     if not connection:
         return None
     
+    db_connections_in_use.inc()
     try:
         with connection.cursor() as cursor:
+            started = time.perf_counter()
             cursor.execute(query, params or ())
             
             if fetch:
                 result = cursor.fetchall()
+                elapsed = time.perf_counter() - started
+                db_query_seconds.observe(elapsed, 'read')
+                query_profiler.record(query, elapsed, len(result),
+                                      explain=lambda: _explain(cursor, query, params))
                 return result
             else:
                 connection.commit()
+                elapsed = time.perf_counter() - started
+                db_query_seconds.observe(elapsed, 'write')
+                query_profiler.record(query, elapsed, cursor.rowcount)
                 return cursor.lastrowid
     except pymysql.Error as err:
         print(f"Error executing query: {err}")
         return None
     finally:
+        db_connections_in_use.dec()
         connection.close()
+
+def _explain(cursor, query, params):
+    """EXPLAIN plan rows for a SELECT (run on the same connection, not profiled)"""
+    cursor.execute("EXPLAIN " + query, params or ())
+    return cursor.fetchall()
+
+def get_catalog_version():
+    """Return the current catalog version (0 if it was never bumped)"""
+    result = execute_query(
+        "SELECT meta_value FROM catalog_meta WHERE meta_key = 'catalog_version'",
+        fetch=True
+    )
+    return int(result[0]['meta_value']) if result else 0
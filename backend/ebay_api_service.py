@@ -2,8 +2,9 @@ import requests
 import json
 import os
 from datetime import datetime
-from db import execute_query
+from db import get_db_connection
 from config import Config
+from ingest_pipeline import ApiCacheSink
 
 class EbayAPIService:
     def __init__(self):
@@ -158,44 +159,25 @@ class EbayAPIService:
         return 'unisex'
     
     def store_products_in_cache(self, products):
-        """Store eBay products in database cache"""
-        stored_count = 0
+        """Store eBay products in database cache (one batched upsert, deduped on product_id and content)"""
+        if not products:
+            return 0
         
-        for product in products:
-            try:
-                # Check if product already exists
-                existing = execute_query(
-                    "SELECT id FROM api_cache WHERE product_id = %s AND source = 'ebay'",
-                    (product['product_id'],),
-                    fetch=True
-                )
-                
-                if not existing:
-                    # Insert new product
-                    execute_query(
-                        """INSERT INTO api_cache 
-                           (product_id, title, price, image_url, product_url, rating, description, category, gender, source) 
-                           VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-                        (
-                            product['product_id'],
-                            product['title'],
-                            product['price'],
-                            product['image_url'],
-                            product['product_url'],
-                            product['rating'],
-                            product['description'],
-                            product['category'],
-                            product['gender'],
-                            product['source']
-                        )
-                    )
-                    stored_count += 1
-            except Exception as e:
-                print(f"Error storing product: {e}")
-                continue
+        connection = get_db_connection()
+        if not connection:
+            return 0
+        
+        sink = ApiCacheSink(connection, source='ebay')
+        try:
+            sink.write(products)
+        except Exception as e:
+            print(f"Error storing products: {e}")
+            return 0
+        finally:
+            connection.close()
         
-        print(f"💾 Stored {stored_count} new eBay products in cache")
-        return stored_count
+        print(f"💾 Stored {sink.inserted} new eBay products in cache ({sink.updated} refreshed)")
+        return sink.inserted
 
 # Create singleton instance
 ebay_api_service = EbayAPIService()
@@ -5,16 +5,11 @@ from flask import request, jsonify
 import json
 from datetime import datetime, timedelta
 from db import execute_query
+from auth_middleware import current_user_email
 
 def get_user_email_from_token(request):
-    """Extract user email from JWT token - SECURE"""
-    from app import verify_token
-    
-    token = request.headers.get('Authorization')
-    if token and token.startswith('Bearer '):
-        payload = verify_token(token[7:])
-        return payload.get('email') if payload else None
-    return None
+    """User email from the JWT verified once for this request by auth_middleware - SECURE"""
+    return current_user_email()
 
 # ============= ENHANCED SEARCH HISTORY =============
 def enhanced_search_history():
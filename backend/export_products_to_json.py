@@ -1,29 +1,85 @@
+#!/usr/bin/env python3
+"""
+Export api_cache to a catalog file for the offline fallback.
+Rows are streamed from a server-side cursor straight into the (optionally
+compressed) output, so memory stays constant however large the table is.
+The file is written next to the target and renamed into place, so the
+fallback snapshot never reads a half-written export.
+
+Usage:
+    python export_products_to_json.py                                 # fallback_products.json
+    python export_products_to_json.py -o catalog.ndjson.gz            # NDJSON, gzip
+    python export_products_to_json.py -o catalog.ndjson.zst           # NDJSON, zstd (pip install zstandard)
+"""
+
+import os
 import json
-from db import execute_query
+import time
+import argparse
+import pymysql
+from decimal import Decimal
+from db import get_db_connection
+from product_snapshot import open_catalog_file, is_ndjson
+
+def _json_default(value):
+    # DECIMAL prices/ratings as numbers, datetimes as strings
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+def export_products(output='fallback_products.json', batch_size=1000):
+    """Export all products from database to a JSON / NDJSON file (.gz / .zst compressed by suffix)"""
+    connection = get_db_connection()
+    if not connection:
+        return 0
 
-def export_products():
-    """Export all products from database to JSON file"""
+    started = time.time()
+    # Keep the suffix so the temp file gets the same format and compression
+    temp_path = os.path.join(os.path.dirname(os.path.abspath(output)), f".{os.getpid()}.{os.path.basename(output)}")
+    ndjson = is_ndjson(output)
+    exported = 0
     try:
-        products = execute_query(
-            "SELECT * FROM api_cache ORDER BY cached_at DESC",
-            fetch=True
-        )
-        
-        if products:
-            # Convert datetime objects to strings
-            for product in products:
-                if 'cached_at' in product and product['cached_at']:
-                    product['cached_at'] = str(product['cached_at'])
-            
-            with open('fallback_products.json', 'w', encoding='utf-8') as f:
-                json.dump(products, f, indent=2, ensure_ascii=False)
-            
-            print(f"✅ Exported {len(products)} products to fallback_products.json")
-        else:
+        # Unbuffered server-side cursor - rows arrive as they are read
+        with connection.cursor(pymysql.cursors.SSDictCursor) as cursor, open_catalog_file(temp_path, 'w') as f:
+            cursor.execute("SELECT * FROM api_cache ORDER BY cached_at DESC")
+            if not ndjson:
+                f.write('[')
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    line = json.dumps(row, ensure_ascii=False, separators=(',', ':'), default=_json_default)
+                    if ndjson:
+                        f.write(line + '\n')
+                    else:
+                        f.write(('\n' if exported == 0 else ',\n') + line)
+                    exported += 1
+            if not ndjson:
+                f.write('\n]\n')
+
+        if not exported:
+            os.remove(temp_path)
             print("⚠️  No products found in database")
-            
+            return 0
+
+        os.replace(temp_path, output)
+        size_kb = os.path.getsize(output) / 1024
+        print(f"✅ Exported {exported} products to {output} ({size_kb:.1f} KB) in {time.time() - started:.2f}s")
+        return exported
+
     except Exception as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
         print(f"❌ Error exporting products: {e}")
+        return 0
+    finally:
+        connection.close()
 
 if __name__ == "__main__":
-    export_products()
+    parser = argparse.ArgumentParser(description='Stream api_cache to a fallback catalog file')
+    parser.add_argument('-o', '--output', default='fallback_products.json',
+                        help='.json (array) or .ndjson, optionally ending in .gz or .zst')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+    export_products(args.output, args.batch_size)
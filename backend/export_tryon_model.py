@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Export AI Try-On Model
+Converts the Keras try-on network (Config.TRYON_MODEL_PATH) to ONNX and/or
+TFLite for the lean CPU runtimes, optionally with int8 post-training
+quantization calibrated on cached garment tensors
+
+Usage:
+    python export_tryon_model.py                    # ONNX + TFLite, float32
+    python export_tryon_model.py --format onnx --int8
+"""
+
+import os
+import glob
+import argparse
+
+import numpy as np
+
+from config import Config
+from ai_tryon_api import ai_tryon_backend, TF_AVAILABLE
+from tryon_runtime import exported_model_path
+
+INPUT_SHAPE = (512, 512, 3)
+
+def calibration_batches(count):
+    """
+    Representative inputs for quantization. Cached garment tensors stand in
+    for both inputs (the cache holds real catalog photos); random images are
+    used when the cache is empty.
+    """
+    files = sorted(glob.glob(os.path.join(Config.TRYON_CACHE_DIR, '*.npy')))
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        if files:
+            user = np.load(files[i % len(files)]).astype(np.float32)
+            garment = np.load(files[(i + 1) % len(files)]).astype(np.float32)
+        else:
+            user = rng.random(INPUT_SHAPE, dtype=np.float32)
+            garment = rng.random(INPUT_SHAPE, dtype=np.float32)
+        yield user[np.newaxis], garment[np.newaxis]
+
+def export_onnx(model, path):
+    """Float32 ONNX export with a dynamic batch dimension"""
+    import tensorflow as tf
+    import tf2onnx
+
+    signature = [
+        tf.TensorSpec((None,) + INPUT_SHAPE, tf.float32, name='user_image'),
+        tf.TensorSpec((None,) + INPUT_SHAPE, tf.float32, name='garment_image')
+    ]
+    tf2onnx.convert.from_keras(model, input_signature=signature, opset=13, output_path=path)
+    return path
+
+def quantize_onnx(float_path, int8_path, samples):
+    """Static int8 quantization (QDQ) of an exported ONNX model"""
+    import onnxruntime as ort
+    from onnxruntime.quantization import quantize_static, CalibrationDataReader, QuantFormat, QuantType
+
+    input_names = sorted(
+        (i.name for i in ort.InferenceSession(float_path, providers=['CPUExecutionProvider']).get_inputs()),
+        key=lambda n: 'user' not in n
+    )
+
+    class GarmentCalibrationReader(CalibrationDataReader):
+        def __init__(self):
+            self._batches = (dict(zip(input_names, batch)) for batch in calibration_batches(samples))
+
+        def get_next(self):
+            return next(self._batches, None)
+
+    quantize_static(
+        float_path, int8_path, GarmentCalibrationReader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8
+    )
+    return int8_path
+
+def export_tflite(model, path, int8=False, samples=32):
+    """TFLite export; int8 quantizes weights and activations but keeps float32 inputs/outputs"""
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if int8:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = lambda: ([user, garment] for user, garment in calibration_batches(samples))
+
+    with open(path, 'wb') as f:
+        f.write(converter.convert())
+    return path
+
+def file_size_mb(path):
+    return os.path.getsize(path) / (1024 * 1024)
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the AI try-on model for ONNX Runtime / TFLite')
+    parser.add_argument('--format', choices=['onnx', 'tflite', 'all'], default='all')
+    parser.add_argument('--int8', action='store_true', help='also write an int8 post-training quantized model')
+    parser.add_argument('--calibration-samples', type=int, default=32)
+    args = parser.parse_args()
+
+    if not TF_AVAILABLE:
+        print("❌ TensorFlow is required to export the try-on model")
+        return
+
+    model_path = Config.TRYON_MODEL_PATH
+    os.makedirs(os.path.dirname(model_path) or '.', exist_ok=True)
+    if os.path.exists(model_path):
+        print(f"🧠 Loading Keras model ({model_path})")
+        model = ai_tryon_backend.load_keras_model()
+    else:
+        # Save the freshly built network first so the exports, the Keras
+        # fallback and the parity test all use these exact weights
+        print(f"⚠️ No Keras model at {model_path} - saving a new, untrained one there")
+        model = ai_tryon_backend.create_model_architecture()
+        model.save(model_path)
+
+    written = []
+    formats = ['onnx', 'tflite'] if args.format == 'all' else [args.format]
+
+    if 'onnx' in formats:
+        onnx_path = export_onnx(model, exported_model_path(model_path, 'onnx'))
+        written.append(onnx_path)
+        if args.int8:
+            print(f"⚖️ Calibrating int8 ONNX model on {args.calibration_samples} samples")
+            written.append(quantize_onnx(onnx_path, exported_model_path(model_path, 'onnx', quantized=True),
+                                         args.calibration_samples))
+
+    if 'tflite' in formats:
+        written.append(export_tflite(model, exported_model_path(model_path, 'tflite')))
+        if args.int8:
+            print(f"⚖️ Calibrating int8 TFLite model on {args.calibration_samples} samples")
+            written.append(export_tflite(model, exported_model_path(model_path, 'tflite', quantized=True),
+                                         int8=True, samples=args.calibration_samples))
+
+    print("\n" + "="*60)
+    for path in written:
+        print(f"✅ {path} ({file_size_mb(path):.1f} MB)")
+    print("Serve with TRYON_RUNTIME=onnx|tflite (and TRYON_QUANTIZED=true for int8)")
+    print("Check parity with: python test_tryon_runtime.py")
+    print("="*60)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Product Ingest Pipeline
+Streaming fetch -> normalize -> classify -> dedupe -> sink for upstream product feeds.
+
+Everything moves through generators in fixed-size chunks, so memory stays
+bounded by `max_in_flight` fetches plus one chunk per stage no matter how
+many products an upstream returns. Every stage keeps its own counters.
+
+Usage (no network - replays recorded responses):
+    python ingest_pipeline.py --fixture fixtures/ingest/rapidapi_search.json
+"""
+
+import os
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from product_normalizer import (
+    normalize_product, is_clothing_item, detect_gender_from_text,
+    generate_product_hash, extract_product_list
+)
+
+def chunked(iterable, size):
+    """Yield lists of up to `size` items without materializing the iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+class StageStats:
+    """Items in/out and busy time of one pipeline stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.seconds = 0.0
+
+    def record(self, items_in, items_out, seconds):
+        self.items_in += items_in
+        self.items_out += items_out
+        self.seconds += seconds
+
+    def to_dict(self):
+        return {
+            'stage': self.name,
+            'items_in': self.items_in,
+            'items_out': self.items_out,
+            'dropped': self.items_in - self.items_out,
+            'seconds': round(self.seconds, 4),
+            'items_per_sec': round(self.items_in / self.seconds, 1) if self.seconds > 0 else None
+        }
+
+# ----------------------------------------------------------------------
+# Fetchers and source
+# ----------------------------------------------------------------------
+
+class RecordedFetcher:
+    """Replays recorded upstream responses: {"responses": {query: raw_json}}"""
+
+    def __init__(self, fixture_path):
+        with open(fixture_path, 'r', encoding='utf-8') as f:
+            self.responses = json.load(f).get('responses', {})
+
+    def __call__(self, query):
+        return extract_product_list(self.responses.get(query, []))
+
+class HttpFetcher:
+    """
+    Fetches one search query from RapidAPI, trying endpoints in order until
+    one returns products. `min_interval` spaces request starts across all
+    worker threads so concurrency does not trip the upstream rate limit.
+    """
+
+    def __init__(self, endpoints, timeout=30, min_interval=0.5, params=None):
+        self.endpoints = endpoints
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.params = params or {'country': 'US', 'page': '1'}
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def _throttle(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot)
+            self._next_slot = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+    def __call__(self, query):
+        import requests
+
+        for endpoint in self.endpoints:
+            params = dict(self.params, query=query)
+            if 'real-time-amazon' in endpoint['url']:
+                params['category'] = 'fashion'
+
+            self._throttle()
+            try:
+                response = requests.get(
+                    endpoint['url'],
+                    headers={'X-RapidAPI-Key': endpoint['key'], 'X-RapidAPI-Host': endpoint['host']},
+                    params=params,
+                    timeout=self.timeout
+                )
+            except requests.RequestException as e:
+                print(f"   ❌ {endpoint['name']} failed for '{query}': {e}")
+                continue
+
+            if response.status_code != 200:
+                print(f"   ⚠️  {endpoint['name']} returned {response.status_code} for '{query}'")
+                continue
+
+            products = extract_product_list(response.json())
+            if products:
+                return products
+        return []
+
+class ConcurrentFetchSource:
+    """
+    Runs `fetcher(task)` on a thread pool and yields raw products as
+    responses complete. At most `max_in_flight` responses are pending at any
+    time, so a slow consumer applies back-pressure to the fetches.
+    """
+
+    def __init__(self, tasks, fetcher, workers=4, max_in_flight=None, max_results_per_task=None):
+        self.tasks = tasks
+        self.fetcher = fetcher
+        self.workers = workers
+        self.max_in_flight = max_in_flight or workers * 2
+        self.max_results_per_task = max_results_per_task
+        self.stats = StageStats('fetch')
+        self.failed_tasks = []
+
+    def _timed_fetch(self, task):
+        started = time.perf_counter()
+        products = self.fetcher(task)
+        return products, time.perf_counter() - started
+
+    def __iter__(self):
+        tasks = iter(self.tasks)
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for task in islice(tasks, self.max_in_flight):
+                pending[executor.submit(self._timed_fetch, task)] = task
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = pending.pop(future)
+                    try:
+                        products, seconds = future.result()
+                    except Exception as e:
+                        print(f"   ❌ Fetch failed for '{task}': {e}")
+                        self.failed_tasks.append(task)
+                        products, seconds = [], 0.0
+
+                    if self.max_results_per_task:
+                        products = products[:self.max_results_per_task]
+                    self.stats.record(1, len(products), seconds)
+
+                    for next_task in islice(tasks, 1):
+                        pending[executor.submit(self._timed_fetch, next_task)] = next_task
+
+                    yield from products
+
+# ----------------------------------------------------------------------
+# Chunk stages - each takes a list of products and returns a list
+# ----------------------------------------------------------------------
+
+class NormalizeStage:
+    """Raw upstream dicts -> canonical fields; untitled products are dropped"""
+    name = 'normalize'
+
+    def process(self, chunk):
+        normalized = []
+        for raw in chunk:
+            try:
+                product = normalize_product(raw)
+            except Exception as e:
+                print(f"   ⚠️  Error normalizing product: {e}")
+                continue
+            if product['title']:
+                normalized.append(product)
+        return normalized
+
+class ClassifyStage:
+    """Clothing filter and gender detection over a chunk"""
+    name = 'classify'
+
+    def __init__(self, clothing_only=True, keep_gender=False):
+        self.clothing_only = clothing_only
+        self.keep_gender = keep_gender
+
+    def process(self, chunk):
+        classified = []
+        for product in chunk:
+            if self.clothing_only and not is_clothing_item(product['title'], product['description']):
+                continue
+            if not (self.keep_gender and product.get('gender')):
+                product['gender'] = detect_gender_from_text(product['title'], product['description'])
+            classified.append(product)
+        return classified
+
+class SeenSet:
+    """
+    Content hashes already ingested, in SQLite. With a `path` the set
+    persists across runs (incremental feeds); without one it lives in memory
+    for a single run (full reloads). New hashes are only made durable by
+    `commit()`, after the sink has accepted the rows.
+    """
+
+    # Stay under SQLite's default host-parameter limit
+    LOOKUP_BATCH = 500
+
+    def __init__(self, path=None):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path or ':memory:', check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS seen_products (hash TEXT PRIMARY KEY, seen_at REAL)")
+        self.connection.commit()
+
+    def filter_new(self, hashes):
+        """Subset of `hashes` not seen before (in this run or persisted)"""
+        unique = list(dict.fromkeys(hashes))
+        seen = set()
+        for batch in chunked(unique, self.LOOKUP_BATCH):
+            placeholders = ', '.join('?' * len(batch))
+            rows = self.connection.execute(
+                f"SELECT hash FROM seen_products WHERE hash IN ({placeholders})", batch
+            )
+            seen.update(row[0] for row in rows)
+        return [h for h in unique if h not in seen]
+
+    def add(self, hashes):
+        now = time.time()
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO seen_products (hash, seen_at) VALUES (?, ?)",
+            [(h, now) for h in hashes]
+        )
+
+    def commit(self):
+        self.connection.commit()
+
+    def rollback(self):
+        self.connection.rollback()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM seen_products").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+class DedupeStage:
+    """Drops products whose content hash was already seen"""
+    name = 'dedupe'
+
+    def __init__(self, seen_set=None):
+        self.seen = seen_set if seen_set is not None else SeenSet()
+
+    def process(self, chunk):
+        by_hash = {}
+        for product in chunk:
+            product['hash'] = generate_product_hash(product['title'], product['price'], product['brand'])
+            by_hash.setdefault(product['hash'], product)
+
+        new_hashes = self.seen.filter_new(list(by_hash))
+        self.seen.add(new_hashes)
+        return [by_hash[h] for h in new_hashes]
+
+    def finish(self, success):
+        if success:
+            self.seen.commit()
+        else:
+            self.seen.rollback()
+
+# ----------------------------------------------------------------------
+# Sinks - write(chunk) per chunk, close() once at the end
+# ----------------------------------------------------------------------
+
+class ListSink:
+    """Collects rows in memory (tests and previews)"""
+    name = 'sink'
+
+    def __init__(self):
+        self.rows = []
+
+    def write(self, chunk):
+        self.rows.extend(chunk)
+
+    def close(self):
+        pass
+
+class CatalogReloadSink:
+    """Streams rows into a CatalogReload shadow table; `to_row` maps product -> table row"""
+    name = 'sink'
+
+    def __init__(self, reload, to_row):
+        self.reload = reload
+        self.to_row = to_row
+
+    def write(self, chunk):
+        self.reload.add_many(self.to_row(product) for product in chunk)
+
+    def close(self):
+        self.reload.flush()
+
+class ApiCacheSink:
+    """
+    Batched upsert into api_cache. product_id and content_hash are both
+    unique keys, so a product already cached under either one is refreshed
+    in place instead of duplicated.
+    """
+    name = 'sink'
+
+    COLUMNS = ['product_id', 'title', 'price', 'image_url', 'product_url', 'rating',
+               'description', 'category', 'gender', 'source', 'content_hash']
+    REFRESHED = ['price', 'image_url', 'product_url', 'rating', 'description']
+
+    def __init__(self, connection, source, category='fashion'):
+        self.connection = connection
+        self.source = source
+        self.category = category
+        self.inserted = 0
+        self.updated = 0
+
+    def write(self, chunk):
+        rows = []
+        for product in chunk:
+            row = dict(product, source=product.get('source') or self.source)
+            row.setdefault('category', self.category)
+            # api_cache has no brand column - hash title + price only
+            row['content_hash'] = generate_product_hash(row['title'], row['price'])
+            rows.append(tuple(row.get(column) for column in self.COLUMNS))
+
+        placeholders = ', '.join(['%s'] * len(self.COLUMNS))
+        updates = ', '.join(f"{column} = VALUES({column})" for column in self.REFRESHED)
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO api_cache ({', '.join(self.COLUMNS)}) VALUES ({placeholders}) "
+                f"ON DUPLICATE KEY UPDATE {updates}, cached_at = CURRENT_TIMESTAMP",
+                rows
+            )
+            # MySQL reports 1 affected row per insert and 2 per updated row
+            updated = max(0, min(cursor.rowcount - len(rows), len(rows)))
+        self.connection.commit()
+        self.updated += updated
+        self.inserted += len(rows) - updated
+
+    def close(self):
+        pass
+
+# ----------------------------------------------------------------------
+# Pipeline
+# ----------------------------------------------------------------------
+
+class Pipeline:
+    """
+    source -> chunks -> stages -> sink.
+
+    `source` is any iterable of raw products (a ConcurrentFetchSource, a
+    fixture list, ...); it may expose `stats` for the fetch counters.
+    Stages implement `process(chunk) -> list` and optionally
+    `finish(success)`; the sink implements `write(chunk)` and `close()`.
+    """
+
+    def __init__(self, source, stages, sink, chunk_size=200):
+        self.source = source
+        self.stages = stages
+        self.sink = sink
+        self.chunk_size = chunk_size
+        self.stage_stats = [StageStats(stage.name) for stage in stages]
+        self.sink_stats = StageStats(getattr(sink, 'name', 'sink'))
+        self.elapsed = 0.0
+
+    def run(self):
+        started = time.perf_counter()
+        success = False
+        try:
+            for chunk in chunked(self.source, self.chunk_size):
+                for stage, stats in zip(self.stages, self.stage_stats):
+                    t0 = time.perf_counter()
+                    items_in = len(chunk)
+                    chunk = stage.process(chunk)
+                    stats.record(items_in, len(chunk), time.perf_counter() - t0)
+                    if not chunk:
+                        break
+
+                if chunk:
+                    t0 = time.perf_counter()
+                    self.sink.write(chunk)
+                    self.sink_stats.record(len(chunk), len(chunk), time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            self.sink.close()
+            self.sink_stats.record(0, 0, time.perf_counter() - t0)
+            success = True
+        finally:
+            for stage in self.stages:
+                if hasattr(stage, 'finish'):
+                    stage.finish(success)
+            self.elapsed = time.perf_counter() - started
+        return self.get_stats()
+
+    def get_stats(self):
+        stats = []
+        if hasattr(self.source, 'stats'):
+            stats.append(self.source.stats.to_dict())
+        stats.extend(s.to_dict() for s in self.stage_stats)
+        stats.append(self.sink_stats.to_dict())
+        return {
+            'stages': stats,
+            'written': self.sink_stats.items_out,
+            'elapsed_seconds': round(self.elapsed, 3)
+        }
+
+    def print_stats(self):
+        stats = self.get_stats()
+        print(f"\n📈 Ingest pipeline: {stats['written']} rows written in {stats['elapsed_seconds']}s")
+        print(f"   {'stage':<10}{'in':>8}{'out':>8}{'seconds':>10}{'items/s':>12}")
+        for stage in stats['stages']:
+            rate = stage['items_per_sec'] if stage['items_per_sec'] is not None else '-'
+            print(f"   {stage['stage']:<10}{stage['items_in']:>8}{stage['items_out']:>8}"
+                  f"{stage['seconds']:>10}{rate:>12}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the product ingest pipeline against recorded responses')
+    parser.add_argument('--fixture', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                          'fixtures', 'ingest', 'rapidapi_search.json'))
+    parser.add_argument('--chunk-size', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--seen-db', help='persistent seen-set (SQLite) - omit for a one-off run')
+    parser.add_argument('--all-items', action='store_true', help='keep non-clothing items')
+    args = parser.parse_args()
+
+    fetcher = RecordedFetcher(args.fixture)
+    source = ConcurrentFetchSource(list(fetcher.responses), fetcher, workers=args.workers)
+    sink = ListSink()
+    pipeline = Pipeline(
+        source,
+        [NormalizeStage(), ClassifyStage(clothing_only=not args.all_items), DedupeStage(SeenSet(args.seen_db))],
+        sink,
+        chunk_size=args.chunk_size
+    )
+    pipeline.run()
+    pipeline.print_stats()
+
+    for product in sink.rows[:10]:
+        print(f"   {product['product_id']}: {product['title'][:40]}... (${product['price']}) - {product['gender']}")
+
+if __name__ == "__main__":
+    main()
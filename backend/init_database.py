@@ -44,6 +44,8 @@ def init_database():
                 rating DECIMAL(3, 2),
                 description TEXT,
                 cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                content_hash CHAR(32) NULL,
+                UNIQUE KEY uniq_content_hash (content_hash),
                 INDEX idx_category (category),
                 INDEX idx_gender (gender),
                 INDEX idx_source (source)
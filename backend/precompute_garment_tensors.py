@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Precompute Garment Tensors
+Batch job that preprocesses every catalog garment image into the AI try-on
+tensor cache, so /ai-tryon/process only has to decode the user photo
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from db import execute_query
+from ai_tryon_api import ai_tryon_backend, DEPENDENCIES_AVAILABLE, PIL_AVAILABLE
+from tryon_tensor_cache import TensorCache
+
+TARGET_SIZE = (512, 512)
+DOWNLOAD_WORKERS = 8
+
+def load_image_bytes(image_ref):
+    """Read a garment image from a URL or a local path"""
+    if image_ref.startswith('http://') or image_ref.startswith('https://'):
+        response = requests.get(image_ref, timeout=15)
+        response.raise_for_status()
+        return response.content
+    with open(image_ref, 'rb') as f:
+        return f.read()
+
+def precompute_one(product):
+    """Preprocess one garment and register it under its content hash and product id"""
+    cache = ai_tryon_backend.tensor_cache
+    alias = TensorCache.alias_key(product['product_id'], TARGET_SIZE)
+    if cache.get(alias) is not None:
+        return 'skipped'
+
+    image_bytes = load_image_bytes(product['product_image'])
+    key = TensorCache.content_key(image_bytes, TARGET_SIZE)
+    cache.get_or_compute(key, lambda: ai_tryon_backend.preprocess_bytes(image_bytes, TARGET_SIZE))
+    cache.link(alias, key)
+    return 'stored'
+
+def precompute_garment_tensors():
+    """Precompute tensors for the whole clothing catalog"""
+    if not (DEPENDENCIES_AVAILABLE and PIL_AVAILABLE):
+        print("❌ numpy/Pillow/TensorFlow not installed - nothing to precompute")
+        return
+
+    products = execute_query(
+        "SELECT product_id, product_image FROM clothing WHERE product_image IS NOT NULL AND product_image != ''",
+        fetch=True
+    ) or []
+
+    print(f"🧵 Precomputing try-on tensors for {len(products)} garments")
+    print(f"📁 Cache directory: {os.path.abspath(ai_tryon_backend.tensor_cache.cache_dir)}")
+
+    started = time.time()
+    results = {'stored': 0, 'skipped': 0, 'failed': 0}
+
+    # Downloads dominate, so fetch concurrently; preprocessing releases the GIL in PIL/numpy
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as pool:
+        futures = {pool.submit(precompute_one, product): product for product in products}
+        for done, future in enumerate(as_completed(futures), 1):
+            product = futures[future]
+            try:
+                results[future.result()] += 1
+            except Exception as e:
+                results['failed'] += 1
+                print(f"❌ Product {product['product_id']}: {e}")
+
+            if done % 50 == 0:
+                print(f"   ... {done}/{len(products)} processed")
+
+    elapsed = time.time() - started
+    print("\n" + "="*60)
+    print(f"✅ Stored: {results['stored']}  ⏭️ Skipped: {results['skipped']}  ❌ Failed: {results['failed']}")
+    print(f"⏱️ {elapsed:.1f}s total")
+    print("="*60)
+
+if __name__ == "__main__":
+    precompute_garment_tensors()
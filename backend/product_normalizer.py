@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Product Normalizer
+Shared field extraction, price/rating normalization and clothing/gender
+classification for upstream product feeds (RapidAPI Amazon, eBay, mocks)
+"""
+
+import re
+import hashlib
+
+# Clothing-specific keywords for filtering
+CLOTHING_KEYWORDS = [
+    # Tops
+    'shirt', 'blouse', 'top', 't-shirt', 'tshirt', 'tank', 'camisole', 'sweater',
+    'cardigan', 'hoodie', 'sweatshirt', 'polo', 'tunic', 'crop top', 'halter',
+
+    # Bottoms
+    'pants', 'jeans', 'trousers', 'shorts', 'skirt', 'leggings', 'joggers',
+    'chinos', 'slacks', 'capris', 'culottes', 'palazzo',
+
+    # Dresses & Outerwear
+    'dress', 'gown', 'frock', 'jacket', 'coat', 'blazer', 'vest', 'cardigan',
+    'parka', 'windbreaker', 'bomber', 'denim jacket', 'leather jacket',
+
+    # Footwear
+    'shoes', 'sneakers', 'boots', 'sandals', 'heels', 'flats', 'loafers',
+    'oxfords', 'pumps', 'wedges', 'clogs', 'moccasins', 'stilettos',
+
+    # Undergarments & Sleepwear
+    'bra', 'underwear', 'lingerie', 'panties', 'boxers', 'briefs', 'pajamas',
+    'nightgown', 'robe', 'sleepwear', 'loungewear',
+
+    # Accessories (clothing-related)
+    'belt', 'scarf', 'tie', 'bow tie', 'suspenders', 'gloves', 'hat', 'cap',
+    'beanie', 'headband', 'socks', 'stockings', 'tights',
+
+    # General clothing terms
+    'clothing', 'apparel', 'wear', 'fashion', 'garment', 'outfit', 'attire'
+]
+
+# Non-clothing keywords to exclude
+EXCLUDE_KEYWORDS = [
+    'phone', 'case', 'charger', 'cable', 'electronics', 'book', 'toy', 'game',
+    'kitchen', 'home', 'garden', 'tool', 'automotive', 'beauty', 'makeup',
+    'supplement', 'vitamin', 'food', 'snack', 'drink', 'coffee', 'tea',
+    'furniture', 'decor', 'lamp', 'pillow', 'blanket', 'sheet', 'towel',
+    'computer', 'laptop', 'tablet', 'mouse', 'keyboard', 'monitor', 'camera'
+]
+
+WOMEN_INDICATORS = [
+    'women', 'woman', 'ladies', 'female', 'girl', 'womens', "women's",
+    'dress', 'blouse', 'skirt', 'bra', 'lingerie', 'heels', 'purse',
+    'handbag', 'maternity', 'plus size women', 'ladies'
+]
+
+MEN_INDICATORS = [
+    'men', 'man', 'male', 'boy', 'mens', "men's", 'gentleman',
+    'tie', 'suit', 'tuxedo', 'boxer', 'briefs', 'beard', 'masculine'
+]
+
+KIDS_INDICATORS = [
+    'kid', 'child', 'baby', 'toddler', 'infant', 'youth', 'junior',
+    'boys', 'girls', 'children', 'pediatric', 'school age'
+]
+
+DEFAULT_IMAGE_URL = 'https://images.unsplash.com/photo-1441986300917-64674bd600d8?w=400'
+
+# Upstream feeds name the same field differently - first non-empty key wins
+FIELD_FALLBACKS = {
+    'title': ['title', 'product_title', 'name', 'product_name'],
+    'description': ['description', 'product_description', 'summary'],
+    'product_id': ['asin', 'id', 'product_id'],
+    'price': ['price', 'product_price', 'current_price', 'price_current'],
+    'brand': ['brand', 'manufacturer'],
+    'image_url': ['image', 'product_photo', 'thumbnail', 'image_url', 'main_image', 'imageUrl'],
+    'rating': ['rating', 'product_star_rating', 'stars'],
+    'reviews_count': ['reviews_count', 'review_count', 'total_reviews'],
+    'product_url': ['product_url', 'url']
+}
+
+def compile_keywords(keywords):
+    """One alternation regex for a keyword list - same substring semantics as `any(k in text ...)`"""
+    ordered = sorted(set(keywords), key=len, reverse=True)
+    return re.compile('|'.join(re.escape(keyword) for keyword in ordered))
+
+CLOTHING_PATTERN = compile_keywords(CLOTHING_KEYWORDS)
+EXCLUDE_PATTERN = compile_keywords(EXCLUDE_KEYWORDS)
+GENDER_PATTERNS = [
+    ('women', compile_keywords(WOMEN_INDICATORS)),
+    ('men', compile_keywords(MEN_INDICATORS)),
+    ('kids', compile_keywords(KIDS_INDICATORS))
+]
+
+def is_clothing_item(title, description=""):
+    """Check if item is clothing based on title and description"""
+    text = f"{title} {description}".lower()
+
+    # Check for exclude keywords first
+    if EXCLUDE_PATTERN.search(text):
+        return False
+
+    # Check for clothing keywords
+    return CLOTHING_PATTERN.search(text) is not None
+
+def detect_gender_from_text(title, description=""):
+    """Detect gender from title and description"""
+    text = f"{title} {description}".lower()
+
+    for gender, pattern in GENDER_PATTERNS:
+        if pattern.search(text):
+            return gender
+
+    return 'unisex'
+
+def normalize_price(price_data):
+    """Extract and normalize price from various formats"""
+    try:
+        if isinstance(price_data, (int, float)):
+            price = float(price_data)
+        elif isinstance(price_data, dict):
+            price = float(price_data.get('value', 0) or price_data.get('amount', 0) or 0)
+        elif isinstance(price_data, str):
+            # Extract numbers from price string
+            numbers = re.findall(r'\d+\.?\d*', price_data.replace(',', ''))
+            price = float(numbers[0]) if numbers else 0
+        else:
+            price = 0
+
+        # Convert to reasonable USD range
+        if price < 5:
+            price = price * 10  # Convert if in different scale
+        elif price > 1000:
+            price = price / 100  # Convert from cents
+
+        # Ensure reasonable clothing price range ($5-$300)
+        if price < 5:
+            price = 25.99
+        elif price > 300:
+            price = 149.99
+
+        return round(price, 2)
+
+    except:
+        return 29.99
+
+def normalize_rating(rating_data):
+    """Extract and normalize rating (1-5 scale)"""
+    try:
+        if isinstance(rating_data, (int, float)):
+            rating = float(rating_data)
+        elif isinstance(rating_data, dict):
+            rating = float(rating_data.get('value', 0) or rating_data.get('rating', 0) or 4.0)
+        elif isinstance(rating_data, str):
+            numbers = re.findall(r'\d+\.?\d*', rating_data)
+            rating = float(numbers[0]) if numbers else 4.0
+        else:
+            rating = 4.0
+
+        # Ensure 1-5 range
+        rating = max(1.0, min(5.0, rating))
+        return round(rating, 1)
+
+    except:
+        return 4.0
+
+def generate_product_hash(title, price, brand=""):
+    """
+    Generate hash for duplicate detection. This is the persistent
+    content_hash key, so the price is formatted the same way for floats from
+    the normalizer and DECIMALs read back from MySQL.
+    """
+    # Normalize title for comparison
+    normalized_title = re.sub(r'[^\w\s]', '', title.lower().strip())
+    hash_string = f"{normalized_title}_{float(price or 0):.2f}_{(brand or '').lower()}"
+    return hashlib.md5(hash_string.encode()).hexdigest()
+
+def first_field(product, field, default=None):
+    """First non-empty value among the upstream names for `field`"""
+    for key in FIELD_FALLBACKS[field]:
+        value = product.get(key)
+        if value:
+            return value
+    return default
+
+def extract_product_list(data):
+    """Find the product array in the various RapidAPI response structures"""
+    if isinstance(data, list):
+        return data
+    if not isinstance(data, dict):
+        return []
+
+    for key in ['products', 'data', 'results', 'items']:
+        if key not in data:
+            continue
+        if isinstance(data[key], list):
+            return data[key]
+        if isinstance(data[key], dict):
+            # Check for nested products
+            nested_data = data[key]
+            for nested_key in ['products', 'results', 'items']:
+                if isinstance(nested_data.get(nested_key), list):
+                    return nested_data[nested_key]
+    return []
+
+def normalize_product(product):
+    """Map one raw upstream product onto the canonical ingest fields (no filtering)"""
+    title = first_field(product, 'title', '')
+    description = first_field(product, 'description', '')
+    asin = first_field(product, 'product_id')
+
+    try:
+        reviews_count = int(first_field(product, 'reviews_count', 50))
+    except (TypeError, ValueError):
+        reviews_count = 50
+
+    return {
+        'product_id': str(asin) if asin else None,
+        'title': title[:255],
+        'description': description[:500],
+        'price': normalize_price(first_field(product, 'price')),
+        'brand': str(first_field(product, 'brand', 'Fashion Brand'))[:100],
+        'image_url': first_field(product, 'image_url', DEFAULT_IMAGE_URL),
+        'rating': normalize_rating(first_field(product, 'rating')),
+        'reviews_count': min(reviews_count, 9999),
+        'product_url': first_field(product, 'product_url') or (f"https://amazon.com/dp/{asin}" if asin else "")
+    }
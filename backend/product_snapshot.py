@@ -0,0 +1,143 @@
+# Product Snapshot - catalog file codecs and the in-memory fallback catalog
+import os
+import io
+import gzip
+import json
+import time
+import threading
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+def open_catalog_file(path, mode='r'):
+    """
+    Text stream for a catalog file; compression follows the suffix
+    (.gz -> gzip, .zst -> zstandard). `mode` is 'r' or 'w'.
+    """
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8', compresslevel=6)
+    if path.endswith('.zst'):
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstandard is not installed - pip install zstandard, or use .gz")
+        raw = open(path, mode + 'b')
+        if mode == 'w':
+            stream = zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=True)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+def is_ndjson(path):
+    return '.ndjson' in os.path.basename(path) or '.jsonl' in os.path.basename(path)
+
+def read_products(path):
+    """All products in a catalog file - a JSON array or NDJSON (one product per line)"""
+    with open_catalog_file(path) as f:
+        if is_ndjson(path):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+class FallbackSnapshot:
+    """
+    Fallback catalog kept in memory, indexed by product_id, gender, category
+    and title/description word. The file is parsed once and again only when
+    its mtime changes (checked at most every `check_seconds`), so requests
+    during a database outage never touch the disk.
+    """
+
+    def __init__(self, path, check_seconds=2.0):
+        self.path = path
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._next_check = 0.0
+        # (products, by_id, by_gender, by_category, by_word) - swapped as one
+        # tuple so a reader never mixes an old list with a new index
+        self._index = ([], {}, {}, {}, {})
+        self.stats = {'loads': 0, 'load_ms': 0.0, 'lookups': 0}
+
+    def _build(self, products):
+        by_id, by_gender, by_category, by_word = {}, {}, {}, {}
+        for position, product in enumerate(products):
+            if product.get('product_id') is not None:
+                by_id[str(product['product_id'])] = product
+            by_gender.setdefault((product.get('gender') or '').lower(), []).append(position)
+            by_category.setdefault((product.get('category') or '').lower(), []).append(position)
+            text = f"{product.get('title') or ''} {product.get('description') or ''}".lower()
+            for word in set(_words(text)):
+                by_word.setdefault(word, set()).add(position)
+        self._index = (products, by_id, by_gender, by_category, by_word)
+
+    def refresh(self, force=False):
+        """Reload when the file changed; keeps the previous snapshot on errors"""
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return False
+        with self._lock:
+            if not force and now < self._next_check:
+                return False
+            self._next_check = now + self.check_seconds
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                return False
+            if not force and mtime == self._mtime:
+                return False
+
+            started = time.perf_counter()
+            try:
+                products = read_products(self.path)
+            except Exception as e:
+                print(f"Error loading fallback products: {e}")
+                return False
+            self._build(products if isinstance(products, list) else [])
+            self._mtime = mtime
+            self.stats['loads'] += 1
+            self.stats['load_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            return True
+
+    def get(self, product_id):
+        self.refresh()
+        return self._index[1].get(str(product_id))
+
+    def search(self, query=None, gender=None, category=None, limit=None):
+        """
+        Products matching every query word (and gender/category when given),
+        in file order. A query that matches nothing returns the whole
+        snapshot - the old fallback always served everything.
+        """
+        self.refresh()
+        self.stats['lookups'] += 1
+        products, _, by_gender, by_category, by_word = self._index
+
+        candidates = None
+        for key, index in ((gender, by_gender), (category, by_category)):
+            if key:
+                positions = set(index.get(key.lower(), ()))
+                candidates = positions if candidates is None else candidates & positions
+
+        words = _words(query.lower()) if query else []
+        if words:
+            matched = None
+            for word in words:
+                positions = by_word.get(word, set())
+                matched = set(positions) if matched is None else matched & positions
+            if matched and candidates is not None:
+                matched &= candidates
+            if matched:
+                candidates = matched
+
+        if candidates is None:
+            result = products
+        else:
+            result = [products[i] for i in sorted(candidates)]
+        return result[:limit] if limit else list(result)
+
+    def __len__(self):
+        self.refresh()
+        return len(self._index[0])
+
+def _words(text):
+    return [w for w in ''.join(c if c.isalnum() else ' ' for c in text).split() if len(w) > 1]
@@ -1,58 +1,160 @@
-from db import execute_query
+#!/usr/bin/env python3
+"""
+Remove Duplicate Products - one-shot, set-based cleanup of api_cache
+Backfills the content_hash column, deletes duplicates with window functions
+(newest row wins) and adds the unique keys, so every later ingest dedupes
+itself through INSERT ... ON DUPLICATE KEY UPDATE.
 
-def remove_duplicate_products():
-    """Remove duplicate products from api_cache table"""
+Needs MySQL 8.0+ / MariaDB 10.2+ (ROW_NUMBER).
+
+Usage:
+    python remove_duplicates.py            # clean up and add unique keys
+    python remove_duplicates.py --dry-run  # only report what would be deleted
+"""
+
+import sys
+import time
+from db import get_db_connection
+from product_normalizer import generate_product_hash
+
+TABLE = 'api_cache'
+
+# Newest row per key survives; id breaks cached_at ties
+DUPLICATE_IDS_SQL = """
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (PARTITION BY {key} ORDER BY cached_at DESC, id DESC) AS row_num
+        FROM {table}
+        WHERE {key} IS NOT NULL
+    ) ranked
+    WHERE row_num > 1
+"""
+
+def _scalar(cursor, query, params=()):
+    cursor.execute(query, params)
+    row = cursor.fetchone()
+    return list(row.values())[0] if row else None
+
+def column_exists(cursor, table, column):
+    return bool(_scalar(
+        cursor,
+        "SELECT COUNT(*) FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+        (table, column)
+    ))
+
+def unique_index_exists(cursor, table, column):
+    return bool(_scalar(
+        cursor,
+        "SELECT COUNT(*) FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s "
+        "AND NON_UNIQUE = 0 AND SEQ_IN_INDEX = 1",
+        (table, column)
+    ))
+
+def backfill_content_hashes(connection, table=TABLE, batch_size=5000):
+    """
+    Fill content_hash for rows that have none. Hashes are computed in Python
+    (same function the ingest path uses) and applied with one UPDATE ... JOIN
+    per batch through a temporary table.
+    """
+    cursor = connection.cursor()
+    cursor.execute("CREATE TEMPORARY TABLE IF NOT EXISTS content_hash_backfill "
+                   "(id INT PRIMARY KEY, content_hash CHAR(32) NOT NULL)")
+    updated = 0
+    last_id = 0
+    try:
+        while True:
+            cursor.execute(
+                f"SELECT id, title, price FROM {table} WHERE content_hash IS NULL AND id > %s ORDER BY id LIMIT %s",
+                (last_id, batch_size)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+
+            cursor.execute("DELETE FROM content_hash_backfill")
+            cursor.executemany(
+                "INSERT INTO content_hash_backfill (id, content_hash) VALUES (%s, %s)",
+                [(row['id'], generate_product_hash(row['title'] or '', row['price'])) for row in rows]
+            )
+            cursor.execute(
+                f"UPDATE {table} t JOIN content_hash_backfill b ON b.id = t.id SET t.content_hash = b.content_hash"
+            )
+            connection.commit()
+            updated += len(rows)
+    finally:
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS content_hash_backfill")
+        cursor.close()
+    return updated
+
+def count_duplicates(cursor, key, table=TABLE):
+    return _scalar(cursor, f"SELECT COUNT(*) FROM ({DUPLICATE_IDS_SQL.format(key=key, table=table)}) dup") or 0
+
+def delete_duplicates(cursor, key, table=TABLE):
+    """Delete every row but the newest per `key` in one statement"""
+    # The extra derived table forces materialization, so MySQL allows
+    # reading the table that is being deleted from
+    cursor.execute(
+        f"DELETE t FROM {table} t JOIN ({DUPLICATE_IDS_SQL.format(key=key, table=table)}) dup ON dup.id = t.id"
+    )
+    return cursor.rowcount
+
+def remove_duplicate_products(dry_run=False):
+    """Remove duplicate products from api_cache table and make duplicates impossible"""
+    connection = get_db_connection()
+    if not connection:
+        return
+
+    started = time.time()
+    cursor = connection.cursor()
     try:
-        # Find duplicates based on product_id
         print("🔍 Checking for duplicate products...")
-        
-        duplicates = execute_query(
-            """SELECT product_id, COUNT(*) as count 
-               FROM api_cache 
-               GROUP BY product_id 
-               HAVING count > 1""",
-            fetch=True
-        )
-        
-        if not duplicates:
-            print("✅ No duplicate products found!")
+
+        if not column_exists(cursor, TABLE, 'content_hash'):
+            if dry_run:
+                print("ℹ️  content_hash column missing - checking product_id duplicates only")
+            else:
+                cursor.execute(f"ALTER TABLE {TABLE} ADD COLUMN content_hash CHAR(32) NULL")
+                connection.commit()
+                print("🧱 Added content_hash column")
+
+        if not dry_run:
+            backfilled = backfill_content_hashes(connection)
+            print(f"#️⃣  Backfilled {backfilled} content hashes")
+
+        # product_id first (the old rule), then identical content under different ids
+        keys = ['product_id']
+        if column_exists(cursor, TABLE, 'content_hash'):
+            keys.append('content_hash')
+
+        for key in keys:
+            if dry_run:
+                print(f"⚠️  {count_duplicates(cursor, key)} duplicate rows by {key}")
+                continue
+            deleted = delete_duplicates(cursor, key)
+            connection.commit()
+            print(f"🗑️  Deleted {deleted} duplicate rows by {key}")
+
+        if dry_run:
             return
-        
-        print(f"⚠️  Found {len(duplicates)} products with duplicates")
-        
-        # For each duplicate, keep only the most recent one
-        for dup in duplicates:
-            product_id = dup['product_id']
-            count = dup['count']
-            print(f"   - Product {product_id}: {count} duplicates")
-            
-            # Delete all but the most recent entry
-            execute_query(
-                """DELETE FROM api_cache 
-                   WHERE product_id = %s 
-                   AND id NOT IN (
-                       SELECT id FROM (
-                           SELECT id FROM api_cache 
-                           WHERE product_id = %s 
-                           ORDER BY cached_at DESC 
-                           LIMIT 1
-                       ) as keeper
-                   )""",
-                (product_id, product_id)
-            )
-        
-        print("✅ Duplicates removed successfully!")
-        
-        # Show final count
-        result = execute_query(
-            "SELECT COUNT(*) as count FROM api_cache",
-            fetch=True
-        )
-        total = result[0]['count'] if result else 0
+
+        for key, index in (('product_id', 'uniq_product_id'), ('content_hash', 'uniq_content_hash')):
+            if not unique_index_exists(cursor, TABLE, key):
+                cursor.execute(f"ALTER TABLE {TABLE} ADD UNIQUE INDEX {index} ({key})")
+                connection.commit()
+                print(f"🔒 Added unique index {index}")
+
+        total = _scalar(cursor, f"SELECT COUNT(*) FROM {TABLE}") or 0
+        print(f"✅ Duplicates removed in {time.time() - started:.2f}s")
         print(f"📊 Total unique products: {total}")
-        
+
     except Exception as e:
+        connection.rollback()
         print(f"❌ Error removing duplicates: {e}")
+    finally:
+        cursor.close()
+        connection.close()
 
 if __name__ == "__main__":
-    remove_duplicate_products()
+    remove_duplicate_products(dry_run='--dry-run' in sys.argv)
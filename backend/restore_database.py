@@ -10,6 +10,7 @@ import json
 import os
 from datetime import datetime
 import time
+from catalog_reload import CatalogReload, CatalogReloadError
 
 # Database configuration
 DB_CONFIG = {
@@ -177,9 +178,12 @@ def fetch_products_from_rapidapi():
         print("   Update RAPIDAPI_CONFIG['headers']['X-RapidAPI-Key'] with your actual key")
         return False
     
+    reload = None
     try:
         conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor()
+        # Load into a shadow copy of products; the live table is swapped only once complete
+        reload = CatalogReload(conn, 'products').begin()
+        cached_at = datetime.now()
         
         # Search queries from previous sessions
         search_queries = [
@@ -234,24 +238,18 @@ def fetch_products_from_rapidapi():
                             rating = float(product.get('rating', {}).get('value', 4.0))
                             reviews = int(product.get('reviews_count', 0))
                             
-                            # Insert product
-                            insert_query = """
-                            INSERT IGNORE INTO products 
-                            (id, title, price, imageUrl, category, gender, rating, reviews_count, cached_at)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                            """
-                            
-                            cursor.execute(insert_query, (
-                                product_id,
-                                title,
-                                price,
-                                image_url,
-                                'fashion',
-                                search['category'],
-                                rating,
-                                reviews,
-                                datetime.now()
-                            ))
+                            # Queue product for the batched shadow-table load
+                            reload.add({
+                                'id': product_id,
+                                'title': title,
+                                'price': price,
+                                'imageUrl': image_url,
+                                'category': 'fashion',
+                                'gender': search['category'],
+                                'rating': rating,
+                                'reviews_count': reviews,
+                                'cached_at': cached_at
+                            })
                             
                             total_products += 1
                             
@@ -271,14 +269,21 @@ def fetch_products_from_rapidapi():
                 print(f"   ❌ Request error: {e}")
                 continue
         
-        conn.commit()
-        cursor.close()
-        conn.close()
+        try:
+            reload.commit()
+        except CatalogReloadError as e:
+            reload.abort()
+            print(f"⚠️  Catalog reload rejected, existing products kept: {e}")
+            return False
+        finally:
+            conn.close()
         
         print(f"\n🎉 Successfully added {total_products} products to database!")
         return True
         
     except Exception as e:
+        if reload is not None:
+            reload.abort()
         print(f"❌ Error fetching products: {e}")
         return False
 
@@ -11,6 +11,7 @@ import time
 import random
 from datetime import datetime
 import os
+from catalog_reload import CatalogReload, CatalogReloadError
 
 # Database configuration for phpMyAdmin (XAMPP)
 DB_CONFIG = {
@@ -85,55 +86,52 @@ def test_database_connection():
         print(f"❌ Database connection failed: {e}")
         return False
 
+# Products table structure - {table} is the live table or the reload shadow table
+PRODUCTS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS `{table}` (
+    id VARCHAR(255) PRIMARY KEY,
+    title TEXT NOT NULL,
+    price DECIMAL(10,2) NOT NULL,
+    imageUrl TEXT,
+    category VARCHAR(100) DEFAULT 'fashion',
+    gender VARCHAR(50) DEFAULT 'unisex',
+    description TEXT,
+    rating DECIMAL(3,2) DEFAULT 4.0,
+    reviews_count INT DEFAULT 0,
+    availability VARCHAR(50) DEFAULT 'in_stock',
+    brand VARCHAR(100),
+    sizes JSON,
+    colors JSON,
+    product_url TEXT,
+    source VARCHAR(50) DEFAULT 'rapidapi',
+    asin VARCHAR(100),
+    sticker_image VARCHAR(255),
+    sticker_anchor VARCHAR(50) DEFAULT 'chest',
+    sticker_position_x INT DEFAULT 50,
+    sticker_position_y INT DEFAULT 50,
+    cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_category (category),
+    INDEX idx_gender (gender),
+    INDEX idx_price (price),
+    INDEX idx_rating (rating)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
 def create_products_table():
-    """Create products table with proper structure"""
+    """Create products table with proper structure (existing catalog is kept until a reload swaps it)"""
     try:
         conn = mysql.connector.connect(**DB_CONFIG)
         cursor = conn.cursor()
         
-        # Drop existing table to ensure clean structure
-        cursor.execute("DROP TABLE IF EXISTS products")
-        
-        # Create products table with comprehensive structure
-        create_table_sql = """
-        CREATE TABLE products (
-            id VARCHAR(255) PRIMARY KEY,
-            title TEXT NOT NULL,
-            price DECIMAL(10,2) NOT NULL,
-            imageUrl TEXT,
-            category VARCHAR(100) DEFAULT 'fashion',
-            gender VARCHAR(50) DEFAULT 'unisex',
-            description TEXT,
-            rating DECIMAL(3,2) DEFAULT 4.0,
-            reviews_count INT DEFAULT 0,
-            availability VARCHAR(50) DEFAULT 'in_stock',
-            brand VARCHAR(100),
-            sizes JSON,
-            colors JSON,
-            product_url TEXT,
-            source VARCHAR(50) DEFAULT 'rapidapi',
-            asin VARCHAR(100),
-            sticker_image VARCHAR(255),
-            sticker_anchor VARCHAR(50) DEFAULT 'chest',
-            sticker_position_x INT DEFAULT 50,
-            sticker_position_y INT DEFAULT 50,
-            cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-            INDEX idx_category (category),
-            INDEX idx_gender (gender),
-            INDEX idx_price (price),
-            INDEX idx_rating (rating)
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-        """
-        
-        cursor.execute(create_table_sql)
+        cursor.execute(PRODUCTS_TABLE_SQL.format(table='products'))
         conn.commit()
         
         cursor.close()
         conn.close()
         
-        print("✅ Products table created successfully")
+        print("✅ Products table created/verified")
         return True
         
     except Exception as e:
@@ -383,15 +381,16 @@ def try_rapidapi_endpoint(endpoint, search_query, max_products=15):
         return None
 
 def fetch_products_from_rapidapi():
-    """Fetch products from RapidAPI and store in database"""
+    """
+    Fetch products from RapidAPI and store in database.
+    Products are bulk-loaded into a shadow table with a clean structure and
+    swapped in atomically, so the live catalog is never empty or partial.
+    """
+    reload = None
     try:
         conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        
-        # Clear existing products
-        cursor.execute("DELETE FROM products")
-        conn.commit()
-        print("🗑️  Cleared existing products")
+        reload = CatalogReload(conn, 'products', create_sql=PRODUCTS_TABLE_SQL).begin()
+        cached_at = datetime.now()
         
         # Search queries for different categories
         search_queries = [
@@ -425,46 +424,27 @@ def fetch_products_from_rapidapi():
                     successful_endpoints.append(endpoint['name'])
                     products_found = True
                     
-                    # Store products in database
+                    # Queue products for the shadow table (batched multi-row inserts)
                     for i, product in enumerate(products):
-                        try:
-                            product_id = (
-                                product['asin'] or 
-                                f"rapid_{query.replace(' ', '_')}_{total_products}_{i}"
-                            )
-                            
-                            insert_sql = """
-                            INSERT IGNORE INTO products 
-                            (id, title, price, imageUrl, category, gender, description, rating, 
-                             reviews_count, brand, product_url, source, asin, cached_at)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                            """
-                            
-                            cursor.execute(insert_sql, (
-                                product_id,
-                                product['title'],
-                                product['price'],
-                                product['image_url'],
-                                'fashion',
-                                product['gender'],
-                                product['description'],
-                                product['rating'],
-                                product['reviews_count'],
-                                product['brand'],
-                                product['product_url'],
-                                'rapidapi',
-                                product['asin'],
-                                datetime.now()
-                            ))
-                            
-                            total_products += 1
-                            print(f"   ✅ Added: {product['title'][:40]}... (${product['price']})")
-                            
-                        except Exception as e:
-                            print(f"   ⚠️  Error storing product: {e}")
-                            continue
+                        reload.add({
+                            'id': product['asin'] or f"rapid_{query.replace(' ', '_')}_{total_products}_{i}",
+                            'title': product['title'],
+                            'price': product['price'],
+                            'imageUrl': product['image_url'],
+                            'category': 'fashion',
+                            'gender': product['gender'],
+                            'description': product['description'],
+                            'rating': product['rating'],
+                            'reviews_count': product['reviews_count'],
+                            'brand': product['brand'],
+                            'product_url': product['product_url'],
+                            'source': 'rapidapi',
+                            'asin': product['asin'],
+                            'cached_at': cached_at
+                        })
+                        total_products += 1
+                        print(f"   ✅ Added: {product['title'][:40]}... (${product['price']})")
                     
-                    conn.commit()
                     break  # Move to next query
                 
                 # Rate limiting between endpoint attempts
@@ -476,8 +456,14 @@ def fetch_products_from_rapidapi():
             # Rate limiting between queries
             time.sleep(3)
         
-        cursor.close()
-        conn.close()
+        try:
+            reload.commit()
+        except CatalogReloadError as e:
+            reload.abort()
+            print(f"⚠️  Catalog reload rejected, existing products kept: {e}")
+            return False
+        finally:
+            conn.close()
         
         print(f"\n🎉 Successfully stored {total_products} products in database!")
         print(f"📡 Successful endpoints: {list(set(successful_endpoints))}")
@@ -485,6 +471,8 @@ def fetch_products_from_rapidapi():
         return total_products > 0
         
     except Exception as e:
+        if reload is not None:
+            reload.abort()
         print(f"❌ Error in fetch_products_from_rapidapi: {e}")
         return False
 
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test and benchmark the autocomplete index
+Builds a synthetic catalog + search history at production scale and checks
+ranking, incremental updates and per-keystroke latency (target < 2 ms)
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_agent.autocomplete import AutocompleteIndex
+
+COLORS = ['Red', 'Blue', 'Black', 'White', 'Green', 'Pink', 'Navy', 'Maroon', 'Olive', 'Yellow']
+CATEGORIES = ['Dresses', 'Hoodies', 'Jeans', 'Kurti', 'Shirts', 'T-Shirts', 'Sarees', 'Tops', 'Jackets', 'Skirts']
+STYLES = ['Floral', 'Slim Fit', 'Oversized', 'Cotton', 'Printed', 'Casual', 'Formal', 'Party', 'Ethnic', 'Denim']
+
+def synthetic_entries(products=20000, searches=50000, seed=7):
+    rng = random.Random(seed)
+    for i in range(products):
+        yield f"{rng.choice(STYLES)} {rng.choice(COLORS)} {rng.choice(CATEGORIES)} {i}", 'product', 1.0
+    for category in CATEGORIES:
+        yield category, 'category', products / len(CATEGORIES)
+    for color in COLORS:
+        yield color, 'color', products / len(COLORS) * 0.5
+    for _ in range(searches):
+        query = f"{rng.choice(COLORS).lower()} {rng.choice(CATEGORIES).lower()} under {rng.choice([500, 1000, 2000])}"
+        yield query, 'query', 2.0
+
+def keystrokes(text):
+    return [text[:i] for i in range(1, len(text) + 1)]
+
+def test_autocomplete():
+    print("🧪 Testing autocomplete index")
+    print("=" * 50)
+
+    index = AutocompleteIndex()
+    started = time.perf_counter()
+    index.build(synthetic_entries())
+    print(f"✅ Built in {(time.perf_counter() - started) * 1000:.0f} ms: {index.get_stats()}")
+
+    top = index.suggest('dr', limit=3)
+    assert top[0]['text'] == 'Dresses' and top[0]['type'] == 'category', top
+    assert any(s['text'].startswith('red dresses') for s in index.suggest('red dr')), "multi-word prefix"
+    assert all('Red' in s['text'] or 'red' in s['text'] for s in index.suggest('red ')), "trailing space ends the word"
+    assert index.suggest('dresses', kinds=['category'])[0]['text'] == 'Dresses'
+    assert index.suggest('zzz') == []
+    products = index.suggest('d', limit=5, kinds=['product'])
+    assert len(products) == 5 and all(s['type'] == 'product' for s in products), "kind filter on a wide prefix"
+    assert index.suggest('r', limit=3, kinds=['query', 'color'])[0]['text'] == 'Red'
+    print("✅ Ranking and prefix matching")
+
+    index.add('linen palazzo pants', 'query', 50000)
+    assert index.suggest('l', limit=1)[0]['text'] == 'linen palazzo pants', "new phrase reaches a memoized prefix"
+    index.add('maroon kurti under 1000', 'query', 100000)
+    assert index.suggest('m', limit=1)[0]['text'] == 'maroon kurti under 1000', "weight increase reorders a memoized prefix"
+    print("✅ Incremental add and re-weighting")
+
+    typed = []
+    for text in ['red dresses under 2000', 'floral kurti', 'slim fit jeans', 'oversized hoodies', 'navy t-shirts']:
+        typed.extend(keystrokes(text))
+    latencies = []
+    for prefix in typed * 5:
+        started = time.perf_counter()
+        index.suggest(prefix)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"⏱️  {len(latencies)} keystrokes: p50 {p50:.3f} ms, p99 {p99:.3f} ms, max {latencies[-1]:.3f} ms")
+    assert p99 < 2.0, f"p99 {p99:.3f} ms is over the 2 ms budget"
+    print("✅ Per-keystroke latency under 2 ms")
+
+if __name__ == "__main__":
+    test_autocomplete()
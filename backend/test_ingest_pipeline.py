@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test the product ingest pipeline end-to-end against recorded RapidAPI responses
+No network or database needed
+"""
+
+import os
+import tempfile
+
+from product_normalizer import normalize_price, normalize_rating, is_clothing_item, detect_gender_from_text
+from ingest_pipeline import (
+    Pipeline, RecordedFetcher, ConcurrentFetchSource, NormalizeStage,
+    ClassifyStage, DedupeStage, SeenSet, ListSink
+)
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'ingest', 'rapidapi_search.json')
+
+def build_pipeline(seen_set, chunk_size=3):
+    fetcher = RecordedFetcher(FIXTURE)
+    source = ConcurrentFetchSource(sorted(fetcher.responses), fetcher, workers=2, max_in_flight=2)
+    sink = ListSink()
+    pipeline = Pipeline(source, [NormalizeStage(), ClassifyStage(), DedupeStage(seen_set)], sink, chunk_size=chunk_size)
+    return pipeline, sink
+
+def test_normalizer():
+    print("\n" + "="*50)
+    print("TESTING PRODUCT NORMALIZER")
+    print("="*50)
+
+    assert normalize_price("$34.99") == 34.99
+    assert normalize_price("2,199") == 21.99
+    assert normalize_price({'value': 59.0}) == 59.0
+    assert normalize_price(None) == 25.99
+    assert normalize_rating("4.0 out of 5 stars") == 4.0
+    assert normalize_rating("6.0") == 5.0
+    assert is_clothing_item("Women Wrap Midi Dress")
+    assert not is_clothing_item("Floral Phone Case for Women")
+    assert detect_gender_from_text("Men Leather Belt") == 'men'
+    assert detect_gender_from_text("Toddler Puffer Jacket") == 'kids'
+    assert detect_gender_from_text("Fleece Pullover Hoodie") == 'unisex'
+    print("✅ Normalizer matches the legacy fetch-script behaviour")
+
+def test_pipeline_fixture_run():
+    print("\n" + "="*50)
+    print("TESTING INGEST PIPELINE (RECORDED RESPONSES)")
+    print("="*50)
+
+    pipeline, sink = build_pipeline(SeenSet())
+    stats = pipeline.run()
+    pipeline.print_stats()
+
+    titles = [p['title'] for p in sink.rows]
+    assert stats['written'] == len(sink.rows) == 10, f"expected 10 rows, got {len(sink.rows)}"
+    assert len(set(p['hash'] for p in sink.rows)) == len(sink.rows), "duplicate hashes reached the sink"
+    assert not any('Phone Case' in t or 'Keyboard' in t for t in titles), "non-clothing item reached the sink"
+    assert all(p['gender'] in ('women', 'men', 'kids', 'unisex') for p in sink.rows)
+
+    by_stage = {s['stage']: s for s in stats['stages']}
+    assert by_stage['fetch']['items_in'] == 5
+    assert by_stage['normalize']['items_in'] == by_stage['fetch']['items_out'] == 15
+    assert by_stage['dedupe']['dropped'] == 2
+    print(f"✅ {stats['written']} unique clothing products from {by_stage['fetch']['items_out']} raw items")
+
+def test_persistent_seen_set():
+    print("\n" + "="*50)
+    print("TESTING PERSISTENT SEEN-SET")
+    print("="*50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'seen.db')
+
+        seen = SeenSet(path)
+        first, _ = build_pipeline(seen)
+        assert first.run()['written'] == 10
+        seen.close()
+
+        seen = SeenSet(path)
+        assert len(seen) == 10
+        second, sink = build_pipeline(seen)
+        assert second.run()['written'] == 0, "second run re-ingested known products"
+        seen.close()
+    print("✅ Second run against the same seen-set writes nothing")
+
+if __name__ == "__main__":
+    test_normalizer()
+    test_pipeline_fixture_run()
+    test_persistent_seen_set()
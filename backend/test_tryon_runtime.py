@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test AI Try-On exported runtimes - output parity with the Keras model
+Run export_tryon_model.py (with --int8 for the quantized checks) first
+"""
+
+import os
+
+import numpy as np
+
+from config import Config
+from ai_tryon_api import ai_tryon_backend, TF_AVAILABLE
+from tryon_runtime import load_runtime
+
+# Largest allowed per-pixel difference from Keras, in 0-255 units
+MAX_PIXEL_ERROR = {
+    False: 2.0,   # float32 export
+    True: 24.0    # int8 post-training quantization
+}
+
+def parity_inputs(batch_size=2, seed=42):
+    rng = np.random.default_rng(seed)
+    shape = (batch_size, 512, 512, 3)
+    return [rng.random(shape, dtype=np.float32), rng.random(shape, dtype=np.float32)]
+
+def max_pixel_error(reference, candidate):
+    return float(np.max(np.abs(np.asarray(reference) - np.asarray(candidate))) * 255)
+
+def check_runtime_parity(keras_model, runtime, quantized):
+    """Compare one exported runtime against Keras; None when the export is missing"""
+    label = f"{runtime}{' int8' if quantized else ''}"
+    backend = load_runtime(runtime, Config.TRYON_MODEL_PATH, quantized=quantized)
+    if backend is None:
+        print(f"⏭️ {label}: no exported model, skipped")
+        return None
+
+    inputs = parity_inputs()
+    reference = keras_model.predict(inputs, verbose=0)
+    candidate = backend.predict(inputs)
+
+    error = max_pixel_error(reference, candidate)
+    mean_error = float(np.mean(np.abs(reference - candidate)) * 255)
+    passed = candidate.shape == reference.shape and error <= MAX_PIXEL_ERROR[quantized]
+    print(f"{'✅' if passed else '❌'} {label}: max pixel error {error:.2f} "
+          f"(limit {MAX_PIXEL_ERROR[quantized]}), mean {mean_error:.3f}")
+    return passed
+
+def test_tryon_runtime_parity():
+    """Every exported runtime must match Keras within its pixel-error budget"""
+    print("\n" + "="*50)
+    print("TESTING TRY-ON RUNTIME PARITY")
+    print("="*50)
+
+    if not TF_AVAILABLE:
+        print("⏭️ TensorFlow not installed - parity needs the Keras reference")
+        return
+
+    # Only the saved model the exports came from is a valid reference
+    if not os.path.exists(Config.TRYON_MODEL_PATH):
+        print(f"⏭️ No Keras model at {Config.TRYON_MODEL_PATH} - run export_tryon_model.py first")
+        return
+
+    keras_model = ai_tryon_backend.load_keras_model()
+    results = [
+        check_runtime_parity(keras_model, runtime, quantized)
+        for runtime in ('onnx', 'tflite')
+        for quantized in (False, True)
+    ]
+    failures = [r for r in results if r is False]
+    assert not failures, f"{len(failures)} runtime(s) exceeded the pixel-error budget"
+
+if __name__ == "__main__":
+    test_tryon_runtime_parity()
@@ -0,0 +1,275 @@
+# AI Try-On Inference Worker - bounded job queue with dynamic batching
+import queue
+import threading
+import time
+import uuid
+import logging
+from collections import OrderedDict
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+class InferenceJob:
+    """A single try-on inference request tracked by job id"""
+
+    def __init__(self, user_array, garment_array, meta=None):
+        self.id = uuid.uuid4().hex
+        self.user_array = user_array
+        self.garment_array = garment_array
+        self.meta = meta or {}
+        self.created_at = time.time()
+        self.started_at = None
+        self.completed_at = None
+        self.batch_size = None
+        self.prediction = None
+        self.error = None
+        self.result = None  # Finalized response payload, filled by the caller
+        self.result_image = None  # Encoded JPEG for binary/url responses
+        self.lock = threading.Lock()
+        self._done = threading.Event()
+
+    @property
+    def status(self):
+        if self._done.is_set():
+            return 'failed' if self.error else 'completed'
+        return 'running' if self.started_at else 'queued'
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def complete(self, prediction=None, error=None, batch_size=None):
+        self.prediction = prediction
+        self.error = error
+        self.batch_size = batch_size
+        self.completed_at = time.time()
+        # Inputs are no longer needed once the model has run
+        self.user_array = None
+        self.garment_array = None
+        self._done.set()
+
+class TryOnInferenceWorker:
+    """
+    Owns the try-on model and runs it on a background thread.
+
+    Requests are queued (bounded), and whatever is waiting when the worker
+    is free - up to `max_batch_size`, or whatever arrives within
+    `max_wait_ms` - is stacked into one `predict` call.
+
+    `on_complete(job)` runs on the worker thread as each job finishes, so
+    results are encoded and the large arrays released even if nobody polls.
+    """
+
+    def __init__(self, model_loader, max_queue_size=32, max_batch_size=8,
+                 max_wait_ms=20, job_ttl_seconds=300, max_tracked_jobs=1000,
+                 input_shape=(512, 512, 3), on_complete=None):
+        self.model_loader = model_loader
+        self.on_complete = on_complete
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.job_ttl_seconds = job_ttl_seconds
+        self.max_tracked_jobs = max_tracked_jobs
+        self.input_shape = input_shape
+
+        self.model = None
+        self.ready = threading.Event()
+        self.load_error = None
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._jobs = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+        self._last_eviction = 0.0
+
+        self.metrics = {
+            'jobs_submitted': 0,
+            'jobs_completed': 0,
+            'jobs_failed': 0,
+            'jobs_rejected': 0,
+            'batches_run': 0,
+            'last_batch_size': 0,
+            'max_batch_size_seen': 0,
+            'batch_size_counts': {},
+            'total_inference_ms': 0.0,
+            'warmup_ms': None
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the worker thread (model load + warm-up happen on that thread)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='tryon-inference', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _load_and_warm_up(self):
+        self.model = self.model_loader()
+        if self.model is None:
+            raise RuntimeError("Model loader returned no model")
+
+        started = time.time()
+        dummy = np.zeros((1,) + tuple(self.input_shape), dtype=np.float32)
+        self._predict(dummy, dummy)
+        self.metrics['warmup_ms'] = round((time.time() - started) * 1000, 2)
+        logger.info(f"Try-on model warmed up in {self.metrics['warmup_ms']} ms")
+
+    def _run(self):
+        try:
+            self._load_and_warm_up()
+        except Exception as e:
+            self.load_error = str(e)
+            logger.error(f"Try-on inference worker failed to start: {e}")
+            return
+
+        self.ready.set()
+        while not self._stopping.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self._run_batch(batch)
+                self._finish_batch(batch)
+            # Expire finished jobs even when no new submissions arrive
+            if time.time() - self._last_eviction >= 1.0:
+                with self._jobs_lock:
+                    self._evict_jobs()
+
+    # ------------------------------------------------------------------
+    # Job API
+    # ------------------------------------------------------------------
+
+    def submit(self, user_array, garment_array, meta=None):
+        """Queue a job; raises queue.Full when the worker is saturated"""
+        job = InferenceJob(user_array, garment_array, meta)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self.metrics['jobs_rejected'] += 1
+            raise
+
+        with self._jobs_lock:
+            self._jobs[job.id] = job
+            self._evict_jobs()
+        self.metrics['jobs_submitted'] += 1
+        return job
+
+    def get_job(self, job_id):
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def _evict_jobs(self):
+        """Drop finished jobs past their TTL and cap how many are tracked - caller holds the lock"""
+        now = time.time()
+        self._last_eviction = now
+        for job_id in list(self._jobs):
+            job = self._jobs[job_id]
+            expired = job.done() and now - job.completed_at > self.job_ttl_seconds
+            if not expired and len(self._jobs) <= self.max_tracked_jobs:
+                break
+            if job.done():
+                del self._jobs[job_id]
+            else:
+                # Oldest job still running - keep it and stop scanning
+                break
+
+    # ------------------------------------------------------------------
+    # Batching
+    # ------------------------------------------------------------------
+
+    def _collect_batch(self):
+        try:
+            first = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _predict(self, user_batch, garment_batch):
+        return self.model.predict([user_batch, garment_batch], batch_size=len(user_batch), verbose=0)
+
+    def _run_batch(self, batch):
+        started = time.time()
+        for job in batch:
+            job.started_at = started
+
+        size = len(batch)
+        try:
+            user_batch = np.stack([np.asarray(job.user_array, dtype=np.float32) for job in batch])
+            garment_batch = np.stack([np.asarray(job.garment_array, dtype=np.float32) for job in batch])
+            predictions = self._predict(user_batch, garment_batch)
+            for job, prediction in zip(batch, predictions):
+                job.complete(prediction=prediction, batch_size=size)
+            self.metrics['jobs_completed'] += size
+        except Exception as e:
+            logger.error(f"Try-on batch of {size} failed: {e}")
+            for job in batch:
+                job.complete(error=str(e), batch_size=size)
+            self.metrics['jobs_failed'] += size
+
+        elapsed_ms = (time.time() - started) * 1000
+        self.metrics['batches_run'] += 1
+        self.metrics['last_batch_size'] = size
+        self.metrics['max_batch_size_seen'] = max(self.metrics['max_batch_size_seen'], size)
+        self.metrics['batch_size_counts'][size] = self.metrics['batch_size_counts'].get(size, 0) + 1
+        self.metrics['total_inference_ms'] += elapsed_ms
+
+    def _finish_batch(self, batch):
+        """Run on_complete for each job after the batch (outside the inference timing)"""
+        if self.on_complete is None:
+            return
+        for job in batch:
+            try:
+                self.on_complete(job)
+            except Exception as e:
+                logger.error(f"Try-on job {job.id} finalization failed: {e}")
+            # The callback has taken what it needs from the raw output
+            job.prediction = None
+            job.meta.pop('user_array', None)
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def get_metrics(self):
+        batches = self.metrics['batches_run']
+        processed = self.metrics['jobs_completed'] + self.metrics['jobs_failed']
+        with self._jobs_lock:
+            tracked = len(self._jobs)
+        return {
+            **self.metrics,
+            'batch_size_counts': dict(self.metrics['batch_size_counts']),
+            'ready': self.ready.is_set(),
+            'load_error': self.load_error,
+            'queue_depth': self.queue_depth(),
+            'queue_capacity': self._queue.maxsize,
+            'tracked_jobs': tracked,
+            'average_batch_size': round(processed / batches, 2) if batches else 0.0,
+            'average_batch_ms': round(self.metrics['total_inference_ms'] / batches, 2) if batches else 0.0
+        }
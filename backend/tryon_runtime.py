@@ -0,0 +1,108 @@
+# AI Try-On Runtimes - Keras, ONNX Runtime and TFLite backends behind one predict() call
+import os
+import logging
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+RUNTIMES = ('keras', 'onnx', 'tflite')
+
+class OnnxTryOnRuntime:
+    """Exported try-on network served by ONNX Runtime on CPU"""
+
+    name = 'onnx'
+
+    def __init__(self, model_path, threads=0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        if threads:
+            options.intra_op_num_threads = threads
+
+        self.model_path = model_path
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+        self.input_names = sorted((i.name for i in self.session.get_inputs()), key=lambda n: 'user' not in n)
+        self.output_name = self.session.get_outputs()[0].name
+
+    def predict(self, inputs, batch_size=None, verbose=0):
+        """Keras-compatible predict: inputs is [user_batch, garment_batch]"""
+        feed = {name: np.asarray(array, dtype=np.float32) for name, array in zip(self.input_names, inputs)}
+        return self.session.run([self.output_name], feed)[0]
+
+class TFLiteTryOnRuntime:
+    """Exported try-on network served by the TFLite interpreter (float or int8 weights)"""
+
+    name = 'tflite'
+
+    def __init__(self, model_path, threads=0):
+        try:
+            # The standalone runtime avoids importing all of TensorFlow
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        self.model_path = model_path
+        self.interpreter = Interpreter(model_path=model_path, num_threads=threads or None)
+        self.interpreter.allocate_tensors()
+        # Keep the Keras input order: user image first, then garment
+        self.input_details = sorted(self.interpreter.get_input_details(), key=lambda d: 'user' not in d['name'])
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        self._batch_size = int(self.input_details[0]['shape'][0])
+
+    def _resize(self, batch_size):
+        if batch_size == self._batch_size:
+            return
+        for detail in self.input_details:
+            shape = list(detail['shape'])
+            shape[0] = batch_size
+            self.interpreter.resize_tensor_input(detail['index'], shape)
+        self.interpreter.allocate_tensors()
+        self._batch_size = batch_size
+
+    def predict(self, inputs, batch_size=None, verbose=0):
+        """Keras-compatible predict: inputs is [user_batch, garment_batch]"""
+        arrays = [np.asarray(array, dtype=np.float32) for array in inputs]
+        self._resize(len(arrays[0]))
+        for detail, array in zip(self.input_details, arrays):
+            self.interpreter.set_tensor(detail['index'], array)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index).copy()
+
+def exported_model_path(model_path, runtime, quantized=False):
+    """Path of the exported file next to the Keras model (e.g. ai_tryon_model.int8.onnx)"""
+    base, _ = os.path.splitext(model_path)
+    suffix = '.int8' if quantized else ''
+    return f"{base}{suffix}.{runtime}"
+
+def load_runtime(runtime, model_path, threads=0, quantized=False):
+    """
+    Load an exported runtime for `model_path`. Returns None when the export
+    or its runtime library is missing, so callers can fall back to Keras.
+    """
+    if runtime == 'keras':
+        return None
+    if runtime not in RUNTIMES:
+        logger.warning(f"Unknown try-on runtime '{runtime}', using keras")
+        return None
+
+    path = exported_model_path(model_path, runtime, quantized)
+    if not os.path.exists(path):
+        logger.warning(f"Exported try-on model not found at {path} - run export_tryon_model.py")
+        return None
+
+    try:
+        backend = OnnxTryOnRuntime(path, threads) if runtime == 'onnx' else TFLiteTryOnRuntime(path, threads)
+        logger.info(f"Loaded {runtime} try-on runtime from {path}")
+        return backend
+    except ImportError as e:
+        logger.warning(f"{runtime} runtime not installed ({e}), using keras")
+    except Exception as e:
+        logger.error(f"Failed to load {runtime} try-on runtime: {e}")
+    return None
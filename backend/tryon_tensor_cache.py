@@ -0,0 +1,142 @@
+# Preprocessed Image Tensor Cache - two-level (memory LRU + memory-mapped .npy on disk)
+import os
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+class TensorCache:
+    """
+    Content-hash keyed cache for preprocessed try-on tensors.
+
+    Level 1 is an in-process LRU of arrays. Level 2 is a directory of float16
+    `.npy` files opened with mmap, so a garment decoded once (by a request or
+    by the precompute job) is never decoded again by any worker.
+    """
+
+    def __init__(self, cache_dir, max_memory_items=256, dtype='float16'):
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.dtype = dtype
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def content_key(image_bytes, target_size=(512, 512)):
+        """Stable key for raw image bytes at a given target size"""
+        digest = hashlib.blake2b(image_bytes, digest_size=20).hexdigest()
+        return f"{digest}_{target_size[0]}x{target_size[1]}"
+
+    @staticmethod
+    def stream_key(stream, target_size=(512, 512), chunk_size=64 * 1024):
+        """Same key as content_key, hashed from a seekable stream in chunks"""
+        digest = hashlib.blake2b(digest_size=20)
+        stream.seek(0)
+        for chunk in iter(lambda: stream.read(chunk_size), b''):
+            digest.update(chunk)
+        stream.seek(0)
+        return f"{digest.hexdigest()}_{target_size[0]}x{target_size[1]}"
+    
+    @staticmethod
+    def alias_key(product_id, target_size=(512, 512)):
+        """Key for a catalog garment precomputed by product id"""
+        safe_id = ''.join(c for c in str(product_id) if c.isalnum() or c in '-_')
+        return f"product-{safe_id}_{target_size[0]}x{target_size[1]}"
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _remember(self, key, array):
+        with self._lock:
+            self._memory[key] = array
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached array (float16, possibly memory-mapped) or None"""
+        with self._lock:
+            array = self._memory.get(key)
+            if array is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return array
+
+        path = self._path(key)
+        if NUMPY_AVAILABLE and os.path.exists(path):
+            try:
+                array = np.load(path, mmap_mode='r')
+                self.stats['disk_hits'] += 1
+                self._remember(key, array)
+                return array
+            except Exception as e:
+                logger.warning(f"Discarding unreadable tensor cache file {path}: {e}")
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, key, array):
+        """Store an array at both levels (written atomically on disk)"""
+        if not NUMPY_AVAILABLE:
+            return array
+
+        compact = np.asarray(array, dtype=self.dtype)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, compact)
+            os.replace(tmp_path, path)
+            self.stats['stores'] += 1
+        except Exception as e:
+            logger.warning(f"Failed to persist tensor {key}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self._remember(key, compact)
+        return compact
+
+    def link(self, alias, key):
+        """Make `alias` resolve to the same file as `key` (used for product ids)"""
+        source, target = self._path(key), self._path(alias)
+        if not os.path.exists(source):
+            return False
+        try:
+            if os.path.exists(target):
+                os.remove(target)
+            os.link(source, target)
+        except OSError:
+            # Filesystems without hard links get a copy instead
+            self.put(alias, self.get(key))
+        return True
+
+    def get_or_compute(self, key, compute):
+        """Return the cached tensor for `key`, computing and storing it on a miss"""
+        array = self.get(key)
+        if array is None:
+            array = self.put(key, compute())
+        return array
+
+    def get_stats(self):
+        with self._lock:
+            memory_items = len(self._memory)
+        lookups = self.stats['memory_hits'] + self.stats['disk_hits'] + self.stats['misses']
+        hits = self.stats['memory_hits'] + self.stats['disk_hits']
+        return {
+            **self.stats,
+            'memory_items': memory_items,
+            'hit_ratio': round(hits / lookups, 3) if lookups else 0.0
+        }
@@ -0,0 +1,124 @@
+# Try-On Upload Helpers - multipart image uploads without base64/JSON buffering
+import io
+import json
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from flask import send_file
+
+# Magic-byte prefixes for the formats the try-on pipeline accepts
+IMAGE_SIGNATURES = [
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+]
+
+RESPONSE_FORMATS = ('binary', 'url', 'json')
+
+class UploadError(ValueError):
+    """Rejected upload, carrying the HTTP status to answer with"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+def is_multipart(req):
+    return req.mimetype == 'multipart/form-data'
+
+def sniff_image_type(stream):
+    """Detect the image type from its first bytes, leaving the stream at position 0"""
+    head = stream.read(12)
+    stream.seek(0)
+    for signature, mimetype in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return mimetype
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+def open_upload(files, field, max_bytes, required=True):
+    """
+    Validate an uploaded image part and return (stream, mimetype).
+
+    Werkzeug spools large parts to a temporary file while parsing, so the
+    returned stream is read by the decoder directly instead of being copied
+    into a string first.
+    """
+    storage = files.get(field)
+    if storage is None or not storage.filename:
+        if required:
+            raise UploadError(f'Missing required file: {field}')
+        return None, None
+
+    stream = storage.stream
+    stream.seek(0, io.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+
+    if size == 0:
+        raise UploadError(f'{field} is empty')
+    if size > max_bytes:
+        raise UploadError(f'{field} exceeds the {max_bytes // (1024 * 1024)} MB upload limit', 413)
+
+    mimetype = sniff_image_type(stream)
+    if mimetype is None:
+        raise UploadError(f'{field} is not a JPEG, PNG, GIF or WebP image', 415)
+
+    return stream, mimetype
+
+def form_json(form, field, default=None):
+    """Parse a JSON-encoded form field (e.g. body_measurements)"""
+    raw = form.get(field)
+    if not raw:
+        return default
+    try:
+        return json.loads(raw)
+    except ValueError:
+        raise UploadError(f'{field} must be valid JSON')
+
+def response_format(req, default='binary'):
+    """Requested result format for upload requests: binary image, fetchable url, or json"""
+    value = (req.args.get('response') or req.form.get('response') or default).lower()
+    if value not in RESPONSE_FORMATS:
+        raise UploadError(f"response must be one of: {', '.join(RESPONSE_FORMATS)}")
+    return value
+
+def image_response(data, mimetype='image/jpeg', headers=None):
+    """Send raw image bytes (or a stream) as the response body"""
+    body = io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+    response = send_file(body, mimetype=mimetype, max_age=0)
+    for name, value in (headers or {}).items():
+        if value is not None:
+            response.headers[name] = str(value)
+    return response
+
+class TryOnResultStore:
+    """Bounded, expiring in-memory store for result images served by URL"""
+
+    def __init__(self, max_items=256, ttl_seconds=300):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, data, mimetype='image/jpeg'):
+        result_id = uuid.uuid4().hex
+        with self._lock:
+            self._items[result_id] = (time.time(), data, mimetype)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return result_id
+
+    def get(self, result_id):
+        """Return (data, mimetype) or None when missing or expired"""
+        with self._lock:
+            entry = self._items.get(result_id)
+            if entry is None:
+                return None
+            created, data, mimetype = entry
+            if time.time() - created > self.ttl_seconds:
+                del self._items[result_id]
+                return None
+            return data, mimetype
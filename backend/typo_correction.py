@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Typo Correction Service
+Keyword tables for natural-language search and a typo corrector over them,
+so "hoddie", "kurtha" or "tshrit" still reach the right category
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+
+# The corrector lives in the chat agent package so both services share one implementation
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_agent.spell_correct import build_keyword_corrector
+from config import Config
+from catalog_facets import catalog_facet_service
+
+logger = logging.getLogger(__name__)
+
+# Order matters - most specific first
+CATEGORY_KEYWORDS = {
+    'T-shirts': ['t-shirt', 't-shirts', 'tshirt', 'tshirts', 'tee', 'tees'],
+    'Bottom Wear': ['bottom wear', 'bottomwear', 'pants', 'jeans', 'trousers'],
+    f"Women{chr(8217)}s Bottomwear": ['women bottomwear', 'womens bottomwear', 'women\'s bottomwear'],  # Handle smart quote
+    'Shirts': ['shirt', 'shirts'],
+    'Dresses': ['dress', 'dresses', 'gown', 'gowns'],
+    'Ethnic Wear': ['ethnic', 'traditional', 'ethnic wear', 'kurta', 'saree', 'kurti'],
+    'Western Wear': ['western', 'casual', 'western wear'],
+    'Hoodies': ['hoodie', 'hoodies', 'sweatshirt', 'sweatshirts'],
+    'Tops and Co-ord Sets': ['tops', 'coord', 'co-ord', 'sets', 'top']
+}
+
+COLOR_KEYWORDS = {
+    'Black': ['black', 'dark'],
+    'White': ['white', 'cream', 'off-white'],
+    'Blue': ['blue', 'navy', 'sky blue', 'light blue'],
+    'Red': ['red', 'maroon', 'crimson'],
+    'Green': ['green', 'olive', 'mint'],
+    'Pink': ['pink', 'rose', 'baby pink'],
+    'Grey': ['grey', 'gray', 'charcoal'],
+    'Brown': ['brown', 'tan', 'beige'],
+    'Yellow': ['yellow', 'golden', 'mustard'],
+    'Purple': ['purple', 'violet', 'lavender'],
+    'Orange': ['orange', 'peach']
+}
+
+GENDER_KEYWORDS = ['women', 'woman', 'female', 'girls', 'ladies', 'men', 'man', 'male', 'boys', 'guys']
+PARTY_KEYWORDS = ['party', 'party wear', 'evening', 'night out']
+FORMAL_KEYWORDS = ['formal', 'office', 'work', 'business']
+
+class TypoCorrectionService:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._corrector = None
+        self._catalog_version = None
+        self._next_check = 0.0
+        self.stats = {'rebuilds': 0, 'rebuild_ms': 0.0, 'queries': 0, 'corrected_queries': 0}
+
+    def _keyword_lists(self):
+        return [
+            [k for keywords in CATEGORY_KEYWORDS.values() for k in keywords],
+            [k for keywords in COLOR_KEYWORDS.values() for k in keywords],
+            GENDER_KEYWORDS, PARTY_KEYWORDS, FORMAL_KEYWORDS
+        ]
+
+    def _catalog_words(self, version):
+        """Product names, categories and colors, so real catalog terms are left alone"""
+        snapshot = catalog_facet_service.snapshot(version) if version is not None else None
+        if snapshot is None:
+            return []
+        words = set()
+        for row in snapshot.rows(('product_name', 'product_category', 'color')):
+            for value in row.values():
+                if value:
+                    words.add(value)
+        return words
+
+    def rebuild(self, version):
+        started = time.time()
+        self._corrector = build_keyword_corrector(self._keyword_lists(), self._catalog_words(version))
+        self._catalog_version = version
+        self.stats['rebuilds'] += 1
+        self.stats['rebuild_ms'] = round((time.time() - started) * 1000, 1)
+        logger.info("✏️ Typo corrector built: %d words (%s ms)", self._corrector.get_stats()['words'], self.stats['rebuild_ms'])
+
+    def ensure_fresh(self):
+        """Build on first use, then rebuild when the catalog version moves"""
+        now = time.time()
+        if self._corrector is not None and now < self._next_check:
+            return
+        if not self._lock.acquire(blocking=self._corrector is None):
+            return  # another request is rebuilding - keep using the current corrector
+        try:
+            if self._corrector is not None and now < self._next_check:
+                return
+            self._next_check = now + Config.TYPO_CORRECTION_REFRESH_SECONDS
+            version = catalog_facet_service.store.version()
+            if self._corrector is None or version != self._catalog_version:
+                self.rebuild(version)
+        except Exception as e:
+            logger.warning("Typo corrector refresh failed: %s", e)
+            if self._corrector is None:
+                self._corrector = build_keyword_corrector(self._keyword_lists())
+        finally:
+            self._lock.release()
+
+    def correct(self, query):
+        """(corrected query, {typo: correction}) - the query unchanged when correction is off"""
+        if not Config.TYPO_CORRECTION_ENABLED or not query:
+            return query, {}
+        self.ensure_fresh()
+        corrected, corrections = self._corrector.correct(query)
+        self.stats['queries'] += 1
+        if corrections:
+            self.stats['corrected_queries'] += 1
+            return corrected, corrections
+        return query, {}
+
+    def get_stats(self):
+        words = self._corrector.get_stats() if self._corrector is not None else {}
+        return dict(self.stats, **words, catalog_version=self._catalog_version)
+
+# Singleton instance
+typo_correction_service = TypoCorrectionService()
@@ -1,8 +1,14 @@
 """
 Update product images to match product titles and categories
 Uses appropriate Unsplash images for each product type
+
+Usage:
+    python update_product_images.py [--dry-run]
 """
-from db import execute_query
+import re
+import sys
+import time
+from db import get_db_connection
 
 # Category-specific image mappings
 IMAGE_MAPPINGS = {
@@ -102,123 +108,191 @@ IMAGE_MAPPINGS = {
     ],
 }
 
-def categorize_product(title):
-    """Determine the image category based on product title"""
-    title_lower = title.lower()
-    
+# Ordered rules: (category, any of these words, all of these words, none of these words).
+# First match wins - same precedence as the old if/elif chain.
+CATEGORY_RULES = [
     # Women's categories
-    if "dress" in title_lower:
-        return "dress"
-    elif "kurti" in title_lower or "kurta" in title_lower:
-        return "kurti"
-    elif "saree" in title_lower:
-        return "saree"
-    elif any(word in title_lower for word in ["anarkali", "salwar", "lehenga", "sharara", "palazzo suit", "ethnic"]):
-        return "ethnic_women"
-    elif any(word in title_lower for word in ["top", "blouse", "crop", "tank", "tunic", "peplum"]):
-        return "top"
-    elif any(word in title_lower for word in ["palazzo", "jeans", "legging", "trouser", "short", "culotte", "pant", "jogger", "capri", "cargo"]) and "women" in title_lower:
-        return "women_bottom"
-    elif any(word in title_lower for word in ["jacket", "blazer", "cardigan", "coat", "shrug", "windcheater", "hoodie", "bomber", "puffer"]) and "women" in title_lower:
-        return "women_jacket"
-    
+    ("dress", ["dress"], [], []),
+    ("kurti", ["kurti", "kurta"], [], []),
+    ("saree", ["saree"], [], []),
+    ("ethnic_women", ["anarkali", "salwar", "lehenga", "sharara", "palazzo suit", "ethnic"], [], []),
+    ("top", ["top", "blouse", "crop", "tank", "tunic", "peplum"], [], []),
+    ("women_bottom", ["palazzo", "jeans", "legging", "trouser", "short", "culotte", "pant", "jogger", "capri", "cargo"], ["women"], []),
+    ("women_jacket", ["jacket", "blazer", "cardigan", "coat", "shrug", "windcheater", "hoodie", "bomber", "puffer"], ["women"], []),
+
     # Men's categories
-    elif "shirt" in title_lower and "men" in title_lower and "t-shirt" not in title_lower:
-        return "men_shirt"
-    elif "t-shirt" in title_lower or "tshirt" in title_lower or ("polo" in title_lower and "men" in title_lower):
-        return "men_tshirt"
-    elif any(word in title_lower for word in ["jeans", "trouser", "chino", "cargo", "jogger", "short", "track pant", "pant"]) and "men" in title_lower:
-        return "men_bottom"
-    elif any(word in title_lower for word in ["kurta", "sherwani", "pathani", "nehru", "dhoti", "indo-western", "bandhgala", "jodhpuri"]):
-        return "men_ethnic"
-    elif any(word in title_lower for word in ["jacket", "blazer", "hoodie", "sweater", "cardigan", "coat", "windcheater", "bomber", "puffer"]) and "men" in title_lower:
-        return "men_jacket"
-    
+    ("men_shirt", ["shirt"], ["men"], ["t-shirt"]),
+    ("men_tshirt", ["t-shirt", "tshirt"], [], []),
+    ("men_tshirt", ["polo"], ["men"], []),
+    ("men_bottom", ["jeans", "trouser", "chino", "cargo", "jogger", "short", "track pant", "pant"], ["men"], []),
+    ("men_ethnic", ["kurta", "sherwani", "pathani", "nehru", "dhoti", "indo-western", "bandhgala", "jodhpuri"], [], []),
+    ("men_jacket", ["jacket", "blazer", "hoodie", "sweater", "cardigan", "coat", "windcheater", "bomber", "puffer"], ["men"], []),
+
     # Kids categories
-    elif "girls" in title_lower:
-        return "girls"
-    elif "boys" in title_lower:
-        return "boys"
-    elif "kids" in title_lower:
-        return "kids_unisex"
-    
-    # Default
-    return "dress"
+    ("girls", ["girls"], [], []),
+    ("boys", ["boys"], [], []),
+    ("kids_unisex", ["kids"], [], []),
+]
 
-def update_images():
-    """Update all eBay product images with appropriate category-specific images"""
-    
+DEFAULT_CATEGORY = "dress"
+
+class CategoryMatcher:
+    """
+    CATEGORY_RULES compiled once: each rule's word list becomes a single
+    alternation regex (one C-level scan instead of a Python loop of
+    substring checks), rules are tried in order, and results are memoized
+    per lowercased title since feeds repeat titles heavily.
+    """
+
+    def __init__(self, rules, default, cache_size=100000):
+        self.default = default
+        self.cache_size = cache_size
+        self.rules = [
+            (category, self._compile(any_of), tuple(all_of), tuple(none_of))
+            for category, any_of, all_of, none_of in rules
+        ]
+        self._cache = {}
+
+    @staticmethod
+    def _compile(words):
+        return re.compile('|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True)))
+
+    def classify(self, title):
+        title_lower = (title or '').lower()
+        category = self._cache.get(title_lower)
+        if category is not None:
+            return category
+
+        category = self.default
+        for rule_category, any_of, all_of, none_of in self.rules:
+            if (any_of.search(title_lower)
+                    and all(w in title_lower for w in all_of)
+                    and not any(w in title_lower for w in none_of)):
+                category = rule_category
+                break
+        if len(self._cache) < self.cache_size:
+            self._cache[title_lower] = category
+        return category
+
+    def classify_many(self, titles):
+        return [self.classify(title) for title in titles]
+
+category_matcher = CategoryMatcher(CATEGORY_RULES, DEFAULT_CATEGORY)
+
+def categorize_product(title):
+    """Determine the image category based on product title"""
+    return category_matcher.classify(title)
+
+def _scalar(cursor, query, params=()):
+    cursor.execute(query, params)
+    row = cursor.fetchone()
+    return list(row.values())[0] if row else None
+
+def update_images(source='ebay', chunk_size=10000, dry_run=False):
+    """
+    Re-categorize every product of `source` and point its image_url at a
+    category-specific image.
+
+    Rows are read in keyset-paginated chunks and classified per chunk; new
+    image URLs are staged in a temporary table with multi-row INSERTs and
+    applied with one UPDATE ... JOIN, so 100k products take a few dozen
+    round trips. `dry_run` reports the changes without writing.
+    """
     print("\n" + "="*70)
-    print("Updating Product Images to Match Titles")
+    print(f"Updating Product Images to Match Titles{' (dry run)' if dry_run else ''}")
     print("="*70)
-    
-    # Get all eBay products
-    products = execute_query(
-        "SELECT id, product_id, title FROM api_cache WHERE source = 'ebay' ORDER BY id",
-        fetch=True
-    )
-    
-    if not products:
-        print("No eBay products found!")
-        return
-    
-    print(f"\nFound {len(products)} eBay products to update")
-    print("-"*70)
-    
-    updated_count = 0
+
+    connection = get_db_connection()
+    if not connection:
+        return None
+
+    started = time.time()
+    cursor = connection.cursor()
     category_counts = {}
-    
-    for product in products:
-        try:
-            product_id = product['product_id']
-            title = product['title']
-            
-            # Determine category
-            category = categorize_product(title)
-            
-            # Get appropriate image
-            images = IMAGE_MAPPINGS.get(category, IMAGE_MAPPINGS["dress"])
-            image_url = images[updated_count % len(images)]
-            
-            # Update image
-            execute_query(
-                "UPDATE api_cache SET image_url = %s WHERE product_id = %s",
-                (image_url, product_id)
+    scanned = changed = 0
+    try:
+        total = _scalar(cursor, "SELECT COUNT(*) FROM api_cache WHERE source = %s", (source,)) or 0
+        if not total:
+            print(f"No {source} products found!")
+            return None
+        print(f"\nFound {total} {source} products to re-categorize")
+        print("-"*70)
+
+        if not dry_run:
+            cursor.execute("CREATE TEMPORARY TABLE IF NOT EXISTS image_recategorize "
+                           "(id INT PRIMARY KEY, image_url VARCHAR(500) NOT NULL)")
+            cursor.execute("DELETE FROM image_recategorize")
+
+        last_id = 0
+        while True:
+            cursor.execute(
+                "SELECT id, title, image_url FROM api_cache WHERE source = %s AND id > %s ORDER BY id LIMIT %s",
+                (source, last_id, chunk_size)
             )
-            
-            # Track statistics
-            category_counts[category] = category_counts.get(category, 0) + 1
-            updated_count += 1
-            
-            print(f"✅ {title[:60]}...")
-            print(f"   Category: {category} | Image: {image_url[:50]}...")
-            
-        except Exception as e:
-            print(f"❌ Error updating {title[:30]}...: {e}")
-    
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+
+            staged = []
+            for row, category in zip(rows, category_matcher.classify_many([r['title'] for r in rows])):
+                images = IMAGE_MAPPINGS.get(category, IMAGE_MAPPINGS[DEFAULT_CATEGORY])
+                # Same rotation as before: the running row index picks the image
+                image_url = images[scanned % len(images)]
+                scanned += 1
+                category_counts[category] = category_counts.get(category, 0) + 1
+                if row['image_url'] != image_url:
+                    staged.append((row['id'], image_url))
+
+            changed += len(staged)
+            if staged and not dry_run:
+                cursor.executemany("INSERT INTO image_recategorize (id, image_url) VALUES (%s, %s)", staged)
+
+            elapsed = time.time() - started
+            print(f"⏳ {scanned}/{total} classified ({scanned / total:.0%}, "
+                  f"{scanned / elapsed if elapsed > 0 else 0:,.0f} rows/s) - {changed} to update")
+
+        if not dry_run and changed:
+            cursor.execute(
+                "UPDATE api_cache t JOIN image_recategorize r ON r.id = t.id SET t.image_url = r.image_url"
+            )
+            connection.commit()
+    except Exception as e:
+        connection.rollback()
+        print(f"❌ Error updating images: {e}")
+        return None
+    finally:
+        if not dry_run:
+            cursor.execute("DROP TEMPORARY TABLE IF EXISTS image_recategorize")
+        cursor.close()
+        connection.close()
+
     print("\n" + "="*70)
-    print(f"✅ Successfully updated {updated_count} product images")
+    verb = "Would update" if dry_run else "Successfully updated"
+    print(f"✅ {verb} {changed} of {scanned} product images in {time.time() - started:.2f}s")
     print("="*70)
-    
+
     # Show category breakdown
-    print("\n📊 Images Updated by Category:")
+    print("\n📊 Products by Category:")
     print("-"*70)
     for category, count in sorted(category_counts.items(), key=lambda x: x[1], reverse=True):
         print(f"  • {category:20} : {count:3} products")
-    
-    print("\n" + "="*70)
-    print("🎉 All product images now match their titles!")
-    print("="*70)
+
+    return {'scanned': scanned, 'changed': changed, 'categories': category_counts, 'dry_run': dry_run}
 
 if __name__ == "__main__":
+    dry_run = '--dry-run' in sys.argv
     print("\n" + "="*70)
     print("Product Image Updater")
     print("="*70)
     print("\nThis will update all eBay product images to match their titles.")
     print("Each product will get an appropriate category-specific image.")
+    if dry_run:
+        print("Dry run: nothing will be written.")
     print("\n" + "="*70 + "\n")
     
-    update_images()
+    update_images(dry_run=dry_run)
     
-    print("\n✅ Done! Refresh your website to see the updated images.")
-    print("🌐 Visit: http://localhost:3000/home\n")
+    if not dry_run:
+        print("\n✅ Done! Refresh your website to see the updated images.")
+        print("🌐 Visit: http://localhost:3000/home\n")
@@ -10,28 +10,69 @@ import sys
 import os
 from datetime import datetime
 
+try:
+    import jwt
+except ImportError:
+    jwt = None
+
 # Add current directory to Python path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from chat_agent import FashionPulseChatAgent
+from database import query_profiler, search_result_cache
+from metrics import registry
+from config import ChatAgentConfig
+from structured_logging import configure_logging, init_request_ids
+from generation_budget import Deadline, client_disconnected
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# JSON-lines logs written off the request thread; hot paths log at DEBUG only
+configure_logging(
+    'chat-agent',
+    level=ChatAgentConfig.LOG_LEVEL,
+    module_levels=ChatAgentConfig.LOG_LEVELS,
+    json_format=ChatAgentConfig.LOG_JSON,
+    debug_sample_rate=ChatAgentConfig.LOG_DEBUG_SAMPLE_RATE,
+    debug_per_second=ChatAgentConfig.LOG_DEBUG_PER_SECOND,
+    queue_size=ChatAgentConfig.LOG_QUEUE_SIZE
 )
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend integration
 
+# X-Request-ID on every request, stamped on each log line
+init_request_ids(app)
+
+# Query count / DB time per request (Server-Timing header in debug mode)
+query_profiler.init_app(app)
+
+# Prometheus metrics on /metrics (request counts and latency per route)
+registry.init_app(app)
+chat_intents = registry.counter('chat_intents_total', 'Chat messages by detected intent / response type', ('intent',))
+
 # Initialize chat agent
 chat_agent = FashionPulseChatAgent()
+registry.gauge('db_connection_up', 'Chat agent MySQL connection open (1) or not (0)').set_function(
+    lambda: 1 if chat_agent.db_handler.connection and chat_agent.db_handler.connection.open else 0
+)
+
+def verified_user_email():
+    """Email in the backend's bearer token - None without a valid token or without JWT_SECRET"""
+    header = request.headers.get('Authorization', '')
+    if jwt is None or not ChatAgentConfig.JWT_SECRET or not header.startswith('Bearer '):
+        return None
+    try:
+        claims = jwt.decode(header[len('Bearer '):], ChatAgentConfig.JWT_SECRET, algorithms=['HS256'])
+    except jwt.InvalidTokenError:
+        return None
+    return claims.get('email')
 
 @app.route('/api/chat', methods=['POST'])
 def chat_endpoint():
     """
     Main chat endpoint
-    Expects: {"message": "user message"}
+    Expects: {"message": "user message", "session_id": "optional chat session"}
+    With the backend's "Authorization: Bearer <token>", a session the user
+    started earlier is restored from their saved chat history
     Returns: {"response": "agent response", "timestamp": "ISO timestamp"}
     """
     try:
@@ -50,12 +91,17 @@ def chat_endpoint():
                 'error': 'Empty message provided'
             }), 400
         
-        # Process message with chat agent
-        response = chat_agent.process_message(user_message)
+        # Process message with chat agent - bounded in time, abandoned if the client disconnects
+        environ = request.environ
+        deadline = Deadline(ChatAgentConfig.LLM_DEADLINE_SECONDS, is_cancelled=lambda: client_disconnected(environ))
+        response = chat_agent.process_message(user_message, session_id=data.get('session_id'), deadline=deadline,
+                                              user_email=verified_user_email())
         
         # Also get structured product data if it's a search query
         parsed_query = chat_agent.query_parser.parse_user_query(user_message)
+        chat_intents.inc(parsed_query.get('intent') or 'unknown')
         products = []
+        facets = {}
         
         if parsed_query['intent'] == 'search' or any([parsed_query['category'], parsed_query['color'], parsed_query['gender']]):
             products = chat_agent.db_handler.search_products(
@@ -65,10 +111,17 @@ def chat_endpoint():
                 max_price=parsed_query['max_price'],
                 limit=5  # Limit for chat display
             )
+            # Facet counts come from the in-memory store - no extra query
+            facets = chat_agent.db_handler.get_facet_counts(
+                category=parsed_query['category'],
+                color=parsed_query['color'],
+                gender=parsed_query['gender']
+            )
         
         return jsonify({
             'response': response,
             'products': products,
+            'facets': facets,
             'timestamp': datetime.now().isoformat(),
             'status': 'success'
         })
@@ -112,6 +165,8 @@ def get_chat_stats():
         
         return jsonify({
             'stats': stats,
+            'facets': chat_agent.db_handler.get_facet_counts(),
+            'price_histogram': chat_agent.db_handler.facets.price_histogram(),
             'timestamp': datetime.now().isoformat(),
             'status': 'success'
         })
@@ -167,6 +222,20 @@ def get_colors():
             'message': str(e)
         }), 500
 
+@app.route('/api/chat/db-metrics', methods=['GET'])
+def get_db_metrics():
+    """
+    Query counts, DB time, slowest fingerprints, EXPLAIN captures, search result cache
+    and the product vector index
+    """
+    return jsonify({
+        'db': query_profiler.get_stats(),
+        'result_cache': search_result_cache.get_stats(),
+        'product_index': chat_agent.db_handler.get_product_index_stats(),
+        'timestamp': datetime.now().isoformat(),
+        'status': 'success'
+    })
+
 @app.route('/api/chat/health', methods=['GET'])
 def health_check():
     """
@@ -254,6 +323,8 @@ def get_help():
             'POST /api/chat': 'Main chat interface with LLM support',
             'GET /api/chat/product/{id}': 'Get product details',
             'GET /api/chat/stats': 'Get database statistics',
+            'GET /api/chat/db-metrics': 'Get per-query timing and slow-query plans',
+            'GET /metrics': 'Prometheus metrics (requests, latency, intents, DB)',
             'GET /api/chat/categories': 'Get all categories',
             'GET /api/chat/colors': 'Get all colors',
             'GET /api/chat/llm-status': 'Get LLM integration status',
@@ -293,4 +364,6 @@ if __name__ == '__main__':
     print("📚 Help endpoint: GET http://localhost:5001/api/chat/help")
     print("="*60)
     
-    app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
+    # The debug reloader runs the app in a second process, which would find the
+    # LLM worker pool already claimed by the first - keep it off with a pool
+    app.run(host='0.0.0.0', port=5001, debug=True, use_reloader=ChatAgentConfig.LLM_WORKERS == 0)
\ No newline at end of file
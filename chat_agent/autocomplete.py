@@ -0,0 +1,187 @@
+"""
+Typeahead index for FashionPulse search
+Phrases (product names, categories, colors, past queries) are indexed under
+every word-suffix in one sorted key array, so a keystroke is two binary
+searches plus a top-k over the matching range. Short prefixes, whose ranges
+are large, keep a memoized top-k that is updated in place when weights grow.
+"""
+import re
+import heapq
+import threading
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+_NON_WORD = re.compile(r"[^\w'&-]+", re.UNICODE)
+_HIGH = '\uffff'
+
+
+def normalize(text: str) -> str:
+    """Lowercase, punctuation to spaces, single-spaced"""
+    return ' '.join(_NON_WORD.sub(' ', str(text or '').lower()).split())
+
+
+class _Phrase:
+    __slots__ = ('text', 'kind', 'weight', 'keys')
+
+    def __init__(self, text: str, kind: str, weight: float, keys: Tuple[str, ...]):
+        self.text = text
+        self.kind = kind
+        self.weight = weight
+        self.keys = keys
+
+
+class AutocompleteIndex:
+    """
+    `add(text, kind, weight)` indexes a phrase (or adds weight to an
+    existing one); `suggest(prefix)` returns the heaviest phrases having a
+    word that starts with `prefix`'s first word and continuing with the rest.
+
+    Ranges wider than `scan_limit` keys are answered from a per-prefix
+    top-`memo_size` list, filled on first use and kept current as weights
+    increase; wide one- to three-letter prefixes are memoized at build time.
+    Lookups restricted to `kinds` use their own per-(prefix, kind) lists, so
+    a rare kind is not crowded out of the shared top-k.
+    """
+
+    def __init__(self, max_suffixes: int = 6, scan_limit: int = 256, memo_size: int = 32):
+        self.max_suffixes = max_suffixes
+        self.scan_limit = scan_limit
+        self.memo_size = memo_size
+        self._lock = threading.RLock()
+        self._phrases: Dict[str, _Phrase] = {}
+        # phrase -> weight, kept alongside _phrases so ranking uses a C-level key
+        self._weights: Dict[str, float] = {}
+        # Sorted (key, phrase) pairs - one per word-suffix of each phrase
+        self._keys: List[Tuple[str, str]] = []
+        # prefix, or (prefix, kind) -> [(weight, phrase)] heaviest first
+        self._memo: Dict[Any, List[Tuple[float, str]]] = {}
+
+    def _suffix_keys(self, phrase: str) -> Tuple[str, ...]:
+        words = phrase.split(' ')
+        return tuple(' '.join(words[i:]) for i in range(min(len(words), self.max_suffixes)))
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def build(self, entries: Iterable[Tuple[str, str, float]]):
+        """Replace the whole index with (text, kind, weight) entries - one sort"""
+        phrases: Dict[str, _Phrase] = {}
+        for text, kind, weight in entries:
+            phrase = normalize(text)
+            if not phrase or weight <= 0:
+                continue
+            existing = phrases.get(phrase)
+            if existing is not None:
+                existing.weight += weight
+            else:
+                phrases[phrase] = _Phrase(str(text).strip(), kind, float(weight), self._suffix_keys(phrase))
+        keys = sorted((key, phrase) for phrase, entry in phrases.items() for key in entry.keys)
+        with self._lock:
+            self._phrases = phrases
+            self._weights = {phrase: entry.weight for phrase, entry in phrases.items()}
+            self._keys = keys
+            self._memo = {}
+            self._warm()
+
+    def _warm(self, max_length: int = 3):
+        """Memoize the widest ranges (1-3 letter prefixes) so the first keystrokes are fast too"""
+        prefixes = sorted({key[:length] for key, _ in self._keys for length in range(1, max_length + 1)})
+        for prefix in prefixes:
+            lo, hi = self._range(prefix)
+            if hi - lo > self.scan_limit:
+                self._memo[prefix] = self._top(lo, hi, self.memo_size)
+
+    def add(self, text: str, kind: str, weight: float = 1.0):
+        """Index one phrase incrementally, or add `weight` to it if it exists"""
+        phrase = normalize(text)
+        if not phrase or weight <= 0:
+            return
+        with self._lock:
+            entry = self._phrases.get(phrase)
+            if entry is None:
+                entry = self._phrases[phrase] = _Phrase(str(text).strip(), kind, float(weight),
+                                                        self._suffix_keys(phrase))
+                for key in entry.keys:
+                    insort(self._keys, (key, phrase))
+            else:
+                entry.weight += weight
+            self._weights[phrase] = entry.weight
+            self._update_memo(entry, phrase)
+
+    def _update_memo(self, entry: _Phrase, phrase: str):
+        """Weights only grow, so a memoized top-k can be patched rather than dropped"""
+        for key in entry.keys:
+            for end in range(1, len(key) + 1):
+                for memo_key in (key[:end], (key[:end], entry.kind)):
+                    self._patch_memo(self._memo.get(memo_key), entry, phrase)
+
+    def _patch_memo(self, top: Optional[List[Tuple[float, str]]], entry: _Phrase, phrase: str):
+        if top is None:
+            return
+        top[:] = [item for item in top if item[1] != phrase]
+        if len(top) < self.memo_size or entry.weight > top[-1][0]:
+            top.append((entry.weight, phrase))
+            top.sort(key=lambda item: -item[0])
+            del top[self.memo_size:]
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        return bisect_left(self._keys, (prefix,)), bisect_left(self._keys, (prefix + _HIGH,))
+
+    def _top(self, lo: int, hi: int, count: int, kind: Optional[str] = None) -> List[Tuple[float, str]]:
+        phrases = {phrase for _, phrase in self._keys[lo:hi]}
+        if kind is not None:
+            phrases = {phrase for phrase in phrases if self._phrases[phrase].kind == kind}
+        weights = self._weights
+        return [(weights[p], p) for p in heapq.nlargest(count, phrases, key=weights.__getitem__)]
+
+    def suggest(self, prefix: str, limit: int = 8, kinds: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        query = normalize(prefix)
+        if not query:
+            return []
+        # Keep a trailing space meaningful: "red " should not match "reddish"
+        if str(prefix).endswith(' '):
+            query += ' '
+        with self._lock:
+            lo, hi = self._range(query)
+            if hi - lo <= self.scan_limit:
+                ranked = self._top(lo, hi, limit if not kinds else hi - lo)
+            elif not kinds:
+                ranked = self._memoized(query, lo, hi)
+            else:
+                ranked = sorted((item for kind in set(kinds) for item in self._memoized(query, lo, hi, kind)),
+                                key=lambda item: -item[0])
+            results = []
+            for weight, phrase in ranked:
+                entry = self._phrases[phrase]
+                if kinds and entry.kind not in kinds:
+                    continue
+                results.append({'text': entry.text, 'type': entry.kind, 'score': round(weight, 3)})
+                if len(results) >= limit:
+                    break
+        return results
+
+    def _memoized(self, query: str, lo: int, hi: int, kind: Optional[str] = None) -> List[Tuple[float, str]]:
+        """Top-`memo_size` of a wide range (of one kind), computed once - caller holds the lock"""
+        memo_key = query if kind is None else (query, kind)
+        ranked = self._memo.get(memo_key)
+        if ranked is None:
+            if len(self._memo) > 10000:
+                self._memo.clear()
+            ranked = self._memo[memo_key] = self._top(lo, hi, self.memo_size, kind)
+        return ranked
+
+    def __len__(self) -> int:
+        return len(self._phrases)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            by_kind: Dict[str, int] = {}
+            for entry in self._phrases.values():
+                by_kind[entry.kind] = by_kind.get(entry.kind, 0) + 1
+            return {'phrases': len(self._phrases), 'keys': len(self._keys),
+                    'memoized_prefixes': len(self._memo), 'by_type': by_kind}
@@ -0,0 +1,90 @@
+"""
+Benchmark and accuracy report for the compiled intent router
+Compares it with the original keyword-list router on data/intent_corpus.tsv:
+the compiled router is scored with 5-fold cross-validation (it never sees
+the message it is tested on), the legacy router on every message
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import ChatAgentConfig
+from intent_router import IntentRouter, INTENTS, load_corpus, legacy_route
+from query_parser import QueryParser
+
+FOLDS = 5
+
+def route_with_fallback(router, message, parsed_query):
+    routed = router.route(message, parsed_query)
+    if routed['confidence'] >= ChatAgentConfig.INTENT_MIN_CONFIDENCE:
+        return routed['intent']
+    return legacy_route(message, parsed_query)
+
+def benchmark_intent_router():
+    print("🧪 Benchmarking intent routing")
+    print("=" * 50)
+
+    examples = load_corpus()
+    parser = QueryParser()
+    parsed = {message: parser.parse_user_query(message) for _, message in examples}
+    print(f"📚 Corpus: {len(examples)} labeled messages, {len(INTENTS)} intents")
+
+    started = time.perf_counter()
+    router = IntentRouter(examples, parse=parser.parse_user_query)
+    print(f"⏱️  Training on the full corpus: {(time.perf_counter() - started) * 1000:.0f} ms, "
+          f"{len(router.model.weights)} weight rows")
+
+    # Cross-validated predictions for the compiled router
+    order = list(range(len(examples)))
+    random.Random(1).shuffle(order)
+    compiled, combined = {}, {}
+    for fold in range(FOLDS):
+        held_out = set(order[fold::FOLDS])
+        fold_router = IntentRouter([examples[i] for i in order if i not in held_out], parse=parser.parse_user_query)
+        for i in held_out:
+            message = examples[i][1]
+            compiled[i] = fold_router.route(message, parsed[message])['intent']
+            combined[i] = route_with_fallback(fold_router, message, parsed[message])
+    legacy = {i: legacy_route(message, parsed[message]) for i, (_, message) in enumerate(examples)}
+
+    def accuracy(predictions):
+        return sum(predictions[i] == intent for i, (intent, _) in enumerate(examples)) / len(examples)
+
+    print()
+    print(f"{'router':<32}{'accuracy':>10}")
+    print(f"{'legacy keyword lists':<32}{accuracy(legacy):>10.1%}")
+    print(f"{'compiled (5-fold CV)':<32}{accuracy(compiled):>10.1%}")
+    print(f"{'compiled + legacy fallback':<32}{accuracy(combined):>10.1%}")
+
+    print()
+    print(f"{'intent':<20}{'n':>4}{'legacy':>9}{'compiled':>10}")
+    for intent in INTENTS:
+        rows = [i for i, (label, _) in enumerate(examples) if label == intent]
+        legacy_recall = sum(legacy[i] == intent for i in rows) / len(rows)
+        compiled_recall = sum(combined[i] == intent for i in rows) / len(rows)
+        print(f"{intent:<20}{len(rows):>4}{legacy_recall:>9.0%}{compiled_recall:>10.0%}")
+
+    fixed = [(examples[i][1], legacy[i], combined[i]) for i in range(len(examples))
+             if legacy[i] != examples[i][0] and combined[i] == examples[i][0]]
+    print()
+    print(f"✅ {len(fixed)} legacy misroutes now correct, e.g.:")
+    for message, was, now in fixed[:8]:
+        print(f"   {message!r}: {was} -> {now}")
+
+    assert accuracy(combined) > accuracy(legacy), "compiled router must beat the legacy router"
+
+    # Routing latency, parse excluded (both routers reuse the parsed query)
+    messages = [message for _, message in examples] * 20
+    for label, route in (('legacy', lambda m: legacy_route(m, parsed[m])),
+                         ('compiled', lambda m: router.route(m, parsed[m]))):
+        started = time.perf_counter()
+        for message in messages:
+            route(message)
+        per_message = (time.perf_counter() - started) / len(messages) * 1e6
+        print(f"⏱️  {label}: {per_message:.1f} µs per message")
+
+if __name__ == "__main__":
+    benchmark_intent_router()
@@ -0,0 +1,136 @@
+"""
+Benchmark for the product vector index behind retrieval-augmented prompts
+Builds synthetic catalogs of increasing size and reports build time, exact vs
+IVF query latency, IVF recall against exact search, and what vague shopper
+requests retrieve
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from product_index import ProductVectorIndex, NUMPY_AVAILABLE
+
+SIZES = (5000, 20000, 80000)
+K = 5
+LATENCY_BUDGET_MS = 5.0
+
+CATEGORIES = {
+    'dress': ['sundress', 'maxi dress', 'bodycon dress', 'wrap dress', 'shirt dress'],
+    'top': ['crop top', 'tank top', 'peplum top', 'blouse'],
+    'shirt': ['linen shirt', 'oxford shirt', 'formal shirt', 'printed shirt'],
+    'jeans': ['skinny jeans', 'straight jeans', 'mom jeans'],
+    'shorts': ['denim shorts', 'linen shorts', 'cargo shorts'],
+    'kurta': ['cotton kurta', 'silk kurta', 'embroidered kurta'],
+    'saree': ['silk saree', 'georgette saree', 'banarasi saree'],
+    'lehenga': ['bridal lehenga', 'festive lehenga'],
+    'hoodie': ['zip hoodie', 'fleece hoodie', 'oversized hoodie'],
+    'blazer': ['slim blazer', 'linen blazer'],
+}
+COLORS = ['red', 'blue', 'black', 'white', 'green', 'yellow', 'pink', 'beige', 'maroon', 'navy']
+DETAILS = ['lightweight', 'breathable', 'cotton', 'linen', 'flowy', 'floral print', 'embroidered',
+           'festive', 'sequin', 'warm', 'wool blend', 'stretch', 'relaxed fit', 'tailored', 'party']
+QUERIES = [
+    'something breezy for a beach trip',
+    'outfit for my cousin\'s sangeet',
+    'warm stuff for winter',
+    'what should I wear to an office interview',
+    'black party dress',
+    'red silk saree',
+    'comfortable clothes for college',
+    'floral sundress',
+]
+
+def synthetic_catalog(size, seed=3):
+    rng = random.Random(seed)
+    rows = []
+    for product_id in range(1, size + 1):
+        category = rng.choice(list(CATEGORIES))
+        style = rng.choice(CATEGORIES[category])
+        color = rng.choice(COLORS)
+        details = rng.sample(DETAILS, 3)
+        rows.append({
+            'product_id': product_id,
+            'product_name': f"{color.title()} {style.title()}",
+            'product_category': category,
+            'color': color,
+            'gender': rng.choice(['women', 'men', 'unisex']),
+            'price': rng.randrange(399, 6999),
+            'product_description': f"A {details[0]} {style} in {color}, {details[1]} and {details[2]}.",
+        })
+    return rows
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def time_queries(index, approximate, repeat=25):
+    samples = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            started = time.perf_counter()
+            index.search(query, K, approximate=approximate)
+            samples.append((time.perf_counter() - started) * 1000)
+    return percentile(samples, 0.5), percentile(samples, 0.99)
+
+def recall(index):
+    """Share of exact top-k scores IVF also reaches (scores, not IDs - the catalog has ties)"""
+    hits = total = 0
+    for query in QUERIES:
+        exact = [row['score'] for row in index.search(query, K, approximate=False)]
+        approx = sorted((row['score'] for row in index.search(query, K, approximate=True)), reverse=True)
+        hits += sum(1 for e, a in zip(exact, approx) if a >= e - 1e-4)
+        total += len(exact)
+    return hits / total if total else 1.0
+
+def benchmark_product_index():
+    print("🧪 Benchmarking the product vector index")
+    print("=" * 50)
+    if not NUMPY_AVAILABLE:
+        print("❌ numpy is not installed - the index is disabled")
+        return
+
+    print(f"{'products':>9}{'build ms':>10}{'MB':>6}{'exact p50':>11}{'p99':>7}{'ivf p50':>9}{'p99':>7}{'recall':>8}")
+    for size in SIZES:
+        rows = synthetic_catalog(size)
+        index = ProductVectorIndex()
+        started = time.perf_counter()
+        index.build(rows)
+        build_ms = (time.perf_counter() - started) * 1000
+        index.train_ivf()
+        exact_p50, exact_p99 = time_queries(index, approximate=False)
+        ivf_p50, ivf_p99 = time_queries(index, approximate=True)
+        print(f"{size:>9}{build_ms:>10.0f}{index.get_stats()['matrix_mb']:>6}"
+              f"{exact_p50:>9.2f}ms{exact_p99:>6.2f}{ivf_p50:>7.2f}ms{ivf_p99:>6.2f}{recall(index):>8.0%}")
+        # The default 'auto' mode switches to IVF at ivf_threshold products
+        auto_p99 = ivf_p99 if size >= index.ivf_threshold else exact_p99
+        assert auto_p99 < LATENCY_BUDGET_MS, f"{size} products: retrieval over budget ({auto_p99:.2f} ms)"
+        if size == 20000:
+            catalog = index
+
+    # Incremental ingest: new products are searchable without a rebuild
+    started = time.perf_counter()
+    catalog.add([{'product_id': 10 ** 6, 'product_name': 'Mustard Chikankari Anarkali',
+                  'product_category': 'kurta', 'color': 'yellow',
+                  'product_description': 'Festive chikankari anarkali for mehendi and sangeet'}])
+    print(f"\n➕ Added one product in {(time.perf_counter() - started) * 1000:.2f} ms")
+    found = catalog.search('chikankari anarkali', 1)
+    assert found and found[0]['product_id'] == 10 ** 6, "ingested product must be retrievable"
+    catalog.remove([10 ** 6])
+    assert not any(row['product_id'] == 10 ** 6 for row in catalog.search('chikankari anarkali', K))
+
+    print("\n🔎 Top results (20k catalog, exact):")
+    for query in QUERIES[:4]:
+        results = catalog.search(query, 3, approximate=False)
+        print(f"   {query!r}")
+        for row in results:
+            print(f"      {row['score']:.3f}  {row['product_name']} ({row['product_category']})")
+    beach = {row['product_category'] for row in catalog.search(QUERIES[0], K, approximate=False)}
+    sangeet = {row['product_category'] for row in catalog.search(QUERIES[1], K, approximate=False)}
+    assert beach <= {'dress', 'shorts', 'shirt', 'top'}, beach
+    assert sangeet <= {'kurta', 'saree', 'lehenga'}, sangeet
+
+if __name__ == "__main__":
+    benchmark_product_index()
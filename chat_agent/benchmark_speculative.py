@@ -0,0 +1,124 @@
+"""
+Benchmark for speculative (assisted) decoding on CPU
+Runs a fixed set of shopper prompts, built exactly as the chat agent builds
+them, through plain greedy generation and through assisted generation with a
+small draft model, and reports latency, tokens/sec, draft acceptance rate and
+how many answers came out identical (greedy assisted decoding should not
+change the text, only the speed)
+
+    python benchmark_speculative.py
+    python benchmark_speculative.py --model gpt2-large --draft distilgpt2 --draft-tokens 4
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import torch
+from transformers import AutoTokenizer, AutoModelForCausalLM
+
+from config import ChatAgentConfig
+from llm_integration import FalconEcommerceLLM
+from speculative import AssistedDecodingMonitor
+
+MAIN_MODEL = "SHJ622/falcon_7b_ecommerce_ai_chatbot_n100"
+
+PRODUCTS = [
+    {'product_name': 'Floral Sundress', 'product_category': 'dress', 'color': 'yellow', 'price': 1299},
+    {'product_name': 'Linen Shirt', 'product_category': 'shirt', 'color': 'white', 'price': 999},
+    {'product_name': 'Silk Saree', 'product_category': 'saree', 'color': 'maroon', 'price': 4599},
+]
+QUERIES = [
+    ("something breezy for a beach trip", {'products': PRODUCTS[:2]}),
+    ("what should I wear to my cousin's sangeet", {'products': PRODUCTS[2:]}),
+    ("show me white shirts under 1000", {'products': PRODUCTS[1:2]}),
+    ("how do I return an order", {}),
+    ("do you have this dress in size M", {'products': PRODUCTS[:1]}),
+    ("suggest an office outfit", {}),
+]
+
+def load(name):
+    tokenizer = AutoTokenizer.from_pretrained(name, trust_remote_code=True)
+    model = AutoModelForCausalLM.from_pretrained(name, trust_remote_code=True,
+                                                 torch_dtype=torch.float32, low_cpu_mem_usage=True).eval()
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    return tokenizer, model
+
+def generate(model, tokenizer, prompt, max_new_tokens, **assisted):
+    inputs = tokenizer(prompt, return_tensors='pt')
+    started = time.perf_counter()
+    with torch.inference_mode():
+        output = model.generate(**inputs, max_new_tokens=max_new_tokens, do_sample=False,
+                                pad_token_id=tokenizer.eos_token_id, **assisted)
+    seconds = time.perf_counter() - started
+    new_ids = output[0][inputs['input_ids'].shape[1]:]
+    return tokenizer.decode(new_ids, skip_special_tokens=True), len(new_ids), seconds
+
+def benchmark_speculative(model_name, draft_name, draft_tokens, max_new_tokens):
+    print("🧪 Benchmarking speculative decoding")
+    print("=" * 50)
+    print(f"Main model: {model_name}")
+    print(f"Draft model: {draft_name} ({draft_tokens} draft tokens per step)")
+    print(f"Threads: {torch.get_num_threads()}, max_new_tokens: {max_new_tokens}")
+
+    # Prompts exactly as the chat agent would send them
+    builder = FalconEcommerceLLM(load_model=False)
+    prompts = [builder._build_ecommerce_prompt(query, context) for query, context in QUERIES]
+
+    tokenizer, model = load(model_name)
+    draft_tokenizer, draft_model = load(draft_name)
+    draft_model.generation_config.num_assistant_tokens = draft_tokens
+    # Different vocabularies need universal assisted decoding (transformers >= 4.46)
+    assisted = {'assistant_model': draft_model}
+    if draft_tokenizer.get_vocab() != tokenizer.get_vocab():
+        assisted.update(tokenizer=tokenizer, assistant_tokenizer=draft_tokenizer)
+        print("Vocabularies differ: using universal assisted decoding")
+    monitor = AssistedDecodingMonitor(model, draft_model)
+
+    # Warm up both paths so one-off allocation is not measured
+    generate(model, tokenizer, prompts[0], 8)
+    generate(model, tokenizer, prompts[0], 8, **assisted)
+
+    plain, speculative, identical = [], [], 0
+    for (query, _), prompt in zip(QUERIES, prompts):
+        text, tokens, seconds = generate(model, tokenizer, prompt, max_new_tokens)
+        plain.append((tokens, seconds))
+        with monitor.measure() as run:
+            assisted_text, assisted_tokens, assisted_seconds = generate(model, tokenizer, prompt,
+                                                                       max_new_tokens, **assisted)
+        figures = monitor.record(run, assisted_tokens, assisted_seconds)
+        speculative.append((assisted_tokens, assisted_seconds))
+        identical += text.strip() == assisted_text.strip()
+        print(f"  {query[:40]:<40} plain {seconds:6.2f}s  assisted {assisted_seconds:6.2f}s  "
+              f"accepted {figures['acceptance_rate']}  same={text.strip() == assisted_text.strip()}")
+
+    def summary(runs):
+        tokens = sum(t for t, _ in runs)
+        seconds = sum(s for _, s in runs)
+        return statistics.mean(s for _, s in runs), tokens / seconds if seconds else 0.0
+
+    plain_latency, plain_tps = summary(plain)
+    assisted_latency, assisted_tps = summary(speculative)
+    stats = monitor.get_stats()
+    print("\n📊 Results")
+    print(f"{'mode':<12} {'mean latency':>14} {'tokens/sec':>12}")
+    print(f"{'plain':<12} {plain_latency:>13.2f}s {plain_tps:>12.2f}")
+    print(f"{'assisted':<12} {assisted_latency:>13.2f}s {assisted_tps:>12.2f}")
+    print(f"Speedup: {plain_latency / assisted_latency:.2f}x")
+    print(f"Draft acceptance rate: {stats['acceptance_rate']} "
+          f"({stats['accepted']}/{stats['drafted']} draft tokens, {stats['tokens_per_forward']} tokens per main forward)")
+    print(f"Identical outputs: {identical}/{len(QUERIES)}")
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--model', default=MAIN_MODEL)
+    parser.add_argument('--draft', default=ChatAgentConfig.LLM_DRAFT_MODEL)
+    parser.add_argument('--draft-tokens', type=int, default=ChatAgentConfig.LLM_DRAFT_TOKENS)
+    parser.add_argument('--max-new-tokens', type=int, default=64)
+    args = parser.parse_args()
+    benchmark_speculative(args.model, args.draft, args.draft_tokens, args.max_new_tokens)
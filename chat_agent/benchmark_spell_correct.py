@@ -0,0 +1,104 @@
+"""
+Benchmark for the typo corrector
+Checks the corrections the parsers rely on and measures per-query cost with
+a cold cache (every token looked up) and a warm one (repeated queries)
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import ChatAgentConfig
+from query_parser import QueryParser
+from spell_correct import build_keyword_corrector
+
+EXPECTED = {
+    'red hoddie under 1500': 'red hoodie under 1500',
+    'blue kurtha for women': 'blue kurta for women',
+    'tshrit for men': 'tshirt for men',
+    'blakc shrit': 'black shirt',
+    'skinny jenas': 'skinny jeans',
+    'ethinc wear for girls': 'ethnic wear for girls',
+}
+UNCHANGED = ['i want pants', 'something nice for a party', 'show me dresses under 2000']
+# Ordinary words one or two edits from a keyword - correcting them would
+# invent filters (sister -> silver, button -> bottom, floral -> formal ...)
+MUST_NOT_CHANGE = [
+    'gift for my sister', 'button down shirt', 'floral dress', 'shirt with collar', 'thanks', 'thank you',
+    'hey', 'pretty dress for a wedding', 'woven kurta', 'that is too expensive', 'read more', 'i said no',
+    'skirt for women', 'sisters wedding outfit', 'buttoned shirt', 'then show me more', 'many thanks',
+]
+
+NAMES = ['Floral', 'Slim Fit', 'Oversized', 'Cotton', 'Printed', 'Anarkali', 'Palazzo', 'Chikankari', 'Bodycon']
+
+def typo(word, rng):
+    """One random edit - what a hurried shopper types"""
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    edit = rng.choice(['swap', 'drop', 'double', 'replace'])
+    if edit == 'swap':
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    if edit == 'drop':
+        return word[:i] + word[i + 1:]
+    if edit == 'double':
+        return word[:i] + word[i] + word[i:]
+    return word[:i] + rng.choice('aeiou') + word[i + 1:]
+
+def benchmark_spell_correct():
+    print("🧪 Benchmarking typo correction")
+    print("=" * 50)
+
+    started = time.perf_counter()
+    corrector = QueryParser.get_corrector()
+    print(f"✅ Built in {(time.perf_counter() - started) * 1000:.1f} ms: {corrector.get_stats()}")
+
+    for query, expected in EXPECTED.items():
+        corrected, corrections = corrector.correct(query)
+        assert corrected == expected, (query, corrected)
+        print(f"   {query!r} -> {corrected!r} {corrections}")
+    for query in UNCHANGED:
+        assert corrector.correct(query) == (query, {}), query
+    # Also without catalog vocabulary, as the backend runs when the snapshot is unavailable
+    bare = build_keyword_corrector([[w for v in ChatAgentConfig.PRODUCT_CATEGORIES.values() for w in v],
+                                    [w for v in ChatAgentConfig.COLOR_VARIATIONS.values() for w in v],
+                                    ChatAgentConfig.PRICE_KEYWORDS, ['formal', 'office', 'work', 'business']])
+    for query in MUST_NOT_CHANGE:
+        assert corrector.correct(query) == (query, {}), (query, corrector.correct(query))
+        assert bare.correct(query) == (query, {}), (query, bare.correct(query))
+    print("✅ Expected corrections, known words untouched")
+
+    parser = QueryParser()
+    parsed = parser.parse_user_query('Red Hoddie under 1500')
+    assert parsed['category'] == 'hoodies' and parsed['corrections'] == {'hoddie': 'hoodie'}, parsed
+    filters = ('category', 'color', 'gender', 'max_price')
+    for query in MUST_NOT_CHANGE:
+        parsed = parser.parse_user_query(query)
+        ChatAgentConfig.TYPO_CORRECTION_ENABLED = False
+        plain = parser.parse_user_query(query)
+        ChatAgentConfig.TYPO_CORRECTION_ENABLED = True
+        assert 'corrections' not in parsed, (query, parsed['corrections'])
+        assert all(parsed[f] == plain[f] for f in filters), (query, parsed, plain)
+    print("✅ Parser sees the corrected query, and ordinary words add no filters")
+
+    rng = random.Random(7)
+    keywords = [w for variations in ChatAgentConfig.PRODUCT_CATEGORIES.values() for w in variations if ' ' not in w]
+    colors = [w for variations in ChatAgentConfig.COLOR_VARIATIONS.values() for w in variations if ' ' not in w]
+    queries = [f"{typo(rng.choice(colors), rng)} {typo(rng.choice(keywords), rng)} for women under {rng.choice([500, 999, 2000])}"
+               for _ in range(2000)]
+
+    for label, fresh in (('cold', True), ('warm', False)):
+        if fresh:
+            corrector = build_keyword_corrector([keywords, colors], catalog_words=NAMES)
+        started = time.perf_counter()
+        for query in queries:
+            corrector.correct(query)
+        per_query = (time.perf_counter() - started) / len(queries) * 1e6
+        print(f"⏱️  {label}: {per_query:.1f} µs per query ({len(queries)} queries)")
+        assert per_query < 1000, f"{label} correction costs {per_query:.1f} µs per query"
+    print("✅ Correction stays in microseconds")
+
+if __name__ == "__main__":
+    benchmark_spell_correct()
@@ -8,6 +8,9 @@ from database import DatabaseHandler
 from query_parser import QueryParser
 from response_formatter import ResponseFormatter
 from llm_integration import FalconEcommerceLLM
+from llm_worker_pool import LLMWorkerPool, PooledLLM, claim_host_pool
+from conversation_context import ConversationContext, ConversationStore
+from generation_budget import Deadline
 from config import ChatAgentConfig
 
 class FashionPulseChatAgent:
@@ -16,12 +19,38 @@ class FashionPulseChatAgent:
         self.db_handler = DatabaseHandler()
         self.query_parser = QueryParser()
         self.response_formatter = ResponseFormatter()
-        self.llm = FalconEcommerceLLM()  # Initialize Falcon 7B LLM
+        self.llm = self._create_llm()
         self.logger = logging.getLogger(__name__)
+        # Per-session history for multi-turn prompts, seeded from a signed-in user's user_chat_history
+        self.conversations = ConversationStore(
+            max_sessions=self.config.CONVERSATION_MAX_SESSIONS,
+            idle_seconds=self.config.CONVERSATION_IDLE_SECONDS,
+            seed=self.db_handler.get_session_turns,
+            recent_turns=self.config.CONVERSATION_RECENT_TURNS,
+            summary_sentences=self.config.CONVERSATION_SUMMARY_SENTENCES
+        )
         
         # Initialize database connection
         self._initialize()
     
+    def _create_llm(self):
+        """
+        Falcon 7B in this process, or a client of LLM worker processes when
+        LLM_WORKERS > 0. Only one web process per host starts the pool; any
+        other gets rule-based answers instead of another LLM_WORKERS copies of
+        the model, so run the chat agent as a single web process
+        """
+        if self.config.LLM_WORKERS > 0:
+            if not claim_host_pool():
+                logging.getLogger(__name__).warning(
+                    "⚠️ Another process on this host owns the LLM worker pool - this one answers "
+                    "rule-based only; run the chat agent as a single web process")
+                return FalconEcommerceLLM(load_model=False)
+            pool = LLMWorkerPool(workers=self.config.LLM_WORKERS, queue_size=self.config.LLM_QUEUE_SIZE)
+            return PooledLLM(pool.start(), FalconEcommerceLLM(load_model=False),
+                             default_deadline_seconds=self.config.LLM_DEADLINE_SECONDS)
+        return FalconEcommerceLLM()  # Initialize Falcon 7B LLM
+    
     def _initialize(self):
         """Initialize the chat agent"""
         try:
@@ -31,6 +60,8 @@ class FashionPulseChatAgent:
                 # Log LLM status
                 if self.llm.is_model_loaded():
                     self.logger.info("🧠 Falcon 7B E-commerce LLM loaded successfully")
+                elif isinstance(self.llm, PooledLLM):
+                    self.logger.info(f"🧠 Starting {self.config.LLM_WORKERS} LLM worker(s) - fallback responses until ready")
                 else:
                     self.logger.warning("⚠️ LLM not loaded - using fallback responses")
             else:
@@ -38,32 +69,47 @@ class FashionPulseChatAgent:
         except Exception as e:
             self.logger.error(f"❌ Chat agent initialization error: {e}")
     
-    def process_message(self, user_message: str) -> str:
+    def process_message(self, user_message: str, session_id: Optional[str] = None,
+                        deadline: Optional[Deadline] = None, user_email: Optional[str] = None) -> str:
         """
         Main method to process user message and return response
         Enhanced with LLM integration for comprehensive e-commerce support
         
         Args:
             user_message (str): User's input message
+            session_id (str): Chat session the message belongs to (optional;
+                without it the LLM sees no earlier turns)
+            deadline (Deadline): When the reply is due / whether the client
+                is still there (optional; LLM_DEADLINE_SECONDS from now)
+            user_email (str): Verified user the session belongs to (optional;
+                only then are earlier turns restored from user_chat_history)
             
         Returns:
             str: Formatted response
         """
         try:
-            self.logger.info(f"💬 Processing message: {user_message}")
+            self.logger.debug("💬 Processing message: %s", user_message)
+            deadline = deadline or Deadline(self.config.LLM_DEADLINE_SECONDS)
             
             # Parse user query
             parsed_query = self.query_parser.parse_user_query(user_message)
+            conversation = self.conversations.get(session_id, user_email) if session_id else None
+            if conversation is not None:
+                conversation.update_slots(parsed_query, user_message)
             
             # Determine if this is a product search query
             is_product_query = self._is_product_search_query(parsed_query, user_message)
             
             if is_product_query:
                 # Handle product search with database + LLM enhancement
-                return self._handle_product_search_with_llm(parsed_query, user_message)
+                response = self._handle_product_search_with_llm(parsed_query, user_message, conversation, deadline)
             else:
                 # Handle general e-commerce queries with LLM
-                return self._handle_general_ecommerce_query(user_message, parsed_query)
+                response = self._handle_general_ecommerce_query(user_message, parsed_query, conversation, deadline)
+            
+            if conversation is not None:
+                conversation.add_turn(user_message, response)
+            return response
                 
         except Exception as e:
             self.logger.error(f"❌ Error processing message: {e}")
@@ -92,7 +138,9 @@ class FashionPulseChatAgent:
         
         return has_search_criteria or has_product_keywords
     
-    def _handle_product_search_with_llm(self, parsed_query: Dict[str, Any], user_message: str) -> str:
+    def _handle_product_search_with_llm(self, parsed_query: Dict[str, Any], user_message: str,
+                                        conversation: Optional[ConversationContext] = None,
+                                        deadline: Optional[Deadline] = None) -> str:
         """Handle product search queries with database results + LLM enhancement"""
         try:
             # First, search the database
@@ -108,14 +156,16 @@ class FashionPulseChatAgent:
             context = {
                 'products': products,
                 'query_type': 'product_search',
-                'search_criteria': parsed_query
+                'search_criteria': parsed_query,
+                'conversation': conversation
             }
             
             if products:
                 # Products found - enhance response with LLM
                 if self.llm.is_model_loaded():
                     # Use LLM to create personalized response
-                    llm_response = self.llm.generate_response(user_message, context)
+                    context['retrieved_products'] = self.db_handler.retrieve_products(user_message)
+                    llm_response = self.llm.generate_response(user_message, context, deadline)
                     
                     # Combine LLM response with structured product data
                     structured_products = self.response_formatter.format_products_response(products, parsed_query)
@@ -129,7 +179,8 @@ class FashionPulseChatAgent:
             else:
                 # No products found - use LLM for helpful suggestions
                 if self.llm.is_model_loaded():
-                    return self.llm.generate_response(user_message, context)
+                    context['retrieved_products'] = self.db_handler.retrieve_products(user_message)
+                    return self.llm.generate_response(user_message, context, deadline)
                 else:
                     return self._try_broader_search_or_suggestions(parsed_query)
                     
@@ -137,19 +188,23 @@ class FashionPulseChatAgent:
             self.logger.error(f"❌ Error in product search with LLM: {e}")
             return self.response_formatter.format_error_response()
     
-    def _handle_general_ecommerce_query(self, user_message: str, parsed_query: Dict[str, Any]) -> str:
+    def _handle_general_ecommerce_query(self, user_message: str, parsed_query: Dict[str, Any],
+                                        conversation: Optional[ConversationContext] = None,
+                                        deadline: Optional[Deadline] = None) -> str:
         """Handle general e-commerce queries (shipping, returns, policies, etc.) with LLM"""
         try:
             # Prepare context
             context = {
                 'query_type': 'general_ecommerce',
                 'intent': parsed_query.get('intent', 'unknown'),
-                'original_message': user_message
+                'original_message': user_message,
+                'conversation': conversation
             }
             
             # Use LLM for comprehensive e-commerce support
             if self.llm.is_model_loaded():
-                return self.llm.generate_response(user_message, context)
+                context['retrieved_products'] = self.db_handler.retrieve_products(user_message)
+                return self.llm.generate_response(user_message, context, deadline)
             else:
                 # Fallback to rule-based responses
                 return self._handle_general_query_fallback(user_message)
@@ -326,6 +381,8 @@ class FashionPulseChatAgent:
         """Clean up resources"""
         try:
             self.db_handler.disconnect()
+            if isinstance(self.llm, PooledLLM):
+                self.llm.pool.stop()
             self.logger.info("🔌 Chat agent closed successfully")
         except Exception as e:
             self.logger.error(f"❌ Error closing chat agent: {e}")
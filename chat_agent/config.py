@@ -70,4 +70,106 @@ class ChatAgentConfig:
     MAX_RESULTS = 10
     
     # Default price limit if none specified
-    DEFAULT_MAX_PRICE = 10000
\ No newline at end of file
+    DEFAULT_MAX_PRICE = 10000
+    
+    # Facet store - how often (seconds) to probe catalog_meta for a new version
+    FACET_REFRESH_SECONDS = int(os.getenv('FACET_REFRESH_SECONDS', 30))
+    
+    # Shared catalog snapshot - same directory as the backend so both services map one copy
+    SHARED_CATALOG_ENABLED = os.getenv('SHARED_CATALOG_ENABLED', 'true').lower() == 'true'
+    SHARED_CATALOG_DIR = os.getenv('SHARED_CATALOG_DIR', '')
+    SHARED_CATALOG_CHECK_SECONDS = float(os.getenv('SHARED_CATALOG_CHECK_SECONDS', 2))
+    # Writes to the clothing table do not bump catalog_meta, so the snapshot and the
+    # facets are also rebuilt once they are this old, whatever the version says
+    SHARED_CATALOG_MAX_AGE_SECONDS = float(os.getenv('SHARED_CATALOG_MAX_AGE_SECONDS', 300))
+    
+    # Policy store - support answers served from memory; the policy_version row in
+    # catalog_meta is probed every POLICY_CHECK_SECONDS, full reload every POLICY_TTL_SECONDS
+    POLICY_CHECK_SECONDS = float(os.getenv('POLICY_CHECK_SECONDS', 30))
+    POLICY_TTL_SECONDS = float(os.getenv('POLICY_TTL_SECONDS', 600))
+    
+    # Intent routing for the lightweight agent - 'compiled' (keyword automaton +
+    # hashed n-gram model trained from data/intent_corpus.tsv) or 'legacy'
+    # keyword lists; compiled predictions below the confidence floor fall back
+    INTENT_ROUTER = os.getenv('INTENT_ROUTER', 'compiled').lower()
+    INTENT_MIN_CONFIDENCE = float(os.getenv('INTENT_MIN_CONFIDENCE', 0.3))
+    
+    # Search result cache - product IDs per canonical filter tuple, dropped on a
+    # catalog version bump; cost is one unit per cached ID
+    RESULT_CACHE_ENABLED = os.getenv('RESULT_CACHE_ENABLED', 'true').lower() == 'true'
+    RESULT_CACHE_MAX_COST = int(os.getenv('RESULT_CACHE_MAX_COST', 50000))
+    RESULT_CACHE_TTL_SECONDS = float(os.getenv('RESULT_CACHE_TTL_SECONDS', 300))
+    
+    # Typo correction - misspelled query words ("hoddie", "kurtha") are mapped
+    # to the nearest keyword within two edits before parsing
+    TYPO_CORRECTION_ENABLED = os.getenv('TYPO_CORRECTION_ENABLED', 'true').lower() == 'true'
+    
+    # Product vector index - hashed TF-IDF vectors of name/description/category/color
+    # searched in memory to add the PRODUCT_INDEX_TOP_K closest products to LLM
+    # prompts. Mode 'auto' switches from exact to IVF (k-means lists, NPROBE probed)
+    # at PRODUCT_INDEX_IVF_THRESHOLD products; 'exact' / 'ivf' force one
+    PRODUCT_INDEX_ENABLED = os.getenv('PRODUCT_INDEX_ENABLED', 'true').lower() == 'true'
+    PRODUCT_INDEX_DIM = int(os.getenv('PRODUCT_INDEX_DIM', 512))
+    PRODUCT_INDEX_TOP_K = int(os.getenv('PRODUCT_INDEX_TOP_K', 3))
+    PRODUCT_INDEX_MODE = os.getenv('PRODUCT_INDEX_MODE', 'auto').lower()
+    PRODUCT_INDEX_IVF_THRESHOLD = int(os.getenv('PRODUCT_INDEX_IVF_THRESHOLD', 20000))
+    PRODUCT_INDEX_NPROBE = int(os.getenv('PRODUCT_INDEX_NPROBE', 8))
+    
+    # Conversation context - per session, the last CONVERSATION_RECENT_TURNS turns
+    # verbatim, the best CONVERSATION_SUMMARY_SENTENCES sentences of older turns and
+    # the stated preferences (color, size, budget, gender), kept within
+    # CONVERSATION_TOKEN_BUDGET prompt tokens
+    CONVERSATION_TOKEN_BUDGET = int(os.getenv('CONVERSATION_TOKEN_BUDGET', 320))
+    CONVERSATION_RECENT_TURNS = int(os.getenv('CONVERSATION_RECENT_TURNS', 3))
+    CONVERSATION_SUMMARY_SENTENCES = int(os.getenv('CONVERSATION_SUMMARY_SENTENCES', 6))
+    CONVERSATION_MAX_SESSIONS = int(os.getenv('CONVERSATION_MAX_SESSIONS', 1000))
+    CONVERSATION_IDLE_SECONDS = float(os.getenv('CONVERSATION_IDLE_SECONDS', 1800))
+    # The backend's JWT secret. When set, /api/chat accepts the backend bearer token
+    # and restores a signed-in user's own sessions from user_chat_history; unset,
+    # sessions start empty and nothing is read back from the database
+    JWT_SECRET = os.getenv('JWT_SECRET')
+    
+    # LLM generation budget - each chat request must answer within
+    # LLM_DEADLINE_SECONDS; max_new_tokens shrinks to what the measured tokens/sec
+    # allows (never above LLM_MAX_NEW_TOKENS) and the rule-based answer is used
+    # when fewer than LLM_MIN_NEW_TOKENS would fit. Generation also stops at a
+    # stop sequence or when the client disconnects
+    LLM_DEADLINE_SECONDS = float(os.getenv('LLM_DEADLINE_SECONDS', 20))
+    LLM_DEADLINE_MARGIN_SECONDS = float(os.getenv('LLM_DEADLINE_MARGIN_SECONDS', 0.5))
+    LLM_MAX_NEW_TOKENS = int(os.getenv('LLM_MAX_NEW_TOKENS', 256))
+    LLM_MIN_NEW_TOKENS = int(os.getenv('LLM_MIN_NEW_TOKENS', 24))
+    LLM_STOP_SEQUENCES = ['CUSTOMER QUERY:', '\nCustomer:', '\nUser:', '\nRESPONSE:']
+    
+    # Speculative (assisted) decoding - LLM_DRAFT_MODEL proposes LLM_DRAFT_TOKENS
+    # tokens at a time and Falcon verifies them in one forward pass. A draft with
+    # a different tokenizer (the default) needs transformers >= 4.46; if a trial
+    # assisted generation fails at startup, plain generation is used instead
+    SPECULATIVE_DECODING = os.getenv('SPECULATIVE_DECODING', 'false').lower() == 'true'
+    LLM_DRAFT_MODEL = os.getenv('LLM_DRAFT_MODEL', 'tiiuae/falcon-rw-1b')
+    LLM_DRAFT_TOKENS = int(os.getenv('LLM_DRAFT_TOKENS', 5))
+    
+    # LLM worker pool - LLM_WORKERS > 0 runs generation in that many separate
+    # processes (each loads the model once) instead of the web process. At most
+    # LLM_QUEUE_SIZE requests wait; beyond that, or when a request could not
+    # start before its deadline, it gets the rule-based answer at once.
+    # One pool per host: run the chat agent as a single web process (no
+    # gunicorn -w N) - further processes on the host answer rule-based only
+    LLM_WORKERS = int(os.getenv('LLM_WORKERS', 0))
+    LLM_QUEUE_SIZE = int(os.getenv('LLM_QUEUE_SIZE', 8))
+    
+    # Query profiler - statements slower than this (ms) are logged and EXPLAINed once
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+    EXPLAIN_SLOW_QUERIES = os.getenv('EXPLAIN_SLOW_QUERIES', 'true').lower() == 'true'
+    
+    # Logging - JSON lines via a background writer. LOG_LEVELS overrides per
+    # module ('werkzeug=WARNING,query_parser=DEBUG'); DEBUG records are
+    # sampled and capped per call site per second
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_LEVELS = os.getenv('LOG_LEVELS', 'werkzeug=WARNING')
+    LOG_JSON = os.getenv('LOG_JSON', 'true').lower() == 'true'
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 1.0))
+    LOG_DEBUG_PER_SECOND = int(os.getenv('LOG_DEBUG_PER_SECOND', 20))
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    
+    # Price histogram bucket edges (₹) - last bucket is open-ended
+    PRICE_HISTOGRAM_EDGES = [0, 500, 1000, 1500, 2000, 3000, 5000, 10000]
\ No newline at end of file
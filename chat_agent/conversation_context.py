@@ -0,0 +1,219 @@
+"""
+Conversation context for multi-turn LLM prompts
+Each chat session keeps its last few turns verbatim, an extractive summary of
+older turns (the few sentences that carry products, sizes, prices or order
+details) and the shopper's stated preferences. `render` assembles the
+smallest history block that fits a token budget, so prompt length stays flat
+however long the conversation runs.
+"""
+import math
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+_WORD = re.compile(r"\w+|[^\w\s]")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|\n+")
+_SIZE = re.compile(r"\bsize\s*(xxs|xs|s|m|l|xl|xxl|xxxl|\d{2})\b|\b(xxs|xs|xl|xxl|xxxl)\b", re.IGNORECASE)
+
+# Slots carried from turn to turn, in the order they are rendered
+SLOTS = ('gender', 'category', 'color', 'size', 'budget')
+
+# Words that make an older sentence worth keeping in the summary
+SALIENT_WORDS = frozenset(
+    'order track tracking return refund exchange cancel size fit delivery shipping payment '
+    'cod upi wedding party office event prefer like love hate allergic budget size color colour'.split()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough BPE token count (words and punctuation x 1.3) for when no tokenizer is loaded"""
+    return int(math.ceil(len(_WORD.findall(text or '')) * 1.3))
+
+
+def extract_size(message: str) -> Optional[str]:
+    match = _SIZE.search(message or '')
+    if not match:
+        return None
+    return (match.group(1) or match.group(2)).upper()
+
+
+class ConversationContext:
+    """
+    One session's history. `update_slots` folds a parsed query into the
+    preferences, `add_turn` records an exchange (the oldest recent turn is
+    summarized when the window is full), `render(budget)` returns the
+    history block for the next prompt.
+    """
+
+    def __init__(self, recent_turns: int = 3, summary_sentences: int = 6, reply_tokens: int = 60):
+        self.recent_turns = recent_turns
+        self.summary_sentences = summary_sentences
+        self.reply_tokens = reply_tokens
+        self.turns: Deque[Tuple[str, str]] = deque()
+        self.slots: Dict[str, Any] = {}
+        # (score, sequence, sentence) - best `summary_sentences` of everything evicted
+        self._summary: List[Tuple[float, int, str]] = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self.touched_at = time.time()
+
+    def update_slots(self, parsed_query: Optional[Dict[str, Any]], message: str = ''):
+        """Remember the filters this message stated; unstated ones keep their old value"""
+        parsed_query = parsed_query or {}
+        found = {
+            'gender': parsed_query.get('gender'),
+            'category': parsed_query.get('category'),
+            'color': parsed_query.get('color'),
+            'size': extract_size(message),
+            'budget': parsed_query.get('max_price'),
+        }
+        with self._lock:
+            self.slots.update({slot: value for slot, value in found.items() if value})
+
+    def add_turn(self, user_message: str, response: str):
+        with self._lock:
+            self.touched_at = time.time()
+            self.turns.append((user_message or '', response or ''))
+            while len(self.turns) > self.recent_turns:
+                self._summarize(*self.turns.popleft())
+
+    def _score(self, sentence: str, from_user: bool) -> float:
+        words = set(re.findall(r"[a-z0-9]+", sentence.lower()))
+        slot_values = {str(value).lower() for value in self.slots.values()}
+        score = len(words & SALIENT_WORDS) + 2 * len(words & slot_values)
+        score += sum(1 for word in words if word.isdigit())
+        return score * (2.0 if from_user else 1.0)
+
+    def _summarize(self, user_message: str, response: str):
+        """Keep the most informative sentences of an evicted turn (lock held)"""
+        for speaker, text in (('Customer', user_message), ('Assistant', response)):
+            for sentence in _SENTENCE.split(text):
+                sentence = sentence.strip(' -•*')
+                if len(sentence) < 8:
+                    continue
+                if speaker == 'Assistant' and ('|' in sentence or '**' in sentence):
+                    continue  # product listing rows - the shopper saw them, the model needn't
+                score = self._score(sentence, speaker == 'Customer')
+                line = f"{speaker}: {sentence}"
+                if score <= 0 or any(line == kept for _, _, kept in self._summary):
+                    continue
+                self._sequence += 1
+                self._summary.append((score, self._sequence, line))
+        # Best sentences win; among equals the more recent one
+        self._summary.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        del self._summary[self.summary_sentences:]
+
+    def _clip(self, text: str, tokens: int, count_tokens: Callable[[str], int]) -> str:
+        """First sentences of `text` that fit in `tokens` (long product listings are cut)"""
+        if count_tokens(text) <= tokens:
+            return text
+        kept = ''
+        for sentence in _SENTENCE.split(text):
+            candidate = f"{kept} {sentence}".strip()
+            if count_tokens(candidate) > tokens:
+                break
+            kept = candidate
+        return (kept or ' '.join(text.split()[:max(tokens // 2, 1)])) + ' …'
+
+    def render(self, budget: int, count_tokens: Callable[[str], int] = estimate_tokens) -> Tuple[str, int]:
+        """
+        History block within `budget` tokens and its token count: preferences
+        first, then recent turns newest-first, then summary sentences by score.
+        Returns ('', 0) for a new conversation.
+        """
+        with self._lock:
+            slots = dict(self.slots)
+            turns = list(self.turns)
+            summary = list(self._summary)
+
+        sections: List[str] = []
+        # Section headings are reserved up front so the whole block fits
+        used = count_tokens("EARLIER IN THIS CONVERSATION:\nRECENT CONVERSATION:")
+        if slots:
+            line = "CUSTOMER PREFERENCES: " + ", ".join(
+                f"{slot}={'₹%g' % slots[slot] if slot == 'budget' else slots[slot]}"
+                for slot in SLOTS if slot in slots)
+            used += count_tokens(line)
+            sections.append(line)
+
+        recent: List[str] = []
+        for user_message, response in reversed(turns):
+            exchange = (f"Customer: {self._clip(user_message, self.reply_tokens, count_tokens)}\n"
+                        f"Assistant: {self._clip(response, self.reply_tokens, count_tokens)}")
+            cost = count_tokens(exchange)
+            if used + cost > budget:
+                break
+            recent.insert(0, exchange)
+            used += cost
+
+        earlier: List[Tuple[int, str]] = []
+        for _, sequence, line in summary:
+            cost = count_tokens(line)
+            if used + cost > budget:
+                continue
+            earlier.append((sequence, line))
+            used += cost
+
+        if earlier:
+            sections.append("EARLIER IN THIS CONVERSATION:\n" + "\n".join(line for _, line in sorted(earlier)))
+        if recent:
+            sections.append("RECENT CONVERSATION:\n" + "\n".join(recent))
+        if not sections:
+            return '', 0
+        block = "\n\n".join(sections)
+        return block, count_tokens(block)
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def __getstate__(self):
+        # Picklable (minus the lock) so a prompt can be built in an LLM worker process
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class ConversationStore:
+    """
+    (user, session ID) -> ConversationContext, least recently used first out.
+    `seed` (optional) returns the stored [(user_message, response)] turns of
+    a session this process has not seen, e.g. after a restart. It is only
+    called with a verified user: a bare session ID comes from the client and
+    must not unlock anyone's stored history.
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_seconds: float = 1800.0,
+                 seed: Optional[Callable[[str, str], Iterable[Tuple[str, str]]]] = None,
+                 **context_options: Any):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.seed = seed
+        self.context_options = context_options
+        self._sessions: 'OrderedDict[Tuple[Optional[str], str], ConversationContext]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str, user_email: Optional[str] = None) -> ConversationContext:
+        key = (user_email, session_id)
+        with self._lock:
+            context = self._sessions.get(key)
+            if context is not None and time.time() - context.touched_at > self.idle_seconds:
+                context = None
+            if context is not None:
+                self._sessions.move_to_end(key)
+                return context
+            context = self._sessions[key] = ConversationContext(**self.context_options)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        if self.seed and user_email:
+            for user_message, response in self.seed(session_id, user_email):
+                context.add_turn(user_message, response)
+        return context
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -1,12 +1,48 @@
 """
 Database connection and query handler for FashionPulse Chat Agent
 """
+import time
+import threading
 import pymysql
 import logging
 from typing import List, Dict, Optional, Any
 from config import ChatAgentConfig
+from facet_store import CatalogFacetStore
+from shared_catalog import SharedCatalog, CLOTHING_SNAPSHOT_QUERY, FACET_COLUMNS
+from query_profiler import QueryProfiler
+from result_cache import SearchResultCache, canonical_key
+from product_index import ProductVectorIndex, NUMPY_AVAILABLE
+from metrics import registry
+
+# Per-request query counts/timings and slow-query EXPLAINs for every handler
+query_profiler = QueryProfiler(
+    slow_ms=ChatAgentConfig.SLOW_QUERY_MS,
+    explain_slow=ChatAgentConfig.EXPLAIN_SLOW_QUERIES
+)
+# Product IDs per canonical search filter tuple, shared by every handler in the process
+search_result_cache = SearchResultCache(
+    max_cost=ChatAgentConfig.RESULT_CACHE_MAX_COST,
+    ttl=ChatAgentConfig.RESULT_CACHE_TTL_SECONDS
+)
+db_query_seconds = registry.histogram('db_query_duration_seconds', 'execute_query statement time', ('kind',))
+
+# search_products filters that make up a result-cache key, and the columns it returns
+SEARCH_KEY_FIELDS = ('gender', 'category', 'color', 'max_price', 'limit')
+SEARCH_COLUMNS = ('product_id', 'product_name', 'product_category', 'product_description',
+                  'color', 'size', 'gender', 'price', 'product_image')
+# Columns the product vector index embeds or hands to the prompt
+INDEX_COLUMNS = ('product_id', 'product_name', 'product_description', 'product_category',
+                 'color', 'gender', 'price')
 
 class DatabaseHandler:
+    # Facets are shared by every handler in the process
+    _facet_store: Optional[CatalogFacetStore] = None
+    _shared_catalog: Optional[SharedCatalog] = None
+    # Vector index for prompt retrieval, and the catalog version it reflects
+    _product_index: Optional[ProductVectorIndex] = None
+    _product_index_version: Optional[int] = None
+    _product_index_lock = threading.Lock()
+
     def __init__(self):
         self.config = ChatAgentConfig()
         self.connection = None
@@ -36,21 +72,51 @@ class DatabaseHandler:
             self.logger.info("🔌 Database disconnected")
     
     def execute_query(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
-        """Execute SQL query and return results"""
-        if not self.connection:
-            if not self.connect():
-                return []
-        
+        """Execute SQL query and return results ([] on any database error)"""
         try:
-            with self.connection.cursor() as cursor:
-                cursor.execute(query, params)
-                results = cursor.fetchall()
-                self.logger.info(f"📊 Query executed: {len(results)} results found")
-                return results
+            return self.fetch_rows(query, params)
         except Exception as e:
             self.logger.error(f"❌ Query execution failed: {e}")
             return []
     
+    def fetch_rows(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        """
+        Execute SQL query and return results, raising on database errors -
+        for loaders whose result is cached, where a failure must not look
+        like an empty table
+        """
+        if not self.connection and not self.connect():
+            raise ConnectionError("database unavailable")
+        
+        try:
+            return self._fetch(query, params)
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError) as e:
+            # Server restarted or dropped the idle connection (wait_timeout) - reconnect once
+            self.logger.warning(f"⚠️ Database connection lost ({e}), reconnecting")
+            if not self.connect():
+                raise
+            return self._fetch(query, params)
+    
+    def _fetch(self, query: str, params: tuple) -> List[Dict[str, Any]]:
+        with self.connection.cursor() as cursor:
+            started = time.perf_counter()
+            cursor.execute(query, params)
+            results = cursor.fetchall()
+            elapsed = time.perf_counter() - started
+            db_query_seconds.observe(elapsed, 'read')
+            query_profiler.record(
+                query, elapsed, len(results),
+                explain=lambda: self._explain(cursor, query, params)
+            )
+            self.logger.debug("📊 Query executed: %s results found", len(results))
+            return results
+    
+    @staticmethod
+    def _explain(cursor, query: str, params: tuple) -> List[Dict[str, Any]]:
+        """EXPLAIN plan for a slow query (called by the profiler, not recorded itself)"""
+        cursor.execute(f"EXPLAIN {query}", params)
+        return cursor.fetchall()
+    
     def search_products(self, 
                        category: Optional[str] = None,
                        color: Optional[str] = None, 
@@ -58,8 +124,37 @@ class DatabaseHandler:
                        max_price: Optional[float] = None,
                        limit: int = 10) -> List[Dict[str, Any]]:
         """
-        Search products based on filters with exact keyword matching
+        Search products based on filters with exact keyword matching.
+        Results are cached as product IDs per catalog version, so phrasings
+        that parse to the same filters share one SQL execution.
         """
+        if not self.config.RESULT_CACHE_ENABLED:
+            return self._search_products_sql(category, color, gender, max_price, limit) or []
+        
+        version = self.facets.version()
+        key = canonical_key({'category': category, 'color': color, 'gender': gender,
+                             'max_price': max_price}, SEARCH_KEY_FIELDS, limit=limit)
+        rows = None
+        
+        def load():
+            nonlocal rows
+            rows = self._search_products_sql(category, color, gender, max_price, limit)
+            if rows is None:
+                return None  # query failed - don't cache
+            return [row['product_id'] for row in rows]
+        
+        product_ids = search_result_cache.get_or_load(key, version, load)
+        if rows is not None or product_ids is None:
+            return rows or []
+        return self.get_products_by_ids(product_ids, version)
+    
+    def _search_products_sql(self,
+                             category: Optional[str],
+                             color: Optional[str],
+                             gender: Optional[str],
+                             max_price: Optional[float],
+                             limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Filtered product rows, or None when the query failed"""
         # Base query - excluding stock information per user request
         query = f"""
         SELECT 
@@ -133,10 +228,34 @@ class DatabaseHandler:
         query += " ORDER BY price ASC LIMIT %s"
         params.append(limit)
         
-        self.logger.info(f"🔍 Exact keyword search with query: {query}")
-        self.logger.info(f"📝 Parameters: {params}")
+        self.logger.debug("🔍 Exact keyword search with query: %s", query)
+        self.logger.debug("📝 Parameters: %s", params)
         
-        return self.execute_query(query, tuple(params))
+        try:
+            return self.fetch_rows(query, tuple(params))
+        except Exception as e:
+            self.logger.error(f"❌ Product search failed: {e}")
+            return None
+    
+    def get_products_by_ids(self, product_ids: List[int], version: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Search columns for `product_ids`, in that order. Descriptive columns
+        come from the shared snapshot when it has them all; the price is
+        always read live, so a cached ID list never shows an old price.
+        """
+        if not product_ids:
+            return []
+        placeholders = ', '.join(['%s'] * len(product_ids))
+        snapshot = self.catalog_snapshot(version)
+        if snapshot is not None:
+            rows = [snapshot.get(product_id, SEARCH_COLUMNS) for product_id in product_ids]
+            if all(row is not None for row in rows):
+                query = f"SELECT product_id, price FROM {self.config.DB_TABLE} WHERE product_id IN ({placeholders})"
+                prices = {row['product_id']: row['price'] for row in self.execute_query(query, tuple(product_ids))}
+                return [dict(row, price=prices[row['product_id']]) for row in rows if row['product_id'] in prices]
+        query = f"SELECT {', '.join(SEARCH_COLUMNS)} FROM {self.config.DB_TABLE} WHERE product_id IN ({placeholders})"
+        by_id = {row['product_id']: row for row in self.execute_query(query, tuple(product_ids))}
+        return [by_id[product_id] for product_id in product_ids if product_id in by_id]
     
     def get_product_by_id(self, product_id: str) -> Optional[Dict[str, Any]]:
         """Get single product by ID"""
@@ -155,44 +274,183 @@ class DatabaseHandler:
         """
         return self.execute_query(query, (limit,))
     
+    @property
+    def facets(self) -> CatalogFacetStore:
+        """Process-wide materialized facet store over the catalog table"""
+        if DatabaseHandler._facet_store is None:
+            DatabaseHandler._facet_store = CatalogFacetStore(
+                loader=self._load_facet_rows,
+                version_probe=self.get_catalog_version,
+                check_interval=self.config.FACET_REFRESH_SECONDS,
+                max_age=self.config.SHARED_CATALOG_MAX_AGE_SECONDS,
+                price_edges=self.config.PRICE_HISTOGRAM_EDGES
+            )
+        return DatabaseHandler._facet_store
+    
+    def _load_facet_rows(self) -> List[Dict[str, Any]]:
+        """Facet rows from the shared snapshot, else the narrow column set from the database"""
+        snapshot = self.catalog_snapshot(self.get_catalog_version())
+        if snapshot is not None:
+            return list(snapshot.rows(FACET_COLUMNS))
+        query = f"SELECT product_category, gender, color, size, price FROM {self.config.DB_TABLE}"
+        return self.fetch_rows(query)
+    
+    def catalog_snapshot(self, version: Optional[int] = None):
+        """
+        Memory-mapped catalog shared with the backend and other workers (None
+        when disabled or unavailable). Builds `version` if nobody has yet.
+        """
+        if not self.config.SHARED_CATALOG_ENABLED:
+            return None
+        if DatabaseHandler._shared_catalog is None:
+            DatabaseHandler._shared_catalog = SharedCatalog(
+                self.config.SHARED_CATALOG_DIR or None,
+                check_seconds=self.config.SHARED_CATALOG_CHECK_SECONDS,
+                max_age=self.config.SHARED_CATALOG_MAX_AGE_SECONDS
+            )
+        try:
+            if version is None:
+                return DatabaseHandler._shared_catalog.current()
+            return DatabaseHandler._shared_catalog.ensure(
+                version,
+                lambda: self.fetch_rows(CLOTHING_SNAPSHOT_QUERY.format(table=self.config.DB_TABLE))
+            )
+        except Exception as e:
+            self.logger.warning(f"⚠️ Shared catalog unavailable, reading the database: {e}")
+            return None
+    
+    def retrieve_products(self, query: str, k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Products closest to `query` in the local vector index ([] when disabled).
+        The index is built on first use; after a catalog version bump only the
+        products added, edited or removed since are applied.
+        """
+        if not self.config.PRODUCT_INDEX_ENABLED or not NUMPY_AVAILABLE:
+            return []
+        try:
+            index = self._ensure_product_index()
+            mode = self.config.PRODUCT_INDEX_MODE
+            approximate = None if mode == 'auto' else mode == 'ivf'
+            return index.search(query, k or self.config.PRODUCT_INDEX_TOP_K, approximate=approximate)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Product retrieval failed: {e}")
+            return []
+    
+    def _ensure_product_index(self) -> ProductVectorIndex:
+        version = self.facets.version()
+        with DatabaseHandler._product_index_lock:
+            index = DatabaseHandler._product_index
+            if index is not None and DatabaseHandler._product_index_version == version:
+                return index
+            started = time.time()
+            try:
+                rows = self._load_index_rows(version)
+            except Exception as e:
+                self.logger.warning(f"⚠️ Product index load failed, keeping the current index: {e}")
+                rows = []
+            if not rows:
+                # Database unreachable (or an empty catalog) - keep what we have and try again next call
+                return index or ProductVectorIndex(dim=self.config.PRODUCT_INDEX_DIM)
+            if index is None:
+                index = ProductVectorIndex(
+                    dim=self.config.PRODUCT_INDEX_DIM,
+                    ivf_threshold=self.config.PRODUCT_INDEX_IVF_THRESHOLD,
+                    nprobe=self.config.PRODUCT_INDEX_NPROBE
+                )
+                index.build(rows)
+                self.logger.info(f"🧭 Product index built: {len(index)} products "
+                                 f"({(time.time() - started) * 1000:.0f} ms)")
+            else:
+                changes = index.sync(rows)
+                self.logger.info(f"🧭 Product index synced to catalog version {version}: "
+                                 f"{changes['added']} added, {changes['changed']} changed, "
+                                 f"{changes['removed']} removed ({(time.time() - started) * 1000:.0f} ms)")
+            DatabaseHandler._product_index = index
+            DatabaseHandler._product_index_version = version
+            return index
+    
+    def _load_index_rows(self, version: Optional[int]) -> List[Dict[str, Any]]:
+        snapshot = self.catalog_snapshot(version)
+        if snapshot is not None:
+            return list(snapshot.rows(INDEX_COLUMNS))
+        return self.fetch_rows(f"SELECT {', '.join(INDEX_COLUMNS)} FROM {self.config.DB_TABLE}")
+    
+    def get_product_index_stats(self) -> Dict[str, Any]:
+        index = DatabaseHandler._product_index
+        if index is None:
+            return {'built': False}
+        return dict(index.get_stats(), built=True, version=DatabaseHandler._product_index_version)
+    
+    def get_session_turns(self, session_id: str, user_email: str, limit: int = 20) -> List[tuple]:
+        """
+        Last `limit` messages of one of `user_email`'s chat sessions from
+        user_chat_history, paired oldest-first as (user_message, response)
+        ([] without session columns)
+        """
+        query = """
+        SELECT message_text, is_user_message FROM user_chat_history
+        WHERE user_email = %s AND session_id = %s ORDER BY created_at DESC, id DESC LIMIT %s
+        """
+        turns = []
+        for row in reversed(self.execute_query(query, (user_email, session_id, limit))):
+            if row['is_user_message']:
+                turns.append([row['message_text'], ''])
+            elif turns and not turns[-1][1]:
+                turns[-1][1] = row['message_text']
+        return [tuple(turn) for turn in turns]
+    
+    def get_catalog_version(self) -> int:
+        """Current catalog version (primary-key lookup, 0 if never bumped)"""
+        query = "SELECT meta_value FROM catalog_meta WHERE meta_key = 'catalog_version'"
+        results = self.execute_query(query)
+        return int(results[0]['meta_value']) if results else 0
+    
+    def get_policy_version(self) -> int:
+        """Policy version (bumped by whoever edits the policies table, 0 if never)"""
+        query = "SELECT meta_value FROM catalog_meta WHERE meta_key = 'policy_version'"
+        # Raises on errors - a failed probe must not read as "version 0"
+        try:
+            results = self.fetch_rows(query)
+        except pymysql.err.ProgrammingError:
+            return 0  # no catalog_meta table yet
+        return int(results[0]['meta_value']) if results else 0
+    
+    def load_policies(self) -> Dict[str, str]:
+        """
+        Every policy document as {policy_type: content} ({} without a policies
+        table). Raises on database errors so a caller can keep its last copy.
+        """
+        if not self.connection and not self.connect():
+            raise ConnectionError("database unavailable")
+        # Reloads are minutes apart - revive a connection the server has closed since
+        self.connection.ping(reconnect=True)
+        with self.connection.cursor() as cursor:
+            cursor.execute("SHOW TABLES LIKE 'policies'")
+            if not cursor.fetchone():
+                return {}
+            cursor.execute("SELECT policy_type, policy_content FROM policies")
+            return {row['policy_type']: row['policy_content'] for row in cursor.fetchall()}
+    
     def get_categories(self) -> List[str]:
         """Get all unique categories"""
-        query = f"SELECT DISTINCT product_category FROM {self.config.DB_TABLE} ORDER BY product_category"
-        results = self.execute_query(query)
-        return [row['product_category'] for row in results]
+        return self.facets.categories()
     
     def get_colors(self) -> List[str]:
         """Get all unique colors"""
-        query = f"SELECT DISTINCT color FROM {self.config.DB_TABLE} WHERE color IS NOT NULL ORDER BY color"
-        results = self.execute_query(query)
-        return [row['color'] for row in results]
+        return self.facets.colors()
     
     def get_price_range(self) -> Dict[str, float]:
         """Get min and max prices"""
-        query = f"SELECT MIN(price) as min_price, MAX(price) as max_price FROM {self.config.DB_TABLE}"
-        results = self.execute_query(query)
-        if results:
-            return {
-                'min_price': float(results[0]['min_price'] or 0),
-                'max_price': float(results[0]['max_price'] or 0)
-            }
-        return {'min_price': 0, 'max_price': 0}
+        return self.facets.price_range()
+    
+    def get_facet_counts(self,
+                         category: Optional[str] = None,
+                         color: Optional[str] = None,
+                         gender: Optional[str] = None,
+                         size: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        """Facet counts for a search, served from memory"""
+        return self.facets.facet_counts(category=category, gender=gender, color=color, size=size)
     
     def get_stats(self) -> Dict[str, Any]:
         """Get database statistics"""
-        stats = {}
-        
-        # Total products
-        query = f"SELECT COUNT(*) as total FROM {self.config.DB_TABLE}"
-        result = self.execute_query(query)
-        stats['total_products'] = result[0]['total'] if result else 0
-        
-        # Products by gender
-        query = f"SELECT gender, COUNT(*) as count FROM {self.config.DB_TABLE} GROUP BY gender"
-        results = self.execute_query(query)
-        stats['by_gender'] = {row['gender']: row['count'] for row in results}
-        
-        # Price range
-        stats['price_range'] = self.get_price_range()
-        
-        return stats
\ No newline at end of file
+        return self.facets.stats()
\ No newline at end of file
@@ -44,7 +44,7 @@ class EventManager:
             # For demo purposes, we'll return empty list
             # The frontend handles the actual storage via localStorage
             
-            self.logger.info(f"🔍 Checking upcoming events for {user_email}")
+            self.logger.debug("🔍 Checking upcoming events for %s", user_email)
             return []
             
         except Exception as e:
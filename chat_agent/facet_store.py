@@ -0,0 +1,292 @@
+"""
+Materialized catalog facet store for FashionPulse
+Keeps counts per category x gender x color x size, price histograms and
+distinct-value lists in memory so metadata endpoints never scan the catalog
+"""
+import bisect
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Default price bucket edges (₹) for the histogram - last bucket is open-ended
+DEFAULT_PRICE_EDGES = [0, 500, 1000, 1500, 2000, 3000, 5000, 10000]
+
+FACET_DIMENSIONS = ('category', 'gender', 'color', 'size')
+
+
+def _norm(value: Any) -> str:
+    """Normalize a facet value for case-insensitive keys"""
+    return str(value).strip().lower() if value is not None else ''
+
+
+class CatalogFacetStore:
+    """
+    In-memory facet cube over the product catalog.
+
+    The store is built once from `loader` (an iterable of product rows) and
+    rebuilt when `version_probe` reports a new catalog version - whatever
+    writes the catalog bumps the catalog_meta version row (see catalog_reload) -
+    or, with `max_age`, once the facets are that many seconds old, for writers
+    that do not bump it.
+    """
+
+    def __init__(self,
+                 loader: Callable[[], Iterable[Dict[str, Any]]],
+                 version_probe: Optional[Callable[[], int]] = None,
+                 check_interval: float = 30.0,
+                 price_edges: Optional[List[float]] = None,
+                 field_map: Optional[Dict[str, str]] = None,
+                 max_age: Optional[float] = None):
+        self.logger = logging.getLogger(__name__)
+        self.loader = loader
+        self.version_probe = version_probe
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self.price_edges = sorted(price_edges or DEFAULT_PRICE_EDGES)
+
+        # Maps facet dimension -> column name in loader rows
+        self.field_map = {
+            'category': 'product_category',
+            'gender': 'gender',
+            'color': 'color',
+            'size': 'size',
+            'price': 'price'
+        }
+        if field_map:
+            self.field_map.update(field_map)
+
+        self._lock = threading.Lock()
+        self._version = None
+        self._last_check = 0.0
+        self._built_at = 0.0
+        self._loaded = False
+        self._reset()
+
+    # ------------------------------------------------------------------
+    # Build / invalidation
+    # ------------------------------------------------------------------
+
+    def _reset(self):
+        """Clear all materialized state"""
+        # (category, gender, color, size) -> count
+        self._cube: Dict[Tuple[str, str, str, str], int] = {}
+        # Same key -> per-bucket price counts
+        self._price_cube: Dict[Tuple[str, str, str, str], List[int]] = {}
+        # normalized value -> display value (first seen) per dimension
+        self._display: Dict[str, Dict[str, str]] = {dim: {} for dim in FACET_DIMENSIONS}
+        self._total = 0
+        self._price_sum = 0.0
+        self._min_price: Optional[float] = None
+        self._max_price: Optional[float] = None
+
+    def _row_key(self, row: Dict[str, Any]) -> Tuple[str, str, str, str]:
+        key = []
+        for dim in FACET_DIMENSIONS:
+            raw = row.get(self.field_map[dim])
+            norm = _norm(raw)
+            if norm and norm not in self._display[dim]:
+                self._display[dim][norm] = str(raw).strip()
+            key.append(norm)
+        return tuple(key)
+
+    def _row_price(self, row: Dict[str, Any]) -> Optional[float]:
+        try:
+            price = row.get(self.field_map['price'])
+            return float(price) if price is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    def _bucket(self, price: float) -> int:
+        return max(bisect.bisect_right(self.price_edges, price) - 1, 0)
+
+    def _add(self, row: Dict[str, Any]):
+        """Count a single row into the cube - caller holds the lock"""
+        key = self._row_key(row)
+        self._cube[key] = self._cube.get(key, 0) + 1
+        self._total += 1
+
+        price = self._row_price(row)
+        if price is None:
+            return
+
+        buckets = self._price_cube.setdefault(key, [0] * len(self.price_edges))
+        buckets[self._bucket(price)] += 1
+
+        self._price_sum += price
+        self._min_price = price if self._min_price is None else min(self._min_price, price)
+        self._max_price = price if self._max_price is None else max(self._max_price, price)
+
+    def rebuild(self) -> bool:
+        """Reload every facet from the loader"""
+        started = time.time()
+        try:
+            rows = list(self.loader() or [])
+        except Exception as e:
+            self.logger.error(f"❌ Facet store rebuild failed: {e}")
+            return False
+
+        version = self._probe_version()
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._add(row)
+            self._version = version
+            self._loaded = True
+            self._last_check = self._built_at = time.time()
+
+        self.logger.info(
+            f"📚 Facet store rebuilt: {len(rows)} products, version {version} "
+            f"({(time.time() - started) * 1000:.1f} ms)"
+        )
+        return True
+
+    def _probe_version(self) -> Optional[int]:
+        if not self.version_probe:
+            return None
+        try:
+            return self.version_probe()
+        except Exception as e:
+            self.logger.warning(f"⚠️ Catalog version probe failed: {e}")
+            return self._version
+
+    def ensure_fresh(self):
+        """Build on first use and rebuild when the catalog version changes or the facets expire"""
+        if not self._loaded:
+            self.rebuild()
+            return
+
+        now = time.time()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        version = self._probe_version()
+        if version is not None and version != self._version:
+            self.logger.info(f"🔄 Catalog version changed ({self._version} → {version}), rebuilding facets")
+            self.rebuild()
+        elif self.max_age is not None and now - self._built_at > self.max_age:
+            self.logger.info(f"🔄 Facets are older than {self.max_age:.0f}s, rebuilding")
+            self.rebuild()
+
+    def invalidate(self):
+        """Force a rebuild on next read"""
+        with self._lock:
+            self._loaded = False
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _matches(self, key: Tuple[str, str, str, str], filters: Dict[str, str]) -> bool:
+        for index, dim in enumerate(FACET_DIMENSIONS):
+            wanted = filters.get(dim)
+            if wanted is not None and key[index] not in wanted:
+                return False
+        return True
+
+    @staticmethod
+    def _normalize_filters(**filters) -> Dict[str, Any]:
+        normalized = {}
+        for dim, value in filters.items():
+            if value is None or value == '':
+                continue
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            normalized[dim] = {_norm(v) for v in values}
+        return normalized
+
+    def version(self) -> Optional[int]:
+        self.ensure_fresh()
+        return self._version
+
+    def total_count(self) -> int:
+        self.ensure_fresh()
+        return self._total
+
+    def count(self, category=None, gender=None, color=None, size=None) -> int:
+        """Count products matching the given facet values (lists allowed)"""
+        self.ensure_fresh()
+        filters = self._normalize_filters(category=category, gender=gender, color=color, size=size)
+        with self._lock:
+            if not filters:
+                return self._total
+            return sum(n for key, n in self._cube.items() if self._matches(key, filters))
+
+    def distinct(self, dimension: str) -> List[str]:
+        """Distinct display values for a dimension, sorted case-insensitively"""
+        self.ensure_fresh()
+        with self._lock:
+            index = FACET_DIMENSIONS.index(dimension)
+            present = {key[index] for key in self._cube if key[index]}
+            display = self._display[dimension]
+            return sorted((display[value] for value in present), key=str.lower)
+
+    def categories(self) -> List[str]:
+        return self.distinct('category')
+
+    def colors(self) -> List[str]:
+        return self.distinct('color')
+
+    def sizes(self) -> List[str]:
+        return self.distinct('size')
+
+    def count_by(self, dimension: str) -> Dict[str, int]:
+        """Product counts grouped by a single dimension"""
+        self.ensure_fresh()
+        index = FACET_DIMENSIONS.index(dimension)
+        counts: Dict[str, int] = {}
+        with self._lock:
+            for key, n in self._cube.items():
+                label = self._display[dimension].get(key[index], key[index] or None)
+                counts[label] = counts.get(label, 0) + n
+        return counts
+
+    def price_range(self) -> Dict[str, float]:
+        self.ensure_fresh()
+        return {
+            'min_price': float(self._min_price or 0),
+            'max_price': float(self._max_price or 0)
+        }
+
+    def price_histogram(self, category=None, gender=None, color=None, size=None) -> List[Dict[str, Any]]:
+        """Price histogram for products matching the filters"""
+        self.ensure_fresh()
+        filters = self._normalize_filters(category=category, gender=gender, color=color, size=size)
+        totals = [0] * len(self.price_edges)
+        with self._lock:
+            for key, buckets in self._price_cube.items():
+                if self._matches(key, filters):
+                    for i, n in enumerate(buckets):
+                        totals[i] += n
+
+        histogram = []
+        for i, lower in enumerate(self.price_edges):
+            upper = self.price_edges[i + 1] if i + 1 < len(self.price_edges) else None
+            histogram.append({'min': lower, 'max': upper, 'count': totals[i]})
+        return histogram
+
+    def facet_counts(self, category=None, gender=None, color=None, size=None) -> Dict[str, Dict[str, int]]:
+        """
+        Drill-down counts for search responses: for each dimension, counts of
+        its values under the *other* active filters (standard faceted search)
+        """
+        self.ensure_fresh()
+        active = self._normalize_filters(category=category, gender=gender, color=color, size=size)
+        facets: Dict[str, Dict[str, int]] = {dim: {} for dim in FACET_DIMENSIONS}
+        with self._lock:
+            for key, n in self._cube.items():
+                for index, dim in enumerate(FACET_DIMENSIONS):
+                    others = {d: v for d, v in active.items() if d != dim}
+                    if not key[index] or not self._matches(key, others):
+                        continue
+                    label = self._display[dim][key[index]]
+                    facets[dim][label] = facets[dim].get(label, 0) + n
+        return facets
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistics payload compatible with DatabaseHandler.get_stats"""
+        return {
+            'total_products': self.total_count(),
+            'by_gender': self.count_by('gender'),
+            'price_range': self.price_range()
+        }
@@ -0,0 +1,112 @@
+"""
+Time budgets for LLM generation
+A Deadline is created when a chat request arrives and travels with it; the
+model's stopping criteria check it after every token, together with whether
+the HTTP client is still connected. ThroughputTracker learns prefill and
+decode speed from finished generations, so max_new_tokens can be sized to
+what fits in the time that is left.
+"""
+import select
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class Deadline:
+    """
+    Absolute point in time a request must answer by, plus a cancellation
+    flag. `is_cancelled` (e.g. a client-disconnect probe) is polled at most
+    every `poll_seconds`; once it returns True the deadline stays cancelled.
+    """
+
+    def __init__(self, seconds: float, is_cancelled: Optional[Callable[[], bool]] = None,
+                 poll_seconds: float = 0.25):
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + seconds
+        self.is_cancelled = is_cancelled
+        self.poll_seconds = poll_seconds
+        self._cancelled = threading.Event()
+        self._polled_at = 0.0
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def cancelled(self) -> bool:
+        if self._cancelled.is_set():
+            return True
+        now = time.monotonic()
+        if self.is_cancelled is not None and now - self._polled_at >= self.poll_seconds:
+            self._polled_at = now
+            try:
+                if self.is_cancelled():
+                    self._cancelled.set()
+            except Exception:
+                pass
+        return self._cancelled.is_set()
+
+
+def client_disconnected(environ: Dict[str, Any]) -> bool:
+    """
+    True once the peer of a WSGI request has closed its socket. Works with
+    the werkzeug and gunicorn servers (the socket is in the environ);
+    elsewhere the answer is always False.
+    """
+    sock = environ.get('werkzeug.socket') or environ.get('gunicorn.socket')
+    if sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        if not readable:
+            return False
+        # Readable with nothing to read means the client sent FIN
+        return sock.recv(1, socket.MSG_PEEK) == b''
+    except (OSError, ValueError):
+        return True
+
+
+class ThroughputTracker:
+    """
+    Exponentially weighted prefill time per prompt token and decode tokens
+    per second. `token_budget(seconds, prompt_tokens)` is how many new
+    tokens fit in `seconds`, or `cap` until a generation has been measured.
+    """
+
+    def __init__(self, alpha: float = 0.3, safety: float = 0.85):
+        self.alpha = alpha
+        self.safety = safety
+        self.decode_tokens_per_second: Optional[float] = None
+        self.prefill_seconds_per_token: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _blend(self, old: Optional[float], new: float) -> float:
+        return new if old is None else (1 - self.alpha) * old + self.alpha * new
+
+    def observe(self, prompt_tokens: int, prefill_seconds: float, new_tokens: int, decode_seconds: float):
+        with self._lock:
+            if prompt_tokens > 0 and prefill_seconds > 0:
+                self.prefill_seconds_per_token = self._blend(self.prefill_seconds_per_token,
+                                                             prefill_seconds / prompt_tokens)
+            if new_tokens > 1 and decode_seconds > 0:
+                self.decode_tokens_per_second = self._blend(self.decode_tokens_per_second,
+                                                            new_tokens / decode_seconds)
+
+    def token_budget(self, seconds: float, prompt_tokens: int, cap: int) -> int:
+        with self._lock:
+            if self.decode_tokens_per_second is None:
+                return cap
+            prefill = (self.prefill_seconds_per_token or 0.0) * prompt_tokens
+            tokens = int((seconds - prefill) * self.decode_tokens_per_second * self.safety)
+        return max(min(tokens, cap), 0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'decode_tokens_per_second': round(self.decode_tokens_per_second, 2) if self.decode_tokens_per_second else None,
+            'prefill_ms_per_token': round(self.prefill_seconds_per_token * 1000, 3) if self.prefill_seconds_per_token else None,
+        }
@@ -0,0 +1,319 @@
+"""
+Compiled intent router for the FashionPulse chat agents
+One pass over a message yields its intent and a confidence: a token-level
+keyword automaton applies hard rules, otherwise a linear model over hashed
+word/bigram/character n-gram features (trained from data/intent_corpus.tsv)
+scores every intent. `legacy_route` keeps the original keyword-list router
+for low-confidence fallback and for the accuracy comparison.
+"""
+import math
+import os
+import random
+import re
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'intent_corpus.tsv')
+
+INTENTS = (
+    'product_search', 'greeting', 'thanks', 'goodbye', 'how_are_you', 'positive_feedback',
+    'shipping', 'returns', 'cancellation', 'sizing', 'payment', 'order_tracking', 'cart',
+    'wishlist', 'my_orders', 'support', 'stats', 'categories', 'colors', 'general'
+)
+
+# Unambiguous phrases that decide the intent outright (longest match wins)
+HARD_RULES = {
+    'cancel my order': 'cancellation', 'cancel order': 'cancellation', 'cancellation': 'cancellation',
+    'my cart': 'cart', 'view cart': 'cart', 'show cart': 'cart', 'cart items': 'cart',
+    'wishlist': 'wishlist', 'saved items': 'wishlist', 'my favorites': 'wishlist', 'my favourites': 'wishlist',
+    'my orders': 'my_orders', 'order history': 'my_orders', 'past orders': 'my_orders',
+    'purchase history': 'my_orders',
+    'track my order': 'order_tracking', 'track order': 'order_tracking', 'where is my order': 'order_tracking',
+    'order status': 'order_tracking', 'tracking number': 'order_tracking',
+    'size chart': 'sizing', 'size guide': 'sizing',
+    'return policy': 'returns', 'exchange policy': 'returns', 'refund': 'returns',
+    'cash on delivery': 'payment', 'payment methods': 'payment',
+    'customer care': 'support', 'customer service': 'support',
+}
+
+# Cue words per intent - not decisive on their own, they become model
+# features ("k:shipping") so training learns how much each one counts
+CUE_KEYWORDS = {
+    'greeting': ['hi', 'hii', 'hello', 'hey', 'namaste', 'yo', 'greetings', 'good morning',
+                 'good afternoon', 'good evening'],
+    'thanks': ['thank', 'thanks', 'thank you', 'thank u', 'thx', 'ty', 'appreciate'],
+    'goodbye': ['bye', 'goodbye', 'cya', 'see you', 'later', 'good night', 'gotta go'],
+    'how_are_you': ['how are you', 'how r u', 'how do you do', "what's up", "how's it going",
+                    'how have you been', 'doing well'],
+    'positive_feedback': ['nice', 'great', 'awesome', 'cool', 'amazing', 'perfect', 'superb',
+                          'love', 'helpful', 'wow'],
+    'shipping': ['shipping', 'ship', 'delivery', 'deliver', 'delivered', 'arrive', 'when will',
+                 'how long', 'express', 'overnight'],
+    'returns': ['return', 'refund', 'exchange', 'send back', 'damaged'],
+    'cancellation': ['cancel', 'cancellation'],
+    'sizing': ['size', 'sizes', 'fit', 'fits', 'measure', 'measurement', 'chart', 'run small'],
+    'payment': ['payment', 'pay', 'card', 'upi', 'cod', 'emi', 'net banking', 'paid', 'deducted'],
+    'order_tracking': ['order', 'track', 'tracking', 'status', 'parcel', 'package', 'shipped'],
+    'cart': ['cart', 'bag'],
+    'wishlist': ['wishlist', 'favorites', 'favourites', 'saved', 'save', 'liked'],
+    'my_orders': ['orders', 'history', 'purchases', 'bought', 'buy'],
+    'support': ['help', 'support', 'contact', 'problem', 'issue', 'agent', 'human', 'not working'],
+    'stats': ['stats', 'statistics', 'inventory', 'total', 'how many products', 'collection', 'catalog'],
+    'categories': ['categories', 'category', 'types', 'what do you have', 'kind', 'sell'],
+    'colors': ['colors', 'colours', 'color', 'colour'],
+    'product_search': ['show me', 'find me', 'search for', 'looking for', 'i want', 'i need',
+                       'display', 'browse', 'shop for', 'suggest', 'do you have', 'any'],
+}
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text: str) -> List[str]:
+    return ['<num>' if token.isdigit() else token for token in _TOKEN.findall(str(text or '').lower())]
+
+
+class KeywordAutomaton:
+    """
+    Phrase matcher over word tokens: phrases are compiled into a trie and
+    every match is found in one left-to-right pass, on word boundaries
+    ("hi" never fires inside "shirt", unlike a substring test).
+    """
+
+    def __init__(self):
+        self._root: Dict[str, Any] = {}
+
+    def add(self, phrase: str, label: Any):
+        node = self._root
+        words = tokenize(phrase)
+        for word in words:
+            node = node.setdefault(word, {})
+        node.setdefault(None, []).append((label, len(words)))
+
+    def matches(self, tokens: Sequence[str]) -> List[Tuple[int, int, Any]]:
+        """(start, length, label) for every phrase occurrence"""
+        found = []
+        for start in range(len(tokens)):
+            node = self._root
+            for position in range(start, len(tokens)):
+                node = node.get(tokens[position])
+                if node is None:
+                    break
+                for label, length in node.get(None, ()):
+                    found.append((start, length, label))
+        return found
+
+
+def extract_features(tokens: Sequence[str], slots: Iterable[str] = (), cues: Iterable[str] = ()) -> List[str]:
+    """Word unigrams and bigrams, character trigrams (typo-tolerant), length bucket, parser slots and cue words"""
+    features = ['bias', 'len:' + ('1' if len(tokens) <= 1 else '2' if len(tokens) == 2 else
+                                  '3-4' if len(tokens) <= 4 else '5+')]
+    for i, token in enumerate(tokens):
+        features.append('w:' + token)
+        if i:
+            features.append('b:' + tokens[i - 1] + ' ' + token)
+        padded = '#' + token + '#'
+        for j in range(len(padded) - 2):
+            features.append('c:' + padded[j:j + 3])
+    features.extend('s:' + slot for slot in slots)
+    features.extend('k:' + cue for cue in cues)
+    return features
+
+
+def parsed_slots(parsed_query: Optional[Dict[str, Any]]) -> List[str]:
+    """Which search filters the query parser found"""
+    if not parsed_query:
+        return []
+    return [slot for slot, key in (('category', 'category'), ('color', 'color'),
+                                   ('gender', 'gender'), ('price', 'max_price')) if parsed_query.get(key)]
+
+
+class HashedLinearModel:
+    """
+    Multinomial logistic regression over hashed features. Weights are kept
+    sparsely (bucket -> per-intent list), so only buckets seen in training
+    cost memory.
+    """
+
+    def __init__(self, labels: Sequence[str], buckets: int = 1 << 18):
+        self.labels = list(labels)
+        self.buckets = buckets
+        self.weights: Dict[int, List[float]] = {}
+
+    def _hash(self, features: Iterable[str]) -> List[int]:
+        mask = self.buckets - 1
+        return [zlib.crc32(feature.encode('utf-8')) & mask for feature in features]
+
+    def scores(self, features: Sequence[str]) -> List[float]:
+        return self.scores_for_buckets(self._hash(features))
+
+    @staticmethod
+    def softmax(scores: Sequence[float]) -> List[float]:
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        total = sum(exps)
+        return [value / total for value in exps]
+
+    def predict(self, features: Sequence[str]) -> Tuple[str, float]:
+        probabilities = self.softmax(self.scores(features))
+        best = max(range(len(probabilities)), key=probabilities.__getitem__)
+        return self.labels[best], probabilities[best]
+
+    def train(self, examples: Sequence[Tuple[Sequence[str], str]], epochs: int = 12,
+              learning_rate: float = 0.5, l2: float = 1e-4, seed: int = 13):
+        """SGD on the cross-entropy loss; deterministic for a given seed"""
+        index = {label: k for k, label in enumerate(self.labels)}
+        hashed = [(self._hash(features), index[label]) for features, label in examples]
+        order = list(range(len(hashed)))
+        rng = random.Random(seed)
+        size = len(self.labels)
+        for epoch in range(epochs):
+            rng.shuffle(order)
+            rate = learning_rate / (1.0 + epoch * 0.3)
+            for i in order:
+                buckets, target = hashed[i]
+                probabilities = self.softmax(self.scores_for_buckets(buckets))
+                gradient = [probability - (1.0 if k == target else 0.0)
+                            for k, probability in enumerate(probabilities)]
+                for bucket in buckets:
+                    row = self.weights.get(bucket)
+                    if row is None:
+                        row = self.weights[bucket] = [0.0] * size
+                    for k in range(size):
+                        row[k] -= rate * (gradient[k] + l2 * row[k])
+        return self
+
+    def scores_for_buckets(self, buckets: Sequence[int]) -> List[float]:
+        totals = [0.0] * len(self.labels)
+        for bucket in buckets:
+            row = self.weights.get(bucket)
+            if row is not None:
+                for k, value in enumerate(row):
+                    totals[k] += value
+        return totals
+
+
+def load_corpus(path: str = CORPUS_PATH) -> List[Tuple[str, str]]:
+    """(intent, message) pairs; '#' lines are comments"""
+    examples = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            intent, message = line.split('\t', 1)
+            if intent not in INTENTS:
+                raise ValueError(f"Unknown intent {intent!r} in {path}")
+            examples.append((intent, message))
+    return examples
+
+
+class IntentRouter:
+    """
+    `route(message, parsed_query)` -> {'intent', 'confidence', 'source'}
+    where source is 'rule' (hard-rule phrase, confidence 1.0) or 'model'.
+    Hard rules and cue words share one automaton, so a message is scanned
+    once for both.
+    """
+
+    def __init__(self, examples: Optional[Sequence[Tuple[str, str]]] = None, parse=None,
+                 rules: Optional[Dict[str, str]] = None, cues: Optional[Dict[str, List[str]]] = None):
+        self.parse = parse
+        self.automaton = KeywordAutomaton()
+        for phrase, intent in (HARD_RULES if rules is None else rules).items():
+            self.automaton.add(phrase, ('rule', intent))
+        for intent, phrases in (CUE_KEYWORDS if cues is None else cues).items():
+            for phrase in phrases:
+                self.automaton.add(phrase, ('cue', intent))
+        self.model = HashedLinearModel(INTENTS)
+        examples = load_corpus() if examples is None else examples
+        training = []
+        for intent, message in examples:
+            tokens = tokenize(message)
+            training.append((self._features(tokens, self._scan(tokens)[1], None, message), intent))
+        self.model.train(training)
+
+    def _scan(self, tokens: Sequence[str]) -> Tuple[Optional[str], List[str]]:
+        """(longest hard-rule intent or None, cue intents) from one automaton pass"""
+        rule, rule_length, cues = None, 0, set()
+        for _, length, (kind, intent) in self.automaton.matches(tokens):
+            if kind == 'cue':
+                cues.add(intent)
+            elif length > rule_length:
+                rule, rule_length = intent, length
+        return rule, sorted(cues)
+
+    def _features(self, tokens, cues, parsed_query, message) -> List[str]:
+        if parsed_query is None and self.parse is not None:
+            parsed_query = self.parse(message)
+        return extract_features(tokens, parsed_slots(parsed_query), cues)
+
+    def route(self, message: str, parsed_query: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        tokens = tokenize(message)
+        if not tokens:
+            return {'intent': 'general', 'confidence': 1.0, 'source': 'rule'}
+        rule, cues = self._scan(tokens)
+        if rule is not None:
+            return {'intent': rule, 'confidence': 1.0, 'source': 'rule'}
+        intent, confidence = self.model.predict(self._features(tokens, cues, parsed_query, message))
+        return {'intent': intent, 'confidence': round(confidence, 4), 'source': 'model'}
+
+
+# ----------------------------------------------------------------------
+# Original keyword-list router (LightweightFashionPulseChatAgent before the
+# compiled router) - fallback for low-confidence messages and the baseline
+# the benchmark compares against
+# ----------------------------------------------------------------------
+
+_GREETING_WORDS = [
+    'hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening',
+    'how are you', 'what\'s up', 'whatsup', 'sup', 'greetings'
+]
+
+
+def _legacy_is_product_search(parsed_query: Dict[str, Any], message_lower: str) -> bool:
+    if any(greeting in message_lower for greeting in _GREETING_WORDS) and len(message_lower.split()) <= 3:
+        return False
+    general_conversation = [
+        'thank you', 'thanks', 'bye', 'goodbye', 'see you', 'nice', 'great',
+        'awesome', 'cool', 'ok', 'okay', 'yes', 'no', 'maybe'
+    ]
+    if any(word in message_lower for word in general_conversation) and len(message_lower.split()) <= 2:
+        return False
+    has_search_criteria = any([parsed_query.get('category'), parsed_query.get('color'),
+                               parsed_query.get('gender'), parsed_query.get('max_price')])
+    explicit_search_words = [
+        'show me', 'find me', 'search for', 'looking for', 'i want', 'i need',
+        'can you show', 'display', 'browse', 'shop for'
+    ]
+    return has_search_criteria or any(phrase in message_lower for phrase in explicit_search_words)
+
+
+def legacy_route(message: str, parsed_query: Dict[str, Any]) -> str:
+    """Intent the original substring-scan router picks"""
+    message_lower = message.lower().strip()
+    if _legacy_is_product_search(parsed_query, message_lower):
+        return 'product_search'
+    checks = [
+        ('greeting', _GREETING_WORDS),
+        ('thanks', ['thank you', 'thanks', 'ty']),
+        ('goodbye', ['bye', 'goodbye', 'see you', 'cya']),
+        ('how_are_you', ['how are you', 'how do you do']),
+        ('positive_feedback', ['nice', 'great', 'awesome', 'cool', 'amazing']),
+        ('shipping', ['shipping', 'delivery', 'when will', 'how long']),
+        ('returns', ['return', 'refund', 'exchange']),
+        ('cancellation', ['cancel', 'cancellation', 'cancel order', 'cancel policy']),
+        ('sizing', ['size', 'fit', 'measurement']),
+        ('payment', ['payment', 'pay', 'card', 'upi', 'cod']),
+        ('order_tracking', ['order', 'track', 'status', 'where is']),
+        ('cart', ['cart', 'my cart', 'show cart', 'cart items', 'what\'s in cart']),
+        ('wishlist', ['wishlist', 'my wishlist', 'show wishlist', 'saved items', 'favorites']),
+        ('my_orders', ['my orders', 'show orders', 'order history', 'past orders']),
+        ('support', ['help', 'support', 'contact', 'problem']),
+        ('stats', ['stats', 'statistics', 'inventory', 'total']),
+        ('categories', ['categories', 'types', 'what do you have']),
+        ('colors', ['colors', 'available colors']),
+    ]
+    for intent, words in checks:
+        if any(word in message_lower for word in words):
+            return intent
+    return 'general'
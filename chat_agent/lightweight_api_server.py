@@ -14,18 +14,40 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from lightweight_chat_agent import LightweightFashionPulseChatAgent
+from database import query_profiler, search_result_cache
+from metrics import registry
+from config import ChatAgentConfig
+from structured_logging import configure_logging, init_request_ids
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# JSON-lines logs written off the request thread; hot paths log at DEBUG only
+configure_logging(
+    'chat-agent-lightweight',
+    level=ChatAgentConfig.LOG_LEVEL,
+    module_levels=ChatAgentConfig.LOG_LEVELS,
+    json_format=ChatAgentConfig.LOG_JSON,
+    debug_sample_rate=ChatAgentConfig.LOG_DEBUG_SAMPLE_RATE,
+    debug_per_second=ChatAgentConfig.LOG_DEBUG_PER_SECOND,
+    queue_size=ChatAgentConfig.LOG_QUEUE_SIZE
 )
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend integration
 
+# X-Request-ID on every request, stamped on each log line
+init_request_ids(app)
+
+# Query count / DB time per request (Server-Timing header in debug mode)
+query_profiler.init_app(app)
+
+# Prometheus metrics on /metrics (request counts and latency per route)
+registry.init_app(app)
+chat_intents = registry.counter('chat_intents_total', 'Chat messages by detected intent / response type', ('intent',))
+
 # Initialize lightweight chat agent
 chat_agent = LightweightFashionPulseChatAgent()
+registry.gauge('db_connection_up', 'Chat agent MySQL connection open (1) or not (0)').set_function(
+    lambda: 1 if chat_agent.db_handler.connection and chat_agent.db_handler.connection.open else 0
+)
 
 @app.route('/api/chat', methods=['POST'])
 def chat_endpoint():
@@ -58,6 +80,7 @@ def chat_endpoint():
             response_type = response.get('type', 'chat')
             
             if response_type in ['cart_request', 'wishlist_request', 'orders_request']:
+                chat_intents.inc(response_type)
                 return jsonify({
                     'response': response['reply'],
                     'type': response_type,
@@ -67,6 +90,7 @@ def chat_endpoint():
                 })
             elif response_type in ['face_tone_flow_result', 'body_fit_flow_result', 'event_outfit_result']:
                 # Handle flow results with products
+                chat_intents.inc(response_type)
                 return jsonify({
                     'response': response['response'],
                     'products': response.get('products', []),
@@ -79,7 +103,9 @@ def chat_endpoint():
         
         # Also get structured product data if it's a search query
         parsed_query = chat_agent.query_parser.parse_user_query(user_message)
+        chat_intents.inc(parsed_query.get('intent') or 'unknown')
         products = []
+        facets = {}
         
         if parsed_query['intent'] == 'search' or any([parsed_query['category'], parsed_query['color'], parsed_query['gender']]):
             products = chat_agent.db_handler.search_products(
@@ -89,10 +115,17 @@ def chat_endpoint():
                 max_price=parsed_query['max_price'],
                 limit=10  # Return more products for better "View All" experience
             )
+            # Facet counts come from the in-memory store - no extra query
+            facets = chat_agent.db_handler.get_facet_counts(
+                category=parsed_query['category'],
+                color=parsed_query['color'],
+                gender=parsed_query['gender']
+            )
         
         return jsonify({
             'response': response,
             'products': products,
+            'facets': facets,
             'timestamp': datetime.now().isoformat(),
             'status': 'success'
         })
@@ -136,6 +169,8 @@ def get_chat_stats():
         
         return jsonify({
             'stats': stats,
+            'facets': chat_agent.db_handler.get_facet_counts(),
+            'price_histogram': chat_agent.db_handler.facets.price_histogram(),
             'timestamp': datetime.now().isoformat(),
             'status': 'success'
         })
@@ -212,6 +247,19 @@ def get_llm_status():
             'message': str(e)
         }), 500
 
+@app.route('/api/chat/db-metrics', methods=['GET'])
+def get_db_metrics():
+    """
+    Query counts, DB time, slowest fingerprints, EXPLAIN captures, search result cache and policy store
+    """
+    return jsonify({
+        'db': query_profiler.get_stats(),
+        'result_cache': search_result_cache.get_stats(),
+        'policies': chat_agent.policy_store.get_stats(),
+        'timestamp': datetime.now().isoformat(),
+        'status': 'success'
+    })
+
 @app.route('/api/chat/health', methods=['GET'])
 def health_check():
     """
@@ -285,6 +333,8 @@ def get_help():
             'POST /api/chat': 'Main chat interface with comprehensive support',
             'GET /api/chat/product/{id}': 'Get product details',
             'GET /api/chat/stats': 'Get database statistics',
+            'GET /api/chat/db-metrics': 'Get per-query timing and slow-query plans',
+            'GET /metrics': 'Prometheus metrics (requests, latency, intents, DB)',
             'GET /api/chat/categories': 'Get all categories',
             'GET /api/chat/colors': 'Get all colors',
             'GET /api/chat/llm-status': 'Get agent status',
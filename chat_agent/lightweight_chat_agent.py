@@ -8,14 +8,22 @@ from database import DatabaseHandler
 from query_parser import QueryParser
 from response_formatter import ResponseFormatter
 from config import ChatAgentConfig
+from intent_router import IntentRouter, legacy_route
+from policy_store import PolicyStore
 
 class LightweightFashionPulseChatAgent:
+    # Trained once per process from the shipped corpus, on first use
+    _intent_router: Optional[IntentRouter] = None
+    # Policy documents, loaded at startup and refreshed in the background
+    _policy_store: Optional[PolicyStore] = None
+
     def __init__(self):
         self.config = ChatAgentConfig()
         self.db_handler = DatabaseHandler()
         self.query_parser = QueryParser()
         self.response_formatter = ResponseFormatter()
         self.logger = logging.getLogger(__name__)
+        self.policy_store = self.get_policy_store()
         
         # E-commerce knowledge base for comprehensive responses
         self.ecommerce_knowledge = {
@@ -70,7 +78,7 @@ class LightweightFashionPulseChatAgent:
             str: Formatted response
         """
         try:
-            self.logger.info(f"💬 Processing message: {user_message}")
+            self.logger.debug("💬 Processing message: %s", user_message)
             
             # Check if this is a flow message (JSON format)
             try:
@@ -93,15 +101,13 @@ class LightweightFashionPulseChatAgent:
             # Parse user query
             parsed_query = self.query_parser.parse_user_query(user_message)
             
-            # Determine if this is a product search query
-            is_product_query = self._is_product_search_query(parsed_query, user_message)
-            
-            if is_product_query:
+            intent = self._route_message(user_message, parsed_query)
+            if intent == 'product_search':
                 # Handle product search with database
                 return self._handle_product_search(parsed_query, user_message)
             else:
                 # Handle general e-commerce queries with enhanced responses
-                return self._handle_general_ecommerce_query(user_message, parsed_query)
+                return self._handle_general_ecommerce_query(user_message, parsed_query, intent)
                 
         except Exception as e:
             self.logger.error(f"❌ Error processing message: {e}")
@@ -132,7 +138,7 @@ class LightweightFashionPulseChatAgent:
             gender = flow_data.get('gender', '').lower()
             category = flow_data.get('category', '')
             
-            self.logger.info(f"🎨 Face Tone Flow - Color: {color}, Gender: {gender}, Category: {category}")
+            self.logger.debug("🎨 Face Tone Flow - Color: %s, Gender: %s, Category: %s", color, gender, category)
             
             # Search products based on face tone flow criteria
             products = self.db_handler.search_products(
@@ -143,7 +149,7 @@ class LightweightFashionPulseChatAgent:
                 limit=10
             )
             
-            self.logger.info(f"🔍 Face Tone Flow found {len(products)} products")
+            self.logger.debug("🔍 Face Tone Flow found %s products", len(products))
             
             if products:
                 response_text = f"🎨 Perfect match! Here are {color} {category.lower()} for {gender} that will complement your skin tone:"
@@ -186,7 +192,7 @@ class LightweightFashionPulseChatAgent:
             category = flow_data.get('category', '')
             color = flow_data.get('color', '')
             
-            self.logger.info(f"👕 Body Fit Flow - Gender: {gender}, Body Shape: {body_shape}, Category: {category}, Color: {color}")
+            self.logger.debug("👕 Body Fit Flow - Gender: %s, Body Shape: %s, Category: %s, Color: %s", gender, body_shape, category, color)
             
             # If we have all parameters, search for products
             if category and color:
@@ -198,7 +204,7 @@ class LightweightFashionPulseChatAgent:
                     limit=10
                 )
                 
-                self.logger.info(f"🔍 Body Fit Flow found {len(products)} products")
+                self.logger.debug("🔍 Body Fit Flow found %s products", len(products))
                 
                 if products:
                     response_text = f"👕 Perfect fit! Here are {color.lower()} {category.lower()} that will look amazing on your {body_shape.lower()} body shape:"
@@ -283,7 +289,7 @@ class LightweightFashionPulseChatAgent:
             event_type = flow_data.get('eventType', '').lower()
             event_date = flow_data.get('eventDate', '')
             
-            self.logger.info(f"📅 Event Outfit Suggestion - Gender: {gender}, Event: {event_type}, Date: {event_date}")
+            self.logger.debug("📅 Event Outfit Suggestion - Gender: %s, Event: %s, Date: %s", gender, event_type, event_date)
             
             # Get recommended categories based on gender and event type
             recommended_categories = self._get_event_categories(gender, event_type)
@@ -310,7 +316,7 @@ class LightweightFashionPulseChatAgent:
                 if len(unique_products) >= 8:  # Limit to 8 products total
                     break
             
-            self.logger.info(f"🔍 Event Outfit Suggestion found {len(unique_products)} products")
+            self.logger.debug("🔍 Event Outfit Suggestion found %s products", len(unique_products))
             
             if unique_products:
                 response_text = f"✨ Perfect outfits for your {event_type} on {event_date}! Here are my top recommendations:"
@@ -395,65 +401,44 @@ class LightweightFashionPulseChatAgent:
         # For now, just process as regular message
         # You could add flow-aware processing here if needed
         parsed_query = self.query_parser.parse_user_query(message)
-        is_product_query = self._is_product_search_query(parsed_query, message)
+        intent = self._route_message(message, parsed_query)
         
-        if is_product_query:
+        if intent == 'product_search':
             return self._handle_product_search(parsed_query, message)
         else:
-            return self._handle_general_ecommerce_query(message, parsed_query)
+            return self._handle_general_ecommerce_query(message, parsed_query, intent)
     
-    def _is_product_search_query(self, parsed_query: Dict[str, Any], user_message: str) -> bool:
-        """Determine if the query is primarily about product search"""
-        
-        message_lower = user_message.lower().strip()
-        
-        # Handle greetings and casual conversation first
-        greeting_words = [
-            'hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening',
-            'how are you', 'what\'s up', 'whatsup', 'sup', 'greetings'
-        ]
-        
-        # If it's just a greeting, don't treat as product search
-        if any(greeting in message_lower for greeting in greeting_words) and len(message_lower.split()) <= 3:
-            return False
-        
-        # Handle general conversation
-        general_conversation = [
-            'thank you', 'thanks', 'bye', 'goodbye', 'see you', 'nice', 'great',
-            'awesome', 'cool', 'ok', 'okay', 'yes', 'no', 'maybe'
-        ]
-        
-        if any(word in message_lower for word in general_conversation) and len(message_lower.split()) <= 2:
-            return False
-        
-        # Check if query has explicit product search criteria
-        has_search_criteria = any([
-            parsed_query['category'],
-            parsed_query['color'], 
-            parsed_query['gender'],
-            parsed_query['max_price']
-        ])
-        
-        # Check for explicit product search intent
-        explicit_search_words = [
-            'show me', 'find me', 'search for', 'looking for', 'i want', 'i need',
-            'can you show', 'display', 'browse', 'shop for'
-        ]
-        
-        has_explicit_search = any(phrase in message_lower for phrase in explicit_search_words)
-        
-        # Check for product-related keywords (but only if combined with search intent)
-        product_keywords = [
-            'dress', 'shirt', 'jeans', 'top', 'bottom', 'wear', 'clothes', 'clothing'
-        ]
-        
-        has_product_keywords = any(keyword in message_lower for keyword in product_keywords)
-        
-        # Only treat as product search if:
-        # 1. Has explicit search criteria, OR
-        # 2. Has explicit search words, OR  
-        # 3. Has product keywords AND search intent words
-        return has_search_criteria or has_explicit_search or (has_product_keywords and has_explicit_search)
+    @classmethod
+    def get_policy_store(cls) -> PolicyStore:
+        if cls._policy_store is None:
+            # The refresher thread gets its own connection rather than sharing the request one
+            policy_db = DatabaseHandler()
+            cls._policy_store = PolicyStore(
+                loader=policy_db.load_policies,
+                version_probe=policy_db.get_policy_version,
+                check_seconds=ChatAgentConfig.POLICY_CHECK_SECONDS,
+                ttl=ChatAgentConfig.POLICY_TTL_SECONDS
+            ).start()
+        return cls._policy_store
+    
+    @classmethod
+    def get_intent_router(cls) -> IntentRouter:
+        if cls._intent_router is None:
+            # Trained with the parser's slot features, as benchmark_intent_router measures it
+            cls._intent_router = IntentRouter(parse=QueryParser().parse_user_query)
+        return cls._intent_router
+    
+    def _route_message(self, user_message: str, parsed_query: Dict[str, Any]) -> str:
+        """
+        Intent for a message: the compiled router's answer when it is confident
+        enough, otherwise (or with INTENT_ROUTER=legacy) the keyword-list router
+        """
+        if self.config.INTENT_ROUTER == 'compiled':
+            routed = self.get_intent_router().route(user_message, parsed_query)
+            self.logger.debug("🧭 Routed: %s", routed)
+            if routed['confidence'] >= self.config.INTENT_MIN_CONFIDENCE:
+                return routed['intent']
+        return legacy_route(user_message, parsed_query)
     
     def _handle_product_search(self, parsed_query: Dict[str, Any], user_message: str) -> str:
         """Handle product search queries with database results"""
@@ -478,98 +463,46 @@ class LightweightFashionPulseChatAgent:
             self.logger.error(f"❌ Error in product search: {e}")
             return self.response_formatter.format_error_response()
     
-    def _handle_general_ecommerce_query(self, user_message: str, parsed_query: Dict[str, Any]) -> str:
+    def _handle_general_ecommerce_query(self, user_message: str, parsed_query: Dict[str, Any],
+                                        intent: Optional[str] = None) -> str:
         """Handle general e-commerce queries with comprehensive responses"""
         try:
-            message_lower = user_message.lower().strip()
-            
-            # Handle greetings first
-            greeting_words = [
-                'hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening',
-                'how are you', 'what\'s up', 'whatsup', 'sup', 'greetings'
-            ]
-            
-            if any(greeting in message_lower for greeting in greeting_words):
-                return self._handle_greeting(user_message)
-            
-            # Handle casual conversation
-            if any(word in message_lower for word in ['thank you', 'thanks', 'ty']):
-                return self._handle_thanks()
-            
-            if any(word in message_lower for word in ['bye', 'goodbye', 'see you', 'cya']):
-                return self._handle_goodbye()
-            
-            if any(phrase in message_lower for phrase in ['how are you', 'how do you do']):
-                return self._handle_how_are_you()
-            
-            if any(word in message_lower for word in ['nice', 'great', 'awesome', 'cool', 'amazing']):
-                return self._handle_positive_feedback()
-            
-            # Shipping queries
-            if any(word in message_lower for word in ['shipping', 'delivery', 'when will', 'how long']):
-                return self._handle_shipping_query(user_message)
-            
-            # Return queries
-            elif any(word in message_lower for word in ['return', 'refund', 'exchange']):
-                return self._handle_return_query(user_message)
-            
-            # Cancellation queries  
-            elif any(word in message_lower for word in ['cancel', 'cancellation', 'cancel order', 'cancel policy']):
-                return self._handle_cancellation_query(user_message)
-            
-            # Sizing queries
-            elif any(word in message_lower for word in ['size', 'fit', 'measurement']):
-                return self._handle_sizing_query(user_message)
-            
-            # Payment queries
-            elif any(word in message_lower for word in ['payment', 'pay', 'card', 'upi', 'cod']):
-                return self._handle_payment_query(user_message)
-            
-            # Order tracking
-            elif any(word in message_lower for word in ['order', 'track', 'status', 'where is']):
-                return self._handle_order_query(user_message)
-            
-            # Cart queries
-            elif any(word in message_lower for word in ['cart', 'my cart', 'show cart', 'cart items', 'what\'s in cart']):
-                return self._handle_cart_query(user_message)
-            
-            # Wishlist queries  
-            elif any(word in message_lower for word in ['wishlist', 'my wishlist', 'show wishlist', 'saved items', 'favorites']):
-                return self._handle_wishlist_query(user_message)
-            
-            # My orders queries
-            elif any(word in message_lower for word in ['my orders', 'show orders', 'order history', 'past orders']):
-                return self._handle_my_orders_query(user_message)
-            
-            # General support
-            elif any(word in message_lower for word in ['help', 'support', 'contact', 'problem']):
-                return self._handle_support_query(user_message)
-            
-            # Stats and inventory
-            elif any(word in message_lower for word in ['stats', 'statistics', 'inventory', 'total']):
-                return self._get_inventory_stats()
-            
-            # Categories
-            elif any(word in message_lower for word in ['categories', 'types', 'what do you have']):
-                return self._get_available_categories()
-            
-            # Colors
-            elif any(word in message_lower for word in ['colors', 'available colors']):
-                return self._get_available_colors()
-            
-            # Default: friendly conversational response
-            else:
+            intent = intent or self._route_message(user_message, parsed_query)
+            handlers = {
+                'greeting': lambda: self._handle_greeting(user_message),
+                'thanks': self._handle_thanks,
+                'goodbye': self._handle_goodbye,
+                'how_are_you': self._handle_how_are_you,
+                'positive_feedback': self._handle_positive_feedback,
+                'shipping': lambda: self._handle_shipping_query(user_message),
+                'returns': lambda: self._handle_return_query(user_message),
+                'cancellation': lambda: self._handle_cancellation_query(user_message),
+                'sizing': lambda: self._handle_sizing_query(user_message),
+                'payment': lambda: self._handle_payment_query(user_message),
+                'order_tracking': lambda: self._handle_order_query(user_message),
+                'cart': lambda: self._handle_cart_query(user_message),
+                'wishlist': lambda: self._handle_wishlist_query(user_message),
+                'my_orders': lambda: self._handle_my_orders_query(user_message),
+                'support': lambda: self._handle_support_query(user_message),
+                'stats': self._get_inventory_stats,
+                'categories': self._get_available_categories,
+                'colors': self._get_available_colors,
+            }
+            handler = handlers.get(intent)
+            if handler is None:
+                # Default: friendly conversational response
                 return self._handle_general_conversation(user_message)
+            return handler()
                 
         except Exception as e:
             self.logger.error(f"❌ Error in general e-commerce query: {e}")
             return self._get_default_help_response()
     
     def _handle_shipping_query(self, user_message: str) -> str:
-        """Handle shipping-related queries - fetch from database"""
+        """Handle shipping-related queries - policy from the store"""
         try:
-            # Try to get policy from database first
-            policy_info = self._get_policy_from_database('shipping_policy')
+            # Policy document from the in-memory store
+            policy_info = self.policy_store.get('shipping_policy')
             
             if policy_info:
                 return policy_info
@@ -597,10 +530,10 @@ class LightweightFashionPulseChatAgent:
             return "I'm sorry, I cannot find policy details right now. Please try again later."
     
     def _handle_return_query(self, user_message: str) -> str:
-        """Handle return and exchange queries - fetch from database"""
+        """Handle return and exchange queries - policy from the store"""
         try:
-            # Try to get policy from database first
-            policy_info = self._get_policy_from_database('return_policy')
+            # Policy document from the in-memory store
+            policy_info = self.policy_store.get('return_policy')
             
             if policy_info:
                 return policy_info
@@ -1014,40 +947,11 @@ class LightweightFashionPulseChatAgent:
         
         return response
     
-    def _get_policy_from_database(self, policy_type: str) -> str:
-        """Fetch policy information from database"""
-        try:
-            conn = self.db_handler.connect()
-            if not conn:
-                return None
-                
-            cursor = conn.cursor()
-            
-            # Check if policies table exists
-            cursor.execute("SHOW TABLES LIKE 'policies'")
-            if not cursor.fetchone():
-                conn.close()
-                return None
-            
-            # Fetch policy from database
-            cursor.execute("SELECT policy_content FROM policies WHERE policy_type = %s", (policy_type,))
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result:
-                return result[0]
-            else:
-                return None
-                
-        except Exception as e:
-            self.logger.error(f"❌ Error fetching policy from database: {e}")
-            return None
-    
     def _handle_cancellation_query(self, user_message: str) -> str:
-        """Handle order cancellation queries - fetch from database"""
+        """Handle order cancellation queries - policy from the store"""
         try:
-            # Try to get policy from database first
-            policy_info = self._get_policy_from_database('cancellation_policy')
+            # Policy document from the in-memory store
+            policy_info = self.policy_store.get('cancellation_policy')
             
             if policy_info:
                 return policy_info
@@ -4,20 +4,96 @@ Integrates the SHJ622/falcon_7b_ecommerce_ai_chatbot_n100 model with FashionPuls
 """
 import logging
 import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
+from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline, StoppingCriteria, StoppingCriteriaList
 from typing import Dict, Any, Optional, List
 import json
 import re
+import time
+from contextlib import nullcontext
 from config import ChatAgentConfig
+from metrics import registry
+from conversation_context import estimate_tokens
+from generation_budget import Deadline, ThroughputTracker
+from speculative import AssistedDecodingMonitor
+
+llm_generated_tokens = registry.counter('llm_generated_tokens_total', 'Tokens generated by the LLM')
+llm_generation_seconds = registry.histogram('llm_generation_seconds', 'LLM generation wall time',
+                                            buckets=(0.25, 0.5, 1, 2, 4, 8, 16, 32, 64))
+llm_tokens_per_second = registry.gauge('llm_tokens_per_second', 'Throughput of the most recent generation')
+llm_prompt_tokens = registry.histogram('llm_prompt_tokens', 'Prompt length per LLM request',
+                                       buckets=(128, 256, 384, 512, 768, 1024, 1536, 2048))
+conversation_context_tokens = registry.histogram('conversation_context_tokens',
+                                                 'Conversation history tokens per LLM prompt',
+                                                 buckets=(0, 32, 64, 128, 192, 256, 320, 512))
+llm_draft_tokens = registry.counter('llm_draft_tokens_total', 'Draft-model tokens by verification result',
+                                    ('result',))
+llm_speculative_acceptance_rate = registry.gauge('llm_speculative_acceptance_rate',
+                                                 'Share of draft tokens the main model accepted (running)')
+llm_generation_outcomes = registry.counter('llm_generation_outcomes_total',
+                                           'How LLM generations ended (complete, length, stop_sequence, '
+                                           'deadline, cancelled, skipped)', ('outcome',))
+
+# Sentence end (with any closing emoji/quote) for trimming a generation cut off by its deadline
+_SENTENCE_END = re.compile(r"[.!?][^\w\s]*(?=\s|$)")
+
+class DeadlineStoppingCriteria(StoppingCriteria):
+    """
+    Checked after every generation step: stops on an expired or cancelled
+    deadline or once the text ends in a stop sequence, and records why
+    (`reason`), when the first token came out (end of prefill) and how many
+    tokens have been generated. The count comes from the sequence length,
+    since one assisted-decoding step can accept several draft tokens.
+    """
+    TAIL_TOKENS = 8
+
+    def __init__(self, tokenizer, deadline: Optional[Deadline] = None, stop_sequences: List[str] = (),
+                 prompt_tokens: int = 0):
+        self.tokenizer = tokenizer
+        self.deadline = deadline
+        self.stop_sequences = list(stop_sequences)
+        self.prompt_tokens = prompt_tokens
+        self.reason: Optional[str] = None
+        self.first_token_at: Optional[float] = None
+        self.tokens = 0
+
+    def _should_stop(self, input_ids) -> bool:
+        if self.deadline is not None:
+            if self.deadline.cancelled():
+                self.reason = 'cancelled'
+                return True
+            if self.deadline.expired():
+                self.reason = 'deadline'
+                return True
+        if self.stop_sequences and self.tokens > 0:
+            # Only generated tokens - the prompt itself ends in "RESPONSE:"
+            tail = self.tokenizer.decode(input_ids[0, -min(self.tokens, self.TAIL_TOKENS):])
+            if any(stop in tail for stop in self.stop_sequences):
+                self.reason = 'stop_sequence'
+                return True
+        return False
+
+    def __call__(self, input_ids, scores, **kwargs):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.tokens = input_ids.shape[1] - self.prompt_tokens
+        stop = self._should_stop(input_ids)
+        return torch.full((input_ids.shape[0],), stop, dtype=torch.bool, device=input_ids.device)
 
 class FalconEcommerceLLM:
-    def __init__(self):
+    def __init__(self, load_model: bool = True):
         self.config = ChatAgentConfig()
         self.logger = logging.getLogger(__name__)
         self.model = None
         self.tokenizer = None
         self.pipeline = None
+        # Optional draft model for speculative decoding
+        self.draft_model = None
+        self.draft_tokenizer = None
+        self.draft_shares_vocab = False
+        self.speculative: Optional[AssistedDecodingMonitor] = None
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        # Prefill / decode speed learned from past generations, for sizing max_new_tokens
+        self.throughput = ThroughputTracker()
         
         # E-commerce knowledge base
         self.ecommerce_knowledge = {
@@ -47,7 +123,10 @@ class FalconEcommerceLLM:
             }
         }
         
-        self._initialize_model()
+        # load_model=False gives just prompts and rule-based answers (the web
+        # process when generation runs in LLM worker processes)
+        if load_model:
+            self._initialize_model()
     
     def _initialize_model(self):
         """Initialize the Falcon 7B e-commerce model"""
@@ -120,6 +199,9 @@ class FalconEcommerceLLM:
             
             self.logger.info(f"✅ Falcon 7B model loaded successfully on {self.device}")
             
+            if self.config.SPECULATIVE_DECODING:
+                self._initialize_draft_model()
+            
         except Exception as e:
             self.logger.error(f"❌ Failed to load Falcon 7B model: {e}")
             self.logger.info("🔄 Falling back to rule-based responses")
@@ -127,13 +209,55 @@ class FalconEcommerceLLM:
             self.tokenizer = None
             self.pipeline = None
     
-    def generate_response(self, user_query: str, context: Dict[str, Any] = None) -> str:
+    def _initialize_draft_model(self):
+        """Load the small draft model for assisted generation (plain generation if it fails)"""
+        draft_name = self.config.LLM_DRAFT_MODEL
+        try:
+            self.logger.info(f"🤖 Loading draft model for speculative decoding: {draft_name}")
+            self.draft_tokenizer = AutoTokenizer.from_pretrained(draft_name, trust_remote_code=True)
+            self.draft_model = AutoModelForCausalLM.from_pretrained(
+                draft_name,
+                trust_remote_code=True,
+                torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
+                low_cpu_mem_usage=True
+            ).to(self.model.device).eval()
+            self.draft_model.generation_config.num_assistant_tokens = self.config.LLM_DRAFT_TOKENS
+            # Same vocabulary: token IDs are passed straight through; otherwise
+            # generate() re-tokenizes the draft's text (universal assisted decoding)
+            self.draft_shares_vocab = self.draft_tokenizer.get_vocab() == self.tokenizer.get_vocab()
+            # One short assisted call up front: a transformers release without
+            # these generate() arguments would otherwise fail every request
+            self.pipeline("Hello", max_new_tokens=2, pad_token_id=self.tokenizer.eos_token_id,
+                          **self._assisted_kwargs())
+            self.speculative = AssistedDecodingMonitor(self.model, self.draft_model)
+            self.logger.info(f"✅ Speculative decoding on ({draft_name}, {self.config.LLM_DRAFT_TOKENS} draft tokens, "
+                             f"{'shared' if self.draft_shares_vocab else 'translated'} vocabulary)")
+        except Exception as e:
+            self.logger.warning(f"⚠️ Draft model unavailable, using plain generation: {e}")
+            self.draft_model = None
+            self.draft_tokenizer = None
+            self.speculative = None
+    
+    def _assisted_kwargs(self) -> Dict[str, Any]:
+        """Extra generate() arguments for speculative decoding ({} when it is off)"""
+        if self.draft_model is None:
+            return {}
+        kwargs = {'assistant_model': self.draft_model}
+        if not self.draft_shares_vocab:
+            kwargs.update(tokenizer=self.tokenizer, assistant_tokenizer=self.draft_tokenizer)
+        return kwargs
+    
+    def generate_response(self, user_query: str, context: Dict[str, Any] = None,
+                          deadline: Optional[Deadline] = None) -> str:
         """
         Generate response using Falcon 7B model with e-commerce context
         
         Args:
             user_query (str): User's question
             context (Dict): Additional context (products, user info, etc.)
+            deadline (Deadline): When the answer is due; generation is sized to
+                fit, stops when it passes or the client goes away, and the
+                rule-based answer is used when there is no time left
             
         Returns:
             str: Generated response
@@ -145,20 +269,57 @@ class FalconEcommerceLLM:
             
             # Build prompt with e-commerce context
             prompt = self._build_ecommerce_prompt(user_query, context)
+            prompt_tokens = self._count_tokens(prompt)
+            llm_prompt_tokens.observe(prompt_tokens)
+            
+            # Only ask for as many tokens as the remaining time allows
+            max_new_tokens = self.config.LLM_MAX_NEW_TOKENS
+            if deadline is not None:
+                max_new_tokens = self.throughput.token_budget(
+                    deadline.remaining() - self.config.LLM_DEADLINE_MARGIN_SECONDS, prompt_tokens, max_new_tokens
+                )
+                if max_new_tokens < self.config.LLM_MIN_NEW_TOKENS or deadline.cancelled():
+                    llm_generation_outcomes.inc('skipped')
+                    self.logger.info("⏱️ No time left for generation (%d tokens fit), using fallback", max_new_tokens)
+                    return self._fallback_response(user_query, context)
+            criteria = DeadlineStoppingCriteria(self.tokenizer, deadline, self.config.LLM_STOP_SEQUENCES,
+                                                prompt_tokens=prompt_tokens)
             
             # Generate response
-            response = self.pipeline(
-                prompt,
-                max_new_tokens=256,
-                do_sample=True,
-                temperature=0.7,
-                top_p=0.9,
-                pad_token_id=self.tokenizer.eos_token_id
-            )
+            started = time.perf_counter()
+            with (self.speculative.measure() if self.speculative else nullcontext()) as speculation:
+                response = self.pipeline(
+                    prompt,
+                    max_new_tokens=max_new_tokens,
+                    do_sample=True,
+                    temperature=0.7,
+                    top_p=0.9,
+                    pad_token_id=self.tokenizer.eos_token_id,
+                    stopping_criteria=StoppingCriteriaList([criteria]),
+                    **self._assisted_kwargs()
+                )
+            finished = time.perf_counter()
             
             # Extract and clean response
             generated_text = response[0]['generated_text']
-            clean_response = self._extract_response(generated_text, prompt)
+            clean_response = self._cut_at_stop_sequence(self._extract_response(generated_text, prompt))
+            new_tokens = self._record_generation(criteria.tokens, finished - started)
+            if speculation is not None:
+                self._record_speculation(speculation, new_tokens, finished - started)
+            if criteria.first_token_at is not None:
+                self.throughput.observe(prompt_tokens, criteria.first_token_at - started,
+                                        new_tokens - 1, finished - criteria.first_token_at)
+            outcome = criteria.reason or ('length' if new_tokens >= max_new_tokens else 'complete')
+            llm_generation_outcomes.inc(outcome)
+            
+            if outcome == 'cancelled':
+                self.logger.info("🔌 Client went away after %d tokens, generation stopped", new_tokens)
+                return self._fallback_response(user_query, context)
+            if outcome == 'deadline':
+                # Keep whole sentences only; nothing whole means nothing usable
+                clean_response = self._complete_sentences(clean_response)
+                if not clean_response:
+                    return self._fallback_response(user_query, context)
             
             # Post-process for e-commerce context
             final_response = self._post_process_response(clean_response, user_query, context)
@@ -169,6 +330,42 @@ class FalconEcommerceLLM:
             self.logger.error(f"❌ Error generating LLM response: {e}")
             return self._fallback_response(user_query, context)
     
+    def _record_generation(self, new_tokens: int, elapsed: float) -> int:
+        """
+        Feed token count and tokens/sec of one generation to the metrics
+        registry - the count the stopping criteria read off the output IDs,
+        so nothing is re-tokenized
+        """
+        new_tokens = max(new_tokens, 0)
+        llm_generated_tokens.inc(amount=new_tokens)
+        llm_generation_seconds.observe(elapsed)
+        if elapsed > 0:
+            llm_tokens_per_second.set(round(new_tokens / elapsed, 2))
+        return new_tokens
+    
+    def _record_speculation(self, speculation, new_tokens: int, elapsed: float):
+        """Draft tokens accepted / rejected by one assisted generation"""
+        figures = self.speculative.record(speculation, new_tokens, elapsed)
+        llm_draft_tokens.inc('accepted', amount=figures['accepted'])
+        llm_draft_tokens.inc('rejected', amount=figures['drafted'] - figures['accepted'])
+        rate = self.speculative.acceptance_rate()
+        if rate is not None:
+            llm_speculative_acceptance_rate.set(round(rate, 3))
+        self.logger.debug("🎯 Speculative decoding: %s", figures)
+    
+    def _cut_at_stop_sequence(self, response: str) -> str:
+        """Drop a stop sequence the model produced and anything after it"""
+        for stop in self.config.LLM_STOP_SEQUENCES:
+            position = response.find(stop.strip())
+            if position > 0:
+                response = response[:position].rstrip()
+        return response
+    
+    def _complete_sentences(self, response: str) -> str:
+        """`response` up to its last complete sentence ('' if there is none)"""
+        ends = list(_SENTENCE_END.finditer(response))
+        return response[:ends[-1].end()].rstrip() if ends else ''
+    
     def _build_ecommerce_prompt(self, user_query: str, context: Dict[str, Any] = None) -> str:
         """Build a comprehensive e-commerce prompt"""
         
@@ -197,18 +394,45 @@ STORE INFO:
 - Customer support: 9 AM - 9 PM IST
 - Payment methods: Cards, UPI, Net Banking, COD"""
 
-        # Add product context if available
+        # Add product context if available - keyword matches first, then the
+        # closest products from the vector index
         product_context = ""
-        if context and context.get('products'):
-            products = context['products'][:3]  # Limit to 3 products
+        products = self._prompt_products(context)
+        if products:
             product_context = "\n\nAVAILABLE PRODUCTS:\n"
             for i, product in enumerate(products, 1):
                 product_context += f"{i}. {product.get('product_name', 'Unknown')} - ₹{product.get('price', 0)} ({product.get('color', 'N/A')} for {product.get('gender', 'All')})\n"
         
+        # Add conversation history, compacted to the token budget
+        conversation_context = ""
+        if context and context.get('conversation') is not None:
+            block, tokens = context['conversation'].render(self.config.CONVERSATION_TOKEN_BUDGET, self._count_tokens)
+            conversation_context_tokens.observe(tokens)
+            if block:
+                conversation_context = "\n\n" + block
+        
         # Add user query context
         query_context = f"\n\nCUSTOMER QUERY: {user_query}\n\nRESPONSE:"
         
-        return system_prompt + product_context + query_context
+        return system_prompt + product_context + conversation_context + query_context
+    
+    def _count_tokens(self, text: str) -> int:
+        """Prompt tokens as the model sees them (estimated when no tokenizer is loaded)"""
+        if self.tokenizer is None:
+            return estimate_tokens(text)
+        return len(self.tokenizer.encode(text))
+    
+    def _prompt_products(self, context: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Up to 3 keyword-search hits plus retrieved products not already listed"""
+        if not context:
+            return []
+        products = list(context.get('products') or [])[:3]
+        listed = {product.get('product_id') for product in products}
+        for product in context.get('retrieved_products') or []:
+            if product.get('product_id') not in listed:
+                products.append(product)
+                listed.add(product.get('product_id'))
+        return products[:3 + self.config.PRODUCT_INDEX_TOP_K]
     
     def _extract_response(self, generated_text: str, prompt: str) -> str:
         """Extract the actual response from generated text"""
@@ -314,5 +538,8 @@ STORE INFO:
             "model_name": "SHJ622/falcon_7b_ecommerce_ai_chatbot_n100",
             "device": self.device,
             "torch_available": torch.cuda.is_available(),
-            "fallback_mode": not self.is_model_loaded()
+            "fallback_mode": not self.is_model_loaded(),
+            "throughput": self.throughput.get_stats(),
+            "speculative_decoding": dict(self.speculative.get_stats(), draft_model=self.config.LLM_DRAFT_MODEL)
+                                    if self.speculative else None
         }
\ No newline at end of file
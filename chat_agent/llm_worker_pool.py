@@ -0,0 +1,434 @@
+"""
+Out-of-process LLM workers for the chat agent
+The web process keeps parsing, search and rule-based answers; generation runs
+in separate worker processes that each load the model once. Requests wait in
+a bounded priority queue (support answers before product chat before small
+talk). When the queue is full, or a request could not be served before its
+deadline, it is shed at once and the caller answers with the rule-based
+fallback instead of waiting.
+
+One pool per host: each web process that started a pool would load another
+LLM_WORKERS copies of the model, so the first process to take the host lock
+(`claim_host_pool`) owns the pool and the others answer rule-based only.
+Run the chat agent as a single web process to give every request the model.
+
+Workers are plain subprocesses running this file; they connect back over a
+local authenticated socket (multiprocessing.connection) and exchange pickled
+dicts:
+    worker -> {'ready': True, 'model_loaded': bool, 'info': {...}}
+    parent -> {'id', 'query', 'context', 'seconds'} | {'cancel': id} | None (exit)
+    worker -> {'id', 'response', 'throughput'}
+"""
+import heapq
+import importlib
+import itertools
+import logging
+import os
+import queue
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from typing import Any, Dict, List, Optional
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows - the single-pool guard is skipped
+    FCNTL_AVAILABLE = False
+
+from generation_budget import Deadline
+from metrics import registry
+
+# Lower is served first
+PRIORITY_SUPPORT = 0
+PRIORITY_PRODUCT = 1
+PRIORITY_CHAT = 2
+
+WORKER_SCRIPT = os.path.abspath(__file__)
+
+llm_pool_requests = registry.counter('llm_pool_requests_total',
+                                     'LLM pool requests by outcome (completed, shed, expired, timeout, error)',
+                                     ('outcome',))
+llm_pool_queue_wait = registry.histogram('llm_pool_queue_wait_seconds', 'Time LLM requests spent queued',
+                                         buckets=(0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 20))
+llm_pool_queue_depth = registry.gauge('llm_pool_queue_depth', 'LLM requests waiting for a worker')
+llm_pool_busy_workers = registry.gauge('llm_pool_busy_workers', 'LLM workers generating right now')
+
+
+HOST_LOCK_PATH = os.path.join(tempfile.gettempdir(), 'fashionpulse-llm-pool.lock')
+_host_lock_file = None
+
+
+def claim_host_pool(path: str = HOST_LOCK_PATH) -> bool:
+    """
+    True if this process may start the LLM worker pool - it now holds the
+    host lock until it exits. False when another process on this host
+    already does.
+    """
+    global _host_lock_file
+    if _host_lock_file is not None or not FCNTL_AVAILABLE:
+        return True
+    lock_file = open(path, 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _host_lock_file = lock_file
+    return True
+
+
+def request_priority(context: Optional[Dict[str, Any]]) -> int:
+    """Support questions first, product searches next, everything else last"""
+    context = context or {}
+    if context.get('intent') == 'support':
+        return PRIORITY_SUPPORT
+    if context.get('query_type') == 'product_search':
+        return PRIORITY_PRODUCT
+    return PRIORITY_CHAT
+
+
+class _Job:
+    __slots__ = ('id', 'priority', 'query', 'context', 'deadline', 'enqueued_at', 'done', 'response')
+
+    def __init__(self, job_id: int, priority: int, query: str, context: Dict[str, Any], deadline: Deadline):
+        self.id = job_id
+        self.priority = priority
+        self.query = query
+        self.context = context
+        self.deadline = deadline
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.response: Optional[str] = None
+
+
+class LLMWorkerPool:
+    """
+    `submit(query, context, deadline, priority)` blocks until a worker has
+    answered and returns the response, or None when the request was shed,
+    expired or failed - the caller then falls back. One slot thread per
+    worker hands it one job at a time and restarts it if it dies.
+    """
+
+    def __init__(self, workers: int = 1, queue_size: int = 8,
+                 factory: str = 'llm_integration:FalconEcommerceLLM', grace_seconds: float = 2.0):
+        self.logger = logging.getLogger(__name__)
+        self.workers = workers
+        self.queue_size = queue_size
+        self.factory = factory
+        self.grace_seconds = grace_seconds
+        self._authkey = secrets.token_bytes(32)
+        self._heap: List[tuple] = []
+        self._cond = threading.Condition()
+        self._ids = itertools.count(1)
+        self._stopping = threading.Event()
+        self._processes: Dict[int, subprocess.Popen] = {}
+        self._connections: Dict[int, Any] = {}
+        self._ready = 0
+        self._busy = 0
+        self._service_seconds: Optional[float] = None
+        self.model_loaded = False
+        self.model_info: Dict[str, Any] = {}
+        self.throughput: Dict[str, Any] = {}
+        self.stats = {'completed': 0, 'shed': 0, 'expired': 0, 'timeout': 0, 'error': 0, 'restarts': 0}
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        for slot in range(self.workers):
+            threading.Thread(target=self._serve, args=(slot,), name=f'llm-slot-{slot}', daemon=True).start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping.set()
+        with self._cond:
+            shed, self._heap = self._heap, []
+            self._cond.notify_all()
+        for _, _, job in shed:
+            self._finish(job, None, 'shed')
+        for slot, conn in list(self._connections.items()):
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        for process in list(self._processes.values()):
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def _launch(self, slot: int):
+        """Start a worker process and wait for it to connect back (None if it exits first)"""
+        listener = Listener(('127.0.0.1', 0), authkey=self._authkey)
+        host, port = listener.address
+        process = subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT, '--address', f'{host}:{port}', '--factory', self.factory],
+            env=dict(os.environ, LLM_WORKER_AUTHKEY=self._authkey.hex())
+        )
+        self._processes[slot] = process
+        accepted = threading.Event()
+
+        def unblock_accept():
+            process.wait()
+            if not accepted.is_set():
+                try:
+                    Client(listener.address, authkey=self._authkey).close()
+                except Exception:
+                    pass
+
+        threading.Thread(target=unblock_accept, daemon=True).start()
+        try:
+            conn = listener.accept()
+        finally:
+            accepted.set()
+            listener.close()
+        if process.poll() is not None:
+            conn.close()
+            return process, None
+        return process, conn
+
+    def _serve(self, slot: int):
+        backoff = 1.0
+        while not self._stopping.is_set():
+            process, conn = self._launch(slot)
+            if conn is None:
+                self.logger.error(f"❌ LLM worker {slot} exited before connecting (code {process.returncode})")
+                self._stopping.wait(backoff)
+                backoff = min(backoff * 2, 60)
+                continue
+            counted = False
+            try:
+                ready = conn.recv()  # sent once the model has loaded
+                self._connections[slot] = conn
+                with self._cond:
+                    self._ready += 1
+                    counted = True
+                    self.model_loaded = self.model_loaded or bool(ready.get('model_loaded'))
+                    self.model_info = ready.get('info') or self.model_info
+                self.logger.info(f"🧠 LLM worker {slot} ready (pid {process.pid}, model loaded: {ready.get('model_loaded')})")
+                backoff = 1.0
+                self._run_jobs(conn)
+            except (EOFError, OSError) as e:
+                self.logger.error(f"❌ LLM worker {slot} died: {e!r}")
+            finally:
+                self._connections.pop(slot, None)
+                conn.close()
+                if process.poll() is None:
+                    process.kill()
+                if counted:
+                    with self._cond:
+                        self._ready -= 1
+            if not self._stopping.is_set():
+                self.stats['restarts'] += 1
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    def _next_job(self) -> Optional[_Job]:
+        with self._cond:
+            while not self._heap and not self._stopping.is_set():
+                self._cond.wait()
+            if self._stopping.is_set():
+                return None
+            _, _, job = heapq.heappop(self._heap)
+            llm_pool_queue_depth.set(len(self._heap))
+            return job
+
+    def _run_jobs(self, conn):
+        """Hand this worker one job at a time until it dies or the pool stops"""
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            llm_pool_queue_wait.observe(time.monotonic() - job.enqueued_at)
+            if job.deadline.cancelled() or job.deadline.remaining() <= 0:
+                self._finish(job, None, 'expired')
+                continue
+            started = time.monotonic()
+            with self._cond:
+                self._busy += 1
+                llm_pool_busy_workers.set(self._busy)
+            try:
+                conn.send({'id': job.id, 'query': job.query, 'context': job.context,
+                           'seconds': job.deadline.remaining()})
+                self._await_reply(conn, job)
+            except (EOFError, OSError):
+                self._finish(job, None, 'error')
+                raise
+            finally:
+                with self._cond:
+                    self._busy -= 1
+                    llm_pool_busy_workers.set(self._busy)
+                    elapsed = time.monotonic() - started
+                    self._service_seconds = elapsed if self._service_seconds is None \
+                        else 0.7 * self._service_seconds + 0.3 * elapsed
+
+    def _await_reply(self, conn, job: _Job):
+        """
+        Wait for the worker's answer, forwarding a cancellation. A caller whose
+        deadline is long past is released with no answer, but the worker is
+        still waited for so it never holds two jobs.
+        """
+        cancel_sent = False
+        while not conn.poll(0.1):
+            if not cancel_sent and job.deadline.cancelled():
+                conn.send({'cancel': job.id})
+                cancel_sent = True
+            if not job.done.is_set() and job.deadline.remaining() <= 0 \
+                    and time.monotonic() > job.deadline.expires_at + self.grace_seconds:
+                self._finish(job, None, 'timeout')
+        reply = conn.recv()
+        if reply.get('throughput'):
+            self.throughput = reply['throughput']
+        if 'error' in reply:
+            self.logger.error(f"❌ LLM worker failed: {reply['error']}")
+            self._finish(job, None, 'error')
+        else:
+            self._finish(job, reply.get('response'), 'completed')
+
+    def _finish(self, job: _Job, response: Optional[str], outcome: str):
+        with self._cond:
+            if job.done.is_set():
+                return
+            job.response = response
+            self.stats[outcome] += 1
+            job.done.set()
+        llm_pool_requests.inc(outcome)
+
+    def _expected_wait(self, priority: int) -> float:
+        """Seconds until a new job of `priority` would start (lock held)"""
+        if self._service_seconds is None or not self._ready:
+            return 0.0
+        ahead = sum(1 for queued_priority, _, _ in self._heap if queued_priority <= priority)
+        return (ahead + self._busy) / self._ready * self._service_seconds
+
+    def submit(self, query: str, context: Dict[str, Any], deadline: Deadline,
+               priority: int = PRIORITY_CHAT) -> Optional[str]:
+        job = _Job(next(self._ids), priority, query, context, deadline)
+        with self._cond:
+            if self._stopping.is_set() or not self._ready:
+                shed = job
+            elif self._expected_wait(priority) >= deadline.remaining():
+                shed = job  # would not even start in time
+            elif len(self._heap) >= self.queue_size:
+                # Full: the new job displaces the least important queued one, if any is less important
+                worst = max(self._heap)
+                if (priority, job.id) < worst[:2]:
+                    self._heap.remove(worst)
+                    heapq.heapify(self._heap)
+                    heapq.heappush(self._heap, (priority, job.id, job))
+                    shed = worst[2]
+                else:
+                    shed = job
+            else:
+                heapq.heappush(self._heap, (priority, job.id, job))
+                shed = None
+            llm_pool_queue_depth.set(len(self._heap))
+            self._cond.notify()
+        if shed is not None:
+            self._finish(shed, None, 'shed')
+        if not job.done.wait(deadline.remaining() + self.grace_seconds + 0.5):
+            self._finish(job, None, 'timeout')
+        return job.response
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return dict(self.stats, workers=self.workers, ready=self._ready, busy=self._busy,
+                        queued=len(self._heap), queue_size=self.queue_size,
+                        service_seconds=round(self._service_seconds, 3) if self._service_seconds else None,
+                        throughput=self.throughput)
+
+
+class PooledLLM:
+    """
+    Stands in for FalconEcommerceLLM in the web process: generation goes to
+    the worker pool, prompts are built there; `local` (an LLM created with
+    load_model=False) supplies the rule-based fallbacks
+    """
+
+    def __init__(self, pool: LLMWorkerPool, local, default_deadline_seconds: float = 20.0):
+        self.pool = pool
+        self.local = local
+        self.default_deadline_seconds = default_deadline_seconds
+
+    def is_model_loaded(self) -> bool:
+        return self.pool.model_loaded
+
+    def generate_response(self, user_query: str, context: Dict[str, Any] = None,
+                          deadline: Optional[Deadline] = None) -> str:
+        deadline = deadline or Deadline(self.default_deadline_seconds)
+        response = self.pool.submit(user_query, context or {}, deadline, request_priority(context))
+        if response is None:
+            return self._fallback_response(user_query, context)
+        return response
+
+    def _fallback_response(self, user_query: str, context: Dict[str, Any] = None) -> str:
+        return self.local._fallback_response(user_query, context)
+
+    def get_model_info(self) -> Dict[str, Any]:
+        info = dict(self.pool.model_info or self.local.get_model_info())
+        info.update(model_loaded=self.is_model_loaded(), fallback_mode=not self.is_model_loaded(),
+                    pool=self.pool.get_stats())
+        return info
+
+
+def _load_factory(path: str):
+    module, name = path.split(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def run_worker(address: str, authkey: bytes, factory: str):
+    """Worker process: connect back, load the model once, answer jobs until told to stop"""
+    host, port = address.rsplit(':', 1)
+    conn = Client((host, int(port)), authkey=authkey)
+    llm = _load_factory(factory)()
+    conn.send({'ready': True, 'model_loaded': llm.is_model_loaded(), 'info': llm.get_model_info()})
+
+    jobs: 'queue.Queue[Optional[dict]]' = queue.Queue()
+    cancelled = set()
+
+    def read():
+        # Separate reader so a cancel arrives while generate_response is running
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                message = None
+            if message is None:
+                jobs.put(None)
+                return
+            if 'cancel' in message:
+                cancelled.add(message['cancel'])
+            else:
+                jobs.put(message)
+
+    threading.Thread(target=read, name='llm-worker-reader', daemon=True).start()
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        job_id = job['id']
+        deadline = Deadline(job['seconds'], is_cancelled=lambda: job_id in cancelled, poll_seconds=0.05)
+        try:
+            response = llm.generate_response(job['query'], job['context'], deadline)
+            conn.send({'id': job_id, 'response': response, 'throughput': llm.throughput.get_stats()})
+        except Exception as e:
+            conn.send({'id': job_id, 'error': str(e)})
+        cancelled.discard(job_id)
+    conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="FashionPulse LLM worker")
+    parser.add_argument('--address', required=True, help="host:port of the pool to connect to")
+    parser.add_argument('--factory', default='llm_integration:FalconEcommerceLLM')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s llm-worker[%(process)d] %(levelname)s %(message)s')
+    run_worker(args.address, bytes.fromhex(os.environ['LLM_WORKER_AUTHKEY']), args.factory)
@@ -0,0 +1,331 @@
+"""
+In-process metrics for FashionPulse services
+Counters, gauges and histograms rendered in the Prometheus text format on
+/metrics. Hot-path updates write to a per-thread shard (no lock, no shared
+dict mutation); shards are only summed when the endpoint is scraped.
+"""
+import time
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Request latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Sharded:
+    """
+    Per-thread value shards. Each thread only ever writes its own dict, so
+    updates need no lock; the registry lock is taken once per thread (to
+    register the shard) and on scrape. Shards of finished threads are folded
+    into `_retired` so a thread-per-request server does not grow the list.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: List[Tuple[threading.Thread, dict]] = []
+        self._retired: dict = {}
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                if len(self._shards) >= 64:
+                    self._fold_dead()
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def _fold_dead(self):
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                for key, value in shard.items():
+                    self._retired[key] = self._merge(self._retired.get(key), value)
+        self._shards = alive
+
+    def _collect(self) -> dict:
+        with self._lock:
+            self._fold_dead()
+            totals = {key: self._merge(None, value) for key, value in self._retired.items()}
+            for _, shard in self._shards:
+                # dict.copy is atomic under the GIL - safe while the owner writes
+                for key, value in shard.copy().items():
+                    totals[key] = self._merge(totals.get(key), value)
+        return totals
+
+    def _merge(self, total, value):
+        return (total or 0) + value
+
+
+class Metric(_Sharded):
+    type_name = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__()
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Tuple) -> Tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return labels
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {_escape(self.documentation)}', f'# TYPE {self.name} {self.type_name}']
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> Iterable[str]:
+        for labels, value in sorted(self._collect().items()):
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+
+
+class Counter(Metric):
+    type_name = 'counter'
+
+    def inc(self, *labels, amount: float = 1):
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._collect().get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """
+    inc/dec go to per-thread shards as [epoch, delta] cells (the deltas are
+    added to the base value); `set` stores an absolute base value and starts
+    a new epoch for the key, so deltas recorded before it stop counting
+    without touching other threads' shards; `set_function` makes the gauge
+    read its value at scrape time.
+    """
+    type_name = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._base: dict = {}
+        self._epochs: dict = {}
+        self._function: Optional[Callable[[], object]] = None
+
+    def inc(self, *labels, amount: float = 1):
+        shard = self._shard()
+        key = self._key(labels)
+        epoch = self._epochs.get(key, 0)
+        cell = shard.get(key)
+        if cell is None or cell[0] != epoch:
+            shard[key] = [epoch, amount]
+        else:
+            cell[1] += amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels):
+        key = self._key(labels)
+        with self._lock:
+            self._base[key] = value
+            self._epochs[key] = self._epochs.get(key, 0) + 1
+
+    def _merge(self, total, value):
+        # Only deltas from the newest epoch count
+        if total is None or value[0] > total[0]:
+            return list(value)
+        if value[0] < total[0]:
+            return total
+        return [total[0], total[1] + value[1]]
+
+    def set_function(self, function: Callable[[], object]):
+        """
+        `function()` returns a number, or a {label tuple: number} dict for a
+        labelled gauge. Evaluated only on scrape.
+        """
+        self._function = function
+
+    def _collect(self) -> dict:
+        if self._function is not None:
+            try:
+                result = self._function()
+            except Exception:
+                return {}
+            if isinstance(result, dict):
+                return {tuple(k) if isinstance(k, tuple) else (k,): v for k, v in result.items() if v is not None}
+            return {(): result} if result is not None else {}
+        cells = super()._collect()
+        totals = dict(self._base)
+        for key, (epoch, delta) in cells.items():
+            if epoch == self._epochs.get(key, 0):
+                totals[key] = totals.get(key, 0) + delta
+        return totals
+
+    def value(self, *labels) -> float:
+        return self._collect().get(self._key(labels), 0)
+
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram; each shard holds [bucket counts..., +Inf count, sum] per label set"""
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        shard = self._shard()
+        key = self._key(labels)
+        cells = shard.get(key)
+        if cells is None:
+            cells = shard[key] = [0] * (len(self.buckets) + 2)
+        # Prometheus buckets are inclusive upper bounds (le)
+        cells[bisect_left(self.buckets, value)] += 1
+        cells[-1] += value
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def _merge(self, total, value):
+        if total is None:
+            return list(value)
+        return [a + b for a, b in zip(total, value)]
+
+    def _samples(self) -> Iterable[str]:
+        for labels, cells in sorted(self._collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), cells[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}'
+            suffix = _format_labels(self.labelnames, labels)
+            yield f'{self.name}_sum{suffix} {_format_value(cells[-1])}'
+            yield f'{self.name}_count{suffix} {cumulative}'
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Named metrics for one process, rendered together on /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Modules re-imported under another name (script vs package) share the metric
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with another type/labels")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    # ------------------------------------------------------------------
+    # Flask integration
+    # ------------------------------------------------------------------
+
+    def init_app(self, app, path: str = '/metrics', prefix: str = 'http'):
+        """
+        Count and time every request by route template, method and status,
+        and serve the registry on `path`. Routes are labelled by their URL
+        rule (/api/products/<product_id>), never the raw path, so label
+        cardinality stays bounded.
+        """
+        from flask import Response, g, request
+
+        requests_total = self.counter(f'{prefix}_requests_total', 'HTTP requests handled',
+                                      ('route', 'method', 'status'))
+        latency = self.histogram(f'{prefix}_request_duration_seconds', 'HTTP request latency',
+                                 ('route', 'method'))
+        in_flight = self.gauge(f'{prefix}_requests_in_flight', 'HTTP requests being handled')
+
+        @app.before_request
+        def _start_request_timer():
+            g._metrics_started = time.perf_counter()
+            in_flight.inc()
+
+        @app.after_request
+        def _record_request(response):
+            started = g.pop('_metrics_started', None)
+            if started is not None:
+                in_flight.dec()
+                rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+                latency.observe(time.perf_counter() - started, rule, request.method)
+                requests_total.inc(rule, request.method, str(response.status_code))
+            return response
+
+        @app.teardown_request
+        def _release_in_flight(exc=None):
+            # after_request did not run (unhandled error) - keep the gauge honest
+            if g.pop('_metrics_started', None) is not None:
+                in_flight.dec()
+
+        def metrics_endpoint():
+            return Response(self.render(), content_type=CONTENT_TYPE)
+
+        app.add_url_rule(path, 'prometheus_metrics', metrics_endpoint, methods=['GET'])
+
+
+# Process-wide registry
+registry = MetricsRegistry()
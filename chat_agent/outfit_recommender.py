@@ -16,7 +16,7 @@ class OutfitRecommender:
     def get_event_outfit_suggestions(self, gender: str, event_type: str, event_date: str = None) -> Dict[str, Any]:
         """Get outfit suggestions for specific event"""
         try:
-            self.logger.info(f"👗 Getting outfit suggestions for {gender} {event_type}")
+            self.logger.debug("👗 Getting outfit suggestions for %s %s", gender, event_type)
             
             # Get recommended categories for this event
             recommended_categories = self.event_manager.get_event_categories(gender, event_type)
@@ -43,7 +43,7 @@ class OutfitRecommender:
                 if len(unique_products) >= 8:  # Limit to 8 products total
                     break
             
-            self.logger.info(f"✅ Found {len(unique_products)} outfit suggestions")
+            self.logger.debug("✅ Found %s outfit suggestions", len(unique_products))
             
             return {
                 'success': True,
@@ -0,0 +1,90 @@
+"""
+In-memory policy store for FashionPulse support answers
+Every policy document is loaded once at startup and served from memory; a
+background thread reloads them when the policy version moves (cheap probe
+every `check_seconds`) or at the latest every `ttl` seconds
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class PolicyStore:
+    """
+    `get(policy_type)` never touches the database. `loader` returns
+    {policy_type: content}; `version_probe` returns a number that changes
+    whenever the policies do (optional - without it only the TTL applies).
+    A failed reload keeps serving the last good documents.
+    """
+
+    def __init__(self,
+                 loader: Callable[[], Dict[str, str]],
+                 version_probe: Optional[Callable[[], int]] = None,
+                 check_seconds: float = 30.0,
+                 ttl: float = 600.0):
+        self.logger = logging.getLogger(__name__)
+        self.loader = loader
+        self.version_probe = version_probe
+        self.check_seconds = check_seconds
+        self.ttl = ttl
+        self._policies: Dict[str, str] = {}
+        self._version: Optional[int] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {'loads': 0, 'load_errors': 0, 'lookups': 0, 'misses': 0}
+
+    def start(self):
+        """Load now and keep the documents fresh in the background"""
+        self.refresh(force=True)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='policy-store', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.check_seconds):
+            self.refresh()
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload when forced, the TTL has passed or the version changed. True if reloaded"""
+        with self._lock:
+            try:
+                version = self.version_probe() if self.version_probe else None
+            except Exception as e:
+                # Unknown version - the TTL still bounds how stale the copy gets
+                self.stats['load_errors'] += 1
+                self.logger.warning(f"⚠️ Policy version probe failed: {e}")
+                version = self._version
+            expired = time.time() - self._loaded_at >= self.ttl
+            if not (force or expired or version != self._version):
+                return False
+            try:
+                policies = self.loader()
+            except Exception as e:
+                self.stats['load_errors'] += 1
+                self.logger.warning(f"⚠️ Policy reload failed, serving the previous copy: {e}")
+                return False
+            # Swap the whole dict - readers never see a half-loaded store
+            self._policies = dict(policies)
+            self._version = version
+            self._loaded_at = time.time()
+            self.stats['loads'] += 1
+            self.logger.info("📜 Loaded %d policy documents (version %s)", len(self._policies), version)
+            return True
+
+    def get(self, policy_type: str) -> Optional[str]:
+        self.stats['lookups'] += 1
+        content = self._policies.get(policy_type)
+        if content is None:
+            self.stats['misses'] += 1
+        return content
+
+    def get_stats(self) -> Dict[str, object]:
+        return dict(self.stats, policies=sorted(self._policies), version=self._version,
+                    age_seconds=round(time.time() - self._loaded_at, 1) if self._loaded_at else None)
@@ -0,0 +1,324 @@
+"""
+Local vector index over the product catalog for retrieval-augmented prompts
+Products are embedded as signed-hash TF-IDF vectors of their name,
+description, category and color (a fixed-width random projection of the
+sparse TF-IDF vector), L2-normalized and stored as rows of a NumPy matrix.
+Queries are expanded with a small fashion vocabulary ("beach" -> linen,
+cotton, shorts...) so vague requests still land near real products.
+Search is an exact matrix-vector product, or IVF (k-means lists, a few
+probed per query) once the catalog is large enough to need it.
+"""
+import math
+import re
+import threading
+import zlib
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Fields embedded per product and how much each counts
+FIELD_WEIGHTS = (('product_name', 2.0), ('product_category', 2.0), ('color', 1.5), ('product_description', 1.0))
+
+# Columns kept per product for the prompt
+PAYLOAD_COLUMNS = ('product_id', 'product_name', 'product_category', 'color', 'gender', 'price')
+
+STOPWORDS = frozenset(
+    'a an the and or of for to in on with my me i im we you your is are am be it this that '
+    'some something any show find want need looking like get give please can could would'.split()
+)
+
+# Occasion / mood words shoppers use that rarely appear in product text
+QUERY_EXPANSIONS = {
+    'beach': 'summer linen cotton shorts sundress floral resort',
+    'breezy': 'linen cotton lightweight breathable flowy',
+    'summer': 'cotton linen lightweight floral',
+    'winter': 'hoodie sweatshirt jacket wool warm',
+    'cold': 'hoodie sweatshirt jacket warm',
+    'sangeet': 'ethnic lehenga kurta kurti saree festive embroidered',
+    'mehendi': 'ethnic kurti kurta saree festive green yellow',
+    'wedding': 'ethnic saree lehenga kurta festive embroidered',
+    'diwali': 'ethnic festive kurta kurti saree',
+    'festive': 'ethnic embroidered kurta saree',
+    'office': 'formal shirt trousers blazer',
+    'interview': 'formal shirt trousers blazer',
+    'gym': 'sports activewear track joggers',
+    'party': 'party dress sequin bodycon evening',
+    'date': 'dress party evening',
+    'college': 'casual jeans tshirt hoodie',
+    'travel': 'casual comfortable cotton jeans',
+}
+
+
+def tokenize(text: Any) -> List[str]:
+    return [word for word in _WORD.findall(str(text or '').lower()) if word not in STOPWORDS]
+
+
+def expand_query(text: str) -> List[str]:
+    words = tokenize(text)
+    expanded = list(words)
+    for word in words:
+        expanded.extend(QUERY_EXPANSIONS.get(word, '').split())
+    return expanded
+
+
+# Buckets per term: a collision then only shares a fraction of two terms' weight
+HASHES_PER_TERM = 4
+
+
+def _signed_buckets(term: str, dim: int):
+    buckets = []
+    for seed in range(HASHES_PER_TERM):
+        digest = zlib.crc32(term.encode('utf-8'), seed)
+        buckets.append((digest % dim, 1.0 if digest & 0x80000000 else -1.0))
+    return buckets
+
+
+def content_hash(row: Dict[str, Any]) -> int:
+    """Hash of everything the index embeds or returns for a product"""
+    fields = [field for field, _ in FIELD_WEIGHTS] + list(PAYLOAD_COLUMNS)
+    return zlib.crc32(repr([row.get(field) for field in fields]).encode('utf-8'))
+
+
+class ProductVectorIndex:
+    """
+    `add(rows)` / `remove(ids)` / `sync(rows)` keep the index current
+    without a rebuild; `search(query, k)` returns the k most similar
+    products as payload dicts with a 'score'.
+
+    Document frequencies are updated on every add, but vectors already in
+    the index keep the IDF they were embedded with - `build` re-embeds
+    everything. Removed products leave dead rows behind; `sync` rebuilds
+    once they exceed `compact_ratio` of the matrix. `approximate=None`
+    switches to IVF search once there are `ivf_threshold` products.
+    """
+
+    def __init__(self, dim: int = 512, ivf_threshold: int = 20000, nprobe: int = 8,
+                 compact_ratio: float = 0.25):
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("numpy is required for the product vector index")
+        self.dim = dim
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.compact_ratio = compact_ratio
+        self._lock = threading.RLock()
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._size = 0
+        self._alive = np.zeros(0, dtype=bool)
+        self._rows: Dict[Any, int] = {}
+        self._payloads: List[Dict[str, Any]] = []
+        # Content hash per product, so sync can tell an edited product from an unchanged one
+        self._hashes: Dict[Any, int] = {}
+        self._df: Dict[str, int] = {}
+        self._documents = 0
+        self._buckets: Dict[str, list] = {}
+        self._removed = 0
+        # IVF state: centroids (nlist x dim) and the row numbers in each list
+        self._centroids = None
+        self._lists: List[List[int]] = []
+        self._trained_size = 0
+
+    # ------------------------------------------------------------------
+    # Embedding
+    # ------------------------------------------------------------------
+
+    def _terms(self, row: Dict[str, Any]) -> Dict[str, float]:
+        terms: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS:
+            for word in tokenize(row.get(field)):
+                terms[word] = terms.get(word, 0.0) + weight
+        return terms
+
+    def _idf(self, term: str) -> float:
+        return math.log((1 + self._documents) / (1 + self._df.get(term, 0))) + 1.0
+
+    def _embed(self, terms: Dict[str, float]):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for term, count in terms.items():
+            buckets = self._buckets.get(term)
+            if buckets is None:
+                buckets = self._buckets[term] = _signed_buckets(term, self.dim)
+            weight = (1.0 + math.log(count)) * self._idf(term)
+            for bucket, sign in buckets:
+                vector[bucket] += sign * weight
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def embed_query(self, text: str):
+        terms: Dict[str, float] = {}
+        for word in expand_query(text):
+            terms[word] = terms.get(word, 0.0) + 1.0
+        return self._embed(terms)
+
+    # ------------------------------------------------------------------
+    # Building / updating
+    # ------------------------------------------------------------------
+
+    def build(self, rows: Iterable[Dict[str, Any]]):
+        """Replace the index - document frequencies first, so every vector gets the final IDF"""
+        rows = [row for row in rows if row.get('product_id') is not None]
+        with self._lock:
+            self._df, self._documents = {}, 0
+            self._size, self._rows, self._payloads, self._removed = 0, {}, [], 0
+            self._hashes = {}
+            self._matrix = np.zeros((max(len(rows), 1), self.dim), dtype=np.float32)
+            self._alive = np.zeros(max(len(rows), 1), dtype=bool)
+            self._centroids, self._lists, self._trained_size = None, [], 0
+            term_rows = [self._terms(row) for row in rows]
+            for terms in term_rows:
+                self._count_terms(terms)
+            for row, terms in zip(rows, term_rows):
+                self._append(row, terms)
+
+    def _count_terms(self, terms: Dict[str, float]):
+        self._documents += 1
+        for term in terms:
+            self._df[term] = self._df.get(term, 0) + 1
+
+    def _append(self, row: Dict[str, Any], terms: Dict[str, float]):
+        if self._size == len(self._matrix):
+            grown = max(len(self._matrix) * 2, 64)
+            matrix = np.zeros((grown, self.dim), dtype=np.float32)
+            matrix[:self._size] = self._matrix[:self._size]
+            alive = np.zeros(grown, dtype=bool)
+            alive[:self._size] = self._alive[:self._size]
+            self._matrix, self._alive = matrix, alive
+        position = self._size
+        self._matrix[position] = self._embed(terms)
+        self._alive[position] = True
+        self._rows[row['product_id']] = position
+        self._hashes[row['product_id']] = content_hash(row)
+        self._payloads.append({column: row.get(column) for column in PAYLOAD_COLUMNS})
+        self._size += 1
+        if self._centroids is not None:
+            centroid = int(np.argmax(self._centroids @ self._matrix[position]))
+            self._lists[centroid].append(position)
+
+    def add(self, rows: Iterable[Dict[str, Any]]):
+        """Index new products (an existing product_id is re-embedded)"""
+        with self._lock:
+            for row in rows:
+                if row.get('product_id') is None:
+                    continue
+                self.remove([row['product_id']])
+                terms = self._terms(row)
+                self._count_terms(terms)
+                self._append(row, terms)
+
+    def remove(self, product_ids: Iterable[Any]):
+        with self._lock:
+            for product_id in product_ids:
+                position = self._rows.pop(product_id, None)
+                self._hashes.pop(product_id, None)
+                if position is not None:
+                    self._alive[position] = False
+                    self._removed += 1
+
+    def sync(self, rows: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Bring the index in line with a catalog: add products it lacks,
+        re-embed ones whose text or payload changed, drop ones that are gone.
+        Rebuilds from `rows` instead when too many dead rows have piled up.
+        """
+        rows = [row for row in rows if row.get('product_id') is not None]
+        with self._lock:
+            seen = set()
+            added, changed = [], []
+            for row in rows:
+                product_id = row['product_id']
+                seen.add(product_id)
+                if product_id not in self._rows:
+                    added.append(row)
+                elif self._hashes.get(product_id) != content_hash(row):
+                    changed.append(row)
+            gone = [product_id for product_id in self._rows if product_id not in seen]
+            self.remove(gone)
+            self.add(added + changed)
+            if self._removed > self.compact_ratio * self._size:
+                self.build(rows)
+            return {'added': len(added), 'changed': len(changed), 'removed': len(gone)}
+
+    # ------------------------------------------------------------------
+    # IVF
+    # ------------------------------------------------------------------
+
+    def train_ivf(self, nlist: Optional[int] = None, iterations: int = 8, seed: int = 7):
+        """k-means over the live vectors; each row goes to its nearest centroid's list"""
+        with self._lock:
+            live = np.flatnonzero(self._alive[:self._size])
+            if len(live) == 0:
+                return
+            nlist = nlist or max(1, int(math.sqrt(len(live))))
+            rng = np.random.default_rng(seed)
+            vectors = self._matrix[live]
+            sample = vectors[rng.choice(len(live), size=min(len(live), nlist * 64), replace=False)]
+            centroids = sample[rng.choice(len(sample), size=min(nlist, len(sample)), replace=False)].copy()
+            for _ in range(iterations):
+                assignment = np.argmax(sample @ centroids.T, axis=1)
+                for c in range(len(centroids)):
+                    members = sample[assignment == c]
+                    if len(members):
+                        centroid = members.sum(axis=0)
+                        norm = np.linalg.norm(centroid)
+                        centroids[c] = centroid / norm if norm else centroid
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            self._lists = [[] for _ in range(len(centroids))]
+            for position, c in zip(live.tolist(), assignment.tolist()):
+                self._lists[c].append(position)
+            self._centroids = centroids
+            self._trained_size = len(live)
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, k: int = 5, approximate: Optional[bool] = None,
+               min_score: float = 0.05) -> List[Dict[str, Any]]:
+        with self._lock:
+            if not self._rows:
+                return []
+            vector = self.embed_query(query)
+            if not vector.any():
+                return []
+            if approximate is None:
+                approximate = len(self._rows) >= self.ivf_threshold
+            if approximate:
+                # Retrain once the catalog has doubled since the last k-means
+                if self._centroids is None or len(self._rows) > 2 * self._trained_size:
+                    self.train_ivf()
+                probe = np.argsort(-(self._centroids @ vector))[:self.nprobe]
+                candidates = np.fromiter((p for c in probe.tolist() for p in self._lists[c]), dtype=np.int64)
+                candidates = candidates[self._alive[candidates]]
+                scores = self._matrix[candidates] @ vector
+            elif self._removed:
+                candidates = np.flatnonzero(self._alive[:self._size])
+                scores = self._matrix[candidates] @ vector
+            else:
+                candidates = None
+                scores = self._matrix[:self._size] @ vector
+            if len(scores) == 0:
+                return []
+            top = min(k, len(scores))
+            best = np.argpartition(-scores, top - 1)[:top]
+            best = best[np.argsort(-scores[best])]
+            results = []
+            for i in best.tolist():
+                score = float(scores[i])
+                if score < min_score:
+                    break
+                position = i if candidates is None else int(candidates[i])
+                results.append(dict(self._payloads[position], score=round(score, 4)))
+            return results
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'products': len(self._rows), 'rows': self._size, 'dim': self.dim,
+                'dead_rows': self._removed, 'terms': len(self._df), 'ivf_lists': len(self._lists),
+                'matrix_mb': round(self._matrix.nbytes / 1e6, 1)}
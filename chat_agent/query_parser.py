@@ -6,12 +6,35 @@ import re
 import logging
 from typing import Dict, Optional, List, Any
 from config import ChatAgentConfig
+from spell_correct import build_keyword_corrector
 
 class QueryParser:
+    # One typo corrector per process, built from the keyword lists on first use
+    _corrector = None
+
     def __init__(self):
         self.config = ChatAgentConfig()
         self.logger = logging.getLogger(__name__)
     
+    @classmethod
+    def get_corrector(cls):
+        if cls._corrector is None:
+            config = ChatAgentConfig
+            cls._corrector = build_keyword_corrector([
+                list(config.PRODUCT_CATEGORIES),
+                [v for variations in config.PRODUCT_CATEGORIES.values() for v in variations],
+                [v for variations in config.COLOR_VARIATIONS.values() for v in variations],
+                [v for variations in config.GENDER_MAPPING.values() for v in variations],
+                config.PRICE_KEYWORDS
+            ])
+        return cls._corrector
+    
+    def correct_typos(self, message: str):
+        """Lowercased message with misspelled keywords fixed, plus {typo: correction}"""
+        if not self.config.TYPO_CORRECTION_ENABLED:
+            return message.lower(), {}
+        return self.get_corrector().correct(message)
+    
     def parse_user_query(self, user_message: str) -> Dict[str, Any]:
         """
         Parse user message and extract search parameters
@@ -21,10 +44,11 @@ class QueryParser:
             'gender': str,
             'max_price': float,
             'intent': str,
-            'original_message': str
+            'original_message': str,
+            'corrections': dict   # only when a typo was fixed
         }
         """
-        message = user_message.lower().strip()
+        message, corrections = self.correct_typos(user_message.strip())
         
         parsed_query = {
             'category': None,
@@ -34,6 +58,9 @@ class QueryParser:
             'intent': self._detect_intent(message),
             'original_message': user_message
         }
+        if corrections:
+            parsed_query['corrections'] = corrections
+            self.logger.debug("✏️ Corrected query words: %s", corrections)
         
         # Extract category
         parsed_query['category'] = self._extract_category(message)
@@ -47,7 +74,7 @@ class QueryParser:
         # Extract price
         parsed_query['max_price'] = self._extract_price(message)
         
-        self.logger.info(f"🧠 Parsed query: {parsed_query}")
+        self.logger.debug("🧠 Parsed query: %s", parsed_query)
         return parsed_query
     
     def _detect_intent(self, message: str) -> str:
@@ -112,14 +139,14 @@ class QueryParser:
         # Check combined patterns first
         for pattern, category in combined_patterns.items():
             if pattern in message:
-                self.logger.info(f"🏷️ Found combined pattern: {pattern} → {category}")
+                self.logger.debug("🏷️ Found combined pattern: %s → %s", pattern, category)
                 return category
         
         # Then check individual categories
         for category, variations in self.config.PRODUCT_CATEGORIES.items():
             for variation in variations:
                 if variation in message:
-                    self.logger.info(f"🏷️ Found category: {category} (matched: {variation})")
+                    self.logger.debug("🏷️ Found category: %s (matched: %s)", category, variation)
                     return category
         return None
     
@@ -128,7 +155,7 @@ class QueryParser:
         for color, variations in self.config.COLOR_VARIATIONS.items():
             for variation in variations:
                 if variation in message:
-                    self.logger.info(f"🎨 Found color: {color} (matched: {variation})")
+                    self.logger.debug("🎨 Found color: %s (matched: %s)", color, variation)
                     return color
         return None
     
@@ -137,7 +164,7 @@ class QueryParser:
         for gender, variations in self.config.GENDER_MAPPING.items():
             for variation in variations:
                 if variation in message:
-                    self.logger.info(f"👤 Found gender: {gender} (matched: {variation})")
+                    self.logger.debug("👤 Found gender: %s (matched: %s)", gender, variation)
                     return gender
         return None
     
@@ -169,7 +196,7 @@ class QueryParser:
             match = re.search(pattern, message)
             if match:
                 price = float(match.group(1))
-                self.logger.info(f"💰 Found price: ₹{price}")
+                self.logger.debug("💰 Found price: ₹%s", price)
                 return price
         
         # Look for standalone numbers that might be prices
@@ -179,7 +206,7 @@ class QueryParser:
             for num in numbers:
                 price = float(num)
                 if 100 <= price <= 50000:
-                    self.logger.info(f"💰 Inferred price: ₹{price}")
+                    self.logger.debug("💰 Inferred price: ₹%s", price)
                     return price
         
         return None
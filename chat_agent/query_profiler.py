@@ -0,0 +1,252 @@
+"""
+Per-request SQL instrumentation for FashionPulse
+Counts queries and DB time per request, aggregates statements by normalized
+fingerprint and captures EXPLAIN plans for slow SELECTs, so N+1 patterns and
+full table scans show up without reading logs
+"""
+import re
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+_COMMENT = re.compile(r'/\*.*?\*/|--[^\n]*', re.S)
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> str:
+    """SQL with literals and placeholder lists collapsed - one key per statement shape"""
+    normalized = _COMMENT.sub(' ', sql)
+    normalized = _STRING.sub('?', normalized)
+    normalized = _NUMBER.sub('?', normalized)
+    normalized = normalized.replace('%s', '?')
+    normalized = _PLACEHOLDER_LIST.sub('(?+)', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip().lower()
+
+
+class _FingerprintStats:
+    __slots__ = ('sql', 'count', 'total_ms', 'max_ms', 'slow_count', 'rows', 'explain',
+                 'full_scan', 'repeated_requests')
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.slow_count = 0
+        self.rows = 0
+        self.explain: Optional[List[Dict[str, Any]]] = None
+        self.full_scan = False
+        self.repeated_requests = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'fingerprint': self.sql,
+            'count': self.count,
+            'total_ms': round(self.total_ms, 2),
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else 0,
+            'max_ms': round(self.max_ms, 2),
+            'slow_count': self.slow_count,
+            'rows': self.rows,
+            'full_scan': self.full_scan,
+            'repeated_in_request': self.repeated_requests,
+            'explain': self.explain
+        }
+
+
+class QueryProfiler:
+    """
+    Collects query timings for the current request (thread-local) and
+    process-wide per-fingerprint aggregates.
+
+    The DB layer calls `record()` after each statement. Statements slower
+    than `slow_ms` get one EXPLAIN capture per fingerprint (through the
+    `explain` callback, which must not call `record()` itself); plans with a
+    `type` of ALL are flagged as full scans. A fingerprint that runs
+    `repeat_threshold` or more times in one request is counted as a likely
+    N+1 pattern.
+    """
+
+    def __init__(self,
+                 slow_ms: float = 100.0,
+                 explain_slow: bool = True,
+                 top_n: int = 5,
+                 repeat_threshold: int = 10,
+                 max_fingerprints: int = 500):
+        self.logger = logging.getLogger(__name__)
+        self.slow_ms = slow_ms
+        self.explain_slow = explain_slow
+        self.top_n = top_n
+        self.repeat_threshold = repeat_threshold
+        self.max_fingerprints = max_fingerprints
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._fingerprints: Dict[str, _FingerprintStats] = {}
+        self._requests = 0
+        self._request_queries = 0
+        self._request_db_ms = 0.0
+        self._max_queries_per_request = 0
+
+    # ------------------------------------------------------------------
+    # Per-request state
+    # ------------------------------------------------------------------
+
+    def start_request(self):
+        self._local.profile = {'count': 0, 'db_ms': 0.0, 'statements': [], 'per_fingerprint': {}}
+
+    def current(self) -> Optional[Dict[str, Any]]:
+        return getattr(self._local, 'profile', None)
+
+    def end_request(self) -> Optional[Dict[str, Any]]:
+        """Close the request profile, fold it into the aggregates and return a summary"""
+        profile = self.current()
+        self._local.profile = None
+        if profile is None:
+            return None
+
+        repeated = [fp for fp, n in profile['per_fingerprint'].items() if n >= self.repeat_threshold]
+        with self._lock:
+            self._requests += 1
+            self._request_queries += profile['count']
+            self._request_db_ms += profile['db_ms']
+            self._max_queries_per_request = max(self._max_queries_per_request, profile['count'])
+            for fp in repeated:
+                stats = self._fingerprints.get(fp)
+                if stats is not None:
+                    stats.repeated_requests += 1
+
+        slowest = sorted(profile['statements'], key=lambda s: s[1], reverse=True)[:self.top_n]
+        return {
+            'count': profile['count'],
+            'db_ms': round(profile['db_ms'], 2),
+            'slowest': [{'fingerprint': fp, 'ms': round(ms, 2)} for fp, ms in slowest],
+            'repeated': repeated
+        }
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def record(self, sql: str, seconds: float, rows: int = 0,
+               explain: Optional[Callable[[], List[Dict[str, Any]]]] = None):
+        elapsed_ms = seconds * 1000
+        fp = fingerprint(sql)
+
+        profile = self.current()
+        if profile is not None:
+            profile['count'] += 1
+            profile['db_ms'] += elapsed_ms
+            profile['statements'].append((fp, elapsed_ms))
+            profile['per_fingerprint'][fp] = profile['per_fingerprint'].get(fp, 0) + 1
+
+        slow = elapsed_ms >= self.slow_ms
+        with self._lock:
+            stats = self._fingerprints.get(fp)
+            if stats is None:
+                if len(self._fingerprints) >= self.max_fingerprints:
+                    # Drop the cheapest fingerprint to stay bounded
+                    cheapest = min(self._fingerprints, key=lambda k: self._fingerprints[k].total_ms)
+                    del self._fingerprints[cheapest]
+                stats = self._fingerprints[fp] = _FingerprintStats(fp)
+            stats.count += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.rows += rows
+            needs_explain = False
+            if slow:
+                stats.slow_count += 1
+                needs_explain = (self.explain_slow and explain is not None and stats.explain is None
+                                 and fp.startswith('select'))
+                if needs_explain:
+                    stats.explain = []  # claimed - other threads skip it
+
+        if slow:
+            self.logger.warning(f"🐢 Slow query ({elapsed_ms:.1f} ms): {fp[:200]}")
+        if needs_explain:
+            self._capture_explain(stats, explain)
+
+    def _capture_explain(self, stats: _FingerprintStats, explain: Callable[[], List[Dict[str, Any]]]):
+        try:
+            plan = [dict(row) for row in explain()]
+        except Exception as e:
+            self.logger.warning(f"⚠️ EXPLAIN failed for {stats.sql[:120]}: {e}")
+            return
+        stats.explain = plan
+        stats.full_scan = any(str(row.get('type', '')).upper() == 'ALL' for row in plan)
+        if stats.full_scan:
+            self.logger.warning(f"🔎 Full table scan: {stats.sql[:200]}")
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def server_timing(summary: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Server-Timing header value for a request summary"""
+        if not summary:
+            return None
+        return f'db;dur={summary["db_ms"]};desc="{summary["count"]} queries"'
+
+    def get_stats(self, limit: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            fingerprints = [s.to_dict() for s in self._fingerprints.values()]
+            requests = self._requests
+            totals = {
+                'requests': requests,
+                'queries': sum(f['count'] for f in fingerprints),
+                'db_ms': round(sum(f['total_ms'] for f in fingerprints), 2),
+                'avg_queries_per_request': round(self._request_queries / requests, 2) if requests else 0,
+                'avg_db_ms_per_request': round(self._request_db_ms / requests, 2) if requests else 0,
+                'max_queries_per_request': self._max_queries_per_request,
+                'slow_ms': self.slow_ms
+            }
+        fingerprints.sort(key=lambda f: f['total_ms'], reverse=True)
+        return {
+            'totals': totals,
+            'top_by_total_time': fingerprints[:limit],
+            'slow': [f for f in fingerprints if f['slow_count']][:limit],
+            'full_scans': [f['fingerprint'] for f in fingerprints if f['full_scan']],
+            'repeated_in_request': [
+                {'fingerprint': f['fingerprint'], 'requests': f['repeated_in_request']}
+                for f in fingerprints if f['repeated_in_request']
+            ]
+        }
+
+    def reset(self):
+        with self._lock:
+            self._fingerprints.clear()
+            self._requests = 0
+            self._request_queries = 0
+            self._request_db_ms = 0.0
+            self._max_queries_per_request = 0
+
+    # ------------------------------------------------------------------
+    # Flask integration
+    # ------------------------------------------------------------------
+
+    def init_app(self, app, server_timing: Optional[bool] = None):
+        """
+        Profile every request. The Server-Timing header is added when
+        `server_timing` is set, or by default while the app runs in debug mode.
+        """
+        @app.before_request
+        def _start_query_profile():
+            self.start_request()
+
+        @app.after_request
+        def _finish_query_profile(response):
+            summary = self.end_request()
+            enabled = app.debug if server_timing is None else server_timing
+            if enabled and summary is not None:
+                response.headers['Server-Timing'] = self.server_timing(summary)
+                response.headers['X-DB-Query-Count'] = str(summary['count'])
+            return response
+
+        @app.teardown_request
+        def _discard_query_profile(exc=None):
+            # after_request is skipped on unhandled errors - never leak a profile
+            self._local.profile = None
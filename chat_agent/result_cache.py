@@ -0,0 +1,168 @@
+"""
+Search result cache for FashionPulse
+Many phrasings resolve to the same filters, so results are cached under the
+canonical filter tuple as lists of product IDs. Entries belong to one catalog
+version and are dropped together when it changes; identical searches that
+arrive while one is running wait for it instead of querying again.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+
+def _canonical(value: Any) -> Any:
+    """Case/whitespace-insensitive strings, order-insensitive lists, numbers as floats"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = ' '.join(value.lower().split())
+        return value or None
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = sorted({_canonical(v) for v in value if _canonical(v) is not None})
+        return tuple(items) or None
+    return value
+
+
+def canonical_key(filters: Dict[str, Any], fields: Sequence[str], **extra: Any) -> Tuple:
+    """
+    Fixed-order tuple of `fields` from `filters` (plus `extra`, e.g. limit);
+    {'color': 'Red ', 'price_max': 2000} and {'price_max': 2000.0,
+    'color': 'red'} give the same key
+    """
+    values = dict(filters, **extra)
+    unknown = set(values) - set(fields)
+    if unknown:
+        raise ValueError(f"Filters not part of the cache key: {sorted(unknown)}")
+    return tuple(_canonical(values.get(field)) for field in fields)
+
+
+class _Flight:
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class SearchResultCache:
+    """
+    LRU of key -> product-ID list bounded by total cost (one unit per ID plus
+    one per entry), for a single catalog version at a time.
+
+    `get_or_load(key, version, loader)` returns the cached IDs, or runs
+    `loader` once for all concurrent callers with the same key. A loader
+    returning None (a failed query) is handed to those callers but not
+    cached. `ttl` bounds how long an entry lives even without a version bump.
+    """
+
+    def __init__(self, max_cost: int = 50000, ttl: float = 300.0,
+                 cost: Optional[Callable[[Any], int]] = None):
+        self.max_cost = max_cost
+        self.ttl = ttl
+        self.cost = cost or (lambda value: len(value) + 1)
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, int, float]]' = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._version: Optional[int] = None
+        self._total_cost = 0
+        self.stats = {'hits': 0, 'misses': 0, 'shared': 0, 'evictions': 0,
+                      'expired': 0, 'invalidations': 0, 'uncached': 0}
+
+    def _set_version(self, version: Optional[int]):
+        """Drop everything when the catalog version moves (lock held)"""
+        if version != self._version:
+            if self._entries:
+                self.stats['invalidations'] += 1
+            self._entries.clear()
+            self._total_cost = 0
+            self._version = version
+
+    def get(self, key: Hashable, version: Optional[int]) -> Optional[Any]:
+        with self._lock:
+            self._set_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, cost, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self._total_cost -= cost
+                self.stats['expired'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return value
+
+    def put(self, key: Hashable, version: Optional[int], value: Any):
+        cost = self.cost(value)
+        with self._lock:
+            if version != self._version:
+                return  # computed against a catalog that is already gone
+            if cost > self.max_cost:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_cost -= previous[1]
+            self._entries[key] = (value, cost, time.time() + self.ttl)
+            self._total_cost += cost
+            while self._total_cost > self.max_cost:
+                _, (_, evicted_cost, _) = self._entries.popitem(last=False)
+                self._total_cost -= evicted_cost
+                self.stats['evictions'] += 1
+
+    def get_or_load(self, key: Hashable, version: Optional[int], loader: Callable[[], Any]) -> Any:
+        value = self.get(key, version)
+        if value is not None:
+            return value
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.stats['misses'] += 1
+            else:
+                self.stats['shared'] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+            if flight.value is None:
+                self.stats['uncached'] += 1
+            else:
+                self.put(key, version, flight.value)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_cost = 0
+            self.stats['invalidations'] += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses'] + self.stats['shared']
+            return dict(self.stats, entries=len(self._entries), cost=self._total_cost,
+                        max_cost=self.max_cost, version=self._version, in_flight=len(self._flights),
+                        hit_ratio=round((self.stats['hits'] + self.stats['shared']) / lookups, 3) if lookups else 0.0)
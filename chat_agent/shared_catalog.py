@@ -0,0 +1,384 @@
+"""
+Shared catalog snapshot for FashionPulse worker processes
+The clothing catalog is written once per catalog version into a columnar
+file (fixed-width numeric columns, dictionary-coded facets, string tables)
+and memory-mapped read-only by every worker, so N processes share one copy
+of the hot data through the page cache. A pointer file names the current
+snapshot; publishing a new version is an atomic rename, and readers swap to
+it on their next check without restarting.
+"""
+import os
+import json
+import mmap
+import time
+import struct
+import logging
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows - builds are not serialized across processes
+    FCNTL_AVAILABLE = False
+
+MAGIC = b'FPCAT001'
+_ALIGN = 8
+
+# Column kinds: 'int' / 'float' are fixed width, 'dict' stores uint16 codes
+# into a per-column value list (code 0 = NULL), 'str' stores uint32 offsets
+# into a UTF-8 blob (NULL is stored as '')
+_TYPECODES = {'int': 'q', 'float': 'd', 'dict': 'H', 'str': 'I'}
+
+# Clothing table layout shared by the backend and the chat agent
+CLOTHING_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ('product_id', 'int'),
+    ('price', 'float'),
+    ('stock', 'int'),
+    ('product_category', 'dict'),
+    ('gender', 'dict'),
+    ('color', 'dict'),
+    ('size', 'dict'),
+    ('product_name', 'str'),
+    ('product_image', 'str'),
+    ('product_description', 'str'),
+)
+
+# Columns the facet store is built from
+FACET_COLUMNS = ('product_category', 'gender', 'color', 'size', 'price')
+
+CLOTHING_SNAPSHOT_QUERY = (
+    "SELECT product_id, price, stock, product_category, gender, color, size, "
+    "product_name, product_image, product_description FROM {table} ORDER BY product_id"
+)
+
+
+def _pad(length: int) -> int:
+    return (-length) % _ALIGN
+
+
+def write_snapshot(path: str, rows: Iterable[Dict[str, Any]], version: int,
+                   columns: Sequence[Tuple[str, str]] = CLOTHING_COLUMNS,
+                   built_at: Optional[float] = None) -> int:
+    """
+    Write `rows` as a columnar snapshot at `path` (sorted by the first
+    column, which must be an 'int' key). Returns the row count.
+    """
+    rows = sorted(rows, key=lambda r: int(r.get(columns[0][0]) or 0))
+    sections: List[bytes] = []
+    meta: Dict[str, Dict[str, Any]] = {}
+
+    for name, kind in columns:
+        info: Dict[str, Any] = {'kind': kind}
+        if kind == 'int':
+            data = array('q', (int(r.get(name) or 0) for r in rows)).tobytes()
+        elif kind == 'float':
+            data = array('d', (float(r[name]) if r.get(name) is not None else float('nan') for r in rows)).tobytes()
+        elif kind == 'dict':
+            values: List[Optional[str]] = [None]
+            codes: Dict[str, int] = {}
+            column = array('H')
+            for r in rows:
+                value = r.get(name)
+                if value is None:
+                    column.append(0)
+                    continue
+                value = str(value)
+                code = codes.get(value)
+                if code is None:
+                    if len(values) > 0xFFFF:
+                        raise ValueError(f"Column {name} has too many distinct values for a dictionary")
+                    code = codes[value] = len(values)
+                    values.append(value)
+                column.append(code)
+            info['values'] = values
+            data = column.tobytes()
+        elif kind == 'str':
+            offsets = array('I', [0])
+            blob = bytearray()
+            for r in rows:
+                blob += str(r.get(name) or '').encode('utf-8')
+                offsets.append(len(blob))
+            info['blob_offset'] = len(offsets) * offsets.itemsize + _pad(len(offsets) * offsets.itemsize)
+            data = offsets.tobytes() + b'\0' * _pad(len(offsets) * offsets.itemsize) + bytes(blob)
+        else:
+            raise ValueError(f"Unknown column kind {kind!r} for {name}")
+        info['nbytes'] = len(data)
+        meta[name] = info
+        sections.append(data)
+
+    header = {'version': version, 'rows': len(rows), 'built_at': built_at or time.time(),
+              'columns': [name for name, _ in columns], 'meta': meta}
+    # Offsets are relative to the end of the header, so compute them first
+    offset = 0
+    for (name, _), data in zip(columns, sections):
+        meta[name]['offset'] = offset
+        offset += len(data) + _pad(len(data))
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    prefix = len(MAGIC) + 4 + len(header_bytes)
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b'\0' * _pad(prefix))
+        for data in sections:
+            f.write(data)
+            f.write(b'\0' * _pad(len(data)))
+        f.flush()
+        os.fsync(f.fileno())
+    return len(rows)
+
+
+class CatalogSnapshot:
+    """
+    Read-only view of one snapshot file. Numeric and code columns are
+    memoryviews straight over the mapping (no copy); strings and rows are
+    decoded on access.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._mmap)
+        if bytes(buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        (header_len,) = struct.unpack_from('<I', buffer, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(bytes(buffer[start:start + header_len]).decode('utf-8'))
+        base = start + header_len + _pad(start + header_len)
+
+        self.version: int = header['version']
+        self.built_at: float = header['built_at']
+        self.columns: List[str] = header['columns']
+        self._rows: int = header['rows']
+        self._meta: Dict[str, Dict[str, Any]] = header['meta']
+        self._views: Dict[str, memoryview] = {}
+        self._offsets: Dict[str, memoryview] = {}
+        self._blobs: Dict[str, memoryview] = {}
+        for name, info in self._meta.items():
+            region = buffer[base + info['offset']:base + info['offset'] + info['nbytes']]
+            if info['kind'] == 'str':
+                self._offsets[name] = region[:info['blob_offset']].cast('I')[:self._rows + 1]
+                self._blobs[name] = region[info['blob_offset']:]
+            else:
+                self._views[name] = region.cast(_TYPECODES[info['kind']])
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def column(self, name: str) -> memoryview:
+        """Zero-copy typed view of an int / float / dict-code column"""
+        return self._views[name]
+
+    def dictionary(self, name: str) -> List[Optional[str]]:
+        """Values of a 'dict' column, indexed by code (code 0 is NULL)"""
+        return self._meta[name]['values']
+
+    def value(self, name: str, index: int) -> Any:
+        kind = self._meta[name]['kind']
+        if kind == 'str':
+            offsets = self._offsets[name]
+            return bytes(self._blobs[name][offsets[index]:offsets[index + 1]]).decode('utf-8')
+        if kind == 'dict':
+            return self._meta[name]['values'][self._views[name][index]]
+        value = self._views[name][index]
+        return None if kind == 'float' and value != value else value
+
+    def row(self, index: int, names: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        return {name: self.value(name, index) for name in (names or self.columns)}
+
+    def rows(self, names: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        names = names or self.columns
+        for index in range(self._rows):
+            yield self.row(index, names)
+
+    def find(self, product_id: int) -> Optional[int]:
+        """Row index for a key in the (sorted) first column, or None"""
+        keys = self._views[self.columns[0]]
+        index = bisect_left(keys, int(product_id))
+        return index if index < self._rows and keys[index] == int(product_id) else None
+
+    def get(self, product_id: int, names: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        index = self.find(product_id)
+        return self.row(index, names) if index is not None else None
+
+    def close(self):
+        """Release the mapping (only once no views are in use)"""
+        self._views.clear()
+        self._offsets.clear()
+        self._blobs.clear()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # a caller still holds a column view - the GC closes it later
+
+
+class SharedCatalog:
+    """
+    Versioned snapshot directory shared by every worker on the host.
+
+    `<name>.current` holds {"version", "file"} of the live snapshot and is
+    replaced atomically on publish. Readers re-check it at most every
+    `check_seconds` and swap to the new mapping in one assignment; the old
+    file is unlinked later, which is safe because open mappings keep their
+    pages alive. `ensure()` builds a missing version under an exclusive file
+    lock, so only one worker queries the database per catalog version.
+    Nothing bumps the version when the clothing table itself is written, so
+    with `max_age` a snapshot older than that many seconds is rebuilt too.
+    """
+
+    def __init__(self, directory: Optional[str] = None, name: str = 'catalog',
+                 check_seconds: float = 2.0, keep: int = 2, max_age: Optional[float] = None):
+        self.logger = logging.getLogger(__name__)
+        self.directory = directory or default_snapshot_dir()
+        self.name = name
+        self.check_seconds = check_seconds
+        self.keep = keep
+        self.max_age = max_age
+        self.pointer_path = os.path.join(self.directory, f'{name}.current')
+        self.lock_path = os.path.join(self.directory, f'{name}.lock')
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._pointer_mtime = None
+        self._next_check = 0.0
+        self.stats = {'opens': 0, 'builds': 0, 'build_ms': 0.0, 'swaps': 0}
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _read_pointer(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.pointer_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def current(self, force: bool = False) -> Optional[CatalogSnapshot]:
+        """The live snapshot, swapping to a newly published one when the pointer moved"""
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return self._snapshot
+        with self._lock:
+            self._next_check = now + self.check_seconds
+            try:
+                mtime = os.stat(self.pointer_path).st_mtime_ns
+            except OSError:
+                return self._snapshot
+            if not force and mtime == self._pointer_mtime:
+                return self._snapshot
+            pointer = self._read_pointer()
+            if pointer is None:
+                return self._snapshot
+            if (self._snapshot is None or self._snapshot.version != pointer['version']
+                    or self._snapshot.built_at != pointer.get('built_at', self._snapshot.built_at)):
+                try:
+                    snapshot = CatalogSnapshot(os.path.join(self.directory, pointer['file']))
+                except (OSError, ValueError) as e:
+                    self.logger.warning(f"⚠️ Could not open catalog snapshot {pointer['file']}: {e}")
+                    return self._snapshot
+                if self._snapshot is not None:
+                    self.stats['swaps'] += 1
+                    self.logger.info(f"🔄 Catalog snapshot {self._snapshot.version} → {snapshot.version}")
+                self._snapshot = snapshot
+                self.stats['opens'] += 1
+            self._pointer_mtime = mtime
+            return self._snapshot
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    def publish(self, rows: Iterable[Dict[str, Any]], version: int,
+                columns: Sequence[Tuple[str, str]] = CLOTHING_COLUMNS) -> CatalogSnapshot:
+        """Write a snapshot for `version` and point every reader at it"""
+        os.makedirs(self.directory, exist_ok=True)
+        started = time.perf_counter()
+        filename = f'{self.name}.{version}.snap'
+        final_path = os.path.join(self.directory, filename)
+        temp_path = os.path.join(self.directory, f'.{os.getpid()}.{filename}')
+        try:
+            built_at = time.time()
+            count = write_snapshot(temp_path, rows, version, columns, built_at)
+            os.replace(temp_path, final_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        pointer_temp = f'{self.pointer_path}.{os.getpid()}'
+        with open(pointer_temp, 'w', encoding='utf-8') as f:
+            json.dump({'version': version, 'file': filename, 'rows': count, 'built_at': built_at}, f)
+        os.replace(pointer_temp, self.pointer_path)
+
+        self.stats['builds'] += 1
+        self.stats['build_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        self.logger.info(f"📦 Published catalog snapshot v{version}: {count} products ({self.stats['build_ms']} ms)")
+        self._prune(keep_file=filename)
+        return self.current(force=True)
+
+    def _prune(self, keep_file: str):
+        snapshots = []
+        prefix = f'{self.name}.'
+        for entry in os.listdir(self.directory):
+            if entry.startswith(prefix) and entry.endswith('.snap') and entry != keep_file:
+                snapshots.append(os.path.join(self.directory, entry))
+        snapshots.sort(key=lambda p: os.stat(p).st_mtime)
+        for path in snapshots[:max(len(snapshots) - (self.keep - 1), 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @contextmanager
+    def _build_lock(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if not FCNTL_AVAILABLE:
+            yield
+            return
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def ensure(self, version: Optional[int], loader: Callable[[], Iterable[Dict[str, Any]]],
+               columns: Sequence[Tuple[str, str]] = CLOTHING_COLUMNS) -> Optional[CatalogSnapshot]:
+        """
+        Snapshot for `version`, building it with `loader` if no worker has yet
+        (or the one there is older than `max_age`). Other workers block on the
+        build lock and then open the result. A loader that raises publishes
+        nothing.
+        """
+        snapshot = self.current(force=True)
+        if self._usable(snapshot, version):
+            return snapshot
+        with self._build_lock():
+            snapshot = self.current(force=True)
+            if self._usable(snapshot, version):
+                return snapshot
+            return self.publish(loader() or [], version or 0, columns)
+
+    def _usable(self, snapshot: Optional[CatalogSnapshot], version: Optional[int]) -> bool:
+        if snapshot is None or (version is not None and snapshot.version != version):
+            return False
+        return self.max_age is None or time.time() - snapshot.built_at <= self.max_age
+
+    def get_stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return dict(self.stats,
+                    directory=self.directory,
+                    version=snapshot.version if snapshot else None,
+                    products=len(snapshot) if snapshot else 0,
+                    size_bytes=os.path.getsize(snapshot.path) if snapshot and os.path.exists(snapshot.path) else 0)
+
+
+def default_snapshot_dir() -> str:
+    """/dev/shm when available (RAM-backed), otherwise the temp directory"""
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, 'fashionpulse')
@@ -0,0 +1,91 @@
+"""
+Acceptance accounting for speculative (assisted) decoding
+With a draft model, generate() lets the draft propose a few tokens and the
+main model checks them all in one forward pass. Every main-model forward
+yields exactly one token of its own plus the draft tokens it accepted, and
+every draft forward proposes one token, so counting forward calls on both
+models is enough to recover the acceptance rate:
+
+    accepted = new_tokens - main_forwards        drafted = draft_forwards
+
+The counters are per thread, so concurrent generations do not mix.
+"""
+import threading
+from typing import Any, Dict, Optional
+
+
+class AssistedDecodingMonitor:
+    """
+    Registers forward pre-hooks on both models once. Wrap a generation in
+    `with monitor.measure() as run:` then `monitor.record(run, new_tokens,
+    seconds)` adds it to the totals.
+    """
+
+    def __init__(self, model, draft_model):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.totals = {'generations': 0, 'new_tokens': 0, 'main_forwards': 0,
+                       'drafted': 0, 'accepted': 0, 'seconds': 0.0}
+        model.register_forward_pre_hook(self._count('main'))
+        draft_model.register_forward_pre_hook(self._count('draft'))
+
+    def _count(self, which: str):
+        def hook(module, args):
+            counts = getattr(self._local, 'counts', None)
+            if counts is not None:
+                counts[which] += 1
+        return hook
+
+    def measure(self):
+        return _Measurement(self._local)
+
+    def record(self, run: '_Measurement', new_tokens: int, seconds: float) -> Dict[str, Any]:
+        """Fold one finished generation into the totals; returns its own figures"""
+        accepted = min(max(new_tokens - run.counts['main'], 0), run.counts['draft'])
+        figures = {
+            'new_tokens': new_tokens,
+            'main_forwards': run.counts['main'],
+            'drafted': run.counts['draft'],
+            'accepted': accepted,
+            'acceptance_rate': round(accepted / run.counts['draft'], 3) if run.counts['draft'] else None,
+            'tokens_per_second': round(new_tokens / seconds, 2) if seconds > 0 else None,
+        }
+        with self._lock:
+            self.totals['generations'] += 1
+            self.totals['new_tokens'] += new_tokens
+            self.totals['main_forwards'] += run.counts['main']
+            self.totals['drafted'] += run.counts['draft']
+            self.totals['accepted'] += accepted
+            self.totals['seconds'] += seconds
+        return figures
+
+    def acceptance_rate(self) -> Optional[float]:
+        with self._lock:
+            drafted = self.totals['drafted']
+            return self.totals['accepted'] / drafted if drafted else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            totals = dict(self.totals)
+        rate = totals['accepted'] / totals['drafted'] if totals['drafted'] else None
+        return dict(
+            totals,
+            seconds=round(totals['seconds'], 2),
+            acceptance_rate=round(rate, 3) if rate is not None else None,
+            tokens_per_forward=round(totals['new_tokens'] / totals['main_forwards'], 2) if totals['main_forwards'] else None,
+            tokens_per_second=round(totals['new_tokens'] / totals['seconds'], 2) if totals['seconds'] else None,
+        )
+
+
+class _Measurement:
+    def __init__(self, local: threading.local):
+        self._local = local
+        self.counts = {'main': 0, 'draft': 0}
+
+    def __enter__(self):
+        self._local.counts = self.counts
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._local.counts = None
+        return False
@@ -0,0 +1,240 @@
+"""
+Typo correction for FashionPulse search queries
+SymSpell-style: every vocabulary word is indexed under all of its deletion
+variants (up to `max_distance` deletes, on the first `prefix_length`
+characters), so a misspelled token is corrected by generating its own
+deletes and looking them up - dictionary hits instead of scanning the
+vocabulary. Candidates are confirmed with a bounded Damerau-Levenshtein
+(optimal string alignment) distance.
+
+Only search keywords are correction targets. Everyday English and fashion
+words (data/common_words.txt, plus catalog vocabulary where available) are
+recognised so they are never rewritten, and they compete as candidates so a
+near-miss of a real word is not pulled onto a keyword.
+"""
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+_TOKEN = re.compile(r"[a-z][a-z'-]*")
+_WORD = re.compile(r'[a-z]+')
+
+COMMON_WORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'common_words.txt')
+
+# Words that appear in shopping queries but are not catalog terms - known
+# words are never corrected, so these keep "want" from becoming "pant"
+QUERY_WORDS = (
+    'a an the and or of for to in on with without me my i im we you your show find get give see '
+    'want need looking look search buy shop something some any all new best good nice cheap '
+    'under below above over less more than between within around about upto up budget price '
+    'rs rupees inr size sizes colour color colors colours for her him his she he kids kid '
+    'please can could would like love do does have has is are am what which where when how '
+    'light dark pale deep bright plain full half long short sleeve sleeves pack set wear '
+    'clothes clothing fashion expensive hello namaste delivery shipping return refund exchange '
+    'replace payment order track tracking cancel policy support help contact phone email '
+    'address location store'
+).split()
+
+# Inflections tried when deciding whether a token is a real word ("sisters", "buttoned")
+_SUFFIXES = ('s', 'es', 'ed', 'ing', 'ly', 'er')
+
+_common_words: Optional[List[str]] = None
+
+
+def common_words() -> List[str]:
+    """Everyday English and fashion vocabulary shipped with the package (read once)"""
+    global _common_words
+    if _common_words is None:
+        words = []
+        try:
+            with open(COMMON_WORDS_PATH, encoding='utf-8') as f:
+                for line in f:
+                    if not line.startswith('#'):
+                        words.extend(line.lower().split())
+        except OSError:
+            pass
+        _common_words = words
+    return _common_words
+
+
+def _plural_pair(a: str, b: str) -> bool:
+    return a in (b + 's', b + 'es') or b in (a + 's', a + 'es')
+
+
+def osa_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance, or limit + 1 once it exceeds `limit`"""
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class SpellCorrector:
+    """
+    Deletion-neighbourhood index over a word-frequency vocabulary.
+
+    Words are added as targets (what a typo may be corrected to) or as
+    plain known words. `correct_token` leaves known words, their simple
+    inflections, short tokens (< `min_length`) and anything without a
+    candidate alone. Tokens of up to 5 letters get at most one edit, longer
+    ones `max_distance`; candidates must keep the first letter (typos there
+    are rare, and it blocks most false fixes). The closest candidate wins,
+    the more frequent one on equal distance - and it must be a target whose
+    count is at least `margin` times that of the runner-up at its distance,
+    otherwise the token is ambiguous and left as typed.
+    """
+
+    def __init__(self, max_distance: int = 2, prefix_length: int = 7, min_length: int = 3,
+                 margin: float = 2.0):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.min_length = min_length
+        self.margin = margin
+        self.counts: Dict[str, int] = {}
+        self.targets: Set[str] = set()
+        self._deletes: Dict[str, List[str]] = {}
+        self._cache: Dict[str, Optional[Tuple[str, int]]] = {}
+
+    def _delete_variants(self, word: str, distance: int) -> Set[str]:
+        variants = {word}
+        frontier = {word}
+        for _ in range(distance):
+            next_frontier = set()
+            for item in frontier:
+                if len(item) <= 1:
+                    continue
+                for i in range(len(item)):
+                    next_frontier.add(item[:i] + item[i + 1:])
+            variants |= next_frontier
+            frontier = next_frontier
+        return variants
+
+    def add_word(self, word: str, count: int = 1, target: bool = True):
+        word = word.lower()
+        if not word:
+            return
+        if target:
+            self.targets.add(word)
+        if word in self.counts:
+            self.counts[word] += count
+            self._cache.clear()
+            return
+        self.counts[word] = count
+        for variant in self._delete_variants(word[:self.prefix_length], self.max_distance):
+            self._deletes.setdefault(variant, []).append(word)
+        self._cache.clear()
+
+    def add_text(self, text: str, count: int = 1, target: bool = True):
+        """Add every word of a phrase ("off-white", "co-ord sets" -> their words)"""
+        for token in _TOKEN.findall(str(text or '').lower()):
+            for word in re.split(r"[-']", token):
+                if len(word) > 1:
+                    self.add_word(word, count, target)
+
+    def add_words(self, words: Iterable[str], count: int = 1, target: bool = True):
+        for word in words:
+            self.add_text(word, count, target)
+
+    def is_known(self, token: str) -> bool:
+        """A vocabulary word, or one with a common inflection ("sisters", "buttoned")"""
+        if token in self.counts:
+            return True
+        for suffix in _SUFFIXES:
+            stem = token[:-len(suffix)]
+            if token.endswith(suffix) and len(stem) >= self.min_length:
+                if stem in self.counts or (suffix != 's' and stem + 'e' in self.counts):
+                    return True
+        return False
+
+    def correct_token(self, token: str) -> Optional[Tuple[str, int]]:
+        """(correction, distance) for a misspelled token, None when it is fine, unknown or ambiguous"""
+        if len(token) < self.min_length or not token.isalpha():
+            return None
+        if token in self._cache:
+            return self._cache[token]
+        if self.is_known(token):
+            self._cache_result(token, None)
+            return None
+
+        limit = 1 if len(token) <= 5 else self.max_distance
+        candidates: List[Tuple[int, int, str]] = []
+        seen: Set[str] = set()
+        for variant in self._delete_variants(token[:self.prefix_length], limit):
+            for word in self._deletes.get(variant, ()):
+                if word in seen or word[0] != token[0]:
+                    continue
+                seen.add(word)
+                distance = osa_distance(token, word, limit)
+                if distance <= limit:
+                    candidates.append((distance, -self.counts[word], word))
+
+        best: Optional[Tuple[str, int]] = None
+        if candidates:
+            candidates.sort()
+            distance, best_count, word = candidates[0]
+            # "shirt" vs "shirts" is not a real ambiguity - compare against another word
+            runner_up = next((c for c in candidates[1:] if not _plural_pair(c[2], word)), None)
+            clear = runner_up is None or runner_up[0] > distance or -best_count >= -runner_up[1] * self.margin
+            if word in self.targets and clear:
+                best = (word, distance)
+        self._cache_result(token, best)
+        return best
+
+    def _cache_result(self, token: str, result: Optional[Tuple[str, int]]):
+        if len(self._cache) > 50000:
+            self._cache.clear()
+        self._cache[token] = result
+
+    def correct(self, text: str) -> Tuple[str, Dict[str, str]]:
+        """Text with misspelled words replaced, plus {typo: correction}"""
+        corrections: Dict[str, str] = {}
+
+        def replace(match):
+            token = match.group(0)
+            fixed = self.correct_token(token)
+            if fixed is None:
+                return token
+            corrections[token] = fixed[0]
+            return fixed[0]
+
+        corrected = _WORD.sub(replace, text.lower())
+        return corrected, corrections
+
+    def get_stats(self) -> Dict[str, int]:
+        return {'words': len(self.counts), 'targets': len(self.targets), 'delete_keys': len(self._deletes),
+                'cached_tokens': len(self._cache)}
+
+
+def build_keyword_corrector(keyword_lists: Iterable[Iterable[str]],
+                            catalog_words: Iterable[str] = (),
+                            **kwargs) -> SpellCorrector:
+    """
+    Corrector whose only targets are the parser keyword lists (heavily
+    weighted, so they win ties against plain words). The query words, the
+    shipped common-word list and, optionally, catalog vocabulary are known
+    words: never "fixed", and never suggested.
+    """
+    corrector = SpellCorrector(**kwargs)
+    for keywords in keyword_lists:
+        corrector.add_words(keywords, count=100)
+    corrector.add_words(QUERY_WORDS, count=1, target=False)
+    corrector.add_words(common_words(), count=1, target=False)
+    for word in catalog_words:
+        corrector.add_text(word, count=1, target=False)
+    return corrector
@@ -0,0 +1,233 @@
+"""
+Structured logging for FashionPulse services
+JSON-lines output written by a background thread, per-module levels,
+request-ID correlation and sampled / rate-limited DEBUG records. Request
+handlers only pay for a level check unless DEBUG is enabled for their module.
+"""
+import sys
+import copy
+import json
+import uuid
+import queue
+import atexit
+import random
+import logging
+import threading
+import contextvars
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+# Request ID of the request being handled on this thread / context
+_request_id: contextvars.ContextVar = contextvars.ContextVar('request_id', default=None)
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+_TRACEBACKS = logging.Formatter()
+
+_listener: Optional[QueueListener] = None
+_handler: Optional['NonBlockingQueueHandler'] = None
+_configure_lock = threading.Lock()
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def set_request_id(request_id: Optional[str]):
+    return _request_id.set(request_id)
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """'werkzeug=WARNING,database=DEBUG' -> {'werkzeug': 'WARNING', 'database': 'DEBUG'}"""
+    levels = {}
+    for part in (spec or '').split(','):
+        if '=' in part:
+            name, level = part.split('=', 1)
+            if name.strip():
+                levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, msg, request_id, exc and any `extra` fields"""
+
+    def __init__(self, service: str = ''):
+        super().__init__()
+        self.service = service
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        if self.service:
+            entry['service'] = self.service
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            entry['request_id'] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """
+    Keeps a `sample_rate` fraction of DEBUG records and at most
+    `per_second` records per call site (logger + message template) each
+    second. Records at INFO and above always pass.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, per_second: int = 20):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.per_second = per_second
+        self._windows: Dict[tuple, list] = {}
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self.dropped += 1
+            return False
+        if self.per_second:
+            key = (record.name, record.msg if isinstance(record.msg, str) else id(record.msg))
+            second = int(record.created)
+            window = self._windows.get(key)
+            if window is None or window[0] != second:
+                if len(self._windows) > 10000:
+                    self._windows.clear()
+                window = self._windows[key] = [second, 0]
+            window[1] += 1
+            if window[1] > self.per_second:
+                self.dropped += 1
+                return False
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread; never blocks the caller. When the
+    queue is full the record is dropped and counted instead of waiting on
+    stdout.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve everything that depends on the calling thread before the
+        # hand-off: the request ID, the message args and the traceback
+        record = copy.copy(record)
+        record.request_id = _request_id.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _TRACEBACKS.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(service: str = '',
+                      level: str = 'INFO',
+                      module_levels: str = '',
+                      json_format: bool = True,
+                      debug_sample_rate: float = 1.0,
+                      debug_per_second: int = 20,
+                      queue_size: int = 10000,
+                      stream=None) -> QueueListener:
+    """
+    Route the root logger through a bounded queue to a background writer.
+    Replaces handlers installed earlier (e.g. by basicConfig in an imported
+    module); calling it again reconfigures levels and format in place.
+    """
+    global _listener, _handler
+    with _configure_lock:
+        _stop_listener()
+
+        writer = logging.StreamHandler(stream or sys.stdout)
+        if json_format:
+            writer.setFormatter(JsonFormatter(service))
+        else:
+            writer.setFormatter(logging.Formatter(
+                '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'))
+
+        log_queue = queue.Queue(maxsize=queue_size)
+        _handler = NonBlockingQueueHandler(log_queue)
+        _handler.addFilter(DebugSampler(debug_sample_rate, debug_per_second))
+        _listener = QueueListener(log_queue, writer, respect_handler_level=False)
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(_handler)
+        root.setLevel(level.upper())
+        for name, module_level in parse_levels(module_levels).items():
+            logging.getLogger(name).setLevel(module_level)
+
+        _listener.start()
+    return _listener
+
+
+def get_logging_stats() -> Dict[str, int]:
+    if _handler is None:
+        return {'queued': 0, 'dropped_full_queue': 0, 'dropped_sampled': 0}
+    sampled = sum(f.dropped for f in _handler.filters if isinstance(f, DebugSampler))
+    return {
+        'queued': _handler.queue.qsize(),
+        'dropped_full_queue': _handler.dropped,
+        'dropped_sampled': sampled
+    }
+
+
+@atexit.register
+def _stop_listener():
+    """Drain queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def init_request_ids(app, header: str = 'X-Request-ID'):
+    """
+    Give every Flask request an ID - the caller's `header` when present,
+    otherwise a new one - and echo it on the response so client and server
+    logs can be joined.
+    """
+    from flask import g, request
+
+    @app.before_request
+    def _assign_request_id():
+        incoming = request.headers.get(header, '')
+        request_id = incoming[:64] if incoming else uuid.uuid4().hex[:16]
+        g.request_id = request_id
+        g._request_id_token = set_request_id(request_id)
+
+    @app.after_request
+    def _echo_request_id(response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers[header] = request_id
+        return response
+
+    @app.teardown_request
+    def _clear_request_id(exc=None):
+        token = g.pop('_request_id_token', None)
+        if token is not None:
+            _request_id.reset(token)
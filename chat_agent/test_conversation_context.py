@@ -0,0 +1,81 @@
+"""
+Test script for the conversation context manager
+Checks that preferences carry forward, older turns are summarized, the
+history block stays within its token budget however long the chat runs, and
+that sessions are evicted least recently used first
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_context import ConversationContext, ConversationStore, estimate_tokens, extract_size
+
+LISTING = "\n".join(f"{i}️⃣ **Blue Party Dress {i}**\n   💰 ₹1,{i}99 | 🎨 Blue | 👩 Women" for i in range(1, 9))
+
+def test_conversation_context():
+    print("🧪 Testing conversation context")
+    print("=" * 50)
+
+    assert extract_size("do you have it in size M?") == 'M'
+    assert extract_size("need xl please") == 'XL'
+    assert extract_size("size 32 jeans") == '32'
+    assert extract_size("show me a dress") is None
+
+    context = ConversationContext(recent_turns=2, summary_sentences=3)
+    assert context.render(300) == ('', 0)
+
+    context.update_slots({'gender': 'women', 'color': 'blue', 'max_price': 2000}, "blue dresses for women under 2000")
+    context.add_turn("Blue dresses for women under 2000", f"Here are the best matches 😊\n{LISTING}")
+    context.update_slots({'color': None, 'category': 'dresses'}, "do you have size M?")
+    context.add_turn("Do you have these in size M?", "Yes, most of them come in size M. Anything else?")
+    assert context.slots == {'gender': 'women', 'color': 'blue', 'budget': 2000, 'category': 'dresses', 'size': 'M'}
+    print("✅ Preferences carry forward; unstated ones are kept")
+
+    context.add_turn("What is your return policy?", "You can return unworn items within 7 days. Refunds take 5 days.")
+    context.add_turn("ok thanks", "You're welcome!")
+    assert len(context) == 2
+    block, tokens = context.render(300)
+    assert "CUSTOMER PREFERENCES: gender=women, category=dresses, color=blue, size=M, budget=₹2000" in block
+    assert "EARLIER IN THIS CONVERSATION:" in block and "Customer: Blue dresses for women under 2000" in block
+    assert "Customer: ok thanks" in block and "Customer: What is your return policy?" in block
+    assert "Blue Party Dress 8" not in block, "long product listings must not be copied into the history"
+    print(f"✅ Two recent turns verbatim, older ones summarized ({tokens} tokens):\n{block}\n")
+
+    # Prompt size stays flat as the conversation grows
+    sizes = []
+    for turn in range(40):
+        context.add_turn(f"Show me more options for the wedding on day {turn}", f"Sure! {LISTING}")
+        sizes.append(context.render(200)[1])
+    assert max(sizes) <= 200, max(sizes)
+    assert sizes[-1] <= sizes[5] + 10, sizes
+    assert len(context._summary) <= 3
+    print(f"✅ History stays under budget: {sizes[0]} → {sizes[-1]} tokens after 40 more turns")
+
+    tight, tokens = context.render(30)
+    assert tokens <= 30 and tight.startswith("CUSTOMER PREFERENCES"), tight
+    print("✅ A tight budget keeps the preferences and drops the rest")
+
+    assert estimate_tokens("Show me red dresses under 2000") == 8
+
+    seeded = []
+    store = ConversationStore(max_sessions=2, seed=lambda session_id, user_email: seeded.append(
+        (session_id, user_email)) or [("hi", "hello!")])
+    first = store.get('a', 'asha@example.com')
+    assert store.get('a', 'asha@example.com') is first and len(first) == 1
+    assert seeded == [('a', 'asha@example.com')]
+    store.get('b', 'asha@example.com')
+    store.get('c', 'asha@example.com')
+    assert len(store) == 2
+    assert store.get('a', 'asha@example.com') is not first, "least recently used session is evicted"
+    print("✅ Sessions are seeded once and evicted least recently used first")
+
+    seeded.clear()
+    anonymous = store.get('a')
+    assert len(anonymous) == 0 and seeded == [], "no stored history without a verified user"
+    assert store.get('a', 'ravi@example.com') is not anonymous
+    assert seeded == [('a', 'ravi@example.com')], "each user's sessions are seeded from their own history"
+    print("✅ Stored history is only restored for the verified user")
+
+if __name__ == "__main__":
+    test_conversation_context()
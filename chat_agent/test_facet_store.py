@@ -0,0 +1,79 @@
+"""
+Test script for the in-memory catalog facet store
+Checks counts, distinct values, drill-down facets and price histograms
+against a small catalog, and that a catalog version change triggers a
+rebuild while a failed rebuild keeps serving the last facets
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from facet_store import CatalogFacetStore
+
+CATALOG = [
+    {'product_category': 'Dress', 'gender': 'Women', 'color': 'Red', 'size': 'M', 'price': 1299},
+    {'product_category': 'dress', 'gender': 'women', 'color': 'Black', 'size': 'S', 'price': 2499},
+    {'product_category': 'Shirt', 'gender': 'Men', 'color': 'white', 'size': 'L', 'price': 799},
+    {'product_category': 'Shirt', 'gender': 'Men', 'color': 'Black', 'size': 'M', 'price': None},
+    {'product_category': 'Saree', 'gender': 'Women', 'color': 'Red', 'size': None, 'price': 5999},
+]
+
+def test_facet_store():
+    print("🧪 Testing catalog facet store")
+    print("=" * 50)
+
+    loads = []
+    catalog = {'rows': CATALOG, 'version': 1, 'fail': False}
+
+    def loader():
+        loads.append(1)
+        if catalog['fail']:
+            raise ConnectionError("database unavailable")
+        return catalog['rows']
+
+    store = CatalogFacetStore(loader, version_probe=lambda: catalog['version'], check_interval=0,
+                              price_edges=[0, 1000, 2000, 5000])
+
+    assert store.total_count() == 5 and len(loads) == 1
+    assert store.categories() == ['Dress', 'Saree', 'Shirt'], "values are deduplicated case-insensitively"
+    assert store.colors() == ['Black', 'Red', 'white']
+    assert store.count(category='dress') == 2
+    assert store.count(gender='women', color=['red', 'black']) == 3
+    assert store.count_by('gender') == {'Women': 3, 'Men': 2}
+    assert store.price_range() == {'min_price': 799.0, 'max_price': 5999.0}
+    print("✅ Counts and distinct values come from one load")
+
+    # Color counts ignore the color filter itself, so the shopper can switch colors
+    facets = store.facet_counts(category='Dress', color='Red')
+    assert facets['color'] == {'Red': 1, 'Black': 1}, facets
+    assert facets['category'] == {'Dress': 1, 'Saree': 1}, facets
+    assert facets['size'] == {'M': 1}, facets
+    histogram = store.price_histogram(gender='Women')
+    assert [bucket['count'] for bucket in histogram] == [0, 1, 1, 1], histogram
+    assert histogram[-1]['max'] is None, "last bucket is open-ended"
+    print(f"✅ Drill-down facets and price histogram: {facets['color']}")
+
+    store.total_count()
+    assert len(loads) == 1, "unchanged version does not reload"
+    catalog['rows'] = CATALOG[:2]
+    catalog['version'] = 2
+    assert store.total_count() == 2 and store.version() == 2 and len(loads) == 2
+    print("✅ A catalog version change rebuilds the facets")
+
+    catalog['fail'] = True
+    catalog['version'] = 3
+    assert store.total_count() == 2, "failed rebuild keeps the last facets"
+    assert store.version() == 2
+    catalog['fail'] = False
+    assert store.total_count() == 2 and store.version() == 3
+    print("✅ A failed rebuild keeps serving the last facets and retries")
+
+    # Rows changed without a version bump - only the age limit picks them up
+    store.max_age = 0
+    catalog['rows'] = CATALOG
+    assert store.total_count() == 5 and store.version() == 3
+    print("✅ Expired facets are rebuilt without a version change")
+
+if __name__ == "__main__":
+    test_facet_store()
@@ -0,0 +1,62 @@
+"""
+Test script for LLM generation budgets
+Checks deadlines and cancellation polling, token budgets sized from measured
+throughput, and client-disconnect detection on a real socket pair
+"""
+import os
+import sys
+import time
+import socket
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from generation_budget import Deadline, ThroughputTracker, client_disconnected
+
+def test_generation_budget():
+    print("🧪 Testing generation budgets")
+    print("=" * 50)
+
+    deadline = Deadline(0.05)
+    assert not deadline.expired() and 0 < deadline.remaining() <= 0.05
+    time.sleep(0.06)
+    assert deadline.expired() and deadline.remaining() == 0.0
+    print("✅ Deadlines expire")
+
+    polls = []
+    deadline = Deadline(10, is_cancelled=lambda: polls.append(1) or len(polls) >= 2, poll_seconds=0.02)
+    assert not deadline.cancelled()
+    assert not deadline.cancelled() and len(polls) == 1, "probe is rate limited"
+    time.sleep(0.03)
+    assert deadline.cancelled() and len(polls) == 2
+    assert deadline.cancelled() and len(polls) == 2, "cancellation sticks without probing again"
+    failing = Deadline(10, is_cancelled=lambda: 1 / 0)
+    assert not failing.cancelled()
+    print("✅ Cancellation is polled at most every poll_seconds and sticks")
+
+    tracker = ThroughputTracker(alpha=0.5, safety=1.0)
+    assert tracker.token_budget(5, 300, cap=256) == 256, "unmeasured: full cap"
+    # 300-token prompt prefilled in 1.5 s, then 40 tokens in 4 s
+    tracker.observe(300, 1.5, 40, 4.0)
+    assert tracker.decode_tokens_per_second == 10.0
+    assert tracker.token_budget(5, 300, cap=256) == 35          # (5 - 1.5) s x 10 tok/s
+    assert tracker.token_budget(30, 300, cap=256) == 256
+    assert tracker.token_budget(1, 300, cap=256) == 0
+    tracker.observe(300, 1.5, 20, 4.0)                          # slower: 5 tok/s
+    assert tracker.decode_tokens_per_second == 7.5
+    assert tracker.token_budget(5, 300, cap=256) == 26
+    print(f"✅ Token budget follows measured throughput: {tracker.get_stats()}")
+
+    server, client = socket.socketpair()
+    environ = {'werkzeug.socket': server}
+    assert not client_disconnected(environ)
+    client.sendall(b'GET / HTTP/1.1\r\n')  # pipelined data is not a disconnect
+    assert not client_disconnected(environ)
+    server.recv(64)
+    client.close()
+    assert client_disconnected(environ)
+    server.close()
+    assert not client_disconnected({}), "unknown servers never report a disconnect"
+    print("✅ Client disconnects are detected without consuming request data")
+
+if __name__ == "__main__":
+    test_generation_budget()
@@ -0,0 +1,118 @@
+"""
+Test script for the out-of-process LLM worker pool
+Runs real worker processes with a stand-in model (EchoLLM) and checks that
+answers come back, support questions jump the queue, a full queue sheds at
+once, cancellation reaches the worker and a crashed worker is replaced
+"""
+import os
+import sys
+import time
+import tempfile
+import threading
+import subprocess
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from generation_budget import Deadline, ThroughputTracker
+from llm_worker_pool import LLMWorkerPool, PooledLLM, PRIORITY_SUPPORT, PRIORITY_CHAT, claim_host_pool
+
+class EchoLLM:
+    """Stand-in model: 'sleep:<seconds>' generates for that long, 'crash' kills the worker"""
+
+    def __init__(self, load_model=True):
+        self.throughput = ThroughputTracker()
+
+    def is_model_loaded(self):
+        return True
+
+    def get_model_info(self):
+        return {'model_name': 'echo', 'model_loaded': True}
+
+    def generate_response(self, user_query, context=None, deadline=None):
+        if user_query == 'crash':
+            os._exit(1)
+        if user_query.startswith('sleep:'):
+            until = time.monotonic() + float(user_query.split(':')[1])
+            while time.monotonic() < until:
+                if deadline is not None and (deadline.cancelled() or deadline.expired()):
+                    return 'stopped early'
+                time.sleep(0.01)
+        return f"echo {user_query} ({len((context or {}).get('products', []))} products)"
+
+    def _fallback_response(self, user_query, context=None):
+        return 'fallback'
+
+def wait_ready(pool, timeout=30):
+    started = time.time()
+    while not pool.get_stats()['ready']:
+        assert time.time() - started < timeout, "worker never became ready"
+        time.sleep(0.05)
+
+def test_llm_worker_pool():
+    print("🧪 Testing LLM worker pool")
+    print("=" * 50)
+
+    pool = LLMWorkerPool(workers=1, queue_size=2, factory='test_llm_worker_pool:EchoLLM', grace_seconds=0.5).start()
+    llm = PooledLLM(pool, EchoLLM())
+    try:
+        wait_ready(pool)
+        assert llm.is_model_loaded()
+        assert llm.generate_response('hi', {'products': [{'product_id': 1}]}, Deadline(5)) == 'echo hi (1 products)'
+        print("✅ Worker process answers over the local socket")
+
+        # Occupy the worker, then queue two chats and a support question
+        order, results = [], {}
+        def ask(name, query, priority, seconds=10):
+            results[name] = pool.submit(query, {}, Deadline(seconds), priority)
+            order.append(name)
+        busy = threading.Thread(target=ask, args=('busy', 'sleep:0.5', PRIORITY_CHAT))
+        busy.start()
+        time.sleep(0.2)
+        threads = [threading.Thread(target=ask, args=(name, name, priority))
+                   for name, priority in (('chat-1', PRIORITY_CHAT), ('chat-2', PRIORITY_CHAT),
+                                          ('support', PRIORITY_SUPPORT))]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.05)
+        for thread in [busy] + threads:
+            thread.join()
+        assert results['chat-2'] is None, "newest low-priority request is shed for the support question"
+        assert order.index('chat-2') < order.index('support') < order.index('chat-1'), order
+        print(f"✅ Support jumps the queue, a full queue sheds the least important request: {order}")
+
+        # Client goes away mid-generation
+        deadline = Deadline(10)
+        threading.Timer(0.2, deadline.cancel).start()
+        started = time.monotonic()
+        assert pool.submit('sleep:5', {}, deadline) == 'stopped early'
+        assert time.monotonic() - started < 2
+        print("✅ Cancellation reaches the worker")
+
+        # Deadline shorter than the work: caller is released, worker still finishes
+        started = time.monotonic()
+        assert llm.generate_response('sleep:3', {}, Deadline(0.2)) == 'stopped early'
+        assert time.monotonic() - started < 1.5
+
+        assert llm.generate_response('crash', {}, Deadline(5)) == 'fallback'
+        wait_ready(pool)
+        assert llm.generate_response('again', {}, Deadline(5)) == 'echo again (0 products)'
+        stats = pool.get_stats()
+        assert stats['restarts'] == 1 and stats['error'] == 1 and stats['shed'] == 1, stats
+        print(f"✅ A crashed worker is replaced: {stats}")
+    finally:
+        pool.stop()
+
+def test_one_pool_per_host():
+    """A second process on the host must not start another pool"""
+    lock_path = os.path.join(tempfile.mkdtemp(), 'llm-pool.lock')
+    assert claim_host_pool(lock_path) and claim_host_pool(lock_path), "the owner keeps its claim"
+    other = subprocess.run(
+        [sys.executable, '-c', 'import sys; from llm_worker_pool import claim_host_pool; '
+                               'print(claim_host_pool(sys.argv[1]))', lock_path],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, timeout=30)
+    assert other.stdout.strip() == 'False', other.stdout + other.stderr
+    print("✅ Only one process per host owns the LLM worker pool")
+
+if __name__ == "__main__":
+    test_llm_worker_pool()
+    test_one_pool_per_host()
@@ -0,0 +1,67 @@
+"""
+Test script for the in-memory policy store
+Checks that documents are reloaded when the policy version moves or the TTL
+passes, and that failed reloads and version probes keep the last good copy
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from policy_store import PolicyStore
+
+def test_policy_store():
+    print("🧪 Testing policy store")
+    print("=" * 50)
+
+    db = {'version': 1, 'policies': {'shipping_policy': 'Ships in 3 days'},
+          'load_fails': False, 'probe_fails': False, 'loads': 0}
+
+    def loader():
+        if db['load_fails']:
+            raise ConnectionError("MySQL server has gone away")
+        db['loads'] += 1
+        return dict(db['policies'])
+
+    def probe():
+        if db['probe_fails']:
+            raise ConnectionError("MySQL server has gone away")
+        return db['version']
+
+    store = PolicyStore(loader, version_probe=probe, check_seconds=3600, ttl=0.2)
+    store.refresh(force=True)
+    assert store.get('shipping_policy') == 'Ships in 3 days' and db['loads'] == 1
+    assert not store.refresh() and db['loads'] == 1, "same version inside the TTL: no reload"
+    assert store.get('returns_policy') is None and store.get_stats()['misses'] == 1
+    print("✅ Loaded once, served from memory")
+
+    db['policies'] = {'shipping_policy': 'Ships in 2 days'}
+    db['version'] = 2
+    assert store.refresh() and store.get('shipping_policy') == 'Ships in 2 days'
+    assert store.get_stats()['version'] == 2
+    print("✅ A policy version change reloads the documents")
+
+    db['policies'] = {'shipping_policy': 'Ships tomorrow'}
+    time.sleep(0.25)
+    assert store.refresh() and store.get('shipping_policy') == 'Ships tomorrow'
+    assert db['loads'] == 3
+    print("✅ The TTL reloads even without a version change")
+
+    db['load_fails'] = True
+    db['version'] = 3
+    assert not store.refresh()
+    assert store.get('shipping_policy') == 'Ships tomorrow', "failed reload keeps the last copy"
+    db['load_fails'] = False
+    db['policies'] = {'shipping_policy': 'Free shipping'}
+    assert store.refresh() and store.get('shipping_policy') == 'Free shipping', "next refresh retries"
+
+    db['probe_fails'] = True
+    db['policies'] = {'shipping_policy': 'Ships in 5 days'}
+    assert not store.refresh() and store.get('shipping_policy') == 'Free shipping'
+    time.sleep(0.25)
+    assert store.refresh() and store.get('shipping_policy') == 'Ships in 5 days', "TTL still applies without a probe"
+    print(f"✅ Failures keep serving the last good copy: {store.get_stats()}")
+
+if __name__ == "__main__":
+    test_policy_store()
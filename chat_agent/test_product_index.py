@@ -0,0 +1,65 @@
+"""
+Test script for the product vector index
+Checks that syncing to a new catalog adds, re-embeds edited and drops
+removed products, and that dead rows are compacted away
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from product_index import ProductVectorIndex, NUMPY_AVAILABLE
+
+CATALOG = [
+    {'product_id': 1, 'product_name': 'Yellow Floral Sundress', 'product_category': 'dress',
+     'color': 'yellow', 'gender': 'women', 'price': 1299, 'product_description': 'breezy cotton'},
+    {'product_id': 2, 'product_name': 'White Linen Shirt', 'product_category': 'shirt',
+     'color': 'white', 'gender': 'men', 'price': 999, 'product_description': 'lightweight linen'},
+    {'product_id': 3, 'product_name': 'Maroon Silk Saree', 'product_category': 'saree',
+     'color': 'maroon', 'gender': 'women', 'price': 4599, 'product_description': 'festive silk'},
+    {'product_id': 4, 'product_name': 'Grey Fleece Hoodie', 'product_category': 'hoodie',
+     'color': 'grey', 'gender': 'unisex', 'price': 1499, 'product_description': 'warm fleece'},
+]
+
+def test_product_index():
+    print("🧪 Testing product vector index")
+    print("=" * 50)
+    if not NUMPY_AVAILABLE:
+        print("⏭️ numpy not installed, skipping")
+        return
+
+    index = ProductVectorIndex(dim=256, compact_ratio=0.5)
+    index.build(CATALOG)
+    assert len(index) == 4
+    assert index.search('silk saree', k=1)[0]['product_id'] == 3
+    assert index.sync([dict(row) for row in CATALOG]) == {'added': 0, 'changed': 0, 'removed': 0}
+    print("✅ An unchanged catalog syncs without re-embedding")
+
+    # Product 3 is renamed and repriced, product 5 is new
+    edited = [dict(row) for row in CATALOG]
+    edited[2].update(product_name='Emerald Velvet Lehenga', product_category='lehenga',
+                     color='green', price=8999, product_description='bridal velvet')
+    edited.append({'product_id': 5, 'product_name': 'Blue Denim Shorts', 'product_category': 'shorts',
+                   'color': 'blue', 'gender': 'women', 'price': 699, 'product_description': 'summer denim'})
+    assert index.sync(edited) == {'added': 1, 'changed': 1, 'removed': 0}
+    top = index.search('velvet lehenga', k=1)[0]
+    assert top['product_id'] == 3 and top['price'] == 8999, top
+    assert all(hit['product_name'] != 'Maroon Silk Saree' for hit in index.search('silk saree', k=5)), \
+        "the stale vector is no longer searched"
+    print(f"✅ An edited product is re-embedded: {top['product_name']}")
+
+    # Only a price change still refreshes the payload
+    edited[1] = dict(edited[1], price=899)
+    assert index.sync(edited)['changed'] == 1
+    assert index.search('linen shirt', k=1)[0]['price'] == 899
+
+    stats = index.get_stats()
+    assert stats['products'] == 5 and stats['dead_rows'] == 2, stats
+    assert index.sync(edited[:2])['removed'] == 3
+    stats = index.get_stats()
+    assert stats['dead_rows'] == 0 and stats['rows'] == 2 and len(index) == 2, stats
+    assert index.search('white linen shirt', k=1)[0]['product_id'] == 2
+    print(f"✅ Dead rows are compacted by a rebuild: {stats}")
+
+if __name__ == "__main__":
+    test_product_index()
@@ -0,0 +1,88 @@
+"""
+Test script for the search result cache
+Checks canonical keys, cost-bounded LRU eviction, version invalidation and
+that concurrent identical searches share one load
+"""
+import os
+import sys
+import time
+import threading
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from result_cache import SearchResultCache, canonical_key
+
+FIELDS = ('gender', 'category', 'color', 'max_price', 'limit')
+
+def test_result_cache():
+    print("🧪 Testing search result cache")
+    print("=" * 50)
+
+    a = canonical_key({'gender': 'Women', 'category': 'Dresses', 'color': 'Red ', 'max_price': 2000}, FIELDS, limit=10)
+    b = canonical_key({'max_price': 2000.0, 'color': 'red', 'category': 'dresses', 'gender': 'women'}, FIELDS, limit=10)
+    assert a == b, (a, b)
+    assert canonical_key({'category': ['Shirts', 'T-shirts']}, FIELDS) == canonical_key({'category': ['t-shirts', 'shirts']}, FIELDS)
+    assert a != canonical_key({'gender': 'women', 'category': 'dresses', 'color': 'red', 'max_price': 2000}, FIELDS, limit=20)
+    try:
+        canonical_key({'brand': 'x'}, FIELDS)
+        assert False, "unknown filters must not be silently dropped from the key"
+    except ValueError:
+        pass
+    print("✅ Different phrasings of the same filters share a key")
+
+    cache = SearchResultCache(max_cost=10)
+    loads = []
+    def loader(ids):
+        return lambda: loads.append(1) or list(ids)
+
+    assert cache.get_or_load('a', 1, loader([1, 2, 3])) == [1, 2, 3]
+    assert cache.get_or_load('a', 1, loader([9])) == [1, 2, 3] and len(loads) == 1
+    assert cache.get_or_load('empty', 1, loader([])) == []
+    assert cache.get_or_load('empty', 1, loader([5])) == [], "empty results are cached too"
+    cache.get_or_load('b', 1, loader([4, 5, 6]))
+    cache.get('a', 1)
+    cache.get_or_load('c', 1, loader([7, 8, 9]))
+    assert cache.get('b', 1) is None and cache.get('a', 1) == [1, 2, 3], "least recently used entry goes first"
+    assert cache.get_stats()['cost'] <= 10
+    print(f"✅ Cost-bounded LRU: {cache.get_stats()}")
+
+    assert cache.get('a', 2) is None and len(cache) == 0, "a new catalog version drops every entry"
+    assert cache.get_or_load('failed', 2, lambda: None) is None and cache.get('failed', 2) is None
+    print("✅ Version bump invalidates; failed loads are not cached")
+
+    cache = SearchResultCache()
+    calls = []
+    started = threading.Event()
+    def slow_load():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return [42]
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('k', 1, slow_load))) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and results == [[42]] * 20, (len(calls), results)
+    print(f"✅ 20 concurrent searches, 1 load: {cache.get_stats()}")
+
+    def failing_load():
+        time.sleep(0.1)
+        raise RuntimeError("db down")
+    errors = []
+    def search():
+        try:
+            cache.get_or_load('err', 1, failing_load)
+        except RuntimeError as e:
+            errors.append(e)
+    threads = [threading.Thread(target=search) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 5 and cache.get('err', 1) is None
+    print("✅ A failed load reaches every waiter and is retried next time")
+
+if __name__ == "__main__":
+    test_result_cache()
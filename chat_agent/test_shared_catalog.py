@@ -0,0 +1,102 @@
+"""
+Test script for the shared catalog snapshot
+Builds snapshots in a temp directory and checks lookups, the single-build
+guarantee, cross-process reads and the versioned swap
+"""
+import os
+import sys
+import shutil
+import tempfile
+import multiprocessing
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from shared_catalog import SharedCatalog, FACET_COLUMNS
+
+def make_rows(count, offset=0):
+    return [{
+        'product_id': offset + i,
+        'price': 499.0 + i,
+        'stock': i % 5,
+        'product_category': 'Dresses' if i % 2 else 'Hoodies',
+        'gender': 'Women' if i % 2 else 'Men',
+        'color': None if i % 7 == 0 else 'Red',
+        'size': 'M',
+        'product_name': f'Product {offset + i} – ₹',
+        'product_image': f'https://example.com/{offset + i}.jpg',
+        'product_description': None
+    } for i in range(count)]
+
+def read_in_child(directory, queue):
+    snapshot = SharedCatalog(directory, check_seconds=0).current()
+    queue.put((snapshot.version, snapshot.get(42)['product_name']))
+
+def test_shared_catalog():
+    print("🧪 Testing shared catalog snapshot")
+    print("=" * 50)
+    directory = tempfile.mkdtemp()
+    try:
+        catalog = SharedCatalog(directory, check_seconds=0)
+        builds = []
+
+        def loader():
+            builds.append(1)
+            return list(reversed(make_rows(1000)))
+
+        snapshot = catalog.ensure(1, loader)
+        assert len(snapshot) == 1000
+        assert snapshot.get(42)['product_name'] == 'Product 42 – ₹'
+        assert snapshot.get(42)['product_description'] == ''
+        assert snapshot.get(5000) is None
+        assert snapshot.column('product_id')[0] == 0, "rows are sorted by product_id"
+        assert next(snapshot.rows(FACET_COLUMNS))['color'] is None
+        print(f"✅ Built v1: {len(snapshot)} products, {os.path.getsize(snapshot.path)} bytes")
+
+        catalog.ensure(1, loader)
+        assert len(builds) == 1, "an existing version is never rebuilt"
+        print("✅ Second ensure() for the same version reuses the snapshot")
+
+        queue = multiprocessing.Queue()
+        child = multiprocessing.Process(target=read_in_child, args=(directory, queue))
+        child.start()
+        assert queue.get(timeout=30) == (1, 'Product 42 – ₹')
+        child.join()
+        print("✅ Another process maps the same snapshot")
+
+        reader = SharedCatalog(directory, check_seconds=0)
+        assert reader.current().version == 1
+        catalog.ensure(2, lambda: make_rows(10, offset=100))
+        swapped = reader.current()
+        assert swapped.version == 2 and len(swapped) == 10
+        assert snapshot.get(42) is not None, "old mapping stays readable after the swap"
+        print("✅ Readers swap to v2 without restarting")
+
+        for version in (3, 4):
+            catalog.ensure(version, lambda: make_rows(3))
+        files = sorted(f for f in os.listdir(directory) if f.endswith('.snap'))
+        assert files == ['catalog.3.snap', 'catalog.4.snap'], files
+        print(f"✅ Old snapshots pruned: {files}")
+
+        def failing_loader():
+            raise ConnectionError("database unavailable")
+
+        try:
+            catalog.ensure(5, failing_loader)
+            raise AssertionError("a failed load must raise")
+        except ConnectionError:
+            pass
+        assert reader.current().version == 4 and len(reader.current()) == 3, "nothing was published"
+
+        # clothing writes don't bump the version - an old snapshot is rebuilt anyway
+        aging = SharedCatalog(directory, check_seconds=0, max_age=60)
+        assert aging.ensure(4, failing_loader).version == 4, "a fresh snapshot is reused"
+        aging.max_age = 0
+        rebuilt = aging.ensure(4, lambda: make_rows(7))
+        assert rebuilt.version == 4 and len(rebuilt) == 7
+        assert len(reader.current()) == 7, "readers reopen a same-version rebuild"
+        print("✅ A failed load publishes nothing; an expired snapshot is rebuilt")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_shared_catalog()